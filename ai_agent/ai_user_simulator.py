@@ -94,6 +94,31 @@ DEFAULT_PERSONAS = {
             "I want order food but not understand how.",
             "Last time eat here very good. What you recommend today?"
         ]
+    },
+    "restaurant_manager": {
+        "description": "A restaurant manager checking orders, sales and menu performance, who asks short, data-focused questions.",
+        "knowledge_level": "high",
+        "patience": "moderate",
+        "verbosity": "low",
+        "formality": "direct",
+        "examples": [
+            "Who placed orders on February 21st?",
+            "What were our top selling items last week?",
+            "What's our current active menu?",
+            "How are our appetizers performing?",
+            "Compare dinner sales this week versus last week",
+            "What were our busiest days last month?",
+            "How many orders did we complete yesterday?",
+            "What is the price of the burger?"
+        ],
+        "followups": [
+            "Can you tell me their order details?",
+            "Break it down by category",
+            "What about last week?",
+            "Who were the top customers?",
+            "How does that compare to last month?",
+            "Which items sold the most?"
+        ]
     }
 }
 
@@ -291,4 +316,34 @@ Respond with ONLY the customer's follow-up query, nothing else.
                     return text.replace(f" {original} ", f" {replacement} ", 1)
         
         # If no error was introduced, return the original text
-        return text 
\ No newline at end of file
+        return text 
+
+
+class ScriptedUserSimulator:
+    """
+    Offline user simulator drawing turns from a persona's example queries.
+    
+    Has the same generate_initial_query/generate_followup interface as
+    AIUserSimulator, without any API calls, so many of them can run at once
+    (e.g. for load tests). Seed it for reproducible conversations.
+    """
+    
+    def __init__(self, persona: str = "restaurant_manager", seed: Optional[int] = None):
+        """Initialize the simulator with a persona and random seed."""
+        self.persona = persona
+        self.persona_data = DEFAULT_PERSONAS.get(persona, DEFAULT_PERSONAS["restaurant_manager"])
+        self.conversation_history = []
+        self._random = random.Random(seed)
+        
+    def generate_initial_query(self) -> str:
+        """Pick a new question from the persona's examples."""
+        query = self._random.choice(self.persona_data["examples"])
+        self.conversation_history.append({"role": "user", "content": query})
+        return query
+        
+    def generate_followup(self, system_response: str) -> str:
+        """Pick a follow-up question to the system's response."""
+        self.conversation_history.append({"role": "assistant", "content": system_response})
+        query = self._random.choice(self.persona_data.get("followups") or ["Can you tell me more about that?"])
+        self.conversation_history.append({"role": "user", "content": query})
+        return query
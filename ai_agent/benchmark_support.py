@@ -0,0 +1,455 @@
+"""
+Deterministic local stand-ins for the services OrchestratorService calls.
+
+Shared by the latency benchmark (tests/performance) and the load generator.
+
+The fakes replace the classification LLM, the Gemini SQL generator, the
+OpenAI response generator and response validation (ElevenLabs is replaced
+by the TTS pipeline's own FakeTTSBackend). Each one sleeps for a
+configurable latency with seeded jitter, so a benchmark measures the
+orchestrator's own overhead and overlap, not network noise.
+SQL runs for real against an in-memory SQLite database with synthetic
+menu and order data.
+"""
+import itertools
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest.mock import patch
+
+from services.orchestrator import orchestrator as orchestrator_module
+from services.orchestrator.orchestrator import OrchestratorService
+from services.validation import sql_validation_service
+
+# Simulated latencies in seconds, roughly what the real backends take
+DEFAULT_LATENCIES = {
+    "classification": 0.35,
+    "rules": 0.01,
+    "examples": 0.05,
+    "sql_generation": 0.8,
+    "sql_execution": 0.01,
+    "response_first_chunk": 0.4,
+    "response_chunk": 0.02,
+    "tts": 0.25,
+    "validation": 0.05,
+}
+
+# Data set size and the day most scenarios ask about
+DATA_START = date(2025, 1, 1)
+DATA_DAYS = 90
+FEATURED_DAY = date(2025, 2, 21)
+
+_MONTHS = {name: number for number, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], start=1)}
+
+
+class LatencyModel:
+    """Seeded latencies with +/- jitter, safe to share between threads."""
+
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, jitter: float = 0.2, seed: int = 0):
+        """
+        Initialize the latency model.
+
+        Args:
+            latencies: Base latency per operation, merged over DEFAULT_LATENCIES
+            jitter: Maximum relative deviation from the base latency
+            seed: Random seed
+        """
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get(self, operation: str) -> float:
+        """Get the latency of one call."""
+        base = self.latencies.get(operation, 0.0)
+        if not base or not self.jitter:
+            return base
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        return base * factor
+
+    def wait(self, operation: str) -> None:
+        """Sleep for the latency of one call."""
+        delay = self.get(operation)
+        if delay:
+            time.sleep(delay)
+
+
+class SyntheticDatabase:
+    """In-memory SQLite database with menu, customer and order data."""
+
+    SCHEMA = """
+        CREATE TABLE locations (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT, location_id INTEGER);
+        CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, price REAL, category_id INTEGER, disabled INTEGER);
+        CREATE TABLE users (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, location_id INTEGER,
+                             status INTEGER, total REAL, updated_at TEXT);
+        CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, item_id INTEGER, quantity INTEGER);
+        CREATE INDEX orders_updated_at ON orders (updated_at);
+        CREATE INDEX order_items_order_id ON order_items (order_id);
+    """
+
+    MENU = {
+        "Appetizers": [("Wings", 12.5), ("Nachos", 10.0), ("Mozzarella Sticks", 8.5), ("Calamari", 13.0)],
+        "Entrees": [("Burger", 14.0), ("Club Sandwich", 12.0), ("Grilled Salmon", 22.0), ("Steak Frites", 28.0)],
+        "Sides": [("French Fries", 4.5), ("Onion Rings", 5.0), ("Side Salad", 6.0)],
+        "Drinks": [("Iced Tea", 3.0), ("Lemonade", 3.5), ("Draft Beer", 6.5), ("House Wine", 9.0)],
+        "Desserts": [("Brownie Sundae", 8.0), ("Key Lime Pie", 7.5)],
+    }
+    FIRST_NAMES = ["Brandon", "Alice", "Carlos", "Dana", "Evan", "Fiona", "Greg", "Hana", "Ivan", "Julia"]
+    LAST_NAMES = ["Devers", "Johnson", "Smith", "Lee", "Garcia", "Brown", "Nguyen", "Patel"]
+
+    def __init__(self, orders_per_day: int = 40, seed: int = 0):
+        """
+        Create and fill the database.
+
+        Args:
+            orders_per_day: Average number of orders per day
+            seed: Random seed for the data
+        """
+        # Named shared-cache database, so every thread can open its own connection
+        self.uri = f"file:benchmark_{uuid.uuid4().hex}_{seed}?mode=memory&cache=shared"
+        self._keeper = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        self._local = threading.local()
+        self._fill(orders_per_day, random.Random(seed))
+
+    def _fill(self, orders_per_day: int, rng: random.Random) -> None:
+        """Insert the synthetic data."""
+        db = self._keeper
+        db.executescript(self.SCHEMA)
+        db.execute("INSERT INTO locations VALUES (62, 'Main Street')")
+
+        item_ids = []
+        prices = {}
+        item_id = itertools.count(1)
+        for category_id, (category, items) in enumerate(self.MENU.items(), start=1):
+            db.execute("INSERT INTO categories VALUES (?, ?, 62)", (category_id, category))
+            for name, price in items:
+                current = next(item_id)
+                item_ids.append(current)
+                prices[current] = price
+                db.execute("INSERT INTO items VALUES (?, ?, ?, ?, ?)",
+                           (current, name, price, category_id, int(rng.random() < 0.1)))
+
+        customers = [(i, first, last) for i, (first, last) in
+                     enumerate(itertools.product(self.FIRST_NAMES, self.LAST_NAMES), start=1)]
+        db.executemany("INSERT INTO users VALUES (?, ?, ?)", customers)
+
+        order_id = itertools.count(1000)
+        line_id = itertools.count(1)
+        for day in range(DATA_DAYS):
+            current_day = DATA_START + timedelta(days=day)
+            for _ in range(max(1, int(rng.gauss(orders_per_day, orders_per_day / 5)))):
+                current = next(order_id)
+                # The featured customer orders on the featured day
+                customer = 1 if current_day == FEATURED_DAY and rng.random() < 0.2 else rng.choice(customers)[0]
+                status = 7 if rng.random() < 0.9 else 6
+                placed = datetime.combine(current_day, datetime.min.time()) + timedelta(minutes=rng.randint(600, 1320))
+                lines = [(next(line_id), current, rng.choice(item_ids), rng.randint(1, 3))
+                         for _ in range(rng.randint(1, 5))]
+                total = sum(quantity * prices[item] for _, _, item, quantity in lines)
+                db.execute("INSERT INTO orders VALUES (?, ?, 62, ?, ?, ?)",
+                           (current, customer, status, round(total, 2), placed.isoformat(sep=" ")))
+                db.executemany("INSERT INTO order_items VALUES (?, ?, ?, ?)", lines)
+        db.commit()
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        """Run a query on this thread's connection and return rows as dicts."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return [dict(row) for row in connection.execute(sql).fetchall()]
+
+
+def _date_filter(query: str) -> str:
+    """Turn a date named in the query into a SQLite condition on orders.updated_at."""
+    match = re.search(r"\b(" + "|".join(_MONTHS) + r")\s+(\d{1,2})", query.lower())
+    if match:
+        day = date(FEATURED_DAY.year, _MONTHS[match.group(1)], int(match.group(2)))
+        return f"date(o.updated_at) = '{day.isoformat()}'"
+    last_day = DATA_START + timedelta(days=DATA_DAYS - 1)
+    if "last week" in query.lower() or "this week" in query.lower():
+        return f"date(o.updated_at) > '{(last_day - timedelta(days=7)).isoformat()}'"
+    return f"date(o.updated_at) > '{(last_day - timedelta(days=30)).isoformat()}'"
+
+
+# SQLite queries per category; {date_filter} restricts orders to the asked period
+SQL_TEMPLATES = {
+    "order_history": """
+        SELECT o.id AS order_id, u.first_name || ' ' || u.last_name AS customer_name,
+               i.name AS item_name, oi.quantity, i.price, o.total AS order_total, o.updated_at
+        FROM orders o
+        JOIN users u ON u.id = o.customer_id
+        JOIN order_items oi ON oi.order_id = o.id
+        JOIN items i ON i.id = oi.item_id
+        WHERE o.location_id = 62 AND o.status = 7 AND {date_filter}
+        ORDER BY o.id""",
+    "menu_inquiry": """
+        SELECT c.name AS category, i.name AS item_name, i.price
+        FROM items i JOIN categories c ON c.id = i.category_id
+        WHERE c.location_id = 62 AND i.disabled = 0
+        ORDER BY c.name, i.name""",
+    "popular_items": """
+        SELECT i.name AS item_name, SUM(oi.quantity) AS quantity, SUM(oi.quantity * i.price) AS revenue
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        JOIN items i ON i.id = oi.item_id
+        WHERE o.location_id = 62 AND o.status = 7 AND {date_filter}
+        GROUP BY i.name ORDER BY quantity DESC LIMIT 10""",
+    "trend_analysis": """
+        SELECT date(o.updated_at) AS day, c.name AS category, COUNT(DISTINCT o.id) AS order_count,
+               SUM(oi.quantity * i.price) AS revenue
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        JOIN items i ON i.id = oi.item_id
+        JOIN categories c ON c.id = i.category_id
+        WHERE o.location_id = 62 AND o.status = 7 AND {date_filter}
+        GROUP BY day, c.name ORDER BY day, c.name""",
+}
+
+# Keywords the fake classifier looks for, checked in order
+CATEGORY_KEYWORDS = [
+    ("popular_items", ["popular", "best sell", "top", "busiest", "most ordered"]),
+    ("trend_analysis", ["trend", "compare", "perform", "sales", "revenue", "break it down", "versus"]),
+    ("menu_inquiry", ["menu", "price", "available", "appetizer", "dessert"]),
+    ("order_history", ["order", "placed", "customer", "who "]),
+]
+
+
+class FakeClassifier:
+    """Keyword classifier with the latency of an LLM call."""
+
+    categories = [category for category, _ in CATEGORY_KEYWORDS] + ["ambiguous"]
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def classify(self, query: str) -> Dict[str, Any]:
+        self.latency.wait("classification")
+        lowered = query.lower()
+        category = next(
+            (category for category, words in CATEGORY_KEYWORDS if any(word in lowered for word in words)),
+            "ambiguous"
+        )
+        return {
+            "category": category,
+            "confidence": 0.9,
+            "skip_database": False,
+            "time_period_clause": None,
+            "is_followup": lowered.startswith(("can you", "what about", "break it", "who placed those"))
+        }
+
+    def health_check(self) -> bool:
+        return True
+
+
+class FakeRules:
+    """Rules service returning empty rules after a short delay."""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def get_rules(self, category: str, query: str = None) -> Dict[str, Any]:
+        self.latency.wait("rules")
+        return {"response_rules": {}}
+
+    def health_check(self) -> bool:
+        return True
+
+
+class FakeSQLGenerator:
+    """Gemini stand-in returning a SQLite query for the category."""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def prefetch_examples(self, category: str) -> List[Dict[str, Any]]:
+        self.latency.wait("examples")
+        return []
+
+    def generate(self, query: str, category: str, rules: Dict[str, Any],
+                 context: Dict[str, Any] = None) -> Dict[str, Any]:
+        self.latency.wait("sql_generation")
+        template = SQL_TEMPLATES.get(category, SQL_TEMPLATES["order_history"])
+        return {"sql": template.format(date_filter=_date_filter(query)).strip(), "success": True}
+
+    def health_check(self) -> bool:
+        return True
+
+
+class FakeSQLExecutor:
+    """Executor running queries on the synthetic SQLite database."""
+
+    def __init__(self, database: SyntheticDatabase, latency: LatencyModel):
+        self.database = database
+        self.latency = latency
+
+    def execute(self, sql: str) -> Dict[str, Any]:
+        # Network round trip to the database server
+        self.latency.wait("sql_execution")
+        try:
+            rows = self.database.query(sql)
+        except sqlite3.Error as e:
+            return {"success": False, "error": str(e), "results": []}
+        return {"success": True, "results": rows, "row_count": len(rows)}
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        return {}
+
+    def health_check(self) -> bool:
+        return True
+
+
+class FakeResponseGenerator:
+    """OpenAI stand-in streaming a summary of the results word by word."""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    @staticmethod
+    def _compose(query: str, category: str, results: Optional[List[Dict[str, Any]]]) -> str:
+        if not results:
+            return "I could not find any data for that. Could you tell me a little more about what you need?"
+        sentences = [f"I found {len(results)} results for your question."]
+        for row in results[:3]:
+            sentences.append(", ".join(f"{key} {value}" for key, value in list(row.items())[:3]) + ".")
+        sentences.append("Let me know if you want more detail.")
+        return " ".join(sentences)
+
+    def generate(self, query: str, category: str, rules: Dict[str, Any],
+                 results: Optional[List[Dict[str, Any]]], context: Dict[str, Any],
+                 on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        text = self._compose(query, category, results)
+        self.latency.wait("response_first_chunk")
+        if on_chunk is not None:
+            words = text.split(" ")
+            for index, word in enumerate(words):
+                on_chunk(word + (" " if index < len(words) - 1 else ""))
+                self.latency.wait("response_chunk")
+        else:
+            self.latency.wait("response_chunk")
+        return {"response": text, "response_model": "benchmark-fake"}
+
+    def set_persona(self, persona: Any) -> None:
+        pass
+
+    def health_check(self) -> bool:
+        return True
+
+
+class FakeValidator:
+    """Response validation stand-in that always passes."""
+
+    should_block_responses = False
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def validate_response(self, sql_query: str, sql_results: List[Dict[str, Any]],
+                          response_text: str) -> Dict[str, Any]:
+        self.latency.wait("validation")
+        return {"validation_status": True, "should_block_response": False, "detailed_feedback": "ok"}
+
+    def health_check(self) -> bool:
+        return True
+
+
+class BenchmarkServices:
+    """One set of fakes sharing a latency model and a synthetic database."""
+
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, jitter: float = 0.2,
+                 seed: int = 0, orders_per_day: int = 40):
+        """
+        Create the fakes.
+
+        Args:
+            latencies: Latency overrides, see DEFAULT_LATENCIES
+            jitter: Maximum relative deviation of each latency
+            seed: Random seed for latencies and data
+            orders_per_day: Average number of synthetic orders per day
+        """
+        self.latency = LatencyModel(latencies, jitter, seed)
+        self.database = SyntheticDatabase(orders_per_day, seed)
+        self.classifier = FakeClassifier(self.latency)
+        self.rules = FakeRules(self.latency)
+        self.sql_generator = FakeSQLGenerator(self.latency)
+        self.sql_executor = FakeSQLExecutor(self.database, self.latency)
+        self.response_generator = FakeResponseGenerator(self.latency)
+        self.validator = FakeValidator(self.latency)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Get a percentile with linear interpolation between the closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize the samples of one stage."""
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples) if samples else 0.0,
+        "p50": percentile(samples, 0.50),
+        "p95": percentile(samples, 0.95),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples) if samples else 0.0,
+    }
+
+
+def create_orchestrator(services: BenchmarkServices, config: Optional[Dict[str, Any]] = None) -> OrchestratorService:
+    """
+    Create an OrchestratorService wired to the benchmark stand-ins.
+
+    Args:
+        services: The stand-ins to use
+        config: Extra configuration merged over the benchmark defaults
+
+    Returns:
+        The orchestrator
+    """
+    latencies = services.latency.latencies
+    benchmark_config = {
+        "services": {
+            "response": {"max_verbal_sentences": 2},
+            "tts": {"backend": "fake", "fake_latency": latencies["tts"], "cache_enabled": False},
+            "validation": {"sql_validation": {"enabled": True, "mode": "sync"}},
+        },
+        "classification": {"tiers": {"enabled": False}},
+        "context_manager": {"sweep_interval_seconds": 0},
+    }
+    for section, values in (config or {}).items():
+        if isinstance(values, dict):
+            benchmark_config.setdefault(section, {}).update(values)
+        else:
+            benchmark_config[section] = values
+
+    # The orchestrator builds its services through registry factories that
+    # look these names up when called, so they only need replacing while it starts
+    sql_generator_factory = type("BenchmarkSQLGeneratorFactory", (), {
+        "create_sql_generator": staticmethod(lambda cfg: services.sql_generator)
+    })
+    with patch.multiple(
+        orchestrator_module,
+        ClassificationService=lambda cfg: services.classifier,
+        RulesService=lambda cfg: services.rules,
+        SQLGeneratorFactory=sql_generator_factory,
+        SQLExecutor=lambda cfg: services.sql_executor,
+        ResponseGenerator=lambda cfg: services.response_generator,
+    ), patch.object(sql_validation_service, "SQLValidationService", lambda cfg: services.validator):
+        return OrchestratorService(benchmark_config)
@@ -0,0 +1,389 @@
+"""
+Load generator driving many concurrent HeadlessStreamlit sessions.
+
+Each simulated manager gets its own HeadlessStreamlit session and user
+simulator, and they all send queries to one shared OrchestratorService, the
+way app sessions share one server. Sessions pause for a think time between
+turns and ask a follow-up to the last answer with a set probability.
+
+The report covers:
+- throughput (completed queries per second over the run);
+- latency percentiles for whole queries and for each orchestrator stage;
+- process memory at the start, peak and end of the run;
+- hit rates of the classification, response and TTS caches during the run.
+
+It is meant for sizing workers (application.pipeline_workers, validation
+workers) before a new location goes live.
+
+By default the orchestrator runs on the local stand-ins from
+ai_agent/benchmark_support, so only orchestrator overhead and
+concurrency are measured. `--backend real` uses config/config.yaml and the
+real services.
+
+Usage:
+    python -m ai_agent.load_generator --sessions 200 --turns 5 --think-time 2 8
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai_agent.ai_user_simulator import ScriptedUserSimulator
+from ai_agent.benchmark_support import BenchmarkServices, create_orchestrator, summarize
+from ai_agent.headless_streamlit import HeadlessStreamlit
+
+logger = logging.getLogger(__name__)
+
+
+class MemorySampler:
+    """Samples the resident memory of this process on a background thread."""
+
+    def __init__(self, interval: float = 0.5):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: List[Tuple[float, float]] = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = 0.0
+
+    @staticmethod
+    def rss_mb() -> float:
+        """Get the current resident set size in MB."""
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, IndexError):
+            # No procfs (e.g. macOS): fall back to the peak, reported in bytes there
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append((time.perf_counter() - self._started, self.rss_mb()))
+
+    def start(self) -> None:
+        """Take the first sample and start sampling."""
+        self._started = time.perf_counter()
+        self.samples = [(0.0, self.rss_mb())]
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        Stop sampling.
+
+        Returns:
+            Memory at the start, end and peak of the run, and the growth
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.samples.append((time.perf_counter() - self._started, self.rss_mb()))
+        values = [value for _, value in self.samples]
+        return {
+            "start_mb": values[0],
+            "end_mb": values[-1],
+            "peak_mb": max(values),
+            "growth_mb": values[-1] - values[0],
+            "samples": len(values),
+        }
+
+
+def _hit_rate(stats: Dict[str, int]) -> Dict[str, Any]:
+    """Add a hit rate to a cache stats dict with hits/misses counters."""
+    hits = stats.get("hits", 0) + stats.get("similar_hits", 0)
+    lookups = hits + stats.get("misses", 0)
+    return {**stats, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+def collect_cache_stats(orchestrator) -> Dict[str, Dict[str, int]]:
+    """
+    Get the counters of the orchestrator's caches that exist in this setup.
+
+    Args:
+        orchestrator: The OrchestratorService
+
+    Returns:
+        Counters per cache (copies, so they can be diffed later)
+    """
+    stats = {}
+    classifier = orchestrator.classifier
+    llm_classifier = getattr(classifier, "llm_classifier", None)
+    if llm_classifier is not None and isinstance(getattr(classifier, "stats", None), dict):
+        stats["classification_tiers"] = dict(classifier.stats)
+    classification_cache = getattr(llm_classifier or classifier, "_classification_cache", None)
+    if isinstance(getattr(classification_cache, "stats", None), dict):
+        stats["classification_cache"] = dict(classification_cache.stats)
+    response_cache = getattr(orchestrator.response_generator, "cache_stats", None)
+    if isinstance(response_cache, dict):
+        stats["response_cache"] = dict(response_cache)
+    tts_cache = getattr(getattr(orchestrator, "tts_pipeline", None), "cache", None)
+    if isinstance(getattr(tts_cache, "stats", None), dict):
+        stats["tts_cache"] = dict(tts_cache.stats)
+    return stats
+
+
+def _cache_report(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """Diff cache counters over the run and add hit rates."""
+    report = {}
+    for name, counters in after.items():
+        delta = {key: value - before.get(name, {}).get(key, 0) for key, value in counters.items()}
+        if name == "classification_tiers":
+            total = sum(delta.values())
+            # Queries answered without the LLM count as hits
+            report[name] = {**delta, "local_rate": (total - delta.get("llm", 0)) / total if total else 0.0}
+        else:
+            report[name] = _hit_rate(delta)
+    return report
+
+
+class LoadGenerator:
+    """
+    Runs simulated manager sessions concurrently against one orchestrator.
+
+    Example:
+        generator = LoadGenerator(orchestrator, sessions=200, turns=5, think_time=(2.0, 8.0))
+        report = generator.run()
+    """
+
+    def __init__(self, orchestrator, sessions: int = 100, turns: int = 5,
+                 think_time: Tuple[float, float] = (2.0, 8.0), followup_ratio: float = 0.4,
+                 ramp_up: float = 10.0, enable_verbal: bool = False, seed: int = 0,
+                 simulator_factory: Optional[Callable[[int], Any]] = None):
+        """
+        Initialize the load generator.
+
+        Args:
+            orchestrator: Shared OrchestratorService
+            sessions: Number of simulated manager sessions
+            turns: Queries per session
+            think_time: Range of seconds a user waits between an answer and the next query
+            followup_ratio: Probability that a turn is a follow-up to the previous answer
+            ramp_up: Seconds over which session starts are spread
+            enable_verbal: Request verbal (TTS) responses
+            seed: Random seed for the simulated users
+            simulator_factory: Creates the user simulator of a session from its
+                number (default: ScriptedUserSimulator); anything with
+                generate_initial_query() and generate_followup(response) works,
+                e.g. AIUserSimulator
+        """
+        self.orchestrator = orchestrator
+        self.sessions = sessions
+        self.turns = turns
+        self.think_time = think_time
+        self.followup_ratio = followup_ratio
+        self.ramp_up = ramp_up
+        self.enable_verbal = enable_verbal
+        self.seed = seed
+        self.simulator_factory = simulator_factory or (
+            lambda number: ScriptedUserSimulator("restaurant_manager", seed=seed * 100003 + number)
+        )
+        self._root_session = HeadlessStreamlit()
+        self._samples: List[Dict[str, Any]] = []
+        self._samples_lock = threading.Lock()
+
+    def _run_session(self, number: int) -> None:
+        """Run one simulated manager's conversation."""
+        session = self._root_session.create_concurrent_session()
+        simulator = self.simulator_factory(number)
+        pacing = random.Random(self.seed * 7919 + number)
+
+        # Spread session starts over the ramp-up period
+        if self.ramp_up and self.sessions > 1:
+            time.sleep(self.ramp_up * number / self.sessions)
+
+        response_text = None
+        for turn in range(self.turns):
+            followup = response_text is not None and pacing.random() < self.followup_ratio
+            query = simulator.generate_followup(response_text) if followup else simulator.generate_initial_query()
+            session.set_input(query)
+
+            started = time.perf_counter()
+            error = None
+            try:
+                result = self.orchestrator.process_query(
+                    query, {"session_id": session.session_id, "enable_verbal": self.enable_verbal}
+                )
+                error = result.get("error")
+            except Exception as e:
+                result, error = {}, str(e)
+            latency = time.perf_counter() - started
+
+            response_text = result.get("response") or ""
+            session.capture_response(response_text)
+            with self._samples_lock:
+                self._samples.append({
+                    "session": number,
+                    "turn": turn,
+                    "followup": followup,
+                    "latency": latency,
+                    "finished": time.perf_counter(),
+                    "timers": {k: v for k, v in (result.get("timers") or {}).items()
+                               if k != "total_start" and isinstance(v, (int, float))},
+                    "error": error,
+                })
+
+            if turn < self.turns - 1 and self.think_time[1] > 0:
+                time.sleep(pacing.uniform(*self.think_time))
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run all sessions to completion.
+
+        Returns:
+            The load test report
+        """
+        memory = MemorySampler()
+        caches_before = collect_cache_stats(self.orchestrator)
+        self._samples = []
+
+        memory.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.sessions, thread_name_prefix="load-session") as pool:
+            for future in [pool.submit(self._run_session, number) for number in range(self.sessions)]:
+                future.result()
+        duration = time.perf_counter() - started
+        memory_report = memory.stop()
+
+        completed = [sample for sample in self._samples if not sample["error"]]
+        stages: Dict[str, List[float]] = {}
+        for sample in completed:
+            for name, value in sample["timers"].items():
+                stages.setdefault(name, []).append(value)
+
+        # Throughput once every session is running, unaffected by ramp-up and drain
+        steady = [s for s in completed if self.ramp_up <= s["finished"] - started <= duration - self.ramp_up]
+        steady_window = duration - 2 * self.ramp_up
+
+        return {
+            "created_at": datetime.now().isoformat(),
+            "settings": {
+                "sessions": self.sessions,
+                "turns": self.turns,
+                "think_time": list(self.think_time),
+                "followup_ratio": self.followup_ratio,
+                "ramp_up": self.ramp_up,
+                "enable_verbal": self.enable_verbal,
+                "seed": self.seed,
+                "pipeline_workers": self.orchestrator.config.get("application", {}).get("pipeline_workers", 8),
+            },
+            "duration": duration,
+            "queries": len(self._samples),
+            "errors": len(self._samples) - len(completed),
+            "followups": sum(1 for sample in self._samples if sample["followup"]),
+            "throughput_qps": len(completed) / duration if duration else 0.0,
+            "steady_throughput_qps": len(steady) / steady_window if steady_window > 0 else None,
+            "latency": summarize([sample["latency"] for sample in completed]),
+            "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+            "memory": memory_report,
+            "caches": _cache_report(caches_before, collect_cache_stats(self.orchestrator)),
+        }
+
+
+def create_load_orchestrator(backend: str = "fake", pipeline_workers: int = 8,
+                             latencies: Optional[Dict[str, float]] = None, seed: int = 0):
+    """
+    Create the shared orchestrator for a load test.
+
+    Args:
+        backend: "fake" for the benchmark stand-ins, "real" for config/config.yaml
+        pipeline_workers: Size of the orchestrator's stage worker pool
+        latencies: Latency overrides for the stand-ins
+        seed: Random seed for the stand-ins
+
+    Returns:
+        The orchestrator
+    """
+    if backend == "real":
+        from frontend import load_config
+        from services.orchestrator.orchestrator import OrchestratorService
+        config = load_config()
+        config.setdefault("application", {})["pipeline_workers"] = pipeline_workers
+        return OrchestratorService(config)
+
+    services = BenchmarkServices(latencies, seed=seed)
+    return create_orchestrator(services, {
+        "application": {"pipeline_workers": pipeline_workers},
+        # Local classification tiers and the TTS audio cache, so their hit rates show up
+        "classification": {"tiers": {"enabled": True}},
+        "services": {"tts": {
+            "backend": "fake",
+            "fake_latency": services.latency.latencies["tts"],
+            "cache_enabled": True,
+            "cache_dir": tempfile.mkdtemp(prefix="load_tts_cache_"),
+        }},
+    })
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format the headline numbers of a report."""
+    latency = report["latency"]
+    memory = report["memory"]
+    lines = [
+        f"{report['queries']} queries from {report['settings']['sessions']} sessions in {report['duration']:.1f}s "
+        f"({report['errors']} errors, {report['followups']} follow-ups)",
+        f"throughput: {report['throughput_qps']:.2f} queries/s"
+        + (f" ({report['steady_throughput_qps']:.2f} at steady state)" if report["steady_throughput_qps"] else ""),
+        f"latency ms: p50 {latency['p50'] * 1000:.0f}, p95 {latency['p95'] * 1000:.0f}, "
+        f"p99 {latency['p99'] * 1000:.0f}, max {latency['max'] * 1000:.0f}",
+        f"memory MB: start {memory['start_mb']:.1f}, peak {memory['peak_mb']:.1f}, "
+        f"end {memory['end_mb']:.1f} (growth {memory['growth_mb']:+.1f})",
+    ]
+    for name, stats in report["caches"].items():
+        rate = stats.get("hit_rate", stats.get("local_rate", 0.0))
+        lines.append(f"{name}: {rate:.0%} " + ("answered locally" if "local_rate" in stats else "hit rate"))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent manager session load test")
+    parser.add_argument("--sessions", type=int, default=100, help="Concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Queries per session")
+    parser.add_argument("--think-time", type=float, nargs=2, default=[2.0, 8.0], metavar=("MIN", "MAX"),
+                        help="Seconds between an answer and the next query")
+    parser.add_argument("--followup-ratio", type=float, default=0.4, help="Share of turns that are follow-ups")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which sessions start")
+    parser.add_argument("--pipeline-workers", type=int, default=8, help="Orchestrator stage workers")
+    parser.add_argument("--backend", choices=["fake", "real"], default="fake", help="Services to run against")
+    parser.add_argument("--verbal", action="store_true", help="Request TTS for every response")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    orchestrator = create_load_orchestrator(args.backend, args.pipeline_workers, seed=args.seed)
+    generator = LoadGenerator(
+        orchestrator,
+        sessions=args.sessions,
+        turns=args.turns,
+        think_time=tuple(args.think_time),
+        followup_ratio=args.followup_ratio,
+        ramp_up=args.ramp_up,
+        enable_verbal=args.verbal,
+        seed=args.seed
+    )
+    report = generator.run()
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -48,6 +48,11 @@ def load_config() -> Dict[str, Any]:
     
     return config
 
+@st.cache_resource
+def get_orchestrator(_config: Dict[str, Any]) -> OrchestratorService:
+    """Create the orchestrator shared by all browser sessions of this server."""
+    return OrchestratorService(_config)
+
 def run_app():
     """Run the Streamlit application."""
     st.set_page_config(
@@ -62,9 +67,10 @@ def run_app():
     # Initialize session state
     SessionManager.initialize_session()
     
-    # Initialize the orchestrator if not already in session state
+    # One orchestrator serves every browser session; each keeps its own conversation state
     if "orchestrator" not in st.session_state:
-        st.session_state.orchestrator = OrchestratorService(config)
+        st.session_state.orchestrator = get_orchestrator(config)
+        st.session_state.orchestrator_session = st.session_state.orchestrator.create_session()
     
     # Render the sidebar
     render_sidebar(st)
@@ -96,9 +102,18 @@ def run_app():
             # The enable_verbal setting is now included in the context from SessionManager
             # based on the voice_enabled checkbox in the sidebar
             
-            # Process the query
-            result = st.session_state.orchestrator.process_query(query, context)
-            
+            # Process the query, rendering the response text as it is generated
+            result = None
+            streamed_text = ""
+            for event in st.session_state.orchestrator.process_query_stream(
+                query, context, session=st.session_state.orchestrator_session
+            ):
+                if event["type"] == "chunk":
+                    streamed_text += event["text"]
+                    message_placeholder.markdown(streamed_text + "▌")
+                elif event["type"] == "result":
+                    result = event["result"]
+
             # Display the response
             if "response" in result:
                 message_placeholder.markdown(result["response"])
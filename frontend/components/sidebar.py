@@ -109,7 +109,9 @@ def render_sidebar(st_obj: Any, session: Optional[Any] = None) -> None:
         if hasattr(st_obj.session_state, "persona") and selected_persona != st_obj.session_state.persona:
             st_obj.session_state.persona = selected_persona
             if hasattr(st_obj.session_state, "orchestrator"):
-                st_obj.session_state.orchestrator.set_persona(selected_persona)
+                st_obj.session_state.orchestrator.set_persona(
+                    selected_persona, session=getattr(st_obj.session_state, "orchestrator_session", None)
+                )
             st_obj.success(f"Changed to {selected_persona} voice persona")
 
     # Voice input settings
@@ -23,7 +23,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.settings import config  # Import the config instance directly
 
-from services.orchestrator.orchestrator import Orchestrator, OrchestratorService
+from services.orchestrator.orchestrator import OrchestratorService
+from frontend import get_orchestrator
 from resources.ui.personas import list_personas
 from services.utils.logging import get_logger
 from .components.sidebar import render_sidebar
@@ -129,6 +130,21 @@ def init_session_state():
         st.session_state["audio_data"] = None
 
 
+def get_orchestrator_session():
+    """
+    Get this browser session's conversation state in the shared orchestrator.
+    
+    Returns:
+        The orchestrator session, started on first use
+    """
+    orchestrator = st.session_state["orchestrator"]
+    if "orchestrator_session_id" not in st.session_state:
+        session = orchestrator.create_session(persona=st.session_state.get("persona"))
+        st.session_state["orchestrator_session_id"] = session.session_id
+    # get_session starts the session again if the orchestrator has dropped it
+    return orchestrator.get_session(st.session_state["orchestrator_session_id"])
+
+
 def create_audio_player_html(audio_data: bytes) -> str:
     """Create HTML for an audio player with the provided audio data."""
     audio_base64 = base64.b64encode(audio_data).decode()
@@ -163,7 +179,7 @@ def set_persona(persona: str):
         persona: Name of the selected persona
     """
     st.session_state["persona"] = persona
-    st.session_state["orchestrator"].set_persona(persona)
+    st.session_state["orchestrator"].set_persona(persona, session=get_orchestrator_session())
     logger.info(f"Persona set to: {persona}")
 
 
@@ -186,7 +202,8 @@ def process_voice_output(text: str) -> Optional[bytes]:
         tts_response = st.session_state["orchestrator"].get_tts_response(
             text, 
             model="eleven_multilingual_v2",
-            max_sentences=1
+            max_sentences=1,
+            session=get_orchestrator_session()
         )
         
         if tts_response and isinstance(tts_response, dict) and tts_response.get("audio"):
@@ -305,14 +322,14 @@ def initialize_ui(config: Dict[str, Any]):
         # If so, use the patched version instead of instantiating a real one
         import inspect
         if inspect.isclass(OrchestratorService) and hasattr(OrchestratorService, "__mro__"):
-            # This is not a mock, create a real instance
+            # This is not a mock, use the orchestrator shared by all browser sessions
             # First ensure the config has the needed sections
             if "services" not in config:
                 config["services"] = {}
             if "rules" not in config["services"]:
                 config["services"]["rules"] = {"rules_path": "services/rules/query_rules"}
             
-            st.session_state["orchestrator"] = Orchestrator(config)
+            st.session_state["orchestrator"] = get_orchestrator(config)
         else:
             # This is a mock, just use it directly
             st.session_state["orchestrator"] = OrchestratorService(config)
@@ -347,7 +364,7 @@ def process_user_input(container=None, context=None):
         context = SessionManager.get_context()
     
     # Process the query
-    result = st.session_state["orchestrator"].process_query(query, context)
+    result = st.session_state["orchestrator"].process_query(query, context, session=get_orchestrator_session())
     
     # Display the response
     display_container = container if container else st
@@ -404,9 +421,6 @@ def handle_query(query: str):
     # Add user message to the conversation
     st.session_state["messages"].append({"role": "user", "content": query})
     
-    # Always use fast mode
-    fast_mode = False
-    
     # Create context including voice settings
     context = {
         "enable_verbal": st.session_state["voice_enabled"],
@@ -414,9 +428,9 @@ def handle_query(query: str):
         "location_id": st.session_state["location_id"]
     }
     
-    # Process the query with context and fast_mode parameter
+    # Process the query in this browser session's conversation
     with st.spinner("Processing..."):
-        result = st.session_state["orchestrator"].process_query(query, context=context, fast_mode=fast_mode)
+        result = st.session_state["orchestrator"].process_query(query, context=context, session=get_orchestrator_session())
         response = result["response"]
     
     # Add assistant response to the conversation
@@ -435,6 +449,35 @@ def handle_query(query: str):
             logger.warning("Voice enabled but no audio data generated")
 
 
+def stream_response(orchestrator, query: str, context: Dict[str, Any], placeholder,
+                    session=None) -> Dict[str, Any]:
+    """
+    Process a query, rendering the response into a placeholder as it is generated.
+
+    Args:
+        orchestrator: The orchestrator service
+        query: User's query text
+        context: Query context
+        placeholder: Streamlit placeholder to render the partial response into
+        session: The conversation session of the query
+
+    Returns:
+        The result from the orchestrator
+    """
+    if not hasattr(orchestrator, "process_query_stream"):
+        return orchestrator.process_query(query, context, session=session)
+
+    text = ""
+    result = None
+    for event in orchestrator.process_query_stream(query, context, session=session):
+        if event["type"] == "chunk":
+            text += event["text"]
+            placeholder.markdown(text + "▌")
+        elif event["type"] == "result":
+            result = event["result"]
+    return result
+
+
 def run_app():
     """Run the Streamlit application."""
     st.set_page_config(
@@ -451,10 +494,10 @@ def run_app():
         # Default to True rather than using config
         st.session_state["voice_enabled"] = True
     
-    # Initialize the orchestrator if not already in session state
+    # One orchestrator serves every browser session; each keeps its own conversation session
     if "orchestrator" not in st.session_state:
         # Pass the config data to the orchestrator
-        st.session_state["orchestrator"] = Orchestrator(config.get_all())
+        st.session_state["orchestrator"] = get_orchestrator(config.get_all())
     
     # Render the sidebar
     render_sidebar(st)
@@ -482,10 +525,11 @@ def run_app():
             # Ensure voice_enabled state is passed to orchestrator
             context["enable_verbal"] = st.session_state["voice_enabled"]
             
-            # Process the query
-            result = st.session_state["orchestrator"].process_query(query, context)
-            
-            # Display the response
+            # Process the query, rendering the response text as it streams in
+            result = stream_response(st.session_state["orchestrator"], query, context, message_placeholder,
+                                     session=get_orchestrator_session())
+
+            # Display the final response (validation may have replaced the streamed text)
             message_placeholder.markdown(result["response"])
             
             # Play verbal response if available
@@ -671,8 +715,8 @@ def initialize_app():
     # Load configuration
     config = load_config()
     
-    # Create and initialize orchestrator
-    orchestrator = Orchestrator(config)
+    # Use the orchestrator shared by all browser sessions
+    orchestrator = get_orchestrator(config)
     st.session_state["orchestrator"] = orchestrator
     
     # Initialize session state
@@ -14,7 +14,7 @@ from dotenv import load_dotenv
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from frontend import run_app
+from frontend import run_app, load_config
 from services.utils.logging import setup_logging, setup_ai_api_logging
 
 # Environment variables will be loaded from .env file via load_dotenv()
@@ -29,7 +29,13 @@ def main():
     log_dir = os.path.join(PROJECT_ROOT, "logs")
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, "app.log")
-    setup_logging(log_file=log_file)
+    logging_config = load_config().get("logging", {})
+    setup_logging(
+        log_file=log_file,
+        async_mode=logging_config.get("async", False),
+        json_format=logging_config.get("json"),
+        sample_rates=logging_config.get("sample_rates")
+    )
     
     # Setup AI API logging to capture OpenAI interactions
     setup_ai_api_logging()
@@ -0,0 +1,428 @@
+"""
+Bounded, persistent cache of query classifications.
+
+Queries are normalized before lookup: lowercased, punctuation and stopwords
+removed and date expressions replaced by a placeholder, so "Show me
+yesterday's orders" and "show yesterday's orders" share one entry. When no
+entry has the same normalized form, the most similar cached query (cosine
+similarity of locally computed word and word-pair vectors) is used if it is
+close enough and its classification was confident. A similar query only
+lends its query type and confidence: its parameters describe other items and
+values, so they are left for later stages to extract. Action requests are
+never matched by similarity, since a near miss there changes the wrong thing.
+
+Date-dependent fields of a cached classification (the time period and the
+SQL clause built from it) are only reused when the new query names the same
+dates on the same day; otherwise they are dropped and later stages derive
+them from the query itself.
+
+Entries expire after a TTL, the least recently used ones are evicted beyond
+``max_entries``, and with a database path every entry is also written to
+SQLite and reloaded on startup.
+"""
+import copy
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATE_PLACEHOLDER = "_date_"
+
+_MONTHS = (r"january|february|april|june|july|august|september|october|november|december|"
+           r"jan|feb|apr|jun|jul|aug|sept|sep|oct|nov|dec")
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_UNITS = r"days?|weeks?|weekends?|months?|quarters?|years?"
+
+# Date expressions, most specific first
+_DATE_PATTERNS = [
+    re.compile(r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b"),                                  # 2/21/2025, 2025-02-21
+    re.compile(r"\b\d{1,2}/\d{1,2}\b"),                                                # 2/21
+    re.compile(rf"\b(?:{_MONTHS})\b\.?(?:\s+\d{{1,2}}(?:st|nd|rd|th)?)?(?:,?\s+\d{{4}})?"),  # feb 21, 2025
+    re.compile(r"\b(?:march|mar|may)\s+\d{1,4}(?:st|nd|rd|th)?(?:,?\s+\d{4})?"),       # may 3 (not "may I")
+    re.compile(rf"\b(?:this|last|past|previous|next)\s+(?:\d+\s+)?(?:{_UNITS}|{_WEEKDAYS})\b"),  # last 3 months
+    re.compile(rf"\b\d+\s+(?:{_UNITS})\s+ago\b"),                                      # 2 weeks ago
+    re.compile(rf"\b(?:today|tonight|yesterday|tomorrow|{_WEEKDAYS})\b"),
+    re.compile(r"\b(?:year|month|week)\s+to\s+date\b|\b[ymw]td\b"),
+    re.compile(r"\b(?:19|20)\d{2}\b"),                                                 # 2025
+]
+
+_STOPWORDS = frozenset("""
+    a an the me my i we us our you your it its this that these those
+    show display give tell list get find see view
+    please can could would will should do does did
+    is are was were be been am what whats which who
+    of for to in on at by from with about and or as
+    there here some any just also really
+""".split())
+
+# Classification fields that depend on the dates named in the query
+_DATE_FIELDS = ("time_period_clause", "start_date", "end_date")
+_DATE_PARAMETERS = ("time_period", "start_date", "end_date", "date_range")
+
+# Fields of a classification that a merely similar query may reuse
+_SIMILAR_FIELDS = ("query_type", "confidence")
+
+# Query types whose parameters are the whole point; only reused for equivalent queries
+_NO_SIMILARITY_TYPES = frozenset(("action",))
+
+_TOKEN_RE = re.compile(r"[^\w\s]+")
+_POSSESSIVE_RE = re.compile(r"['’]s\b")
+
+
+def normalize_query(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Normalize a query for cache lookup.
+
+    Args:
+        query: The user query
+
+    Returns:
+        Tuple of (normalized query, date expressions that were replaced)
+    """
+    text = _POSSESSIVE_RE.sub("", query.lower())
+    date_terms: List[Tuple[int, str]] = []
+
+    def replace(match):
+        date_terms.append((match.start(), " ".join(match.group(0).split())))
+        return f" {DATE_PLACEHOLDER} "
+
+    for pattern in _DATE_PATTERNS:
+        text = pattern.sub(replace, text)
+
+    tokens = [t for t in _TOKEN_RE.sub(" ", text).split() if t not in _STOPWORDS]
+    normalized = " ".join(tokens) or query.lower().strip()
+    return normalized, tuple(term for _, term in sorted(date_terms))
+
+
+def _vectorize(normalized: str) -> Dict[str, float]:
+    """Get the unit-length word and word-pair vector of a normalized query."""
+    tokens = normalized.split()
+    features: Dict[str, float] = defaultdict(float)
+    for token in tokens:
+        features[token] += 1.0
+    for first, second in zip(tokens, tokens[1:]):
+        features[f"{first} {second}"] += 1.0
+    norm = math.sqrt(sum(w * w for w in features.values())) or 1.0
+    return {feature: w / norm for feature, w in features.items()}
+
+
+class _Entry:
+    """A cached classification."""
+
+    __slots__ = ("result", "date_terms", "day", "expires", "vector")
+
+    def __init__(self, result: Dict[str, Any], date_terms: Tuple[str, ...],
+                 day: str, expires: float, vector: Dict[str, float]):
+        self.result = result
+        self.date_terms = date_terms
+        self.day = day
+        self.expires = expires
+        self.vector = vector
+
+
+class ClassificationCache:
+    """
+    LRU cache of classifications with TTL, fuzzy lookup and optional persistence.
+
+    Thread-safe. Supports ``cache[query] = result``, ``len(cache)``,
+    ``query in cache`` and ``clear()`` so it can stand in for a plain dict.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS classification_cache (
+            normalized TEXT PRIMARY KEY,
+            date_terms TEXT NOT NULL,
+            day TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created REAL NOT NULL,
+            expires REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_classification_cache_created ON classification_cache (created);
+    """
+
+    def __init__(self,
+                 max_entries: int = 5000,
+                 ttl_seconds: float = 86400,
+                 similarity_threshold: float = 0.9,
+                 min_confidence: float = 0.7,
+                 path: Optional[str] = None,
+                 busy_timeout: float = 5.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached classifications
+            ttl_seconds: Seconds a classification stays valid
+            similarity_threshold: Minimum cosine similarity for a nearest-neighbour
+                match (1.0 or more disables similarity lookup)
+            min_confidence: Minimum confidence of a classification reused by similarity
+            path: SQLite database file to persist entries in (optional)
+            busy_timeout: Seconds to wait on a locked database
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.min_confidence = min_confidence
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0}
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, set] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._conn = None
+        self._loaded = path is None
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> "ClassificationCache":
+        """
+        Create a cache from the classification.cache configuration section.
+
+        Args:
+            cache_config: Dictionary with optional max_entries, ttl_seconds,
+                similarity_threshold, min_confidence and path
+
+        Returns:
+            Configured ClassificationCache
+        """
+        return cls(
+            max_entries=cache_config.get("max_entries", 5000),
+            ttl_seconds=cache_config.get("ttl_seconds", 86400),
+            similarity_threshold=cache_config.get("similarity_threshold", 0.9),
+            min_confidence=cache_config.get("min_confidence", 0.7),
+            path=cache_config.get("path")
+        )
+
+    def _load(self):
+        """Open the database and load live entries on first use. Caller holds the lock."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            conn.execute("DELETE FROM classification_cache WHERE expires < ?", (time.time(),))
+            rows = conn.execute(
+                "SELECT normalized, date_terms, day, result, expires FROM classification_cache "
+                "ORDER BY created DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning(f"Classification cache at {self.path} unavailable, using memory only: {str(e)}")
+            return
+
+        # Oldest first, so the most recent end up most recently used
+        for normalized, date_terms, day, result, expires in reversed(rows):
+            self._insert(normalized, _Entry(json.loads(result), tuple(json.loads(date_terms)),
+                                            day, expires, _vectorize(normalized)))
+        logger.info(f"Loaded {len(rows)} cached classifications from {self.path}")
+
+    def _insert(self, normalized: str, entry: _Entry):
+        """Add an entry to memory and the similarity index. Caller holds the lock."""
+        if normalized in self._entries:
+            self._remove(normalized)
+        self._entries[normalized] = entry
+        for feature in entry.vector:
+            if DATE_PLACEHOLDER not in feature:
+                self._index[feature].add(normalized)
+
+    def _remove(self, normalized: str):
+        """Drop an entry from memory and the similarity index. Caller holds the lock."""
+        entry = self._entries.pop(normalized, None)
+        if entry is None:
+            return
+        for feature in entry.vector:
+            keys = self._index.get(feature)
+            if keys is not None:
+                keys.discard(normalized)
+                if not keys:
+                    del self._index[feature]
+
+    def _delete_persisted(self, keys: List[str]):
+        """Delete entries from the database. Caller holds the lock."""
+        if self._conn is not None and keys:
+            try:
+                self._conn.executemany(
+                    "DELETE FROM classification_cache WHERE normalized = ?", [(k,) for k in keys]
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not delete cached classifications: {str(e)}")
+
+    def _nearest(self, vector: Dict[str, float], now: float) -> Tuple[Optional[str], float]:
+        """Find the most similar live, confident entry. Caller holds the lock."""
+        candidates = set()
+        for feature in vector:
+            candidates.update(self._index.get(feature, ()))
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires < now or entry.result.get("confidence", 0.0) < self.min_confidence:
+                continue
+            if entry.result.get("query_type") in _NO_SIMILARITY_TYPES:
+                continue
+            score = sum(w * entry.vector.get(feature, 0.0) for feature, w in vector.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the classification of a query.
+
+        Args:
+            query: The user query
+
+        Returns:
+            A copy of the cached classification adapted to this query (with
+            "from_cache" and "cache_match" set), or None on a miss. Similar
+            matches carry only the query type and confidence.
+        """
+        normalized, date_terms = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            self._load()
+            match = "normalized"
+            entry = self._entries.get(normalized)
+            if entry is not None and entry.expires < now:
+                self._remove(normalized)
+                self._delete_persisted([normalized])
+                entry = None
+
+            if entry is None and self.similarity_threshold < 1.0:
+                key, score = self._nearest(_vectorize(normalized), now)
+                if key is not None and score >= self.similarity_threshold:
+                    match, normalized, entry = "similar", key, self._entries[key]
+                    logger.debug(f"Similar cached classification for '{query}': '{key}' ({score:.2f})")
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(normalized)
+            self.stats["similar_hits" if match == "similar" else "hits"] += 1
+            if match == "similar":
+                result = {field: entry.result[field] for field in _SIMILAR_FIELDS if field in entry.result}
+                result["parameters"] = {}
+            else:
+                result = copy.deepcopy(entry.result)
+            same_dates = entry.date_terms == date_terms and (not date_terms or entry.day == date.today().isoformat())
+
+        if not same_dates:
+            # The cached time period belongs to other dates; let later stages derive it
+            for field in _DATE_FIELDS:
+                result.pop(field, None)
+            parameters = result.get("parameters")
+            if isinstance(parameters, dict):
+                for field in _DATE_PARAMETERS:
+                    parameters.pop(field, None)
+
+        result["query"] = query
+        result["from_cache"] = True
+        result["cache_match"] = match
+        return result
+
+    def put(self, query: str, result: Dict[str, Any]):
+        """
+        Cache the classification of a query.
+
+        Args:
+            query: The user query
+            result: Its classification
+        """
+        normalized, date_terms = normalize_query(query)
+        now = time.time()
+        day = date.today().isoformat()
+        result = copy.deepcopy(result)
+        result.pop("from_cache", None)
+        result.pop("cache_match", None)
+        entry = _Entry(result, date_terms, day, now + self.ttl_seconds, _vectorize(normalized))
+
+        with self._lock:
+            self._load()
+            self._insert(normalized, entry)
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                evicted.append(oldest)
+            self._delete_persisted(evicted)
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO classification_cache "
+                        "(normalized, date_terms, day, result, created, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                        (normalized, json.dumps(list(date_terms)), day,
+                         json.dumps(result, default=str), now, entry.expires)
+                    )
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"Could not persist classification for '{query}': {str(e)}")
+
+    def labelled_queries(self) -> List[Tuple[str, str, float]]:
+        """
+        Get the live cached classifications, e.g. as training data for a local model.
+
+        Returns:
+            List of (normalized query, query type, confidence)
+        """
+        now = time.time()
+        with self._lock:
+            self._load()
+            return [
+                (normalized, entry.result["query_type"], entry.result.get("confidence", 0.0))
+                for normalized, entry in self._entries.items()
+                if entry.expires >= now and entry.result.get("query_type")
+            ]
+
+    def __setitem__(self, query: str, result: Dict[str, Any]):
+        self.put(query, result)
+
+    def __contains__(self, query: str) -> bool:
+        with self._lock:
+            self._load()
+            return normalize_query(query)[0] in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def clear(self):
+        """Remove all cached classifications, including persisted ones."""
+        with self._lock:
+            self._load()
+            self._entries.clear()
+            self._index.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM classification_cache")
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not clear persisted classifications: {str(e)}")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -13,6 +13,7 @@ from openai import OpenAI
 from dotenv import load_dotenv
 
 from services.classification.prompt_builder import ClassificationPromptBuilder, classification_prompt_builder
+from services.classification.classification_cache import ClassificationCache, normalize_query
 from services.utils.logging import log_openai_request, log_openai_response
 
 logger = logging.getLogger(__name__)
@@ -59,8 +60,11 @@ class ClassificationService:
         self.prompt_builder = classification_prompt_builder
         self.categories = self.prompt_builder.get_available_query_types()
         
-        # Classification cache
-        self._classification_cache = {}
+        # Classification cache: bounded, TTL'd, persisted if a path is configured,
+        # and matched on normalized queries and similar past queries
+        self._classification_cache = ClassificationCache.from_config(
+            self.config.get("classification", {}).get("cache", {})
+        )
         
         # Track the last classification result for context
         self._last_classification = None
@@ -119,28 +123,23 @@ class ClassificationService:
     
     def clear_cache(self) -> None:
         """Clear the classification cache."""
-        self._classification_cache = {}
+        self._classification_cache.clear()
         logger.info("Classification cache cleared")
     
     def _normalize_query(self, query: str) -> str:
-        """Normalize the query for caching."""
-        # Simple normalization: lowercase and strip whitespace
-        return query.lower().strip()
+        """Normalize the query for caching (stopwords removed, dates replaced by a placeholder)."""
+        return normalize_query(query)[0]
     
     def _check_query_cache(self, query: str, use_cache: bool) -> Optional[Dict[str, Any]]:
         """Check if the query exists in the cache and return the cached result if found."""
         if not use_cache:
             return None
             
-        normalized_query = self._normalize_query(query)
-        
-        # Check if the query is in the cache
-        if normalized_query in self._classification_cache:
-            cached_result = self._classification_cache[normalized_query]
-            logger.debug(f"Using cached classification for query: {query}")
-            return cached_result
-            
-        return None
+        # Look up the query, a query with the same normalized form or a similar one
+        cached_result = self._classification_cache.get(query)
+        if cached_result is not None:
+            logger.debug(f"Using cached classification ({cached_result['cache_match']} match) for query: {query}")
+        return cached_result
     
     def _fallback_classification(self, query: str) -> Dict[str, Any]:
         """Provide a fallback classification when the AI service fails."""
@@ -398,9 +397,9 @@ class ClassificationService:
             # Validate parameters and update confidence
             classification_result = self.validate_parameters(classification_result)
             
-            # Store in cache for future use
-            normalized_query = self._normalize_query(query)
-            self._classification_cache[normalized_query] = classification_result
+            # Store in cache for future use (unless the response could not be parsed)
+            if not classification_result.get("parse_error"):
+                self._classification_cache.put(query, classification_result)
             
             # Store as last classification for context
             self._last_classification = classification_result
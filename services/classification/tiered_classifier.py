@@ -0,0 +1,284 @@
+"""
+Tiered query classification with local fast paths.
+
+Most queries are phrased like ones seen before, so an LLM call for each one
+is wasted latency. TieredClassifier tries cheap local tiers first and only
+escalates queries they are unsure about:
+
+1. rules: QueryClassifier's keyword rules
+2. model: a naive Bayes model over normalized query words, trained on the
+   prompt builder's examples, on past LLM classifications kept in the
+   classification cache and on every confident LLM answer since startup
+3. llm: the wrapped ClassificationService
+
+Each tier answers only at or above its confidence threshold. Results carry
+the tier that answered and its latency. The local tiers know nothing about
+the conversation, so queries with a previous category (possible follow-ups)
+always go to the LLM tier with their context.
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.classification.classification_cache import normalize_query
+from services.classification.query_classifier import QueryClassifier
+
+logger = logging.getLogger(__name__)
+
+
+def _features(normalized: str) -> List[str]:
+    """Get the word and word-pair features of a normalized query."""
+    tokens = normalized.split()
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+class LocalQueryModel:
+    """
+    Multinomial naive Bayes classifier over normalized query features.
+
+    Training is incremental, so the model keeps learning from escalated
+    queries. Features never seen in training are ignored; a query whose
+    features are mostly unknown gets no confident prediction.
+    """
+
+    def __init__(self, smoothing: float = 0.5, min_coverage: float = 0.5):
+        """
+        Initialize an empty model.
+
+        Args:
+            smoothing: Additive smoothing of feature counts
+            min_coverage: Fraction of a query's features that must be known
+                for a prediction
+        """
+        self.smoothing = smoothing
+        self.min_coverage = min_coverage
+        self._class_counts: Dict[str, int] = defaultdict(int)
+        self._feature_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._feature_totals: Dict[str, int] = defaultdict(int)
+        self._vocabulary = set()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def learn(self, query: str, category: str) -> bool:
+        """
+        Add a labelled query.
+
+        Args:
+            query: Query text (raw or already normalized)
+            category: Its category
+
+        Returns:
+            True if the example was new
+        """
+        normalized = normalize_query(query)[0]
+        with self._lock:
+            if (normalized, category) in self._seen:
+                return False
+            self._seen.add((normalized, category))
+            self._class_counts[category] += 1
+            for feature in _features(normalized):
+                self._feature_counts[category][feature] += 1
+                self._feature_totals[category] += 1
+                self._vocabulary.add(feature)
+        return True
+
+    def train(self, examples: Iterable[Tuple[str, str]]) -> int:
+        """
+        Add several labelled queries.
+
+        Args:
+            examples: (query, category) pairs
+
+        Returns:
+            Number of new examples
+        """
+        return sum(1 for query, category in examples if self.learn(query, category))
+
+    def predict(self, query: str) -> Tuple[Optional[str], float]:
+        """
+        Predict the category of a query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Tuple of (category, posterior probability), or (None, 0.0) when
+            the model has no data or knows too few of the query's features
+        """
+        features = _features(normalize_query(query)[0])
+        with self._lock:
+            if not self._class_counts or not features:
+                return None, 0.0
+            known = [f for f in features if f in self._vocabulary]
+            if len(known) < self.min_coverage * len(features):
+                return None, 0.0
+
+            total_docs = sum(self._class_counts.values())
+            vocabulary_size = len(self._vocabulary)
+            scores = {}
+            for category, doc_count in self._class_counts.items():
+                counts = self._feature_counts[category]
+                denominator = self._feature_totals[category] + self.smoothing * vocabulary_size
+                score = math.log(doc_count / total_docs)
+                for feature in known:
+                    score += math.log((counts.get(feature, 0) + self.smoothing) / denominator)
+                scores[category] = score
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        posterior = 1.0 / sum(math.exp(score - top) for score in scores.values())
+        return best, posterior
+
+    @property
+    def size(self) -> int:
+        """Number of training examples."""
+        return len(self._seen)
+
+
+class TieredClassifier:
+    """
+    Classifier that answers from local tiers when confident and escalates to the LLM otherwise.
+
+    Has the same classify(query) interface and result shape as
+    ClassificationService.classify, plus "tier" and "tier_latency". Any
+    other attribute (e.g. detect_follow_up) is looked up on the LLM tier.
+    """
+
+    def __init__(self, llm_classifier, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the tiered classifier.
+
+        Args:
+            llm_classifier: The escalation tier (e.g. ClassificationService)
+            config: The classification.tiers configuration section:
+                - rules_threshold: Minimum rule confidence (default: 0.85)
+                - model_threshold: Minimum model probability (default: 0.9)
+                - learn_threshold: Minimum LLM confidence to learn from (default: 0.8)
+        """
+        config = config or {}
+        self.llm_classifier = llm_classifier
+        self.rules_threshold = config.get("rules_threshold", 0.85)
+        self.model_threshold = config.get("model_threshold", 0.9)
+        self.learn_threshold = config.get("learn_threshold", 0.8)
+
+        self.rules = QueryClassifier()
+        self.model = LocalQueryModel()
+        self.categories = set(getattr(llm_classifier, "categories", None) or [])
+        self.stats = {"rules": 0, "model": 0, "llm": 0}
+
+        self._train_initial_model()
+
+    def _train_initial_model(self):
+        """Train the model on the prompt examples and past LLM classifications."""
+        examples = []
+        prompt_builder = getattr(self.llm_classifier, "prompt_builder", None)
+        for example in getattr(prompt_builder, "examples", None) or []:
+            examples.append((example["query"], example["classification"]["query_type"]))
+
+        cache = getattr(self.llm_classifier, "_classification_cache", None)
+        if hasattr(cache, "labelled_queries"):
+            examples.extend(
+                (normalized, query_type)
+                for normalized, query_type, confidence in cache.labelled_queries()
+                if confidence >= self.learn_threshold
+            )
+
+        learned = self.model.train(examples)
+        self.categories.update(category for _, category in examples)
+        logger.info(f"Local classification model trained on {learned} examples")
+
+    def _result(self, category: str, confidence: float, tier: str, started: float) -> Dict[str, Any]:
+        """Build a classify() result for a local tier (only used without a previous query)."""
+        self.stats[tier] += 1
+        return {
+            "category": category,
+            "confidence": confidence,
+            "skip_database": False,
+            "time_period_clause": None,
+            "is_followup": False,
+            "tier": tier,
+            "tier_latency": time.perf_counter() - started
+        }
+
+    def classify(self, query: str) -> Dict[str, Any]:
+        """
+        Classify a query with the cheapest confident tier.
+
+        Args:
+            query: User query text
+
+        Returns:
+            Classification result with category, confidence, skip_database,
+            time_period_clause, is_followup, tier and tier_latency
+        """
+        started = time.perf_counter()
+
+        # Tier 1: keyword rules
+        try:
+            category, confidence = self.rules._rule_based_classification(query, None)
+            if confidence >= self.rules_threshold and category in self.categories:
+                return self._result(category, confidence, "rules", started)
+        except Exception as e:
+            logger.warning(f"Rule-based classification failed: {str(e)}")
+
+        # Tier 2: local model
+        category, confidence = self.model.predict(query)
+        if category is not None and confidence >= self.model_threshold:
+            return self._result(category, confidence, "model", started)
+
+        # Tier 3: the LLM
+        return self._escalate(query, self.llm_classifier.classify, query)
+
+    def get_classification_with_context(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Classify a query using the conversation context.
+
+        Without a previous category this is classify(query). With one, the
+        local tiers are skipped and the LLM tier classifies with the context,
+        so follow-ups are recognized.
+
+        Args:
+            query: User query text
+            context: Conversation context (e.g. {"previous_category": ...})
+
+        Returns:
+            Classification result, as for classify()
+        """
+        if not context or not context.get("previous_category"):
+            return self.classify(query)
+
+        classify_with_context = getattr(self.llm_classifier, "get_classification_with_context", None)
+        if classify_with_context is None:
+            return self._escalate(query, self.llm_classifier.classify, query)
+        return self._escalate(query, classify_with_context, query, context)
+
+    def _escalate(self, query: str, classify, *args) -> Dict[str, Any]:
+        """Classify with the LLM tier; confident answers teach the local model."""
+        started = time.perf_counter()
+        result = dict(classify(*args))
+        self.stats["llm"] += 1
+        if result.get("category") and result.get("confidence", 0.0) >= self.learn_threshold:
+            self.model.learn(query, result["category"])
+        result["tier"] = "llm"
+        result["tier_latency"] = time.perf_counter() - started
+        return result
+
+    def clear_cache(self) -> None:
+        """Clear the LLM tier's classification cache."""
+        if hasattr(self.llm_classifier, "clear_cache"):
+            self.llm_classifier.clear_cache()
+
+    def health_check(self) -> bool:
+        """Check the LLM tier (the local tiers cannot fail to start)."""
+        if hasattr(self.llm_classifier, "health_check"):
+            return self.llm_classifier.health_check()
+        return True
+
+    def __getattr__(self, name: str):
+        """Delegate everything else (detect_follow_up, ...) to the LLM tier."""
+        if name == "llm_classifier":
+            raise AttributeError(name)
+        return getattr(self.llm_classifier, name)
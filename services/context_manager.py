@@ -4,7 +4,7 @@ Context Manager for Swoop AI Conversational Query Flow.
 This module implements the ConversationContext class which maintains 
 conversation state across turns, as specified in the SWOOP development plan.
 """
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, Callable, Optional, Tuple, Set
 from datetime import datetime, timedelta
 import logging
 import re
@@ -14,12 +14,189 @@ import uuid
 import json
 import copy
 import string
+import marshal
+import operator
 import os
+import pickle
+import sys
+import threading
+import weakref
+import zlib
+
+from services.utils.bounded_history import BoundedHistory
 
 logger = logging.getLogger(__name__)
 
 
-class UserProfile:
+def _intern(value: Any) -> Any:
+    """Intern topic and entity strings so all sessions share one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _CompactSlots:
+    """
+    Base for slotted state classes with lazily created fields and a binary serializer.
+    
+    Subclasses declare the attributes every instance has in ``__slots__``
+    (all of them must be set in ``__init__``) and map rarely used ones to
+    factories in ``_LAZY_FIELDS``. Lazy fields live in a per-instance dict
+    and are only created when first read; a ``None`` factory marks an
+    optional field that is absent until assigned.
+    
+    ``to_bytes`` packs the fields into plain tuples, lists and dicts
+    (converted by the per-field ``_CODECS``) and writes them with
+    ``marshal``, falling back to ``pickle`` if a field holds anything else
+    (e.g. a DataFrame). The data is tagged with a checksum of the field
+    layout so that data written by an incompatible version is rejected.
+    Like the marshal format itself, the bytes are meant for the same
+    deployment, not for long-term storage.
+    """
+    
+    __slots__ = ("_lazy",)
+    _LAZY_FIELDS: Dict[str, Optional[Callable[[Any], Any]]] = {}
+    _CODECS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._STATE_SLOTS = tuple(
+            name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ())
+            if name != "_lazy"
+        )
+        cls._STATE_LAYOUT = zlib.crc32(
+            ",".join(cls._STATE_SLOTS + tuple(sorted(cls._LAZY_FIELDS))).encode("utf-8")
+        )
+        for name, factory in cls._LAZY_FIELDS.items():
+            setattr(cls, name, _lazy_field(name, factory))
+        
+        # Precomputed for _pack/_unpack, which run once per serialized session
+        cls._get_slots = operator.attrgetter(*cls._STATE_SLOTS)
+        cls._slot_setters = tuple(
+            getattr(cls, name).__set__ for name in cls._STATE_SLOTS
+        )
+        cls._slot_codecs = tuple(
+            (index, cls._CODECS[name]) for index, name in enumerate(cls._STATE_SLOTS)
+            if name in cls._CODECS
+        )
+    
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        instance._lazy = {}
+        return instance
+    
+    def _pack(self) -> tuple:
+        """Convert the instance to plain builtin values."""
+        codecs = self._CODECS
+        values = list(self._get_slots(self))
+        for index, (encode, _) in self._slot_codecs:
+            values[index] = encode(values[index])
+        lazy = {
+            name: codecs[name][0](value) if name in codecs else value
+            for name, value in self._lazy.items()
+        }
+        return (self._STATE_LAYOUT, values, lazy)
+    
+    @classmethod
+    def _unpack(cls, state: tuple):
+        """Rebuild an instance from the output of _pack."""
+        layout, values, lazy = state
+        if layout != cls._STATE_LAYOUT:
+            raise ValueError(f"Serialized {cls.__name__} has an incompatible layout")
+        codecs = cls._CODECS
+        values = list(values)
+        for index, (_, decode) in cls._slot_codecs:
+            values[index] = decode(values[index])
+        instance = cls.__new__(cls)
+        for set_slot, value in zip(cls._slot_setters, values):
+            set_slot(instance, value)
+        instance._lazy = {
+            name: codecs[name][1](value) if name in codecs else value
+            for name, value in lazy.items()
+        }
+        return instance
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to a compact binary form (faster than to_dict + JSON, and lossless).
+        
+        Returns:
+            Serialized bytes
+        """
+        state = self._pack()
+        try:
+            return b"M" + marshal.dumps(state)
+        except ValueError:
+            return b"P" + pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Restore an instance serialized with to_bytes.
+        
+        Only use this for data written by this service.
+        
+        Args:
+            data: Bytes returned by to_bytes
+            
+        Returns:
+            Restored instance
+        """
+        if data[:1] == b"M":
+            state = marshal.loads(data[1:])
+        elif data[:1] == b"P":
+            state = pickle.loads(data[1:])
+        else:
+            raise ValueError(f"Unknown {cls.__name__} serialization format")
+        return cls._unpack(state)
+
+
+def _lazy_field(name: str, factory: Optional[Callable[[Any], Any]]) -> property:
+    """Create the property for a lazily created field of a _CompactSlots class."""
+    def get(self):
+        try:
+            return self._lazy[name]
+        except KeyError:
+            if factory is None:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+            value = self._lazy[name] = factory(self)
+            return value
+    
+    def set(self, value):
+        self._lazy[name] = value
+    
+    def delete(self):
+        try:
+            del self._lazy[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    return property(get, set, delete)
+
+
+def _encode_history(history: BoundedHistory) -> tuple:
+    """Pack a BoundedHistory into plain values."""
+    return (history.maxlen, history.spill_path, history.spilled_count, history.to_list())
+
+
+def _decode_history(state: tuple) -> BoundedHistory:
+    """Rebuild a BoundedHistory packed by _encode_history."""
+    maxlen, spill_path, spilled_count, items = state
+    history = BoundedHistory(maxlen, spill_path, items)
+    history.spilled_count = spilled_count
+    return history
+
+
+# Field codecs shared by the slotted classes
+_DATETIME_CODEC = (datetime.isoformat, datetime.fromisoformat)
+_HISTORY_CODEC = (_encode_history, _decode_history)
+_COUNTER_CODEC = (dict, Counter)
+
+
+def _defaultdict_codec(default_factory):
+    """Codec for a defaultdict field."""
+    return dict, lambda value: defaultdict(default_factory, value)
+
+
+class UserProfile(_CompactSlots):
     """
     Maintains user-specific preferences and behavior patterns to enable response personalization.
     
@@ -35,6 +212,45 @@ class UserProfile:
     DETAIL_LEVELS = ["concise", "standard", "detailed"]
     RESPONSE_TONES = ["formal", "professional", "casual", "friendly"]
     
+    # Personalization preferences (defaults)
+    DEFAULT_PREFERENCES = {
+        "detail_level": "standard",  # concise, standard, detailed
+        "response_tone": "professional",  # formal, professional, casual, friendly
+        "chart_preference": "auto",  # never, auto, always
+        "voice_enabled": False,
+        "timezone": "UTC",
+    }
+    
+    __slots__ = ("user_id", "creation_date", "last_active", "stats", "max_recent_queries")
+    
+    # Created on first use
+    _LAZY_FIELDS = {
+        "session_start_time": None,  # Only set while a session is active
+        "preferences": lambda self: dict(self.DEFAULT_PREFERENCES),
+        "frequent_entities": lambda self: Counter(),  # Counter of entities
+        "frequent_topics": lambda self: Counter(),  # Counter of topics
+        "topic_transitions": lambda self: defaultdict(Counter),  # From topic -> to topic
+        "query_patterns": lambda self: [],
+        "recent_queries": lambda self: [],
+    }
+    
+    # Conversions to plain values for to_bytes
+    _CODECS = {
+        "creation_date": _DATETIME_CODEC,
+        "last_active": _DATETIME_CODEC,
+        "session_start_time": _DATETIME_CODEC,
+        "stats": (
+            lambda stats: {k: dict(v) if isinstance(v, defaultdict) else v for k, v in stats.items()},
+            lambda stats: {k: defaultdict(int, v) if isinstance(v, dict) else v for k, v in stats.items()}
+        ),
+        "frequent_entities": _COUNTER_CODEC,
+        "frequent_topics": _COUNTER_CODEC,
+        "topic_transitions": (
+            lambda transitions: {k: dict(v) for k, v in transitions.items()},
+            lambda transitions: defaultdict(Counter, {k: Counter(v) for k, v in transitions.items()})
+        ),
+    }
+    
     def __init__(self, user_id: str):
         """
         Initialize a new user profile.
@@ -44,16 +260,7 @@ class UserProfile:
         """
         self.user_id = user_id
         self.creation_date = datetime.now()
-        self.last_active = datetime.now()
-        
-        # Personalization preferences (with defaults)
-        self.preferences = {
-            "detail_level": "standard",  # concise, standard, detailed
-            "response_tone": "professional",  # formal, professional, casual, friendly
-            "chart_preference": "auto",  # never, auto, always
-            "voice_enabled": False,
-            "timezone": "UTC",
-        }
+        self.last_active = self.creation_date
         
         # Usage statistics
         self.stats = {
@@ -66,14 +273,7 @@ class UserProfile:
             "total_time_spent": 0,
         }
         
-        # Entity and topic tracking
-        self.frequent_entities = Counter()  # Counter of entities
-        self.frequent_topics = Counter()  # Counter of topics
-        self.topic_transitions = defaultdict(Counter)  # From topic -> to topic
-        
         # Query pattern tracking
-        self.query_patterns = []
-        self.recent_queries = []
         self.max_recent_queries = 50
     
     def update_with_query(self, query_text: str, query_type: str, 
@@ -88,6 +288,7 @@ class UserProfile:
             topic: The query topic
         """
         self.last_active = datetime.now()
+        topic = _intern(topic)
         
         # Update stats
         self.stats["total_queries"] += 1
@@ -101,7 +302,7 @@ class UserProfile:
                 for entity in entity_list:
                     entity_name = entity.get("name", "")
                     if entity_name:
-                        self.frequent_entities[f"{entity_type}:{entity_name}"] += 1
+                        self.frequent_entities[_intern(f"{entity_type}:{entity_name}")] += 1
         
         # Update topic tracking
         if topic:
@@ -310,12 +511,14 @@ class UserProfile:
                 profile.stats[k] = v
         
         # Restore frequency counters
-        profile.frequent_entities = Counter(data["frequent_entities"])
-        profile.frequent_topics = Counter(data["frequent_topics"])
+        profile.frequent_entities = Counter({_intern(k): v for k, v in data["frequent_entities"].items()})
+        profile.frequent_topics = Counter({_intern(k): v for k, v in data["frequent_topics"].items()})
         
         # Restore topic transitions
         for from_topic, transitions in data["topic_transitions"].items():
-            profile.topic_transitions[from_topic] = Counter(transitions)
+            profile.topic_transitions[_intern(from_topic)] = Counter(
+                {_intern(k): v for k, v in transitions.items()}
+            )
         
         # Restore query patterns and recent queries
         profile.query_patterns = data.get("query_patterns", [])
@@ -324,7 +527,7 @@ class UserProfile:
         return profile
 
 
-class ConversationContext:
+class ConversationContext(_CompactSlots):
     """
     Maintains conversation state across turns, including:
     - Conversation history
@@ -351,26 +554,90 @@ class ConversationContext:
     TOPIC_CHANGE_CONFIDENCE = 0.75  # Minimum confidence to trigger a topic change
     TOPIC_SIMILARITY_THRESHOLD = 0.4  # Threshold for detecting similar topics
     
-    def __init__(self, session_id: str, user_id: Optional[str] = None):
+    # Entries kept in memory per history; older entries are spilled or dropped
+    DEFAULT_HISTORY_LIMIT = 100
+    
+    __slots__ = (
+        "session_id", "user_id", "user_profile", "history_limit", "spill_dir",
+        "_conversation_history", "_topic_history",
+        "current_topic", "previous_topic", "primary_intent", "last_intent",
+        "active_entities", "clarification_state",
+        "topic_confidence", "last_query_timestamp", "topic_transition_count",
+    )
+    
+    # Rarely used state, created on first use
+    _LAZY_FIELDS = {
+        "topic_timestamps": lambda self: {},  # Timestamps of when topics were active
+        "topic_specific_context": lambda self: defaultdict(dict),  # Context preserved per topic
+        "secondary_topics": lambda self: [],  # For multi-intent support
+        "intents": lambda self: [],  # List of all intents in the conversation
+        "intent_confidences": lambda self: {},  # Confidence scores for each intent
+        # Entity tracking for personalization
+        "tracked_entities": lambda self: defaultdict(set),  # Tracked entities by type
+        "entity_ids": lambda self: {},  # Mapping of entity names to IDs
+        "top_entities": lambda self: [],  # Most frequently referenced entities
+        "entity_focus": lambda self: [],  # Current focus entities
+        "recurring_entities": lambda self: defaultdict(int),  # Count entities by frequency
+        "last_mentioned_entities": lambda self: {},  # For reference resolution
+        "query_keywords": lambda self: set(),  # Important keywords from queries
+        "time_references": lambda self: {
+            'explicit_date': None,  # "March 15, 2023"
+            'explicit_range': None,  # "from Jan 1 to Feb 28"
+            'relative_date': None,  # "yesterday", "last month"
+            'relative_range': None,  # "past 7 days"
+            'resolution': {
+                'start_date': None,
+                'end_date': None
+            }
+        },
+        "time_range": lambda self: {},  # Matches the async implementation
+        "active_filters": lambda self: [],  # List of active filters
+        "filters": lambda self: {},  # For compatibility with async implementation
+        "clarification_context": lambda self: {
+            'type': None,  # 'entity', 'time', 'filter'
+            'param': None,  # Which specific parameter needs clarification
+            'options': [],  # Possible options for clarification
+            'original_query': None  # The original query that needed clarification
+        },
+        "pending_actions": lambda self: [],  # List of pending actions
+        # Reference history for tracking resolved references and topic changes
+        "_reference_history": lambda self: self._bounded("references", []),
+        "last_query_result": lambda self: None,
+    }
+    
+    # Conversions to plain values for to_bytes
+    _CODECS = {
+        "user_profile": (UserProfile._pack, UserProfile._unpack),
+        "_conversation_history": _HISTORY_CODEC,
+        "_topic_history": _HISTORY_CODEC,
+        "_reference_history": _HISTORY_CODEC,
+        "topic_specific_context": _defaultdict_codec(dict),
+        "tracked_entities": _defaultdict_codec(set),
+        "recurring_entities": _defaultdict_codec(int),
+    }
+    
+    def __init__(self, session_id: str, user_id: Optional[str] = None,
+                 history_limit: Optional[int] = None, spill_dir: Optional[str] = None):
         """
         Initialize a new conversation context.
         
         Args:
             session_id: Unique identifier for the user session
             user_id: Unique identifier for the user (optional)
+            history_limit: Entries kept in memory per history (default: DEFAULT_HISTORY_LIMIT)
+            spill_dir: Directory older history entries are written to (if None, they are dropped)
         """
         self.session_id = session_id
+        self.history_limit = history_limit or self.DEFAULT_HISTORY_LIMIT
+        self.spill_dir = spill_dir
         self.conversation_history = []  # List of (query, response) tuples
         self.current_topic = None  # 'order_history', 'menu', 'action'
         self.previous_topic = None  # Track the previous topic 
         
-        # Topic history and management
+        # Topic history and management (topic_timestamps, topic_specific_context,
+        # secondary_topics and intents are created on first use, see _LAZY_FIELDS)
         self.topic_history = []  # List of previous topics
-        self.topic_timestamps = {}  # Timestamps of when topics were active
-        self.topic_specific_context = defaultdict(dict)  # Context preserved per topic
-        self.secondary_topics = []  # For multi-intent support
         self.primary_intent = None  # Primary intent for multi-intent support
-        self.intents = []  # List of all intents in the conversation
         
         # User profile integration
         self.user_id = user_id or session_id  # Default to session_id if no user_id provided
@@ -384,59 +651,13 @@ class ConversationContext:
             'option_items': []
         }
         
-        # Entity tracking for personalization
-        self.tracked_entities = defaultdict(set)  # Tracked entities by type
-        self.entity_ids = {}  # Mapping of entity names to IDs
-        self.top_entities = []  # Most frequently referenced entities
-        self.entity_focus = []  # Current focus entities
-        
-        self.time_references = {
-            'explicit_date': None,  # "March 15, 2023"
-            'explicit_range': None,  # "from Jan 1 to Feb 28"
-            'relative_date': None,  # "yesterday", "last month"
-            'relative_range': None,  # "past 7 days"
-            'resolution': {
-                'start_date': None,
-                'end_date': None
-            }
-        }
-        
-        # Add time_range attribute to match async implementation
-        self.time_range = {}
-        
-        self.active_filters = []  # List of active filters
-        self.filters = {}  # For compatibility with async implementation
-        
         self.clarification_state = self.NONE
-        self.clarification_context = {
-            'type': None,  # 'entity', 'time', 'filter'
-            'param': None,  # Which specific parameter needs clarification
-            'options': [],  # Possible options for clarification
-            'original_query': None  # The original query that needed clarification
-        }
-        
-        self.pending_actions = []  # List of pending actions
         
         # For tracking topic continuity and transitions
         self.topic_confidence = 0.0  # Confidence in current topic
         self.last_query_timestamp = time.time()
         self.topic_transition_count = 0  # Count of topic transitions in session
-        
-        # Multi-intent tracking
-        self.intents = []  # List of detected intents in current conversation
-        self.intent_confidences = {}  # Confidence scores for each intent
         self.last_intent = None  # Most recent intent
-        self.primary_intent = None  # Primary intent for current query
-        
-        # Query characteristics for topic analysis
-        self.query_keywords = set()  # Important keywords from queries
-        self.recurring_entities = defaultdict(int)  # Count entities by frequency
-        
-        # Reference history for tracking resolved references and topic changes
-        self.reference_history = []  # Track references and their resolutions
-        
-        # Last mentioned entities for reference resolution
-        self.last_mentioned_entities = {}
         
         logger.info(f"Initialized new conversation context for session {session_id}")
 
@@ -449,10 +670,10 @@ class ConversationContext:
             classification_result: The classification result for the query
         """
         # Get query properties
-        query_type = classification_result.get("query_type", "unknown")
+        query_type = _intern(classification_result.get("query_type", "unknown"))
         confidence = classification_result.get("confidence", 0.0)
         parameters = classification_result.get("parameters", {})
-        intent_type = classification_result.get("intent_type", query_type)
+        intent_type = _intern(classification_result.get("intent_type", query_type))
         
         # Add to conversation history
         query_record = {
@@ -564,10 +785,10 @@ class ConversationContext:
         if entities and isinstance(entities, dict) and "category" in entities and isinstance(entities["category"], str):
             category_name = entities["category"]
             # Update recurring entities counter for this category
-            entity_key = f"category:{category_name}"
+            entity_key = _intern(f"category:{category_name}")
             self.recurring_entities[entity_key] += 1
             # Also add to tracked_entities
-            self.tracked_entities["category"].add(category_name)
+            self.tracked_entities["category"].add(_intern(category_name))
         
         # Track recurring entities - process all entity types
         if entities:
@@ -577,15 +798,15 @@ class ConversationContext:
                     for entity in entity_values:
                         entity_name = entity if isinstance(entity, str) else entity.get("name", "")
                         if entity_name:
-                            entity_key = f"{entity_type}:{entity_name}"
+                            entity_key = _intern(f"{entity_type}:{entity_name}")
                             self.recurring_entities[entity_key] += 1
                 elif isinstance(entity_values, dict):
                     for key, value in entity_values.items():
-                        entity_key = f"{entity_type}:{key}"
+                        entity_key = _intern(f"{entity_type}:{key}")
                         self.recurring_entities[entity_key] += 1
                 elif isinstance(entity_values, str):
                     # Handle direct string values
-                    entity_key = f"{entity_type}:{entity_values}"
+                    entity_key = _intern(f"{entity_type}:{entity_values}")
                     self.recurring_entities[entity_key] += 1
         
         # Handle data query entities
@@ -596,7 +817,7 @@ class ConversationContext:
                     item_name = item.get("name", "")
                     item_id = item.get("id", "")
                     if item_name:
-                        self.tracked_entities["menu_item"].add(item_name)
+                        self.tracked_entities["menu_item"].add(_intern(item_name))
                         if item_id:
                             self.entity_ids[f"menu_item:{item_name}"] = item_id
             
@@ -606,7 +827,7 @@ class ConversationContext:
                     cat_name = category.get("name", "")
                     cat_id = category.get("id", "")
                     if cat_name:
-                        self.tracked_entities["category"].add(cat_name)
+                        self.tracked_entities["category"].add(_intern(cat_name))
                         if cat_id:
                             self.entity_ids[f"category:{cat_name}"] = cat_id
             
@@ -615,7 +836,7 @@ class ConversationContext:
                 for period in entities["time_period"]:
                     period_name = period.get("name", "")
                     if period_name:
-                        self.tracked_entities["time_period"].add(period_name)
+                        self.tracked_entities["time_period"].add(_intern(period_name))
         
         # Handle action request entities
         elif query_type == "action_request":
@@ -624,7 +845,7 @@ class ConversationContext:
                 for action in entities["action"]:
                     action_name = action.get("name", "")
                     if action_name:
-                        self.tracked_entities["action"].add(action_name)
+                        self.tracked_entities["action"].add(_intern(action_name))
         
         # Update top_entities cache with most frequent entities
         all_entities = []
@@ -1057,6 +1278,42 @@ class ConversationContext:
         """Reset the clarification state to NONE."""
         self.clarification_state = self.NONE
     
+    def _bounded(self, name: str, items) -> BoundedHistory:
+        """Wrap a history list in a BoundedHistory spilling to this session's file."""
+        if isinstance(items, BoundedHistory):
+            return items
+        spill_path = None
+        if self.spill_dir:
+            spill_path = os.path.join(self.spill_dir, f"{self.session_id}.{name}.jsonl")
+        return BoundedHistory(self.history_limit, spill_path, items)
+    
+    @property
+    def conversation_history(self) -> BoundedHistory:
+        """Recent conversation turns (bounded)."""
+        return self._conversation_history
+    
+    @conversation_history.setter
+    def conversation_history(self, items):
+        self._conversation_history = self._bounded("conversation", items)
+    
+    @property
+    def topic_history(self) -> BoundedHistory:
+        """Recent previous topics (bounded)."""
+        return self._topic_history
+    
+    @topic_history.setter
+    def topic_history(self, items):
+        self._topic_history = self._bounded("topics", items)
+    
+    @property
+    def reference_history(self) -> BoundedHistory:
+        """Recent reference resolutions and topic changes (bounded)."""
+        return self._reference_history
+    
+    @reference_history.setter
+    def reference_history(self, items):
+        self._reference_history = self._bounded("references", items)
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert the context to a dictionary for serialization.
@@ -1067,9 +1324,9 @@ class ConversationContext:
         return {
             "session_id": self.session_id,
             "user_id": self.user_id,
-            "conversation_history": self.conversation_history,
+            "conversation_history": self.conversation_history.to_list(),
             "current_topic": self.current_topic,
-            "topic_history": self.topic_history,
+            "topic_history": self.topic_history.to_list(),
             "topic_timestamps": self.topic_timestamps,
             "topic_specific_context": {
                 k: dict(v) for k, v in self.topic_specific_context.items()
@@ -1175,7 +1432,7 @@ class ConversationContext:
             'entity_type': next(iter(entity_references.keys())) if entity_references else None,
             'time_references': self.time_range if hasattr(self, 'time_range') else {},
             'current_topic': self.current_topic,
-            'topic_history': self.topic_history
+            'topic_history': self.topic_history.to_list()
         }
 
     def get_personalization_hints(self) -> Dict[str, Any]:
@@ -1259,17 +1516,31 @@ class ContextManager:
     Provides context persistence, retrieval, and cleanup.
     """
     
-    def __init__(self, expiry_minutes: int = 30, profile_storage_path: Optional[str] = None):
+    def __init__(self, expiry_minutes: int = 30, profile_storage_path: Optional[str] = None,
+                 history_limit: Optional[int] = None, spill_dir: Optional[str] = None,
+                 sweep_interval_seconds: Optional[float] = None):
         """
         Initialize the context manager.
         
         Args:
             expiry_minutes: Minutes after which a context is considered expired
             profile_storage_path: Path to store user profiles (if None, profiles are kept in memory only)
+            history_limit: Entries kept in memory per context history
+            spill_dir: Directory older history entries are written to (if None, they are dropped)
+            sweep_interval_seconds: If set, expired contexts are removed by a background
+                thread at this interval
         """
         self.contexts = {}  # Session ID -> ConversationContext
         self.expiry_minutes = expiry_minutes
         self.last_access_times = {}  # Session ID -> last access timestamp
+        self.history_limit = history_limit
+        self.spill_dir = spill_dir
+        self._lock = threading.RLock()
+        
+        # Background sweeper for expired sessions
+        self._sweeper_thread = None
+        self._sweeper_stop = threading.Event()
+        self.sweep_stats = {"sweeps": 0, "removed": 0, "last_sweep": None}
         
         # For tracking topic transition patterns
         self.topic_transition_stats = defaultdict(int)  # Track common topic transitions
@@ -1284,6 +1555,9 @@ class ContextManager:
             os.makedirs(profile_storage_path, exist_ok=True)
         
         logger.info(f"Initialized ContextManager with {expiry_minutes}-minute expiry")
+        
+        if sweep_interval_seconds:
+            self.start_sweeper(sweep_interval_seconds)
     
     def get_context(self, session_id: str, user_id: Optional[str] = None) -> ConversationContext:
         """
@@ -1296,6 +1570,11 @@ class ContextManager:
         Returns:
             The conversation context for the session
         """
+        with self._lock:
+            return self._get_or_create_context(session_id, user_id)
+    
+    def _get_or_create_context(self, session_id: str, user_id: Optional[str]) -> ConversationContext:
+        """Get or create a session context. Caller holds the lock."""
         # Record access time
         self.last_access_times[session_id] = time.time()
         
@@ -1303,12 +1582,12 @@ class ContextManager:
         if session_id not in self.contexts:
             # If user_id is provided, check if we have a stored profile
             if user_id and user_id in self.user_profiles:
-                context = ConversationContext(session_id, user_id)
+                context = self._new_context(session_id, user_id)
                 context.user_profile = self.user_profiles[user_id]
                 context.user_profile.start_session()
             else:
                 # Create a new context with an optional user ID
-                context = ConversationContext(session_id, user_id)
+                context = self._new_context(session_id, user_id)
                 
                 # If user_id is provided, load user profile from storage
                 if user_id and self.profile_storage_path:
@@ -1333,6 +1612,12 @@ class ContextManager:
         
         return self.contexts[session_id]
     
+    def _new_context(self, session_id: str, user_id: Optional[str]) -> ConversationContext:
+        """Create a context with this manager's history settings."""
+        return ConversationContext(session_id, user_id,
+                                   history_limit=self.history_limit,
+                                   spill_dir=self.spill_dir)
+    
     def update_context(self, 
                      session_id: str, 
                      query_text: str, 
@@ -1670,38 +1955,100 @@ class ContextManager:
             Number of removed contexts
         """
         current_time = time.time()
+        expiry_time = self.expiry_minutes * 60
         removed_count = 0
         
-        for session_id in list(self.contexts.keys()):
-            last_access = self.last_access_times.get(session_id, 0)
-            expiry_time = self.expiry_minutes * 60
-            
-            if current_time - last_access > expiry_time:
-                context = self.contexts[session_id]
+        # Detach expired contexts under the lock, finish them outside it
+        with self._lock:
+            expired = []
+            for session_id in list(self.contexts.keys()):
+                last_access = self.last_access_times.get(session_id, 0)
+                if current_time - last_access > expiry_time:
+                    expired.append(self.contexts.pop(session_id))
+                    self.last_access_times.pop(session_id, None)
+        
+        for context in expired:
+            # End the session in the user profile
+            if hasattr(context, 'user_profile'):
+                context.user_profile.end_session()
                 
-                # End the session in the user profile
-                if hasattr(context, 'user_profile'):
-                    context.user_profile.end_session()
-                    
-                    # If there's a user_id, persist the profile before removing
-                    if hasattr(context, 'user_id') and context.user_id:
-                        self.persist_user_profile(context.user_id)
-                
-                # Remove the context
-                del self.contexts[session_id]
-                
-                # Clean up the access time
-                if session_id in self.last_access_times:
-                    del self.last_access_times[session_id]
-                    
-                removed_count += 1
-                logger.info(f"Removed expired context for session_id={session_id}")
+                # If there's a user_id, persist the profile before removing
+                if hasattr(context, 'user_id') and context.user_id:
+                    self.persist_user_profile(context.user_id)
+                    self._release_user_profile(context.user_id)
+            
+            removed_count += 1
+            logger.info(f"Removed expired context for session_id={context.session_id}")
         
         if removed_count > 0:
             logger.info(f"Cleaned up {removed_count} expired contexts")
             
         return removed_count
     
+    def _release_user_profile(self, user_id: str):
+        """
+        Drop a persisted user profile from memory once no session uses it.
+        
+        Profiles are only released when profile storage is configured, so
+        they can be reloaded from disk on the user's next session.
+        """
+        if not self.profile_storage_path:
+            return
+        with self._lock:
+            in_use = any(c.user_id == user_id for c in self.contexts.values())
+            if not in_use:
+                self.user_profiles.pop(user_id, None)
+    
+    def start_sweeper(self, interval_seconds: float = 60.0):
+        """
+        Start a background thread that removes expired contexts periodically.
+        
+        The thread only holds a weak reference to the manager and exits when
+        the manager is stopped or garbage collected.
+        
+        Args:
+            interval_seconds: Seconds between sweeps
+        """
+        if self._sweeper_thread and self._sweeper_thread.is_alive():
+            return
+        
+        self._sweeper_stop.clear()
+        manager_ref = weakref.ref(self)
+        stop_event = self._sweeper_stop
+        
+        def sweep_loop():
+            while not stop_event.wait(interval_seconds):
+                manager = manager_ref()
+                if manager is None:
+                    return
+                try:
+                    removed = manager.cleanup_expired()
+                    manager.sweep_stats["sweeps"] += 1
+                    manager.sweep_stats["removed"] += removed
+                    manager.sweep_stats["last_sweep"] = time.time()
+                except Exception as e:
+                    logger.error(f"Error sweeping expired contexts: {str(e)}")
+                # Don't keep the manager alive between sweeps
+                del manager
+        
+        self._sweeper_thread = threading.Thread(
+            target=sweep_loop, name="context-sweeper", daemon=True
+        )
+        self._sweeper_thread.start()
+        logger.info(f"Started context sweeper with {interval_seconds}-second interval")
+    
+    def stop_sweeper(self, timeout: Optional[float] = None):
+        """
+        Stop the background sweeper thread.
+        
+        Args:
+            timeout: Seconds to wait for the thread to exit (None to wait indefinitely)
+        """
+        self._sweeper_stop.set()
+        if self._sweeper_thread:
+            self._sweeper_thread.join(timeout)
+            self._sweeper_thread = None
+    
     def get_session_stats(self) -> Dict[str, Any]:
         """
         Get statistics about active sessions and topic transitions.
@@ -1727,6 +2074,7 @@ class ContextManager:
         
         return {
             "active_sessions": active_sessions,
+            "sweeper": dict(self.sweep_stats),
             "top_topic_transitions": dict(top_transitions),
             "top_topics": dict(top_topics)
         } 
\ No newline at end of file
@@ -10,12 +10,19 @@ This package provides a robust data access layer with:
 """
 
 from services.data.db_connection_manager import DatabaseConnectionManager
+from services.data.async_db_connection_manager import AsyncDatabaseConnectionManager
 from services.data.query_cache_manager import QueryCacheManager
+from services.data.cache_backends import CacheBackend, SQLiteCacheBackend
+from services.data.columnar_result import ColumnarResult
 from services.data.enhanced_data_access import EnhancedDataAccess, get_data_access
 
 __all__ = [
     'DatabaseConnectionManager',
+    'AsyncDatabaseConnectionManager',
     'QueryCacheManager',
+    'CacheBackend',
+    'SQLiteCacheBackend',
+    'ColumnarResult',
     'EnhancedDataAccess',
     'get_data_access',
 ] 
\ No newline at end of file
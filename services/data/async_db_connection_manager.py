@@ -0,0 +1,337 @@
+"""
+Native asyncio database access for the Enhanced Data Access Layer.
+
+This module runs queries on an asyncpg connection pool, so concurrent chat
+sessions await their queries on the event loop instead of each holding a
+worker thread. Timeouts and task cancellation are forwarded to PostgreSQL,
+which stops the running statement and frees its pooled connection.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - asyncpg is an optional dependency
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+# Named parameters in the two styles the synchronous path accepts:
+# SQLAlchemy text() ":name" and DBAPI pyformat "%(name)s". String literals,
+# quoted identifiers and "::type" casts are matched first so they are skipped.
+_PARAM_RE = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|::)"
+    r"|%\((\w+)\)s"
+    r"|(?<![:\w]):(\w+)"
+)
+
+# asyncpg status strings end in the affected row count, e.g. "UPDATE 3"
+_STATUS_ROWCOUNT_RE = re.compile(r"(\d+)\s*$")
+
+_POSTGRES_SCHEMES = ("postgresql", "postgres")
+
+
+def supports_async_connection(connection_string: Any) -> bool:
+    """
+    Check whether a connection string can be served by the asyncpg pool.
+
+    Args:
+        connection_string: SQLAlchemy style database URL
+
+    Returns:
+        True if asyncpg is installed and the URL points to PostgreSQL
+    """
+    if asyncpg is None or not isinstance(connection_string, str):
+        return False
+    scheme = connection_string.split("://", 1)[0].split("+", 1)[0].lower()
+    return scheme in _POSTGRES_SCHEMES
+
+
+def convert_query_params(sql_query: str,
+                         params: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Any]]:
+    """
+    Rewrite named query parameters into asyncpg positional parameters.
+
+    A name used several times maps to the same positional parameter.
+
+    Args:
+        sql_query: SQL query with ":name" or "%(name)s" parameters
+        params: Parameter values by name
+
+    Returns:
+        Tuple of (query with $n parameters, positional argument list)
+
+    Raises:
+        KeyError: If the query references a parameter that was not provided
+    """
+    if not params:
+        return sql_query, []
+
+    positions: Dict[str, int] = {}
+    args: List[Any] = []
+
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        name = match.group(2) or match.group(3)
+        if name not in positions:
+            args.append(params[name])
+            positions[name] = len(args)
+        return f"${positions[name]}"
+
+    return _PARAM_RE.sub(replace, sql_query), args
+
+
+class AsyncDatabaseConnectionManager:
+    """
+    Asyncio database connection manager backed by an asyncpg pool.
+
+    Features:
+    - Async connection pool sized like the synchronous SQLAlchemy pool
+    - Server-side cancellation of timed out or cancelled queries
+    - Results in the same shape as DatabaseConnectionManager.execute_query
+    - One pool per event loop, since asyncpg pools are bound to their loop
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the async connection manager.
+
+        Args:
+            config: Dictionary containing configuration options including:
+                - connection_string: PostgreSQL connection string
+                - pool_size: Minimum async pool size (default: 8)
+                - max_overflow: Extra connections above pool_size (default: 5)
+                - pool_timeout: Timeout for acquiring a connection (default: 8)
+                - pool_recycle: Idle connection lifetime in seconds (default: 600)
+                - default_timeout: Default query timeout in seconds (default: 30)
+                - application_name: Application name for connection tracking
+        """
+        if asyncpg is None:
+            raise ImportError("asyncpg is required for the async database path")
+
+        db_config = config.get("database", {})
+        connection_string = db_config.get("connection_string")
+
+        if not supports_async_connection(connection_string):
+            msg = "Async database access requires a PostgreSQL connection string"
+            logger.error(msg)
+            raise ValueError(msg)
+
+        # asyncpg takes a plain libpq URL without the SQLAlchemy driver suffix
+        scheme, rest = connection_string.split("://", 1)
+        self.dsn = f"{scheme.split('+', 1)[0]}://{rest}"
+
+        self.min_size = db_config.get("pool_size", 8)
+        self.max_size = self.min_size + db_config.get("max_overflow", 5)
+        self.pool_timeout = db_config.get("pool_timeout", 8)
+        self.pool_recycle = db_config.get("pool_recycle", 600)
+        self.default_timeout = db_config.get("default_timeout", 30)
+
+        self.server_settings = {}
+        application_name = db_config.get("application_name")
+        if application_name:
+            self.server_settings["application_name"] = application_name
+
+        # asyncpg pools are bound to the loop that created them. They are
+        # keyed by the loop itself (ids are reused once a loop is collected)
+        # and dropped when their loop is closed.
+        self._pools: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._pool_tasks: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+        self._pools_lock = threading.Lock()
+
+        self.stats = {
+            "total_queries": 0,
+            "successful_queries": 0,
+            "failed_queries": 0,
+            "timeouts": 0,
+            "cancelled": 0
+        }
+
+        logger.info(f"Initialized AsyncDatabaseConnectionManager with max_size={self.max_size}")
+
+    async def get_pool(self):
+        """
+        Get or create the connection pool for the running event loop.
+
+        Returns:
+            asyncpg Pool
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._pools_lock:
+            pool = self._pools.get(loop)
+            if pool is not None:
+                return pool
+            stale = self._evict_closed_loops()
+            task = self._pool_tasks.get(loop)
+            if task is None:
+                task = loop.create_task(self._create_pool())
+                self._pool_tasks[loop] = task
+
+        self._terminate_pools(stale)
+
+        try:
+            pool = await asyncio.shield(task)
+        finally:
+            with self._pools_lock:
+                if self._pool_tasks.get(loop) is task and task.done():
+                    del self._pool_tasks[loop]
+
+        with self._pools_lock:
+            self._pools[loop] = pool
+        return pool
+
+    def _evict_closed_loops(self) -> List[Any]:
+        """
+        Forget the pools and pending pool tasks of event loops that are closed.
+        Caller must hold the pools lock.
+
+        Returns:
+            The evicted pools, to be terminated outside the lock
+        """
+        for loop in [loop for loop in self._pool_tasks if loop.is_closed()]:
+            del self._pool_tasks[loop]
+
+        closed = [loop for loop in self._pools if loop.is_closed()]
+        return [self._pools.pop(loop) for loop in closed]
+
+    def _terminate_pools(self, pools: List[Any]):
+        """Terminate pools whose event loop is gone; they can no longer be closed gracefully."""
+        for pool in pools:
+            try:
+                pool.terminate()
+            except Exception as e:
+                logger.warning(f"Error terminating async pool of a closed event loop: {e}")
+        if pools:
+            logger.info(f"Dropped {len(pools)} async database pool(s) of closed event loops")
+
+    async def _create_pool(self):
+        """Create a new asyncpg connection pool."""
+        logger.info(f"Creating async database connection pool: min_size={self.min_size}, max_size={self.max_size}")
+        return await asyncpg.create_pool(
+            dsn=self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.pool_timeout,
+            max_inactive_connection_lifetime=self.pool_recycle,
+            server_settings=self.server_settings
+        )
+
+    async def execute_query(self,
+                            sql_query: str,
+                            params: Optional[Dict[str, Any]] = None,
+                            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Execute a SQL query on the async pool.
+
+        If the calling task is cancelled, asyncpg cancels the statement on the
+        server before the connection goes back to the pool, and the
+        CancelledError is re-raised to the caller.
+
+        Args:
+            sql_query: The SQL query to execute
+            params: Optional named parameters for the query
+            timeout: Optional timeout in seconds
+
+        Returns:
+            Dictionary containing results and execution metadata
+        """
+        start_time = time.time()
+        timeout = timeout or self.default_timeout
+
+        result = {
+            "success": False,
+            "results": None,
+            "error": None,
+            "error_type": None,
+            "execution_time": 0,
+            "row_count": 0,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        try:
+            query, args = convert_query_params(sql_query, params)
+            pool = await self.get_pool()
+
+            async with pool.acquire(timeout=self.pool_timeout) as connection:
+                if self._is_select_query(sql_query):
+                    records = await connection.fetch(query, *args, timeout=timeout)
+                    result["results"] = [dict(record) for record in records]
+                    result["row_count"] = len(records)
+                else:
+                    status = await connection.execute(query, *args, timeout=timeout)
+                    match = _STATUS_ROWCOUNT_RE.search(status or "")
+                    result["results"] = result["row_count"] = int(match.group(1)) if match else 0
+
+            result["data"] = result["results"]
+            result["success"] = True
+
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            logger.warning(f"Async query cancelled: {sql_query[:100]}...")
+            raise
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            result["error"] = f"Query execution timed out after {timeout} seconds"
+            result["error_type"] = "TimeoutError"
+        except Exception as e:
+            logger.warning(f"Async query failed: {str(e)}")
+            result["error"] = str(e)
+            result["error_type"] = type(e).__name__
+        finally:
+            result["execution_time"] = max(0.001, time.time() - start_time)
+            self.stats["total_queries"] += 1
+            if result["success"]:
+                self.stats["successful_queries"] += 1
+            else:
+                self.stats["failed_queries"] += 1
+
+        return result
+
+    def _is_select_query(self, sql_query: str) -> bool:
+        """
+        Check if a query returns rows.
+
+        Args:
+            sql_query: SQL query to check
+
+        Returns:
+            True if the query is a SELECT (or WITH ... SELECT) query
+        """
+        normalized = sql_query.strip().lower()
+        return normalized.startswith(("select", "with", "show", "explain"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get async pool and query statistics.
+
+        Returns:
+            Dictionary with query counts and per-loop pool sizes
+        """
+        with self._pools_lock:
+            stale = self._evict_closed_loops()
+            pools = list(self._pools.values())
+        self._terminate_pools(stale)
+
+        return {
+            **self.stats,
+            "pools": len(pools),
+            "pool_size": sum(pool.get_size() for pool in pools),
+            "idle_connections": sum(pool.get_idle_size() for pool in pools),
+            "max_size": self.max_size
+        }
+
+    async def close(self):
+        """Close the connection pool owned by the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool.close()
+            logger.info("Async database connection pool closed")
@@ -0,0 +1,388 @@
+"""
+Shared storage backends for the query cache.
+
+QueryCacheManager keeps an in-process cache of recent results. A backend adds
+a second tier that every worker process on the host can read and write, along
+with an invalidation stream so that a write seen by one worker evicts the
+matching entries from every other worker's in-process cache.
+
+Only standard library modules are used, so the SQLite backend can run in local
+tests without any outside services.
+"""
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import stat
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Shared tier file used when the configuration does not name one
+DEFAULT_SQLITE_PATH = os.path.join("cache", "query_cache.sqlite3")
+
+
+class CacheBackend(ABC):
+    """
+    Interface for a cache tier shared between processes.
+
+    Entries are opaque values addressed by the cache keys generated by
+    QueryCacheManager. Each backend instance has a unique origin id so that a
+    process can skip invalidation events it published itself.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Get a live entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (data, expires, execution_time), or None on a miss
+        """
+
+    @abstractmethod
+    def set(self,
+            key: str,
+            data: Any,
+            expires: float,
+            query: str,
+            tables: Iterable[str],
+            execution_time: float):
+        """
+        Store an entry.
+
+        Args:
+            key: Cache key
+            data: The result to cache
+            expires: Expiration timestamp
+            query: SQL query string (used for pattern invalidation)
+            tables: Tables the query reads from
+            execution_time: How long the query took to execute
+        """
+
+    @abstractmethod
+    def invalidate(self,
+                   table_name: Optional[str] = None,
+                   pattern: Optional[str] = None,
+                   complete: bool = False) -> int:
+        """
+        Remove matching entries and publish an invalidation event.
+
+        Args:
+            table_name: Optional table name to invalidate entries for
+            pattern: Optional regex pattern to match against queries
+            complete: Whether to invalidate the entire cache
+
+        Returns:
+            Number of entries removed
+        """
+
+    @abstractmethod
+    def poll_invalidations(self) -> List[Tuple[Optional[str], Optional[str], bool]]:
+        """
+        Fetch invalidation events published by other origins since the last poll.
+
+        Returns:
+            List of (table_name, pattern, complete) tuples in publish order
+        """
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache backend stored in a SQLite database file.
+
+    Every process opening the same file shares the cached results and the
+    invalidation stream. The database runs in WAL mode so that readers in one
+    process do not block writers in another. Values are pickled, so the file
+    must only be writable by the application itself: it is created readable
+    and writable by its owner only, and a file others can write to is refused.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            expires REAL NOT NULL,
+            created REAL NOT NULL,
+            query TEXT NOT NULL,
+            execution_time REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_created ON cache_entries (created);
+        CREATE TABLE IF NOT EXISTS cache_entry_tables (
+            table_name TEXT NOT NULL,
+            key TEXT NOT NULL,
+            PRIMARY KEY (table_name, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_entry_tables_key ON cache_entry_tables (key);
+        CREATE TABLE IF NOT EXISTS cache_invalidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origin TEXT NOT NULL,
+            table_name TEXT,
+            pattern TEXT,
+            complete INTEGER NOT NULL,
+            created REAL NOT NULL
+        );
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_entries: int = 10000,
+                 event_retention: int = 3600,
+                 busy_timeout: float = 5.0):
+        """
+        Initialize the SQLite cache backend.
+
+        Args:
+            path: Database file path (default: cache/query_cache.sqlite3)
+            max_entries: Maximum number of shared entries before the oldest are dropped
+            event_retention: Seconds to keep invalidation events
+            busy_timeout: Seconds to wait on a locked database
+        """
+        super().__init__()
+        self.path = path or DEFAULT_SQLITE_PATH
+        self.max_entries = max_entries
+        self.event_retention = event_retention
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        _secure_database_file(self.path)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=busy_timeout,
+            isolation_level=None,  # Autocommit; explicit transactions below
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function("REGEXP", 2, self._regexp, deterministic=True)
+        self._conn.executescript(self._SCHEMA)
+
+        # Only events published after we opened the file are relevant
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()
+        self._last_event_id = row[0]
+        self._writes_since_prune = 0
+
+        logger.info(f"Initialized SQLiteCacheBackend at {self.path}")
+
+    @staticmethod
+    def _regexp(pattern: str, value: str) -> bool:
+        """REGEXP implementation registered with SQLite."""
+        return value is not None and re.search(pattern, value, re.IGNORECASE) is not None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires, execution_time FROM cache_entries "
+                "WHERE key = ? AND expires >= ?",
+                (key, time.time())
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            return pickle.loads(row[0]), row[1], row[2]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable shared cache entry {key}: {e}")
+            return None
+
+    def set(self,
+            key: str,
+            data: Any,
+            expires: float,
+            query: str,
+            tables: Iterable[str],
+            execution_time: float):
+        payload = sqlite3.Binary(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(key, data, expires, created, query, execution_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, payload, expires, now, query, execution_time)
+                )
+                self._conn.execute("DELETE FROM cache_entry_tables WHERE key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO cache_entry_tables (table_name, key) VALUES (?, ?)",
+                    [(table, key) for table in tables]
+                )
+
+                # Pruning is batched rather than paid on every write
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(now)
+                    self._writes_since_prune = 0
+
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def invalidate(self,
+                   table_name: Optional[str] = None,
+                   pattern: Optional[str] = None,
+                   complete: bool = False) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if complete:
+                    removed = self._conn.execute("DELETE FROM cache_entries").rowcount
+                    self._conn.execute("DELETE FROM cache_entry_tables")
+                else:
+                    keys = set()
+                    if table_name:
+                        keys.update(row[0] for row in self._conn.execute(
+                            "SELECT key FROM cache_entry_tables WHERE table_name = ?",
+                            (table_name.lower(),)
+                        ))
+                    if pattern:
+                        keys.update(row[0] for row in self._conn.execute(
+                            "SELECT key FROM cache_entries WHERE query REGEXP ?",
+                            (pattern,)
+                        ))
+                    removed = self._delete_keys(keys)
+
+                self._conn.execute(
+                    "INSERT INTO cache_invalidations (origin, table_name, pattern, complete, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.origin, table_name, pattern, int(complete), time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return removed
+
+    def poll_invalidations(self) -> List[Tuple[Optional[str], Optional[str], bool]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, origin, table_name, pattern, complete FROM cache_invalidations "
+                "WHERE id > ? ORDER BY id",
+                (self._last_event_id,)
+            ).fetchall()
+
+        if not rows:
+            return []
+
+        self._last_event_id = rows[-1][0]
+        return [
+            (table_name, pattern, bool(complete))
+            for _, origin, table_name, pattern, complete in rows
+            if origin != self.origin
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the shared store.
+
+        Returns:
+            Dictionary with entry and event counts
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            events = self._conn.execute("SELECT COUNT(*) FROM cache_invalidations").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "entries": entries, "invalidation_events": events}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _delete_keys(self, keys: Iterable[str]) -> int:
+        """Delete entries and their table links. Caller must hold the lock."""
+        keys = [(key,) for key in keys]
+        if not keys:
+            return 0
+        self._conn.executemany("DELETE FROM cache_entry_tables WHERE key = ?", keys)
+        before = self._conn.total_changes
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", keys)
+        return self._conn.total_changes - before
+
+    def _prune(self, now: float):
+        """Drop expired entries, entries over capacity and old events. Caller must hold the lock."""
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT key FROM cache_entries WHERE expires < ?", (now,)
+        )]
+        self._delete_keys(expired)
+
+        count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        if count > self.max_entries:
+            oldest = [row[0] for row in self._conn.execute(
+                "SELECT key FROM cache_entries ORDER BY created LIMIT ?",
+                (count - self.max_entries,)
+            )]
+            self._delete_keys(oldest)
+
+        self._conn.execute(
+            "DELETE FROM cache_invalidations WHERE created < ?", (now - self.event_retention,)
+        )
+
+
+def _secure_database_file(path: str):
+    """
+    Create a database file readable and writable by its owner only, or check an existing one.
+
+    SQLite gives the -wal and -shm files the permissions of the database file.
+
+    Raises:
+        PermissionError: If the existing file belongs to another user or others can write to it
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except FileExistsError:
+        info = os.stat(path)
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise PermissionError(f"Shared cache file {path} belongs to another user")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Shared cache file {path} is writable by other users")
+    else:
+        os.close(fd)
+
+
+def create_cache_backend(cache_config: Dict[str, Any]) -> Optional[CacheBackend]:
+    """
+    Create the shared cache backend named in the cache configuration.
+
+    Args:
+        cache_config: The "cache" section of the configuration, using:
+            - backend: "memory" (default, no shared tier) or "sqlite"
+            - backend_path: Database file path for the sqlite backend
+              (default: cache/query_cache.sqlite3)
+            - backend_max_entries: Maximum number of shared entries (default: 10000)
+
+    Returns:
+        A CacheBackend instance, or None for the in-process cache only
+    """
+    backend = cache_config.get("backend", "memory")
+
+    if backend in (None, "memory"):
+        return None
+
+    if backend == "sqlite":
+        return SQLiteCacheBackend(
+            path=cache_config.get("backend_path"),
+            max_entries=cache_config.get("backend_max_entries", 10000)
+        )
+
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,415 @@
+"""
+Compact columnar representation for cached query results.
+
+Query results usually arrive as a list of row dicts (or a DataFrame) in which
+the same item names, statuses and categories repeat on every row. Storing them
+column by column lets numeric columns live in flat numpy arrays and repeated
+values be dictionary-encoded into small integer codes, which takes a fraction
+of the memory of the row dicts and has an exact, buffer-based size.
+"""
+import logging
+import pickle
+import zlib
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column encodings
+NUMERIC = "numeric"        # Flat numpy array plus optional null mask
+DICTIONARY = "dictionary"  # Integer codes into a table of distinct values
+CATEGORICAL = "categorical"  # Dictionary codes of a pandas categorical column
+OBJECT = "object"          # Pickled values that cannot be encoded otherwise
+
+# Dictionary encoding only pays off when values actually repeat
+_MAX_DICTIONARY_RATIO = 0.5
+
+
+class ColumnarResult:
+    """
+    Immutable, column-oriented copy of a tabular query result.
+
+    Each column is stored as one of:
+    - numeric: a numpy array (int, float, bool or datetime) and a null mask
+    - dictionary: integer codes plus the distinct values, with strings packed
+      into a single UTF-8 buffer and an offsets array
+    - categorical: a dictionary column that was a pandas categorical, along
+      with whether its categories are ordered
+    - object: a pickled list for values that are neither numeric nor hashable
+
+    Buffers above ``compress_min_bytes`` can optionally be zlib-compressed.
+    ``nbytes`` is the exact sum of the stored buffers.
+    """
+
+    __slots__ = ("columns", "row_count", "source_format", "compressed", "nbytes", "_columns_data")
+
+    def __init__(self,
+                 columns: List[Any],
+                 row_count: int,
+                 source_format: str,
+                 columns_data: List[Tuple],
+                 compressed: bool):
+        self.columns = columns
+        self.row_count = row_count
+        self.source_format = source_format
+        self.compressed = compressed
+        self._columns_data = columns_data
+        self.nbytes = sum(_buffer_size(buf) for col in columns_data for buf in col[1:4])
+
+    @classmethod
+    def from_rows(cls,
+                  rows: List[Dict[str, Any]],
+                  compress: bool = False,
+                  compress_min_bytes: int = 4096) -> Optional["ColumnarResult"]:
+        """
+        Encode a list of row dicts.
+
+        Args:
+            rows: Rows that all share the same keys in the same order
+            compress: Whether to compress large buffers
+            compress_min_bytes: Smallest buffer worth compressing
+
+        Returns:
+            ColumnarResult, or None if the rows are not uniformly shaped
+        """
+        if not rows or not isinstance(rows[0], dict):
+            return None
+
+        columns = list(rows[0])
+        for row in rows:
+            if not isinstance(row, dict) or len(row) != len(columns) or list(row) != columns:
+                return None
+
+        columns_data = [
+            _encode_values([row[name] for row in rows], compress, compress_min_bytes)
+            for name in columns
+        ]
+        return cls(columns, len(rows), "rows", columns_data, compress)
+
+    @classmethod
+    def from_dataframe(cls,
+                       df: pd.DataFrame,
+                       compress: bool = False,
+                       compress_min_bytes: int = 4096) -> Optional["ColumnarResult"]:
+        """
+        Encode a DataFrame.
+
+        Args:
+            df: DataFrame with a default RangeIndex and unique column names
+            compress: Whether to compress large buffers
+            compress_min_bytes: Smallest buffer worth compressing
+
+        Returns:
+            ColumnarResult, or None if the frame cannot be represented
+        """
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            return None
+        if not df.columns.is_unique:
+            return None
+
+        columns_data = []
+        for name in df.columns:
+            series = df[name]
+            dtype = series.dtype
+
+            if isinstance(dtype, pd.CategoricalDtype):
+                codes = np.asarray(series.array.codes)
+                column = _dictionary_column(codes, list(dtype.categories), compress, compress_min_bytes)
+                columns_data.append((CATEGORICAL,) + column[1:] + (bool(dtype.ordered),))
+            elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+                values = series.to_numpy()
+                columns_data.append((
+                    NUMERIC,
+                    _maybe_compress(values, compress, compress_min_bytes),
+                    None
+                ))
+            else:
+                columns_data.append(_encode_values(
+                    series.tolist(), compress, compress_min_bytes
+                ))
+
+        return cls(list(df.columns), len(df), "dataframe", columns_data, compress)
+
+    @classmethod
+    def encode(cls,
+               result: Any,
+               compress: bool = False,
+               compress_min_bytes: int = 4096) -> Optional["ColumnarResult"]:
+        """
+        Encode a result if it is tabular.
+
+        Args:
+            result: List of row dicts or DataFrame
+            compress: Whether to compress large buffers
+            compress_min_bytes: Smallest buffer worth compressing
+
+        Returns:
+            ColumnarResult, or None if the result is not tabular
+        """
+        try:
+            if isinstance(result, pd.DataFrame):
+                return cls.from_dataframe(result, compress, compress_min_bytes)
+            if isinstance(result, list):
+                return cls.from_rows(result, compress, compress_min_bytes)
+        except Exception as e:
+            logger.debug(f"Result not encoded as columnar: {e}")
+        return None
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Build a DataFrame from the stored buffers.
+
+        Columns get the dtypes pandas would infer from the original rows or
+        had in the original frame: dictionary columns are expanded into
+        object columns, and only columns that were categorical to begin with
+        come back as categoricals. The frame owns its data, so callers can
+        modify it without changing the cached result.
+
+        Returns:
+            DataFrame with one column per stored column
+        """
+        data = {}
+        for name, column in zip(self.columns, self._columns_data):
+            kind = column[0]
+
+            if kind == NUMERIC:
+                if column[2] is None:
+                    data[name] = _load_array(column[1]).copy()
+                else:
+                    # Let pandas infer from the values with None, as it does for rows
+                    data[name] = _decode_numeric(column)
+            elif kind == DICTIONARY:
+                data[name] = _expand_dictionary(_load_array(column[1]), _load_dictionary(column))
+            elif kind == CATEGORICAL:
+                data[name] = pd.Categorical.from_codes(
+                    _load_array(column[1]).copy(),
+                    dtype=pd.CategoricalDtype(_load_dictionary(column), ordered=column[4]),
+                    validate=False
+                )
+            else:
+                data[name] = pickle.loads(_load_bytes(column[1]))
+
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        Materialize the result as a list of row dicts.
+
+        Returns:
+            List of dicts keyed by column name
+        """
+        column_values = []
+        for column in self._columns_data:
+            kind = column[0]
+
+            if kind == NUMERIC:
+                column_values.append(_decode_numeric(column))
+            elif kind in (DICTIONARY, CATEGORICAL):
+                column_values.append(
+                    _decode_dictionary(_load_array(column[1]), _load_dictionary(column))
+                )
+            else:
+                column_values.append(pickle.loads(_load_bytes(column[1])))
+
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in zip(*column_values)]
+
+    def to_original(self) -> Union[List[Dict[str, Any]], pd.DataFrame]:
+        """Decode back into the shape the result had when it was encoded."""
+        if self.source_format == "dataframe":
+            return self.to_dataframe()
+        return self.to_rows()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __repr__(self) -> str:
+        return (f"ColumnarResult(rows={self.row_count}, columns={len(self.columns)}, "
+                f"nbytes={self.nbytes}, compressed={self.compressed})")
+
+
+def _encode_values(values: List[Any], compress: bool, compress_min_bytes: int) -> Tuple:
+    """Pick the most compact encoding for one column of Python values."""
+    present = [value for value in values if value is not None]
+    mask = None
+    if len(present) != len(values):
+        mask = np.fromiter((value is None for value in values), dtype=np.bool_, count=len(values))
+
+    kind = _numeric_kind(present)
+    if kind is not None:
+        fill = {"b": False, "i": 0, "f": 0.0}[kind]
+        dtype = {"b": np.bool_, "i": np.int64, "f": np.float64}[kind]
+        try:
+            array = np.array([fill if value is None else value for value in values], dtype=dtype)
+        except OverflowError:
+            array = None
+        if array is not None:
+            return (
+                NUMERIC,
+                _maybe_compress(array, compress, compress_min_bytes),
+                _maybe_compress(mask, compress, compress_min_bytes) if mask is not None else None
+            )
+
+    # Dictionary-encode hashable values that repeat
+    try:
+        index: Dict[Any, int] = {}
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+            else:
+                # Key on type as well so that 1, 1.0 and True stay distinct
+                codes[i] = index.setdefault((type(value), value), len(index))
+    except TypeError:
+        index = None
+
+    if index is not None and len(index) <= max(1, len(values) * _MAX_DICTIONARY_RATIO):
+        dictionary = [value for _, value in index]
+        return _dictionary_column(codes, dictionary, compress, compress_min_bytes)
+
+    return (OBJECT, _maybe_compress(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL),
+                                    compress, compress_min_bytes), None)
+
+
+def _numeric_kind(values: List[Any]) -> Optional[str]:
+    """Return "b", "i" or "f" if every value has that exact numeric type."""
+    if not values:
+        return None
+
+    if all(isinstance(value, (bool, np.bool_)) for value in values):
+        return "b"
+    if all(isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+           for value in values):
+        return "i"
+    if all(isinstance(value, (float, np.floating)) for value in values):
+        return "f"
+    return None
+
+
+def _dictionary_column(codes: np.ndarray,
+                       dictionary: List[Any],
+                       compress: bool,
+                       compress_min_bytes: int) -> Tuple:
+    """Build a dictionary-encoded column with the narrowest code type."""
+    size = len(dictionary)
+    if size < 2 ** 7:
+        code_dtype = np.int8
+    elif size < 2 ** 15:
+        code_dtype = np.int16
+    else:
+        code_dtype = np.int32
+    codes = codes.astype(code_dtype, copy=False)
+
+    if all(isinstance(value, str) for value in dictionary):
+        # Pack strings Arrow-style: one UTF-8 buffer plus offsets
+        encoded = [value.encode("utf-8") for value in dictionary]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return (
+            DICTIONARY,
+            _maybe_compress(codes, compress, compress_min_bytes),
+            _maybe_compress(b"".join(encoded), compress, compress_min_bytes),
+            _maybe_compress(offsets, compress, compress_min_bytes)
+        )
+
+    return (
+        DICTIONARY,
+        _maybe_compress(codes, compress, compress_min_bytes),
+        _maybe_compress(pickle.dumps(dictionary, protocol=pickle.HIGHEST_PROTOCOL),
+                        compress, compress_min_bytes),
+        None
+    )
+
+
+def _load_dictionary(column: Tuple) -> List[Any]:
+    """Decode the distinct values of a dictionary or categorical column."""
+    values, offsets = column[2], column[3]
+    if offsets is None:
+        return pickle.loads(_load_bytes(values))
+
+    buffer = _load_bytes(values)
+    bounds = _load_array(offsets).tolist()
+    return [buffer[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def _decode_dictionary(codes: np.ndarray, dictionary: List[Any]) -> List[Any]:
+    """Expand dictionary codes back into values, mapping -1 to None."""
+    lookup = dictionary + [None]  # codes of -1 index the trailing None
+    return [lookup[code] for code in codes.tolist()]
+
+
+def _expand_dictionary(codes: np.ndarray, dictionary: List[Any]) -> np.ndarray:
+    """Expand dictionary codes into an object array, mapping -1 to None."""
+    lookup = np.empty(len(dictionary) + 1, dtype=object)
+    for i, value in enumerate(dictionary):
+        lookup[i] = value  # element-wise so tuple values are not broadcast
+    lookup[-1] = None
+    return lookup[codes]
+
+
+def _decode_numeric(column: Tuple) -> List[Any]:
+    """Decode a numeric column into Python values, mapping nulls to None."""
+    values = _load_array(column[1])
+    if values.dtype.kind in "mM":
+        decoded = pd.Series(values, copy=False).tolist()
+    else:
+        decoded = values.tolist()
+    if column[2] is not None:
+        mask = _load_array(column[2])
+        decoded = [None if null else value for value, null in zip(decoded, mask.tolist())]
+    return decoded
+
+
+class _Compressed:
+    """A zlib-compressed buffer along with what is needed to restore it."""
+
+    __slots__ = ("payload", "dtype", "shape")
+
+    def __init__(self, payload: bytes, dtype: Optional[str], shape: Optional[Tuple[int, ...]]):
+        self.payload = payload
+        self.dtype = dtype
+        self.shape = shape
+
+
+def _maybe_compress(buffer: Union[np.ndarray, bytes], compress: bool, compress_min_bytes: int):
+    """Compress a buffer when requested and when it is large enough to benefit."""
+    if not compress or _buffer_size(buffer) < compress_min_bytes:
+        return buffer
+
+    if isinstance(buffer, np.ndarray):
+        payload = zlib.compress(np.ascontiguousarray(buffer).tobytes(), 6)
+        if len(payload) >= buffer.nbytes:
+            return buffer
+        return _Compressed(payload, buffer.dtype.str, buffer.shape)
+
+    payload = zlib.compress(buffer, 6)
+    if len(payload) >= len(buffer):
+        return buffer
+    return _Compressed(payload, None, None)
+
+
+def _load_array(buffer) -> np.ndarray:
+    """Return a stored array, decompressing it if needed."""
+    if isinstance(buffer, _Compressed):
+        return np.frombuffer(zlib.decompress(buffer.payload), dtype=np.dtype(buffer.dtype)).reshape(buffer.shape)
+    return buffer
+
+
+def _load_bytes(buffer) -> bytes:
+    """Return stored bytes, decompressing them if needed."""
+    if isinstance(buffer, _Compressed):
+        return zlib.decompress(buffer.payload)
+    return buffer
+
+
+def _buffer_size(buffer) -> int:
+    """Exact size in bytes of a stored buffer."""
+    if buffer is None:
+        return 0
+    if isinstance(buffer, np.ndarray):
+        return buffer.nbytes
+    if isinstance(buffer, _Compressed):
+        return len(buffer.payload)
+    return len(buffer)
@@ -8,8 +8,6 @@ from typing import Dict, Any, List, Optional, Tuple, Union, Callable
 import logging
 import time
 import pandas as pd
-import threading
-import queue
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 import re
@@ -24,6 +22,9 @@ from sqlalchemy.pool import NullPool
 from sqlalchemy.engine import Engine
 from unittest.mock import MagicMock
 
+from services.data.query_stats import QueryStatsRecorder
+from services.utils.query_executor import PooledQueryExecutor
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,6 +58,11 @@ class DatabaseConnectionManager:
                 - retry_delay: Delay between retries in seconds (default: 0.5)
                 - default_timeout: Default query timeout in seconds (default: 30)
                 - application_name: Application name for connection tracking
+                - server_timeout_grace: Seconds added to the server-side statement
+                  timeout beyond the client-side timeout (default: 1.0)
+                - max_history: Size of the recent query ring buffer (default: 100)
+                - max_recent_errors: Size of the recent error ring buffer (default: 20)
+                - history_sample_every: Keep every Nth query in the history (default: 1)
         """
         # Extract database configuration
         db_config = config.get("database", {})
@@ -106,25 +112,23 @@ class DatabaseConnectionManager:
                 # For testing with mocks, create a simple in-memory SQLite database
                 self.engine = create_engine("sqlite:///:memory:", poolclass=NullPool)
         
-        # Performance monitoring
-        self.query_stats = {
-            "total_queries": 0,
-            "successful_queries": 0,
-            "failed_queries": 0,
-            "total_execution_time": 0,
-            "average_execution_time": 0,
-            "slowest_query": {"query": None, "time": 0},
-            "fastest_query": {"query": None, "time": float('inf')},
-            "recent_errors": [],
-            "query_history": []
-        }
+        # Queries run on a bounded pool sized to match the connection pool
+        self._query_executor = PooledQueryExecutor(
+            self.engine,
+            max_workers=pool_size + max_overflow,
+            server_timeout_grace=db_config.get("server_timeout_grace", 1.0),
+            thread_name_prefix="db-query"
+        )
         
-        # Maximum history to keep
+        # Performance monitoring: per-thread counters, latency histograms
+        # and ring buffers, merged when metrics are read
         self.max_history = db_config.get("max_history", 100)
         self.max_recent_errors = db_config.get("max_recent_errors", 20)
-        
-        # Thread safety for stats
-        self._stats_lock = threading.Lock()
+        self._query_stats = QueryStatsRecorder(
+            max_history=self.max_history,
+            max_recent_errors=self.max_recent_errors,
+            history_sample_every=db_config.get("history_sample_every", 1)
+        )
         
         # Cache for table metadata
         self.metadata_cache = {}
@@ -314,7 +318,10 @@ class DatabaseConnectionManager:
                               params: Dict[str, Any],
                               timeout: int) -> Union[pd.DataFrame, int]:
         """
-        Execute a query with a timeout using threading.
+        Execute a query with a timeout on the pooled query executor.
+        
+        On timeout the running statement is cancelled, so the worker thread and
+        its connection go back to their pools.
         
         Args:
             sql_query: SQL query to execute
@@ -328,47 +335,18 @@ class DatabaseConnectionManager:
             TimeoutError: If the query times out
             Various SQL exceptions: If query execution fails
         """
-        result_queue = queue.Queue()
-        error_queue = queue.Queue()
-        
-        def worker():
-            """Worker thread to execute the query."""
+        def work(connection):
             try:
-                with self.get_connection() as connection:
-                    if self._is_select_query(sql_query):
-                        # For SELECT queries, return a DataFrame
-                        df = pd.read_sql(sql_query, connection, params=params)
-                        result_queue.put(df)
-                    else:
-                        # For non-SELECT queries, execute and return affected rows
-                        result = connection.execute(text(sql_query), params)
-                        result_queue.put(result.rowcount)
+                if self._is_select_query(sql_query):
+                    # For SELECT queries, return a DataFrame
+                    return pd.read_sql(sql_query, connection, params=params)
+                # For non-SELECT queries, execute and return affected rows
+                return connection.execute(text(sql_query), params).rowcount
             except Exception as e:
-                # Put the exception in the error queue
-                error_queue.put(e)
                 logger.error(f"Query execution error: {str(e)}")
+                raise
         
-        # Start the worker thread
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
-        
-        # Wait for the thread to complete with timeout
-        thread.join(timeout)
-        
-        # Check if thread is still alive (timeout occurred)
-        if thread.is_alive():
-            raise TimeoutError(f"Query execution timed out after {timeout} seconds")
-        
-        # Check for errors
-        if not error_queue.empty():
-            raise error_queue.get()
-        
-        # Get the result
-        if not result_queue.empty():
-            return result_queue.get()
-        else:
-            raise RuntimeError("Query execution failed with an unknown error")
+        return self._query_executor.run(work, timeout, self.get_connection)
     
     def _record_query_performance(self, 
                                   sql_query: str,
@@ -386,98 +364,24 @@ class DatabaseConnectionManager:
             error_type: Error message if failed
             row_count: Number of rows affected or returned
         """
-        with self._stats_lock:
-            self.query_stats["total_queries"] += 1
-            
-            if success:
-                self.query_stats["successful_queries"] += 1
-            else:
-                self.query_stats["failed_queries"] += 1
-                
-                # Record the error
-                if error_type:
-                    self.query_stats["recent_errors"].append({
-                        "timestamp": datetime.now().isoformat(),
-                        "query": sql_query,
-                        "error": error_type
-                    })
-                    
-                    # Trim errors list if it gets too long
-                    if len(self.query_stats["recent_errors"]) > self.max_recent_errors:
-                        self.query_stats["recent_errors"] = self.query_stats["recent_errors"][-self.max_recent_errors:]
-            
-            # Update timings
-            self.query_stats["total_execution_time"] += execution_time
-            self.query_stats["average_execution_time"] = (
-                self.query_stats["total_execution_time"] / self.query_stats["total_queries"]
-            )
-            
-            # Update slowest/fastest query if applicable
-            if success:
-                truncated_query = sql_query[:100] + "..." if len(sql_query) > 100 else sql_query
-                
-                if execution_time > self.query_stats["slowest_query"]["time"]:
-                    self.query_stats["slowest_query"] = {
-                        "query": truncated_query,
-                        "time": execution_time
-                    }
-                
-                if execution_time < self.query_stats["fastest_query"]["time"]:
-                    self.query_stats["fastest_query"] = {
-                        "query": truncated_query,
-                        "time": execution_time
-                    }
-            
-            # Record in history
-            query_record = {
-                "timestamp": datetime.now().isoformat(),
-                "query": sql_query[:100] + "..." if len(sql_query) > 100 else sql_query,
-                "execution_time": execution_time,
-                "success": success,
-                "rows": row_count
-            }
-            
-            self.query_stats["query_history"].append(query_record)
-            
-            # Trim history if it gets too long
-            if len(self.query_stats["query_history"]) > self.max_history:
-                self.query_stats["query_history"] = self.query_stats["query_history"][-self.max_history:]
+        self._query_stats.record(sql_query, execution_time, success, error_type, row_count)
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """
         Get query performance metrics.
         
         Returns:
-            Dict containing query performance statistics
+            Dict containing query performance statistics, including p50/p95/p99
+            latencies overall ("latency") and per table ("latency_by_table")
         """
-        with self._stats_lock:
-            # Create a copy to avoid thread safety issues
-            metrics = {
-                "total_queries": self.query_stats["total_queries"],
-                "successful_queries": self.query_stats["successful_queries"],
-                "failed_queries": self.query_stats["failed_queries"],
-                "success_rate": (
-                    self.query_stats["successful_queries"] / self.query_stats["total_queries"] * 100
-                    if self.query_stats["total_queries"] > 0 else 0
-                ),
-                "average_execution_time": self.query_stats["average_execution_time"],
-                "slowest_query": self.query_stats["slowest_query"],
-                "fastest_query": (
-                    self.query_stats["fastest_query"]
-                    if self.query_stats["fastest_query"]["query"] is not None else None
-                ),
-                "recent_errors": self.query_stats["recent_errors"][-5:],  # Last 5 errors
-                "recent_queries": self.query_stats["query_history"][-5:]  # Last 5 queries
-            }
-            
-            return metrics
+        return self._query_stats.get_metrics()
     
     def get_connection_pool_status(self) -> Dict[str, Any]:
         """
         Get connection pool status information.
         
         Returns:
-            Dict containing pool statistics
+            Dict containing pool and query executor statistics
         """
         pool = self.engine.pool
         status = {
@@ -486,6 +390,7 @@ class DatabaseConnectionManager:
             "checkedout": pool.checkedout(),
             "overflow": pool.overflow(),
             "checkedout_overflow": pool.overflow_checkedout(),
+            "executor": self._query_executor.get_stats(),
         }
         
         return status
@@ -715,6 +620,8 @@ class DatabaseConnectionManager:
     
     def __del__(self):
         """Cleanup resources when the object is destroyed."""
+        if hasattr(self, '_query_executor'):
+            self._query_executor.shutdown(wait=False)
         if hasattr(self, 'engine'):
             self.engine.dispose()
             logger.info("Database connection pool disposed") 
\ No newline at end of file
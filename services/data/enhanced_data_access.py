@@ -15,11 +15,26 @@ from datetime import datetime
 import uuid
 
 from services.data.db_connection_manager import DatabaseConnectionManager
+from services.data.async_db_connection_manager import (
+    AsyncDatabaseConnectionManager, supports_async_connection
+)
+from services.data.columnar_result import ColumnarResult
 from services.data.query_cache_manager import QueryCacheManager
+from services.data.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
+def _copy_shared_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a query result shared by coalesced callers, down to its rows."""
+    data = result.get("data")
+    if isinstance(data, list):
+        data = [dict(row) if isinstance(row, dict) else row for row in data]
+    elif isinstance(data, pd.DataFrame):
+        data = data.copy()
+    return {**result, "data": data}
+
+
 class EnhancedDataAccess:
     """
     Enhanced data access layer that provides a unified interface for database operations.
@@ -31,7 +46,8 @@ class EnhancedDataAccess:
     - Query result standardization
     - Schema introspection
     - Transparent handling of database errors
-    - Asynchronous query execution support
+    - Asynchronous query execution support, natively on asyncpg for PostgreSQL
+    - Coalescing of identical concurrent cache misses into one execution
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -56,6 +72,12 @@ class EnhancedDataAccess:
         self._loop = None
         self._async_mode = config.get("async_mode", False)
         
+        # Native async pool; other databases fall back to the thread pool
+        self.async_db_manager = None
+        connection_string = config.get("database", {}).get("connection_string")
+        if self._async_mode and supports_async_connection(connection_string):
+            self.async_db_manager = AsyncDatabaseConnectionManager(config)
+        
         # Register for cache invalidation when schema changes
         self.cache_manager.register_invalidation_callback(self._cache_invalidation_callback)
         
@@ -65,6 +87,9 @@ class EnhancedDataAccess:
         self._transaction_depth = 0
         self._transaction_lock = threading.RLock()
         
+        # Identical concurrent cache misses share one database execution
+        self._single_flight = SingleFlight()
+        
         logger.info("Initialized EnhancedDataAccess layer")
     
     def _get_event_loop(self):
@@ -82,7 +107,8 @@ class EnhancedDataAccess:
                      params: Optional[Dict[str, Any]] = None,
                      use_cache: bool = True,
                      cache_ttl: Optional[int] = None,
-                     timeout: Optional[int] = None) -> Dict[str, Any]:
+                     timeout: Optional[int] = None,
+                     columnar: bool = False) -> Dict[str, Any]:
         """
         Execute a SQL query with integrated caching.
         
@@ -92,6 +118,8 @@ class EnhancedDataAccess:
             use_cache: Whether to use query caching (default: True)
             cache_ttl: Cache time-to-live in seconds (default: None = use default)
             timeout: Query timeout in seconds (default: None = use default)
+            columnar: Return cache hits as a ColumnarResult instead of row dicts
+                (default: False)
             
         Returns:
             Dict containing query results and metadata
@@ -115,16 +143,20 @@ class EnhancedDataAccess:
         
         # Determine if this is a SELECT query
         is_select = sql_query.strip().upper().startswith("SELECT")
+        cacheable = use_cache and is_select and self._transaction_depth == 0
         
         # Try to get from cache if it's a cacheable query
-        if use_cache and is_select and self._transaction_depth == 0:
-            cache_hit, cached_data = self.cache_manager.get(sql_query, params)
+        if cacheable:
+            if columnar:
+                cache_hit, cached_data = self.cache_manager.get(sql_query, params, columnar=True)
+            else:
+                cache_hit, cached_data = self.cache_manager.get(sql_query, params)
             
             if cache_hit:
                 result["success"] = True
                 result["data"] = cached_data
                 result["cached"] = True
-                result["rowcount"] = len(cached_data) if isinstance(cached_data, list) else 0
+                result["rowcount"] = len(cached_data) if isinstance(cached_data, (list, ColumnarResult)) else 0
                 result["total_time"] = time.time() - start_time
                 
                 logger.debug(f"Query {result['query_id']} served from cache in {result['total_time']:.4f}s")
@@ -132,22 +164,16 @@ class EnhancedDataAccess:
         
         # Not in cache or not using cache, execute the query
         try:
-            # Execute query through DB manager
-            db_result = self.db_manager.execute_query(
-                sql_query=sql_query,
-                params=params,
-                timeout=timeout
-            )
-            
-            # Process the result
-            if db_result["success"]:
-                result["success"] = True
-                result["data"] = db_result["data"] if is_select else db_result["rowcount"]
-                result["rowcount"] = db_result["rowcount"]
-                result["execution_time"] = db_result["execution_time"]
+            def execute_and_cache():
+                # Execute query through DB manager
+                db_result = self.db_manager.execute_query(
+                    sql_query=sql_query,
+                    params=params,
+                    timeout=timeout
+                )
                 
-                # Store in cache if criteria are met
-                if use_cache and is_select and self._transaction_depth == 0:
+                # Store in cache before the flight ends, so later callers hit it
+                if db_result["success"] and cacheable:
                     self.cache_manager.set(
                         query=sql_query,
                         params=params,
@@ -156,6 +182,23 @@ class EnhancedDataAccess:
                         execution_time=db_result["execution_time"],
                         ttl=cache_ttl
                     )
+                return db_result
+            
+            # Concurrent identical reads wait on one execution; writes never coalesce
+            if cacheable:
+                cache_key = self.cache_manager.generate_cache_key(sql_query, params)
+                db_result, coalesced = self._single_flight.do(cache_key, execute_and_cache,
+                                                              share=_copy_shared_result)
+                result["coalesced"] = coalesced
+            else:
+                db_result = execute_and_cache()
+            
+            # Process the result
+            if db_result["success"]:
+                result["success"] = True
+                result["data"] = db_result["data"] if is_select else db_result["rowcount"]
+                result["rowcount"] = db_result["rowcount"]
+                result["execution_time"] = db_result["execution_time"]
             else:
                 result["error"] = db_result["error"]
                 
@@ -195,12 +238,14 @@ class EnhancedDataAccess:
               - Empty DataFrame on failure
               - metadata contains success, timing, and error information
         """
+        # Cache hits come back columnar and become a frame without row dicts
         result = self.execute_query(
             sql_query=sql_query,
             params=params,
             use_cache=use_cache,
             cache_ttl=cache_ttl,
-            timeout=timeout
+            timeout=timeout,
+            columnar=True
         )
         
         metadata = {
@@ -213,7 +258,9 @@ class EnhancedDataAccess:
             "query_id": result["query_id"]
         }
         
-        if result["success"] and isinstance(result["data"], list):
+        if result["success"] and isinstance(result["data"], ColumnarResult):
+            return result["data"].to_dataframe(), metadata
+        elif result["success"] and isinstance(result["data"], list):
             return pd.DataFrame(result["data"]), metadata
         else:
             return pd.DataFrame(), metadata
@@ -244,7 +291,11 @@ class EnhancedDataAccess:
         start_time = time.time()
         result = None
         
-        if use_cache:
+        # Only plain reads outside a transaction are cached or coalesced
+        is_select = sql_query.strip().upper().startswith("SELECT")
+        cacheable = use_cache and is_select and self._transaction_depth == 0
+        
+        if cacheable:
             # Use the async cache method
             cache_hit, cached_result = await self.cache_manager.get_async(sql_query, params)
             if cache_hit:
@@ -254,27 +305,38 @@ class EnhancedDataAccess:
         if not cache_hit:
             # Execute query asynchronously
             try:
-                result = await self._execute_query_async(sql_query, params, timeout)
-                
-                # Cache the successful result if needed
-                if use_cache and result["success"]:
-                    is_select = sql_query.strip().lower().startswith("select")
-                    execution_time = result.get("execution_time", 0)
+                async def execute_and_cache():
+                    query_result = await self._execute_query_async(sql_query, params, timeout)
                     
-                    # Use the async cache set method
-                    await self.cache_manager.set_async(
-                        sql_query, 
-                        params, 
-                        result, 
-                        is_select=is_select,
-                        execution_time=execution_time,
-                        ttl=cache_ttl
+                    # Cache the successful result if needed
+                    if cacheable and query_result["success"]:
+                        execution_time = query_result.get("execution_time", 0)
+                        
+                        # Use the async cache set method
+                        await self.cache_manager.set_async(
+                            sql_query, 
+                            params, 
+                            query_result, 
+                            is_select=is_select,
+                            execution_time=execution_time,
+                            ttl=cache_ttl
+                        )
+                        
+                        # Track tables for cache invalidation
+                        if self.cache_manager.should_cache_query(sql_query):
+                            for table in self._extract_tables_from_query(sql_query):
+                                self._tracked_tables.add(table)
+                    return query_result
+                
+                # Concurrent identical reads wait on one execution; writes never coalesce
+                if cacheable:
+                    cache_key = self.cache_manager.generate_cache_key(sql_query, params)
+                    shared_result, coalesced = await self._single_flight.do_async(
+                        cache_key, execute_and_cache, share=_copy_shared_result
                     )
-                    
-                    # Track tables for cache invalidation
-                    if self.cache_manager.should_cache_query(sql_query):
-                        for table in self._extract_tables_from_query(sql_query):
-                            self._tracked_tables.add(table)
+                    result = {**shared_result, "coalesced": coalesced}
+                else:
+                    result = await execute_and_cache()
             except Exception as e:
                 logger.error(f"Async query execution error: {str(e)}")
                 result = {
@@ -330,20 +392,29 @@ class EnhancedDataAccess:
         """
         start_time = time.time()
         query_id = str(uuid.uuid4())
+        timeout = timeout if timeout else self.config.get("query_timeout", 30)
         
         try:
-            # Get or create an event loop
-            loop = self._get_event_loop()
-            
-            # Define the lambda function to execute in thread pool
-            sync_execution = lambda: self.db_manager.execute_query(
-                sql_query=sql_query, 
-                params=params, 
-                timeout=timeout if timeout else self.config.get("query_timeout", 30)
-            )
-            
-            # Run the synchronous execute_query in a thread pool
-            db_result = await loop.run_in_executor(None, sync_execution)
+            if self.async_db_manager is not None:
+                # Awaited on the event loop; cancelling this task cancels the query
+                db_result = await self.async_db_manager.execute_query(
+                    sql_query=sql_query,
+                    params=params,
+                    timeout=timeout
+                )
+            else:
+                # Get or create an event loop
+                loop = self._get_event_loop()
+                
+                # Define the lambda function to execute in thread pool
+                sync_execution = lambda: self.db_manager.execute_query(
+                    sql_query=sql_query, 
+                    params=params, 
+                    timeout=timeout
+                )
+                
+                # Run the synchronous execute_query in a thread pool
+                db_result = await loop.run_in_executor(None, sync_execution)
             
             execution_time = time.time() - start_time
             
@@ -351,7 +422,7 @@ class EnhancedDataAccess:
             result = {
                 "success": db_result["success"],
                 "data": db_result["data"] if "data" in db_result else [],
-                "rowcount": db_result["rowcount"] if "rowcount" in db_result else 0,
+                "rowcount": db_result.get("rowcount", db_result.get("row_count", 0)),
                 "execution_time": execution_time,
                 "total_time": execution_time,
                 "cached": False,
@@ -365,17 +436,9 @@ class EnhancedDataAccess:
             return result
             
         except asyncio.CancelledError:
+            # Propagate so callers waiting on the task see the cancellation
             logger.warning(f"Async query execution cancelled: {sql_query[:100]}...")
-            return {
-                "success": False,
-                "data": [],
-                "rowcount": 0,
-                "execution_time": time.time() - start_time,
-                "total_time": time.time() - start_time,
-                "cached": False,
-                "query_id": query_id,
-                "error": "Query execution was cancelled"
-            }
+            raise
         except Exception as e:
             error_msg = f"Async query execution error: {str(e)}"
             logger.error(error_msg)
@@ -613,6 +676,8 @@ class EnhancedDataAccess:
         metrics = {
             "database": db_metrics,
             "cache": cache_stats,
+            "coalescing": self._single_flight.get_stats(),
+            "async_database": self.async_db_manager.get_stats() if self.async_db_manager else None,
             "overall": {
                 "last_query_time": self._last_query_time,
                 "query_count": self._query_count,
@@ -622,6 +687,11 @@ class EnhancedDataAccess:
         
         return metrics
     
+    async def close_async(self):
+        """Close the native async connection pool for the running event loop."""
+        if self.async_db_manager is not None:
+            await self.async_db_manager.close()
+    
     def invalidate_cache(self, 
                         table_name: Optional[str] = None, 
                         pattern: Optional[str] = None, 
@@ -10,20 +10,75 @@ import json
 import time
 import threading
 import asyncio
-from typing import Dict, Any, Optional, List, Tuple, Union, Callable
+import heapq
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Union, Callable, Set
 from datetime import datetime, timedelta
 import pandas as pd
 import re
 
+from services.data.cache_backends import CacheBackend, create_cache_backend
+from services.data.columnar_result import ColumnarResult
+
 logger = logging.getLogger(__name__)
 
+# Table extraction: literals and comments are stripped first so that text
+# such as "WHERE note = 'from orders'" does not register a table.
+_SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_IDENTIFIER = r'(?:"[^"]+"|[a-z_][\w$]*)(?:\s*\.\s*(?:"[^"]+"|[a-z_][\w$]*))?'
+# Keywords that can follow a table reference and must not be read as its alias
+_NOT_ALIAS = (
+    r'(?!(?:join|inner|left|right|full|cross|natural|on|using|where|group|order|'
+    r'having|limit|offset|union|intersect|except|window|set|values|returning)\b)'
+)
+_ALIAS = r'(?:\s+(?:as\s+)?' + _NOT_ALIAS + r'[a-z_]\w*)?'
+_TABLE_REF_RE = re.compile(
+    r'\b(from|join|into|update)\s+(' + _IDENTIFIER + _ALIAS +
+    r'(?:\s*,\s*' + _IDENTIFIER + _ALIAS + r')*)'
+)
+_TABLE_NAME_RE = re.compile(r'^\s*(' + _IDENTIFIER + r')')
+_NOT_TABLES = frozenset({"select", "lateral", "only", "unnest", "generate_series"})
+
+
+def extract_query_tables(query: str) -> Set[str]:
+    """
+    Extract the tables a query reads from or writes to.
+    
+    Schema-qualified names are indexed under both the qualified and the
+    bare table name, so invalidating "orders" also matches "public.orders".
+    
+    Args:
+        query: SQL query string
+        
+    Returns:
+        Set of lowercased table names
+    """
+    stripped = _SQL_LITERAL_RE.sub(" ", query.lower())
+    tables = set()
+    
+    for match in _TABLE_REF_RE.finditer(stripped):
+        for ref in match.group(2).split(","):
+            name_match = _TABLE_NAME_RE.match(ref)
+            if not name_match:
+                continue
+            name = re.sub(r'\s+', '', name_match.group(1)).replace('"', '')
+            if name in _NOT_TABLES:
+                continue
+            tables.add(name)
+            if "." in name:
+                tables.add(name.rsplit(".", 1)[1])
+    
+    return tables
+
 
 class QueryCacheManager:
     """
     Manages caching of database query results to improve performance.
     
     Features:
-    - Time-based cache expiration
+    - Time-based cache expiration with batched purging of expired entries
+    - O(1) LRU eviction
+    - Compact columnar storage of tabular results
     - Memory usage limits
     - Cache statistics and monitoring
     - Partial result caching
@@ -49,6 +104,12 @@ class QueryCacheManager:
                 - uncacheable_tables: List of tables whose queries should not be cached
                 - adaptive_ttl: Whether to use adaptive TTL (default: False)
                 - pattern_caching: Whether to cache based on query patterns (default: False)
+                - backend: Shared cache tier, "memory" (default, none) or "sqlite"
+                - backend_path: Database file shared by worker processes (sqlite backend)
+                - sync_interval: Seconds between polls of the shared invalidation stream (default: 1.0)
+                - columnar_storage: Store tabular results column-wise (default: True)
+                - compress_results: zlib-compress large columnar buffers (default: False)
+                - compress_min_bytes: Smallest buffer worth compressing (default: 4096)
         """
         cache_config = config.get("cache", {})
         
@@ -71,13 +132,27 @@ class QueryCacheManager:
         self.pattern_caching = cache_config.get("pattern_caching", False)
         self.prefetch_related = cache_config.get("prefetch_related", False)
         
-        # Cache storage
-        self._cache = {}  # {key: {"data": data, "timestamp": timestamp, "expires": expires}}
+        # Result storage format
+        self.columnar_storage = cache_config.get("columnar_storage", True)
+        self.compress_results = cache_config.get("compress_results", False)
+        self.compress_min_bytes = cache_config.get("compress_min_bytes", 4096)
+        
+        # Cache storage, kept in LRU order (least recently used first)
+        self._cache = OrderedDict()  # {key: {"data": data, "timestamp": timestamp, "expires": expires}}
         self._memory_usage = 0  # Estimated memory usage in bytes
         
+        # Min-heap of (expires, key) used to purge expired entries in batches.
+        # Entries are removed lazily, so stale heap items are skipped on pop.
+        self._expiry_heap = []  # [(expires, key)]
+        
+        # Reverse index used for table invalidation
+        self._table_index = {}  # {table: {cache_keys}}
+        
         # Query pattern tracking for adaptive TTL
         self._query_frequency = {}  # {pattern: count}
         self._query_patterns = {}  # {pattern: {query_keys}}
+        self._key_patterns = {}  # {cache_key: pattern}
+        self._pattern_tables = {}  # {table: {patterns}}
         
         # Cache statistics
         self.stats = {
@@ -89,6 +164,8 @@ class QueryCacheManager:
             "memory_usage_bytes": 0,
             "hit_rate": 0.0,
             "pattern_hits": 0,
+            "backend_hits": 0,
+            "remote_invalidations": 0,
             "avg_query_time": 0.0,
             "cache_efficiency": 0.0  # (hits * avg_query_time) / total_overhead
         }
@@ -103,17 +180,27 @@ class QueryCacheManager:
         # Async lock for thread-safe async operations
         self._async_lock = asyncio.Lock()
         
+        # Optional tier shared with other worker processes
+        self._backend: Optional[CacheBackend] = create_cache_backend(cache_config)
+        self.sync_interval = cache_config.get("sync_interval", 1.0)
+        self._last_sync = 0.0
+        
         logger.info(f"Initialized QueryCacheManager with max_size={self.max_size}, "
                    f"default_ttl={self.default_ttl}s, enabled={self.enabled}, "
                    f"adaptive_ttl={self.adaptive_ttl}, pattern_caching={self.pattern_caching}")
     
-    def get(self, query: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+    def get(self,
+            query: str,
+            params: Optional[Dict[str, Any]] = None,
+            columnar: bool = False) -> Tuple[bool, Any]:
         """
         Get a cached query result if available.
         
         Args:
             query: The SQL query string
             params: Query parameters
+            columnar: Return tabular results as the stored ColumnarResult
+                instead of decoding them (default: False)
             
         Returns:
             Tuple of (cache_hit, result)
@@ -125,6 +212,10 @@ class QueryCacheManager:
         
         cache_key = self._generate_cache_key(query, params)
         
+        # Backend I/O, unpickling and decoding run outside the lock, so
+        # in-memory hits on other threads never wait for them
+        self._sync_invalidations()
+        
         with self._cache_lock:
             # Direct cache lookup
             cache_entry = self._cache.get(cache_key)
@@ -137,8 +228,9 @@ class QueryCacheManager:
                     self._update_hit_rate()
                     return False, None
                 
-                # Update access time for LRU strategy
+                # Update access time and LRU position
                 cache_entry["last_accessed"] = time.time()
+                self._cache.move_to_end(cache_key)
                 
                 # Update query frequency for adaptive TTL
                 if self.adaptive_ttl:
@@ -146,26 +238,44 @@ class QueryCacheManager:
                 
                 self.stats["hits"] += 1
                 self._update_hit_rate()
-                
-                logger.debug(f"Cache hit for query: {query[:50]}...")
-                return True, cache_entry["data"]
+                stored = cache_entry["data"]
+        
+        if cache_entry:
+            logger.debug(f"Cache hit for query: {query[:50]}...")
+            return True, self._decode_result(stored, columnar)
+        
+        # Fall back to the tier shared with other workers
+        if self._backend is not None:
+            backend_hit, backend_result = self._get_from_backend(cache_key, query, columnar)
             
+            if backend_hit:
+                with self._cache_lock:
+                    self.stats["backend_hits"] += 1
+                    self.stats["hits"] += 1
+                    self._update_hit_rate()
+                logger.debug(f"Shared cache hit for query: {query[:50]}...")
+                return True, backend_result
+        
+        with self._cache_lock:
             # If pattern caching is enabled, try to find a similar pattern
+            pattern_hit = False
             if self.pattern_caching:
                 pattern_key = self._extract_query_pattern(query)
-                pattern_hit, pattern_result = self._check_pattern_cache(pattern_key, query, params)
-                
-                if pattern_hit:
-                    self.stats["pattern_hits"] += 1
-                    self.stats["hits"] += 1
-                    self._update_hit_rate()
-                    logger.debug(f"Pattern cache hit for query: {query[:50]}...")
-                    return True, pattern_result
+                pattern_hit, stored = self._check_pattern_cache(pattern_key, query, params, columnar=True)
             
-            # No hit found
-            self.stats["misses"] += 1
+            if pattern_hit:
+                self.stats["pattern_hits"] += 1
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
             self._update_hit_rate()
-            return False, None
+        
+        if pattern_hit:
+            logger.debug(f"Pattern cache hit for query: {query[:50]}...")
+            return True, self._decode_result(stored, columnar)
+        
+        # No hit found
+        return False, None
     
     async def get_async(self, query: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
         """
@@ -186,6 +296,8 @@ class QueryCacheManager:
         cache_key = self._generate_cache_key(query, params)
         
         async with self._async_lock:
+            self._sync_invalidations()
+            
             # Direct cache lookup
             cache_entry = self._cache.get(cache_key)
             
@@ -197,8 +309,9 @@ class QueryCacheManager:
                     self._update_hit_rate()
                     return False, None
                 
-                # Update access time for LRU strategy
+                # Update access time and LRU position
                 cache_entry["last_accessed"] = time.time()
+                self._cache.move_to_end(cache_key)
                 
                 # Update query frequency for adaptive TTL
                 if self.adaptive_ttl:
@@ -208,7 +321,18 @@ class QueryCacheManager:
                 self._update_hit_rate()
                 
                 logger.debug(f"Async cache hit for query: {query[:50]}...")
-                return True, cache_entry["data"]
+                return True, self._decode_result(cache_entry["data"])
+            
+            # Fall back to the tier shared with other workers
+            if self._backend is not None:
+                backend_hit, backend_result = self._get_from_backend(cache_key, query)
+                
+                if backend_hit:
+                    self.stats["backend_hits"] += 1
+                    self.stats["hits"] += 1
+                    self._update_hit_rate()
+                    logger.debug(f"Async shared cache hit for query: {query[:50]}...")
+                    return True, backend_result
             
             # If pattern caching is enabled, try to find a similar pattern
             if self.pattern_caching:
@@ -277,44 +401,19 @@ class QueryCacheManager:
         
         cache_key = self._generate_cache_key(query, params)
         
-        # Estimate memory usage of this entry
+        # Store tabular results in compact columnar form
+        result = self._encode_result(result)
         entry_size = self._estimate_size(result)
         
         with self._cache_lock:
-            # If we need to make room, evict entries
-            while (len(self._cache) >= self.max_size or 
-                   self._memory_usage + entry_size > self.max_memory_mb * 1024 * 1024):
-                self._evict_lru_entry()
-            
-            # Store in cache
-            self._cache[cache_key] = {
-                "data": result,
-                "timestamp": current_time,
-                "expires": expires,
-                "last_accessed": current_time,
-                "size": entry_size,
-                "query": query[:100] + "..." if len(query) > 100 else query,
-                "execution_time": execution_time,
-                "access_count": 1
-            }
-            
-            self._memory_usage += entry_size
-            self.stats["memory_usage_bytes"] = self._memory_usage
-            self.stats["inserts"] += 1
-            
-            # Update average query time
-            total_queries = self.stats["hits"] + self.stats["misses"] + 1  # Add 1 to prevent division by zero
-            self.stats["avg_query_time"] = (
-                (self.stats["avg_query_time"] * (total_queries - 1) + execution_time) / total_queries
-            )
-            
-            # If pattern caching is enabled, store the query pattern
-            if self.pattern_caching:
-                self._store_query_pattern(query, cache_key)
+            self._insert_entry(cache_key, query, result, entry_size,
+                               current_time, expires, execution_time)
             
             logger.debug(f"Cached query result for {actual_ttl}s: {query[:50]}...")
-            
-            return True
+        
+        self._set_in_backend(cache_key, query, result, expires, execution_time)
+        
+        return True
             
     async def set_async(self, 
                         query: str, 
@@ -366,44 +465,19 @@ class QueryCacheManager:
         
         cache_key = self._generate_cache_key(query, params)
         
-        # Estimate memory usage of this entry
+        # Store tabular results in compact columnar form
+        result = self._encode_result(result)
         entry_size = self._estimate_size(result)
         
         async with self._async_lock:
-            # If we need to make room, evict entries
-            while (len(self._cache) >= self.max_size or 
-                   self._memory_usage + entry_size > self.max_memory_mb * 1024 * 1024):
-                self._evict_lru_entry()
-            
-            # Store in cache
-            self._cache[cache_key] = {
-                "data": result,
-                "timestamp": current_time,
-                "expires": expires,
-                "last_accessed": current_time,
-                "size": entry_size,
-                "query": query[:100] + "..." if len(query) > 100 else query,
-                "execution_time": execution_time,
-                "access_count": 1
-            }
-            
-            self._memory_usage += entry_size
-            self.stats["memory_usage_bytes"] = self._memory_usage
-            self.stats["inserts"] += 1
-            
-            # Update average query time
-            total_queries = self.stats["hits"] + self.stats["misses"] + 1  # Add 1 to prevent division by zero
-            self.stats["avg_query_time"] = (
-                (self.stats["avg_query_time"] * (total_queries - 1) + execution_time) / total_queries
-            )
-            
-            # If pattern caching is enabled, store the query pattern
-            if self.pattern_caching:
-                self._store_query_pattern(query, cache_key)
+            self._insert_entry(cache_key, query, result, entry_size,
+                               current_time, expires, execution_time)
             
             logger.debug(f"Async cached query result for {actual_ttl}s: {query[:50]}...")
-            
-            return True
+        
+        self._set_in_backend(cache_key, query, result, expires, execution_time)
+        
+        return True
     
     def invalidate(self, 
                   table_name: Optional[str] = None, 
@@ -412,6 +486,9 @@ class QueryCacheManager:
         """
         Invalidate cache entries based on specified criteria.
         
+        When a shared backend is configured the invalidation is also applied
+        there and published to the other worker processes.
+        
         Args:
             table_name: Optional table name to invalidate entries for
             pattern: Optional regex pattern to match against queries
@@ -424,61 +501,13 @@ class QueryCacheManager:
             return 0
         
         with self._cache_lock:
-            if complete:
-                # Clear the entire cache
-                count = len(self._cache)
-                self._cache = {}
-                self._memory_usage = 0
-                self.stats["invalidations"] += count
-                
-                # Also clear pattern cache if enabled
-                if self.pattern_caching:
-                    with self._pattern_lock:
-                        self._query_patterns = {}
-                        self._query_frequency = {}
-                
-                # Notify callbacks
-                self._notify_invalidation_callbacks(None, None, True)
-                
-                logger.info(f"Invalidated entire query cache ({count} entries)")
-                return count
-            
-            # Create a list of keys to remove
-            keys_to_remove = []
-            
-            # Match based on table name or pattern
-            for key, cache_entry in self._cache.items():
-                query = cache_entry.get("query", "")
-                query_lower = query.lower()
-                
-                # Match by table name
-                if table_name and (
-                    f" {table_name.lower()} " in query_lower or 
-                    f"from {table_name.lower()}" in query_lower or
-                    f"join {table_name.lower()}" in query_lower or
-                    f"into {table_name.lower()}" in query_lower or
-                    f"update {table_name.lower()}" in query_lower
-                ):
-                    keys_to_remove.append(key)
-                    
-                # Match by pattern
-                elif pattern and re.search(pattern, query, re.IGNORECASE):
-                    keys_to_remove.append(key)
-            
-            # Remove matched entries
-            for key in keys_to_remove:
-                self._evict_entry(key)
-                
-            # If pattern caching is enabled, also clean up query patterns
-            if self.pattern_caching and (table_name or pattern):
-                self._clean_query_patterns(table_name, pattern)
+            count = self._invalidate_entries(table_name, pattern, complete)
             
             # Notify callbacks
-            if keys_to_remove:
-                self._notify_invalidation_callbacks(table_name, pattern, False)
-                
-            logger.info(f"Invalidated {len(keys_to_remove)} cache entries based on criteria")
-            return len(keys_to_remove)
+            if complete or count:
+                self._notify_invalidation_callbacks(table_name, pattern, complete)
+        
+        return max(count, self._invalidate_backend(table_name, pattern, complete))
     
     async def invalidate_async(self, 
                               table_name: Optional[str] = None, 
@@ -499,60 +528,156 @@ class QueryCacheManager:
             return 0
         
         async with self._async_lock:
-            if complete:
-                # Clear the entire cache
-                count = len(self._cache)
-                self._cache = {}
-                self._memory_usage = 0
-                self.stats["invalidations"] += count
-                
-                # Also clear pattern cache if enabled
-                if self.pattern_caching:
-                    self._query_patterns = {}
-                    self._query_frequency = {}
-                
-                # Notify callbacks
-                await self._notify_invalidation_callbacks_async(None, None, True)
-                
-                logger.info(f"Async invalidated entire query cache ({count} entries)")
-                return count
+            count = self._invalidate_entries(table_name, pattern, complete)
+            
+            # Notify callbacks
+            if complete or count:
+                await self._notify_invalidation_callbacks_async(table_name, pattern, complete)
+        
+        return max(count, self._invalidate_backend(table_name, pattern, complete))
+    
+    def _invalidate_entries(self,
+                            table_name: Optional[str],
+                            pattern: Optional[str],
+                            complete: bool) -> int:
+        """
+        Remove matching entries from the in-process cache. Caller must hold the lock.
+        
+        Args:
+            table_name: Optional table name to invalidate entries for
+            pattern: Optional regex pattern to match against queries
+            complete: Whether to invalidate the entire cache
             
-            # Create a list of keys to remove
-            keys_to_remove = []
+        Returns:
+            Number of entries invalidated
+        """
+        if complete:
+            # Clear the entire cache
+            count = len(self._cache)
+            self._cache = OrderedDict()
+            self._expiry_heap = []
+            self._table_index = {}
+            self._memory_usage = 0
+            self.stats["memory_usage_bytes"] = 0
+            self.stats["invalidations"] += count
+            
+            # Also clear pattern cache if enabled
+            if self.pattern_caching:
+                with self._pattern_lock:
+                    self._reset_query_patterns()
             
-            # Match based on table name or pattern
-            for key, cache_entry in self._cache.items():
-                query = cache_entry.get("query", "")
-                query_lower = query.lower()
-                
-                # Match by table name
-                if table_name and (
-                    f" {table_name.lower()} " in query_lower or 
-                    f"from {table_name.lower()}" in query_lower or
-                    f"join {table_name.lower()}" in query_lower or
-                    f"into {table_name.lower()}" in query_lower or
-                    f"update {table_name.lower()}" in query_lower
-                ):
-                    keys_to_remove.append(key)
-                    
-                # Match by pattern
-                elif pattern and re.search(pattern, query, re.IGNORECASE):
-                    keys_to_remove.append(key)
+            logger.info(f"Invalidated entire query cache ({count} entries)")
+            return count
+        
+        keys_to_remove = self._collect_invalidation_keys(table_name, pattern)
+        
+        # Remove matched entries
+        for key in keys_to_remove:
+            self._evict_entry(key)
             
-            # Remove matched entries
-            for key in keys_to_remove:
-                self._evict_entry(key)
-                
-            # If pattern caching is enabled, also clean up query patterns
-            if self.pattern_caching and (table_name or pattern):
-                self._clean_query_patterns(table_name, pattern)
+        # If pattern caching is enabled, also clean up query patterns
+        if self.pattern_caching and (table_name or pattern):
+            self._clean_query_patterns(table_name, pattern)
+        
+        logger.info(f"Invalidated {len(keys_to_remove)} cache entries based on criteria")
+        return len(keys_to_remove)
+    
+    def _get_from_backend(self, cache_key: str, query: str, columnar: bool = False) -> Tuple[bool, Any]:
+        """
+        Look a key up in the shared backend and promote hits into this process.
+        
+        The lookup and decoding run without the lock; it is taken only to
+        install the entry.
+        
+        Args:
+            cache_key: Cache key to look up
+            query: SQL query string
+            columnar: Whether to leave tabular results encoded
             
-            # Notify callbacks
-            if keys_to_remove:
-                await self._notify_invalidation_callbacks_async(table_name, pattern, False)
-                
-            logger.info(f"Async invalidated {len(keys_to_remove)} cache entries based on criteria")
-            return len(keys_to_remove)
+        Returns:
+            Tuple of (hit, result)
+        """
+        try:
+            backend_entry = self._backend.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Shared cache lookup failed: {e}")
+            return False, None
+        
+        if backend_entry is None:
+            return False, None
+        
+        data, expires, execution_time = backend_entry
+        entry_size = self._estimate_size(data)
+        with self._cache_lock:
+            self._insert_entry(cache_key, query, data, entry_size,
+                               time.time(), expires, execution_time)
+        return True, self._decode_result(data, columnar)
+    
+    def _set_in_backend(self,
+                        cache_key: str,
+                        query: str,
+                        result: Any,
+                        expires: float,
+                        execution_time: float):
+        """Write an entry through to the shared backend, if one is configured."""
+        if self._backend is None:
+            return
+        
+        try:
+            self._backend.set(cache_key, result, expires, query,
+                              self._extract_tables(query), execution_time)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed: {e}")
+    
+    def _invalidate_backend(self,
+                            table_name: Optional[str],
+                            pattern: Optional[str],
+                            complete: bool) -> int:
+        """Apply and publish an invalidation to the shared backend, if one is configured."""
+        if self._backend is None:
+            return 0
+        
+        try:
+            return self._backend.invalidate(table_name, pattern, complete)
+        except Exception as e:
+            logger.error(f"Shared cache invalidation failed: {e}")
+            return 0
+    
+    def _sync_invalidations(self):
+        """
+        Apply invalidations published by other worker processes.
+        
+        Polling is throttled to once per sync_interval and runs without the
+        lock; the lock is taken only to apply the events.
+        """
+        if self._backend is None:
+            return
+        
+        with self._cache_lock:
+            now = time.time()
+            if now - self._last_sync < self.sync_interval:
+                return
+            self._last_sync = now
+        
+        try:
+            events = self._backend.poll_invalidations()
+        except Exception as e:
+            logger.warning(f"Polling shared cache invalidations failed: {e}")
+            return
+        
+        if not events:
+            return
+        
+        with self._cache_lock:
+            for table_name, pattern, complete in events:
+                self._invalidate_entries(table_name, pattern, complete)
+                self.stats["remote_invalidations"] += 1
+                self._notify_invalidation_callbacks(table_name, pattern, complete)
+    
+    def close(self):
+        """Release the shared backend, if one is configured."""
+        if self._backend is not None:
+            self._backend.close()
     
     def register_invalidation_callback(self, callback: Callable[[Optional[str], Optional[str], bool], None]):
         """
@@ -637,7 +762,8 @@ class QueryCacheManager:
                 "max_remaining_ttl": max_remaining_ttl,
                 "pattern_caching_enabled": self.pattern_caching,
                 "adaptive_ttl_enabled": self.adaptive_ttl,
-                "frequent_patterns": frequent_patterns
+                "frequent_patterns": frequent_patterns,
+                "shared_backend": type(self._backend).__name__ if self._backend else None
             }
             
             return stats
@@ -654,14 +780,112 @@ class QueryCacheManager:
                 max(total * 0.001, 1)  # Assuming 1ms cache lookup overhead
             )
     
+    def _insert_entry(self,
+                      cache_key: str,
+                      query: str,
+                      result: Any,
+                      entry_size: int,
+                      current_time: float,
+                      expires: float,
+                      execution_time: float):
+        """
+        Insert an entry, making room first. Caller must hold the cache lock.
+        
+        Args:
+            cache_key: Cache key for the entry
+            query: SQL query string
+            result: The result to cache
+            entry_size: Estimated size of the result in bytes
+            current_time: Insertion timestamp
+            expires: Expiration timestamp
+            execution_time: How long the query took to execute
+        """
+        # Replacing an existing key must not double count its memory
+        if cache_key in self._cache:
+            self._remove_entry(cache_key)
+        
+        tables = self._extract_tables(query)
+        
+        # Expired entries are dropped before any live entry is evicted
+        max_bytes = self.max_memory_mb * 1024 * 1024
+        if len(self._cache) >= self.max_size or self._memory_usage + entry_size > max_bytes:
+            self._purge_expired(current_time)
+        
+        # If we still need to make room, evict least recently used entries
+        while self._cache and (len(self._cache) >= self.max_size or
+                               self._memory_usage + entry_size > max_bytes):
+            self._evict_lru_entry()
+        
+        # Store in cache (appended as most recently used)
+        self._cache[cache_key] = {
+            "data": result,
+            "timestamp": current_time,
+            "expires": expires,
+            "last_accessed": current_time,
+            "size": entry_size,
+            "query": query[:100] + "..." if len(query) > 100 else query,
+            "execution_time": execution_time,
+            "access_count": 1,
+            "tables": tables
+        }
+        heapq.heappush(self._expiry_heap, (expires, cache_key))
+        for table in tables:
+            self._table_index.setdefault(table, set()).add(cache_key)
+        
+        self._memory_usage += entry_size
+        self.stats["memory_usage_bytes"] = self._memory_usage
+        self.stats["inserts"] += 1
+        
+        # Update average query time
+        total_queries = self.stats["hits"] + self.stats["misses"] + 1  # Add 1 to prevent division by zero
+        self.stats["avg_query_time"] = (
+            (self.stats["avg_query_time"] * (total_queries - 1) + execution_time) / total_queries
+        )
+        
+        # If pattern caching is enabled, store the query pattern
+        if self.pattern_caching:
+            self._store_query_pattern(query, cache_key)
+        
+        # Stale heap items accumulate when keys are evicted or replaced
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._compact_expiry_heap()
+    
+    def _purge_expired(self, now: Optional[float] = None) -> int:
+        """
+        Remove all expired entries in one pass over the expiry heap.
+        
+        Args:
+            now: Reference timestamp (defaults to the current time)
+            
+        Returns:
+            Number of entries removed
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        heap = self._expiry_heap
+        
+        while heap and heap[0][0] < now:
+            expires, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # Skip heap items left behind by evicted or replaced entries
+            if entry is not None and entry["expires"] == expires:
+                self._evict_entry(key)
+                removed += 1
+        
+        return removed
+    
+    def _compact_expiry_heap(self):
+        """Rebuild the expiry heap from the live entries, dropping stale items."""
+        self._expiry_heap = [(entry["expires"], key) for key, entry in self._cache.items()]
+        heapq.heapify(self._expiry_heap)
+    
     def _evict_lru_entry(self):
         """Evict the least recently used cache entry."""
         if not self._cache:
             return
             
-        # Find the least recently accessed entry
-        lru_key = min(self._cache.keys(), 
-                      key=lambda k: self._cache[k].get("last_accessed", 0))
+        # The first key in the ordered cache is the least recently used
+        lru_key = next(iter(self._cache))
         
         # Remove it
         self._evict_entry(lru_key)
@@ -673,24 +897,41 @@ class QueryCacheManager:
         Args:
             key: Cache key to evict
         """
-        if key not in self._cache:
-            return
+        if self._remove_entry(key) is not None:
+            self.stats["evictions"] += 1
+    
+    def _remove_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove a cache entry and release its memory accounting.
+        
+        The matching expiry heap item is left in place and skipped lazily.
+        
+        Args:
+            key: Cache key to remove
             
-        # Get the memory size before removing
-        cache_entry = self._cache[key]
-        entry_size = cache_entry.get("size", 0)
+        Returns:
+            The removed entry, or None if the key was not cached
+        """
+        cache_entry = self._cache.pop(key, None)
+        if cache_entry is None:
+            return None
+        
+        # Remove from the table index
+        for table in cache_entry.get("tables", ()):
+            keys = self._table_index.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._table_index[table]
         
         # Remove from pattern tracking if enabled
         if self.pattern_caching:
             self._remove_from_patterns(key)
         
-        # Remove the entry
-        del self._cache[key]
-        
         # Update memory usage
-        self._memory_usage = max(0, self._memory_usage - entry_size)
+        self._memory_usage = max(0, self._memory_usage - cache_entry.get("size", 0))
         self.stats["memory_usage_bytes"] = self._memory_usage
-        self.stats["evictions"] += 1
+        return cache_entry
     
     def _generate_cache_key(self, query: str, params: Optional[Dict[str, Any]]) -> str:
         """
@@ -719,6 +960,52 @@ class QueryCacheManager:
     # Make the generate_cache_key method public
     generate_cache_key = _generate_cache_key
         
+    def _encode_result(self, result: Any) -> Any:
+        """
+        Convert a tabular result into its columnar form for storage.
+        
+        Query metadata dicts with a "data" list are kept as dicts with only
+        the rows encoded. Anything that cannot be encoded is stored as is.
+        
+        Args:
+            result: The result to store
+            
+        Returns:
+            The value to keep in the cache
+        """
+        if not self.columnar_storage:
+            return result
+        
+        if isinstance(result, dict) and isinstance(result.get("data"), list):
+            encoded = ColumnarResult.encode(result["data"], self.compress_results, self.compress_min_bytes)
+            return {**result, "data": encoded} if encoded is not None else result
+        
+        encoded = ColumnarResult.encode(result, self.compress_results, self.compress_min_bytes)
+        return encoded if encoded is not None else result
+    
+    def _decode_result(self, stored: Any, columnar: bool = False) -> Any:
+        """
+        Convert a stored value back into the shape it was cached with.
+        
+        Args:
+            stored: The value kept in the cache
+            columnar: Leave ColumnarResult values encoded
+            
+        Returns:
+            The result as originally passed to set(), or with its tabular
+            part still a ColumnarResult if columnar is set
+        """
+        if columnar:
+            return stored
+        
+        if isinstance(stored, ColumnarResult):
+            return stored.to_original()
+        
+        if isinstance(stored, dict) and isinstance(stored.get("data"), ColumnarResult):
+            return {**stored, "data": stored["data"].to_original()}
+        
+        return stored
+    
     def _estimate_size(self, obj: Any) -> int:
         """
         Estimate the memory size of an object.
@@ -731,6 +1018,10 @@ class QueryCacheManager:
         """
         if obj is None:
             return 0
+        
+        # Columnar results know their exact size
+        if isinstance(obj, ColumnarResult):
+            return obj.nbytes
             
         # Handle pandas DataFrame
         if isinstance(obj, pd.DataFrame):
@@ -745,14 +1036,59 @@ class QueryCacheManager:
             
         # Handle dict with nested query metadata
         if isinstance(obj, dict) and "data" in obj:
+            metadata = {key: value for key, value in obj.items() if key != "data"}
             return (
                 self._estimate_size(obj.get("data", [])) + 
-                len(str(obj)) * 2  # Rough estimate for the metadata
+                len(str(metadata)) * 2  # Rough estimate for the metadata
             )
             
         # Fallback: use string representation size as a rough estimate
         return len(str(obj)) * 2  # Multiply by 2 for unicode overhead
     
+    def _extract_tables(self, query: str) -> Set[str]:
+        """
+        Extract the tables a query reads from or writes to.
+        
+        Args:
+            query: SQL query string
+            
+        Returns:
+            Set of lowercased table names
+        """
+        return extract_query_tables(query)
+    
+    # Make the extract_tables method public
+    extract_tables = _extract_tables
+    
+    def _collect_invalidation_keys(self,
+                                   table_name: Optional[str],
+                                   pattern: Optional[str]) -> List[str]:
+        """
+        Collect the cache keys matching a table name or regex pattern.
+        
+        Table lookups go through the reverse index and only touch affected
+        entries; regex patterns still need to be matched against each query.
+        
+        Args:
+            table_name: Table name to match
+            pattern: Regex pattern to match against queries
+            
+        Returns:
+            List of matching cache keys
+        """
+        keys = set()
+        
+        if table_name:
+            keys.update(self._table_index.get(table_name.lower(), ()))
+        
+        if pattern:
+            regex = re.compile(pattern, re.IGNORECASE)
+            for key, cache_entry in self._cache.items():
+                if key not in keys and regex.search(cache_entry.get("query", "")):
+                    keys.add(key)
+        
+        return list(keys)
+    
     def _should_cache_query(self, query: str) -> bool:
         """
         Determine if a query should be cached based on the tables it accesses.
@@ -769,16 +1105,7 @@ class QueryCacheManager:
         if not query_lower.strip().startswith("select"):
             return self.cache_non_select
         
-        # Extract table names (simplified extraction)
-        words = re.split(r'\s+', query_lower)
-        tables = set()
-        
-        # Find table names after FROM and JOIN
-        for i, word in enumerate(words):
-            if word in ("from", "join") and i + 1 < len(words):
-                # Get the next word as the table name
-                table = words[i + 1].strip('();,')
-                tables.add(table)
+        tables = self._extract_tables(query)
         
         # Special case for tests
         if "customers" in query_lower:
@@ -903,14 +1230,21 @@ class QueryCacheManager:
             # Initialize pattern entry if needed
             if pattern not in self._query_patterns:
                 self._query_patterns[pattern] = set()
+                for table in self._extract_tables(query):
+                    self._pattern_tables.setdefault(table, set()).add(pattern)
                 
             # Add this cache key to the pattern
             self._query_patterns[pattern].add(cache_key)
+            self._key_patterns[cache_key] = pattern
             
             # Update frequency counter
             self._query_frequency[pattern] = self._query_frequency.get(pattern, 0) + 1
     
-    def _check_pattern_cache(self, pattern: str, query: str, params: Optional[Dict[str, Any]]) -> Tuple[bool, Any]:
+    def _check_pattern_cache(self,
+                             pattern: str,
+                             query: str,
+                             params: Optional[Dict[str, Any]],
+                             columnar: bool = False) -> Tuple[bool, Any]:
         """
         Check if a query matches a cached pattern and return results if applicable.
         
@@ -918,6 +1252,7 @@ class QueryCacheManager:
             pattern: Query pattern to check
             query: Original query string
             params: Query parameters
+            columnar: Whether to leave tabular results encoded
             
         Returns:
             Tuple of (hit, result)
@@ -949,8 +1284,9 @@ class QueryCacheManager:
                     self._evict_entry(best_key)
                     return False, None
                 
-                # Update access time
+                # Update access time and LRU position
                 entry["last_accessed"] = time.time()
+                self._cache.move_to_end(best_key)
                 
                 # Update access count
                 if "access_count" in entry:
@@ -958,7 +1294,7 @@ class QueryCacheManager:
                 else:
                     entry["access_count"] = 1
                 
-                return True, entry["data"]
+                return True, self._decode_result(entry["data"], columnar)
                 
         return False, None
     
@@ -973,14 +1309,34 @@ class QueryCacheManager:
             return
             
         with self._pattern_lock:
-            # Find patterns containing this key
-            for pattern, keys in list(self._query_patterns.items()):
-                if cache_key in keys:
-                    keys.remove(cache_key)
-                    
-                    # Remove pattern if no keys left
-                    if not keys:
-                        del self._query_patterns[pattern]
+            pattern = self._key_patterns.pop(cache_key, None)
+            if pattern is None:
+                return
+            
+            keys = self._query_patterns.get(pattern)
+            if keys is not None:
+                keys.discard(cache_key)
+                
+                # Remove pattern if no keys left
+                if not keys:
+                    del self._query_patterns[pattern]
+                    self._unindex_pattern(pattern)
+    
+    def _unindex_pattern(self, pattern: str):
+        """Remove a pattern from the table index. Caller must hold the pattern lock."""
+        for table in self._extract_tables(pattern):
+            patterns = self._pattern_tables.get(table)
+            if patterns is not None:
+                patterns.discard(pattern)
+                if not patterns:
+                    del self._pattern_tables[table]
+    
+    def _reset_query_patterns(self):
+        """Clear all pattern tracking state. Caller must hold the pattern lock."""
+        self._query_patterns = {}
+        self._query_frequency = {}
+        self._key_patterns = {}
+        self._pattern_tables = {}
     
     def _clean_query_patterns(self, table_name: Optional[str], pattern: Optional[str]):
         """
@@ -994,26 +1350,22 @@ class QueryCacheManager:
             return
             
         with self._pattern_lock:
-            # Find patterns to remove
-            patterns_to_remove = []
-            
-            for query_pattern, keys in list(self._query_patterns.items()):
-                # Check if pattern references the table
-                if table_name and (
-                    f" {table_name.lower()} " in query_pattern or 
-                    f"from {table_name.lower()}" in query_pattern or
-                    f"join {table_name.lower()}" in query_pattern
-                ):
-                    patterns_to_remove.append(query_pattern)
-                    
-                # Check if pattern matches the regex
-                elif pattern and re.search(pattern, query_pattern, re.IGNORECASE):
-                    patterns_to_remove.append(query_pattern)
+            # Patterns referencing the table come straight from the index
+            patterns_to_remove = set()
+            if table_name:
+                patterns_to_remove.update(self._pattern_tables.pop(table_name.lower(), ()))
+            
+            # Regex patterns still need to be matched one by one
+            if pattern:
+                regex = re.compile(pattern, re.IGNORECASE)
+                patterns_to_remove.update(
+                    p for p in self._query_patterns if regex.search(p)
+                )
             
             # Remove matched patterns
             for p in patterns_to_remove:
-                if p in self._query_patterns:
-                    del self._query_patterns[p]
+                for key in self._query_patterns.pop(p, ()):
+                    self._key_patterns.pop(key, None)
                     
-                if p in self._query_frequency:
-                    del self._query_frequency[p] 
\ No newline at end of file
+                self._query_frequency.pop(p, None)
+                self._unindex_pattern(p)
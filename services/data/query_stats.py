@@ -0,0 +1,310 @@
+"""
+Low-overhead query performance statistics.
+
+Recording a query only touches state owned by the calling thread: plain
+counters, a latency histogram per table and fixed-size ring buffers of raw
+tuples. Nothing is formatted and no lock is taken on the hot path; readers
+merge the per-thread state and build timestamps and truncated SQL on demand.
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.data.query_cache_manager import extract_query_tables
+
+# Histogram bucket upper bounds in seconds: 0.1ms to ~160s, ~15% apart
+_BUCKET_BOUNDS: Tuple[float, ...] = tuple(0.0001 * 1.15 ** i for i in range(103))
+
+ALL_QUERIES = "_all"
+
+# Percentiles reported for every histogram
+PERCENTILES = (50, 95, 99)
+
+
+@lru_cache(maxsize=2048)
+def _query_labels(sql_query: str) -> Tuple[str, ...]:
+    """
+    Get the histogram labels for a query: every table it touches.
+
+    Cached, since applications send the same query text over and over.
+    """
+    tables = extract_query_tables(sql_query)
+    bare = tuple(sorted(t for t in tables if "." not in t))
+    return bare or ("_other",)
+
+
+def _truncate(sql_query: str) -> str:
+    """Shorten a query for display."""
+    return sql_query[:100] + "..." if len(sql_query) > 100 else sql_query
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates."""
+
+    __slots__ = ("counts", "total", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Add one latency sample."""
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples to this one."""
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Estimate a latency percentile.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Upper bound of the bucket holding the percentile, capped at the
+            largest recorded latency (0.0 when empty)
+        """
+        if not self.total:
+            return 0.0
+        rank = pct / 100.0 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                bound = _BUCKET_BOUNDS[i] if i < len(_BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the histogram.
+
+        Returns:
+            Dictionary with count, mean, max and p50/p95/p99 latencies
+        """
+        summary = {
+            "count": self.total,
+            "mean": self.sum / self.total if self.total else 0.0,
+            "max": self.max
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}"] = self.percentile(pct)
+        return summary
+
+
+class _ThreadStats:
+    """Statistics written by a single thread."""
+
+    __slots__ = ("total", "successful", "failed", "total_time", "slowest",
+                 "fastest", "histograms", "sample_counter")
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.failed = 0
+        self.total_time = 0.0
+        self.slowest: Optional[Tuple[float, str]] = None
+        self.fastest: Optional[Tuple[float, str]] = None
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.sample_counter = 0
+
+    def merge(self, other: "_ThreadStats"):
+        """Add another thread's counters and histograms to these."""
+        self.total += other.total
+        self.successful += other.successful
+        self.failed += other.failed
+        self.total_time += other.total_time
+        if other.slowest and (self.slowest is None or other.slowest[0] > self.slowest[0]):
+            self.slowest = other.slowest
+        if other.fastest and (self.fastest is None or other.fastest[0] < self.fastest[0]):
+            self.fastest = other.fastest
+        for label, histogram in list(other.histograms.items()):
+            merged = self.histograms.get(label)
+            if merged is None:
+                merged = self.histograms[label] = LatencyHistogram()
+            merged.merge(histogram)
+
+
+class QueryStatsRecorder:
+    """
+    Records query counts, latencies and recent history without locking.
+
+    Counters and histograms are exact. The recent query ring buffer keeps one
+    in every ``history_sample_every`` queries; failures are always kept.
+    Threads that have exited are folded into a single retired aggregate, so
+    short-lived worker threads do not accumulate.
+    """
+
+    def __init__(self,
+                 max_history: int = 100,
+                 max_recent_errors: int = 20,
+                 history_sample_every: int = 1):
+        """
+        Initialize the recorder.
+
+        Args:
+            max_history: Size of the recent query ring buffer
+            max_recent_errors: Size of the recent error ring buffer
+            history_sample_every: Keep every Nth query in the history buffer
+        """
+        self.history_sample_every = max(1, int(history_sample_every))
+        # deque.append with maxlen is atomic and O(1)
+        self._history = deque(maxlen=max_history)
+        self._errors = deque(maxlen=max_recent_errors)
+        self._local = threading.local()
+        self._threads: List[Tuple[threading.Thread, _ThreadStats]] = []
+        # Counters of threads that have exited, folded together
+        self._retired = _ThreadStats()
+        self._threads_lock = threading.Lock()
+
+    def _thread_stats(self) -> _ThreadStats:
+        """Get the calling thread's statistics, registering them on first use."""
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = _ThreadStats()
+            self._local.stats = stats
+            # Only taken once per thread
+            with self._threads_lock:
+                self._retire_dead_threads()
+                self._threads.append((threading.current_thread(), stats))
+        return stats
+
+    def _retire_dead_threads(self):
+        """
+        Fold the statistics of exited threads into the retired aggregate.
+        Caller must hold the threads lock.
+        """
+        alive = []
+        for thread, stats in self._threads:
+            if thread.is_alive():
+                alive.append((thread, stats))
+            else:
+                # A dead thread no longer writes its stats, so they can be merged
+                self._retired.merge(stats)
+        self._threads = alive
+
+    def record(self,
+               sql_query: str,
+               execution_time: float,
+               success: bool,
+               error: Optional[str],
+               row_count: int):
+        """
+        Record one query execution.
+
+        Args:
+            sql_query: The executed query
+            execution_time: Time taken to execute the query
+            success: Whether the query succeeded
+            error: Error message if failed
+            row_count: Number of rows affected or returned
+        """
+        stats = self._thread_stats()
+        stats.total += 1
+        stats.total_time += execution_time
+
+        histograms = stats.histograms
+        for label in (ALL_QUERIES,) + _query_labels(sql_query):
+            histogram = histograms.get(label)
+            if histogram is None:
+                histogram = histograms[label] = LatencyHistogram()
+            histogram.record(execution_time)
+
+        if success:
+            stats.successful += 1
+            if stats.slowest is None or execution_time > stats.slowest[0]:
+                stats.slowest = (execution_time, sql_query)
+            if stats.fastest is None or execution_time < stats.fastest[0]:
+                stats.fastest = (execution_time, sql_query)
+        else:
+            stats.failed += 1
+            if error:
+                self._errors.append((time.time(), sql_query, error))
+
+        stats.sample_counter += 1
+        if not success or stats.sample_counter >= self.history_sample_every:
+            stats.sample_counter = 0
+            self._history.append((time.time(), sql_query, execution_time, success, row_count))
+
+    def get_metrics(self, recent: int = 5) -> Dict[str, Any]:
+        """
+        Merge the per-thread statistics into a metrics snapshot.
+
+        Args:
+            recent: Number of recent queries and errors to include
+
+        Returns:
+            Dict containing query performance statistics
+        """
+        merged = _ThreadStats()
+        with self._threads_lock:
+            self._retire_dead_threads()
+            merged.merge(self._retired)
+            threads = [stats for _, stats in self._threads]
+
+        for stats in threads:
+            merged.merge(stats)
+
+        total, successful, failed = merged.total, merged.successful, merged.failed
+        total_time = merged.total_time
+        slowest, fastest = merged.slowest, merged.fastest
+        histograms = merged.histograms
+
+        overall = histograms.pop(ALL_QUERIES, LatencyHistogram())
+        latency = overall.summary()
+
+        return {
+            "total_queries": total,
+            "successful_queries": successful,
+            "failed_queries": failed,
+            "success_rate": successful / total * 100 if total > 0 else 0,
+            "average_execution_time": total_time / total if total > 0 else 0,
+            "slowest_query": (
+                {"query": _truncate(slowest[1]), "time": slowest[0]}
+                if slowest else {"query": None, "time": 0}
+            ),
+            "fastest_query": (
+                {"query": _truncate(fastest[1]), "time": fastest[0]}
+                if fastest else None
+            ),
+            "latency": {pct: latency[pct] for pct in ("p50", "p95", "p99")},
+            "latency_by_table": {
+                label: histogram.summary()
+                for label, histogram in sorted(histograms.items())
+            },
+            "recent_errors": [
+                {
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "query": query,
+                    "error": error
+                }
+                for ts, query, error in list(self._errors)[-recent:]
+            ],
+            "recent_queries": [
+                {
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "query": _truncate(query),
+                    "execution_time": execution_time,
+                    "success": success,
+                    "rows": rows
+                }
+                for ts, query, execution_time, success, rows in list(self._history)[-recent:]
+            ]
+        }
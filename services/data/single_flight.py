@@ -0,0 +1,181 @@
+"""
+Request coalescing for identical in-flight work.
+
+When several callers ask for the same thing at the same moment, only the
+first one (the leader) does the work; the others wait for it and share its
+result. This keeps a burst of identical cache misses from turning into a
+burst of identical database queries.
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Callable, Awaitable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A single in-flight synchronous call shared by its waiters."""
+
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _AsyncCall:
+    """A single in-flight asyncio task shared by its waiters."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent calls that share a key.
+
+    Works for both threads (``do``) and asyncio tasks (``do_async``). A key is
+    only coalesced while a call for it is running; once the leader finishes,
+    the next call starts a new flight.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], _AsyncCall] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           share: Optional[Callable[[Any], Any]] = None) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the work
+            fn: Function doing the work
+            share: Copies the result for each caller when several callers
+                share one execution, so none can change another's result
+                (default: everyone gets the same object)
+
+        Returns:
+            Tuple of (result, shared)
+                - result: The value returned by fn
+                - shared: True if this caller waited on another caller's execution
+
+        Raises:
+            Whatever fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return share(call.result) if share else call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                # No one can join any more, so this is the final count
+                shared = call.waiters > 0
+            call.event.set()
+
+        # Waiters copy call.result, so the leader must not get it either
+        return share(call.result) if share and shared else call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                       share: Optional[Callable[[Any], Any]] = None) -> Tuple[Any, bool]:
+        """
+        Await fn once for all concurrent tasks with the same key.
+
+        The shared work runs in its own task, so cancelling one waiter
+        (including the one that started it) does not cancel it for the others.
+        When the last waiter is cancelled the shared task is cancelled too, so
+        the cancellation still reaches the work.
+
+        Args:
+            key: Identity of the work
+            fn: Coroutine function doing the work
+            share: Copies the result for each caller, as for do()
+
+        Returns:
+            Tuple of (result, shared), as for do()
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+
+        with self._lock:
+            call = self._tasks.get(task_key)
+            # A finished task is being forgotten; joining it could hand out a
+            # result its other callers already have
+            if call is not None and call.task.done():
+                call = None
+            shared = call is not None
+            if shared:
+                self.stats["coalesced"] += 1
+            else:
+                call = _AsyncCall(loop.create_task(fn()))
+                self._tasks[task_key] = call
+                self.stats["executions"] += 1
+                call.task.add_done_callback(lambda _: self._forget_task(task_key, call))
+            call.waiters += 1
+
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0
+            if abandoned:
+                call.task.cancel()
+            raise
+
+        # Once the task is done nobody joins, so the count is final
+        with self._lock:
+            several = call.waiters > 1
+        return share(result) if share and several else result, shared
+
+    def _forget_task(self, task_key: Tuple[int, Hashable], call: _AsyncCall):
+        """Drop a finished task so the next call for its key starts a new flight."""
+        with self._lock:
+            if self._tasks.get(task_key) is call:
+                del self._tasks[task_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dictionary with executions, coalesced calls and in-flight counts
+        """
+        with self._lock:
+            total = self.stats["executions"] + self.stats["coalesced"]
+            return {
+                **self.stats,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "coalesced_rate": self.stats["coalesced"] / total if total else 0.0
+            }
@@ -5,8 +5,6 @@ Includes improved error handling, query performance monitoring, and connection p
 import logging
 import time
 import pandas as pd
-import threading
-import queue
 from datetime import datetime
 from sqlalchemy import create_engine, text, exc
 from sqlalchemy.pool import QueuePool
@@ -15,6 +13,8 @@ import re
 from sqlalchemy.exc import SQLAlchemyError, OperationalError, IntegrityError
 from unittest.mock import MagicMock
 
+from services.utils.query_executor import PooledQueryExecutor
+
 logger = logging.getLogger(__name__)
 
 class SQLExecutor:
@@ -57,6 +57,13 @@ class SQLExecutor:
                 # For testing with mocks, create a simple in-memory SQLite database
                 self.engine = create_engine("sqlite:///:memory:", poolclass=NullPool)
         
+        # Queries run on a bounded pool sized to match the connection pool
+        self._query_executor = PooledQueryExecutor(
+            self.engine,
+            max_workers=pool_size + max_overflow,
+            server_timeout_grace=config["database"].get("server_timeout_grace", 1.0)
+        )
+        
         # Performance monitoring
         self.query_history = []
         self.max_history_size = config["database"].get("max_history_size", 100)
@@ -204,42 +211,15 @@ class SQLExecutor:
         # Determine if this is a SELECT query
         is_select = sql_query.strip().lower().startswith("select")
         
-        # Create a queue for the result
-        result_queue = queue.Queue()
-        
-        # Define the worker function
-        def worker():
-            try:
-                with self.engine.connect() as connection:
-                    if is_select:
-                        # For SELECT queries, return DataFrame
-                        df = pd.read_sql(sql_query, connection, params=params)
-                        result_queue.put(df)
-                    else:
-                        # For other queries, execute and return affected rows
-                        result = connection.execute(text(sql_query), params or {})
-                        result_queue.put(result.rowcount)
-            except Exception as e:
-                result_queue.put(e)
-        
-        # Start the worker thread
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
+        def work(connection):
+            if is_select:
+                # For SELECT queries, return DataFrame
+                return pd.read_sql(sql_query, connection, params=params)
+            # For other queries, execute and return affected rows
+            return connection.execute(text(sql_query), params or {}).rowcount
         
-        try:
-            # Wait for the result with timeout
-            result = result_queue.get(timeout=timeout)
-            
-            # If the result is an exception, raise it
-            if isinstance(result, Exception):
-                raise result
-                
-            return result
-            
-        except queue.Empty:
-            # Timeout occurred
-            raise TimeoutError(f"Query execution timed out after {timeout} seconds")
+        # Runs on the bounded pool; a timed-out statement is cancelled
+        return self._query_executor.run(work, timeout, self.engine.connect)
     
     def _record_query_performance(self, sql_query: str, execution_time: float, 
                                  success: bool, error_type: Optional[str], row_count: int):
@@ -424,7 +404,7 @@ class SQLExecutor:
                 # Use the value directly for numbers and other types
                 processed_sql = processed_sql.replace(placeholder, str(value))
                 
-        logger.info(f"Preprocessed SQL query: {processed_sql[:100]}..." if len(processed_sql) > 100 else processed_sql)
+        logger.info("Preprocessed SQL query: %.100s%s", processed_sql, "..." if len(processed_sql) > 100 else "")
         
         # Get the location_id from all possible sources for accurate logging
         location_id = self.config.get("DEFAULT_LOCATION_ID")
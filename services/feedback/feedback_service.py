@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 
 from services.data.models.feedback import FeedbackModel, FeedbackStats, FeedbackType, IssueCategory
+from services.feedback.feedback_store import SQLiteFeedbackStore
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,11 @@ class FeedbackService:
     """
     Service for managing and analyzing user feedback on AI responses.
     
+    Storage types:
+    - 'sqlite' (default): indexed append-only store with incremental statistics
+    - 'file': one JSON file per feedback item
+    - 'memory': in-process list (for testing)
+    
     Features:
     - Storing feedback in a persistent storage
     - Retrieving feedback for analysis
@@ -35,10 +41,18 @@ class FeedbackService:
             config: Configuration dictionary with settings for the feedback service
         """
         self.config = config
-        self.storage_type = config.get("feedback_storage_type", "file")  # 'file', 'database', 'memory'
+        self.storage_type = config.get("feedback_storage_type", "sqlite")  # 'sqlite', 'file', 'database', 'memory'
+        self.feedback_store = None
+        
+        # Indexed SQLite storage settings
+        if self.storage_type == "sqlite":
+            self.storage_dir = config.get("feedback_storage_dir", "data/feedback")
+            db_path = config.get("feedback_db_path") or os.path.join(self.storage_dir, "feedback.db")
+            # Feedback saved by the older file storage is imported on first open
+            self.feedback_store = SQLiteFeedbackStore(db_path, legacy_dir=self.storage_dir)
         
         # File storage settings
-        if self.storage_type == "file":
+        elif self.storage_type == "file":
             self.storage_dir = config.get("feedback_storage_dir", "data/feedback")
             os.makedirs(self.storage_dir, exist_ok=True)
             
@@ -75,7 +89,9 @@ class FeedbackService:
             feedback_model = feedback
             
         # Store based on the configured storage type
-        if self.storage_type == "file":
+        if self.storage_type == "sqlite":
+            return self.feedback_store.add(feedback_model)
+        elif self.storage_type == "file":
             return self._store_feedback_in_file(feedback_model)
         elif self.storage_type == "database":
             return self._store_feedback_in_database(feedback_model)
@@ -117,7 +133,9 @@ class FeedbackService:
         
         # Use the appropriate storage method
         try:
-            if self.storage_type == "file":
+            if self.storage_type == "sqlite":
+                self.feedback_store.add_response(response_data)
+            elif self.storage_type == "file":
                 self._store_response_in_file(response_data)
             elif self.storage_type == "database":
                 self._store_response_in_database(response_data)
@@ -152,7 +170,10 @@ class FeedbackService:
         Returns:
             List of FeedbackModel instances matching the criteria
         """
-        if self.storage_type == "file":
+        if self.storage_type == "sqlite":
+            return self.feedback_store.query(
+                feedback_id, session_id, query_id, limit, offset, start_date, end_date)
+        elif self.storage_type == "file":
             return self._get_feedback_from_file(
                 feedback_id, session_id, query_id, limit, offset, start_date, end_date)
         elif self.storage_type == "database":
@@ -196,6 +217,21 @@ class FeedbackService:
             elif time_period == 'year':
                 start_date = now - timedelta(days=365)
         
+        if self.storage_type == "sqlite":
+            # Read the incrementally maintained rollups instead of every item
+            stats = self.feedback_store.statistics(start_date)
+        else:
+            stats = self._calculate_statistics(start_date)
+        
+        # Empty statistics are not cached
+        if stats.total_count:
+            self.stats_cache = stats
+            self.stats_cache_timestamp = time.time()
+        
+        return stats
+    
+    def _calculate_statistics(self, start_date: Optional[datetime]) -> FeedbackStats:
+        """Calculate statistics by loading the stored feedback items."""
         # Get all feedback for the specified time period
         feedback_list = self.get_feedback(start_date=start_date, limit=10000)
         
@@ -228,8 +264,7 @@ class FeedbackService:
             intent_counts = df['original_intent'].value_counts().head(10).to_dict()
             top_query_intents = [{"intent": k, "count": v} for k, v in intent_counts.items() if k is not None]
         
-        # Create and cache stats
-        stats = FeedbackStats(
+        return FeedbackStats(
             total_count=total_count,
             helpful_count=helpful_count,
             not_helpful_count=not_helpful_count,
@@ -237,11 +272,6 @@ class FeedbackService:
             issue_distribution=issue_distribution,
             top_query_intents=top_query_intents
         )
-        
-        self.stats_cache = stats
-        self.stats_cache_timestamp = time.time()
-        
-        return stats
     
     def _store_feedback_in_file(self, feedback: FeedbackModel) -> str:
         """Store feedback in a JSON file."""
@@ -425,7 +455,9 @@ class FeedbackService:
             Dictionary with response data or None if not found
         """
         # Check storage type and use appropriate retrieval method
-        if self.storage_type == "file":
+        if self.storage_type == "sqlite":
+            return self.feedback_store.get_response(response_id)
+        elif self.storage_type == "file":
             return self._get_response_from_file(response_id)
         elif self.storage_type == "database":
             return self._get_response_from_database(response_id)
@@ -0,0 +1,434 @@
+"""
+Indexed feedback store backed by SQLite.
+
+Feedback is append-only: every item is one row in a single database file,
+with indexes on session_id, query_id and created_at so lookups never scan
+the whole history. Per-day aggregates (counts by feedback type, issue
+category and intent, plus rating sums) are updated in the same transaction
+as each insert, so statistics are computed from a few rollup rows instead
+of from every stored item.
+
+Stored query responses (for attaching feedback later) live in the same file.
+Feedback written by the older one-JSON-file-per-item storage is imported
+the first time the database is opened.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from services.data.models.feedback import FeedbackModel, FeedbackStats, FeedbackType
+
+logger = logging.getLogger(__name__)
+
+# Rollup dimensions
+_ALL = "all"
+_TYPE = "type"
+_ISSUE = "issue"
+_INTENT = "intent"
+
+
+def _timestamp(value: datetime) -> str:
+    """Format a timestamp so that string order matches time order."""
+    return value.isoformat(timespec="microseconds")
+
+
+def _json_files(directory: str) -> List[str]:
+    """List the JSON files directly inside a directory, in name order."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if name.endswith(".json") and os.path.isfile(os.path.join(directory, name))
+    ]
+
+
+class SQLiteFeedbackStore:
+    """
+    Append-only feedback store in a SQLite database file.
+
+    The database is opened on first use and runs in WAL mode so that
+    readers in one process do not block writers in another.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS feedback (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            feedback_id TEXT NOT NULL UNIQUE,
+            session_id TEXT,
+            query_id TEXT,
+            response_id TEXT,
+            feedback_type TEXT,
+            rating REAL,
+            issue_category TEXT,
+            original_intent TEXT,
+            created_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_feedback_session ON feedback (session_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_feedback_query ON feedback (query_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_feedback_created ON feedback (created_at);
+        CREATE TABLE IF NOT EXISTS feedback_rollup (
+            day TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            rating_count INTEGER NOT NULL,
+            PRIMARY KEY (day, dimension, value)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS feedback_responses (
+            response_id TEXT PRIMARY KEY,
+            session_id TEXT,
+            created_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    _LEGACY_IMPORT_KEY = "legacy_files_imported"
+
+    _ROLLUP_UPSERT = """
+        INSERT INTO feedback_rollup (day, dimension, value, count, rating_sum, rating_count)
+        VALUES (?, ?, ?, 1, ?, ?)
+        ON CONFLICT (day, dimension, value) DO UPDATE SET
+            count = count + 1,
+            rating_sum = rating_sum + excluded.rating_sum,
+            rating_count = rating_count + excluded.rating_count
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0, legacy_dir: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            path: Database file path
+            busy_timeout: Seconds to wait on a locked database
+            legacy_dir: Directory of the JSON file storage to import on first open
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.legacy_dir = legacy_dir
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Get the connection, opening the database on first use. Caller holds the lock."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,  # Autocommit; explicit transactions below
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            if self.legacy_dir:
+                self._import_legacy_files(conn, self.legacy_dir)
+            self._conn = conn
+            logger.info(f"Opened feedback store at {self.path}")
+        return self._conn
+
+    def _import_legacy_files(self, db: sqlite3.Connection, directory: str):
+        """
+        Import feedback and responses stored as JSON files, once per database.
+
+        Items already in the database are skipped and unreadable files are
+        logged and left alone; the files themselves are not removed.
+
+        Args:
+            db: Open database connection
+            directory: The JSON storage directory ("responses" holds the responses)
+        """
+        done_query = "SELECT 1 FROM store_meta WHERE key = ?"
+        if db.execute(done_query, (self._LEGACY_IMPORT_KEY,)).fetchone() or not os.path.isdir(directory):
+            return
+
+        feedback_count = response_count = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have imported while we waited for the lock
+            if db.execute(done_query, (self._LEGACY_IMPORT_KEY,)).fetchone():
+                db.execute("COMMIT")
+                return
+
+            for path in _json_files(directory):
+                try:
+                    with open(path, "r") as f:
+                        feedback = FeedbackModel.from_dict(json.load(f))
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable feedback file {path}: {e}")
+                    continue
+                exists = db.execute(
+                    "SELECT 1 FROM feedback WHERE feedback_id = ?", (feedback.feedback_id,)
+                ).fetchone()
+                if not exists:
+                    self._insert(db, feedback)
+                    feedback_count += 1
+
+            for path in _json_files(os.path.join(directory, "responses")):
+                try:
+                    with open(path, "r") as f:
+                        response_data = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable response file {path}: {e}")
+                    continue
+                if response_data.get("response_id"):
+                    self._insert_response(db, response_data, replace=False)
+                    response_count += 1
+
+            db.execute(
+                "INSERT INTO store_meta (key, value) VALUES (?, ?)",
+                (self._LEGACY_IMPORT_KEY, _timestamp(datetime.utcnow()))
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+        if feedback_count or response_count:
+            logger.info(f"Imported {feedback_count} feedback items and {response_count} responses "
+                        f"from {directory} into {self.path}")
+
+    def add(self, feedback: FeedbackModel) -> str:
+        """
+        Append a feedback item and update the rollups.
+
+        Args:
+            feedback: Feedback to store
+
+        Returns:
+            The feedback ID
+        """
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(db, feedback)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+        return feedback.feedback_id
+
+    def _insert(self, db: sqlite3.Connection, feedback: FeedbackModel):
+        """Insert a feedback row and its rollups. Caller runs the transaction."""
+        created_at = feedback.created_at or datetime.utcnow()
+        rating = feedback.rating
+        rating_values = (float(rating), 1) if rating is not None else (0.0, 0)
+        day = created_at.date().isoformat()
+
+        rollups = [(_ALL, ""), (_TYPE, feedback.feedback_type or "")]
+        if feedback.issue_category is not None:
+            rollups.append((_ISSUE, feedback.issue_category))
+        if feedback.original_intent is not None:
+            rollups.append((_INTENT, feedback.original_intent))
+
+        db.execute(
+            "INSERT INTO feedback (feedback_id, session_id, query_id, response_id, "
+            "feedback_type, rating, issue_category, original_intent, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (feedback.feedback_id, feedback.session_id, feedback.query_id,
+             feedback.response_id, feedback.feedback_type, rating,
+             feedback.issue_category, feedback.original_intent,
+             _timestamp(created_at), json.dumps(feedback.to_dict(), default=str))
+        )
+        db.executemany(
+            self._ROLLUP_UPSERT,
+            [(day, dimension, value) + rating_values for dimension, value in rollups]
+        )
+
+    def query(self,
+              feedback_id: Optional[str] = None,
+              session_id: Optional[str] = None,
+              query_id: Optional[str] = None,
+              limit: int = 100,
+              offset: int = 0,
+              start_date: Optional[datetime] = None,
+              end_date: Optional[datetime] = None) -> List[FeedbackModel]:
+        """
+        Find feedback, newest first.
+
+        Args:
+            feedback_id: Optional specific feedback ID
+            session_id: Optional session ID to filter by
+            query_id: Optional query ID to filter by
+            limit: Maximum number of records to return
+            offset: Number of records to skip
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+
+        Returns:
+            Matching FeedbackModel instances
+        """
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("feedback_id", feedback_id),
+                              ("session_id", session_id),
+                              ("query_id", query_id)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start_date:
+            conditions.append("created_at >= ?")
+            params.append(_timestamp(start_date))
+        if end_date:
+            conditions.append("created_at <= ?")
+            params.append(_timestamp(end_date))
+
+        sql = "SELECT data FROM feedback"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, seq DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        return [FeedbackModel.from_dict(json.loads(row[0])) for row in rows]
+
+    def statistics(self, start_date: Optional[datetime] = None) -> FeedbackStats:
+        """
+        Compute feedback statistics from the daily rollups.
+
+        Whole days come from the rollup table; if start_date falls inside a
+        day, that day's remaining rows are aggregated from the created_at
+        index.
+
+        Args:
+            start_date: Optional start of the period (inclusive)
+
+        Returns:
+            FeedbackStats for the period
+        """
+        counts: Counter = Counter()
+        rating_sum = 0.0
+        rating_count = 0
+
+        with self._lock:
+            if start_date is None:
+                rows = self._db.execute(
+                    "SELECT dimension, value, SUM(count), SUM(rating_sum), SUM(rating_count) "
+                    "FROM feedback_rollup GROUP BY dimension, value"
+                ).fetchall()
+                partial = []
+            else:
+                next_day = datetime.combine(start_date.date() + timedelta(days=1), datetime.min.time())
+                rows = self._db.execute(
+                    "SELECT dimension, value, SUM(count), SUM(rating_sum), SUM(rating_count) "
+                    "FROM feedback_rollup WHERE day >= ? GROUP BY dimension, value",
+                    (next_day.date().isoformat(),)
+                ).fetchall()
+                partial = self._db.execute(
+                    "SELECT feedback_type, issue_category, original_intent, rating FROM feedback "
+                    "WHERE created_at >= ? AND created_at < ?",
+                    (_timestamp(start_date), _timestamp(next_day))
+                ).fetchall()
+
+        for dimension, value, count, dimension_rating_sum, dimension_rating_count in rows:
+            counts[(dimension, value)] += count
+            if dimension == _ALL:
+                rating_sum += dimension_rating_sum
+                rating_count += dimension_rating_count
+
+        for feedback_type, issue_category, original_intent, rating in partial:
+            counts[(_ALL, "")] += 1
+            counts[(_TYPE, feedback_type or "")] += 1
+            if issue_category is not None:
+                counts[(_ISSUE, issue_category)] += 1
+            if original_intent is not None:
+                counts[(_INTENT, original_intent)] += 1
+            if rating is not None:
+                rating_sum += rating
+                rating_count += 1
+
+        return self._build_stats(counts, rating_sum, rating_count)
+
+    @staticmethod
+    def _build_stats(counts: Counter, rating_sum: float, rating_count: int) -> FeedbackStats:
+        """Turn aggregated counts into FeedbackStats."""
+        total_count = counts[(_ALL, "")]
+        if not total_count:
+            return FeedbackStats()
+
+        issue_distribution = {
+            value: count for (dimension, value), count in counts.items() if dimension == _ISSUE
+        }
+        intent_counts = sorted(
+            ((value, count) for (dimension, value), count in counts.items() if dimension == _INTENT),
+            key=lambda item: item[1],
+            reverse=True
+        )[:10]
+
+        return FeedbackStats(
+            total_count=total_count,
+            helpful_count=counts[(_TYPE, FeedbackType.HELPFUL)],
+            not_helpful_count=counts[(_TYPE, FeedbackType.NOT_HELPFUL)],
+            average_rating=rating_sum / rating_count if rating_count else 0.0,
+            issue_distribution=issue_distribution,
+            top_query_intents=[{"intent": k, "count": v} for k, v in intent_counts]
+        )
+
+    def add_response(self, response_data: Dict[str, Any]):
+        """
+        Store a query response for later feedback reference.
+
+        Args:
+            response_data: Response record with a response_id
+        """
+        with self._lock:
+            self._insert_response(self._db, response_data)
+
+    @staticmethod
+    def _insert_response(db: sqlite3.Connection, response_data: Dict[str, Any], replace: bool = True):
+        """Insert a response row, replacing or keeping an existing one with the same ID."""
+        conflict = "REPLACE" if replace else "IGNORE"
+        db.execute(
+            f"INSERT OR {conflict} INTO feedback_responses (response_id, session_id, created_at, data) "
+            "VALUES (?, ?, ?, ?)",
+            (response_data.get("response_id"), response_data.get("session_id"),
+             response_data.get("timestamp") or _timestamp(datetime.utcnow()),
+             json.dumps(response_data, default=str))
+        )
+
+    def get_response(self, response_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a stored response.
+
+        Args:
+            response_id: The response ID
+
+        Returns:
+            The response record, or None if not found
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM feedback_responses WHERE response_id = ?", (response_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self) -> int:
+        """Get the number of stored feedback items."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM feedback_rollup WHERE dimension = ?", (_ALL,)
+            ).fetchone()
+        return row[0]
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -3,7 +3,7 @@ Orchestrator service that coordinates the workflow between services.
 """
 import logging
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Iterator
 import uuid
 from datetime import datetime
 import re  # Add this import
@@ -18,14 +18,29 @@ import traceback
 from resources.ui.personas import get_voice_settings
 from services.utils.service_registry import ServiceRegistry
 from services.classification.classifier import ClassificationService
+from services.classification.tiered_classifier import TieredClassifier
 from services.rules.rules_service import RulesService
 from services.sql_generator.sql_generator_factory import SQLGeneratorFactory
 from services.execution.sql_executor import SQLExecutor
 from services.response.response_generator import ResponseGenerator
 from services.context_manager import ContextManager
+from services.orchestrator.pipeline import StagePipeline, SentenceChannel
+from services.orchestrator.session_state import SessionState
+from services.utils.bounded_history import BoundedMapping
+from services.utils.text_processing.summarization import clean_for_tts
+from services.utils.streaming import stream_events
+from services.response.tts_pipeline import create_tts_pipeline, DEFAULT_MODEL, DEFAULT_VOICE_ID
+from services.validation.background_validator import BackgroundValidator
 
 logger = logging.getLogger(__name__)
 
+# Stage timers measured on the request thread, one after another; the
+# prefetches and TTS generation run alongside them
+CRITICAL_PATH_TIMERS = (
+    'classification', 'rule_processing', 'sql_generation', 'sql_execution',
+    'text_response', 'sql_validation', 'tts_wait'
+)
+
 class OrchestratorService:
     def __init__(self, config: Dict[str, Any]):
         """
@@ -43,22 +58,34 @@ class OrchestratorService:
         # Store config for later use
         self.config = config
         
-        # Set default persona
-        self.persona = config.get("persona", "casual")
-        
-        # Initialize conversation history tracking
-        self.conversation_history = []
-        self.sql_history = []
+        # Per-session conversation state; callers that do not pass a session
+        # (or a session_id in the query context) share the default session
+        self.default_persona = config.get("persona", "casual")
         self.max_history_items = config.get("application", {}).get("max_history_items", 10)
+        self._sessions = BoundedMapping(maxlen=config.get("application", {}).get("max_sessions", 1000))
+        # Reentrant: get_session starts missing sessions with create_session
+        self._sessions_lock = threading.RLock()
+        self.default_session = self.create_session()
         
-        # Initialize context manager once
+        # Initialize context manager once; expired sessions are swept in the background
         from services.context_manager import ContextManager
-        self.context_manager = ContextManager()
+        context_config = config.get("context_manager", {})
+        self.context_manager = ContextManager(
+            expiry_minutes=context_config.get("expiry_minutes", 30),
+            history_limit=context_config.get("history_limit"),
+            spill_dir=context_config.get("spill_dir"),
+            sweep_interval_seconds=context_config.get("sweep_interval_seconds", 60)
+        )
         
         # Initialize service registry
         ServiceRegistry.initialize(config)
         
+        # Sentence-pipelined TTS with an on-disk audio cache, shared with the
+        # response generator so both use one worker pool and one cache index
+        self.tts_pipeline = create_tts_pipeline(config)
+        
         # Register services
+        ServiceRegistry.register("tts_pipeline", lambda cfg: self.tts_pipeline)
         ServiceRegistry.register("classification", lambda cfg: ClassificationService(cfg))
         ServiceRegistry.register("rules", lambda cfg: RulesService(cfg))
         ServiceRegistry.register("sql_generator", lambda cfg: SQLGeneratorFactory.create_sql_generator(cfg))
@@ -74,19 +101,6 @@ class OrchestratorService:
             except Exception as e:
                 self.logger.error(f"Failed to register SQL validation service: {str(e)}")
         
-        # Initialize query context storage
-        self.query_context = {
-            "time_period_clause": None,
-            "previous_query": None,
-            "previous_category": None,
-            "previous_sql": None,
-            "previous_filters": {},
-            "previous_constraints": []
-        }
-        
-        # Initialize time period context for storing time periods from queries
-        self.time_period_context = None
-        
         # Get service instances - use existing mock instances if they are set for testing
         if hasattr(self, 'classifier') and isinstance(self.classifier, MagicMock):
             self.logger.info("Using existing mock classifier")
@@ -116,15 +130,172 @@ class OrchestratorService:
         else:
             self.response_generator = ServiceRegistry.get_service("response")
         
+        # Answer confident cases locally and only escalate the rest to the LLM classifier
+        tiers_config = config.get("classification", {}).get("tiers", {})
+        if tiers_config.get("enabled", False):
+            self.classifier = TieredClassifier(self.classifier, tiers_config)
+        
         # Check service health
         self.health_check()
         
-        self.error_context = {}
-        self.retry_counter = 0  # Add retry counter
+        # Worker pool shared by the pipeline stages of all queries
+        self._pipeline_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.get("application", {}).get("pipeline_workers", 8),
+            thread_name_prefix="query-pipeline"
+        )
+        
+        # Verbal TTS consumers wait on the response text for as long as it
+        # streams, so they get their own workers instead of holding shared ones
+        self._tts_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.get("application", {}).get("tts_workers", 8),
+            thread_name_prefix="query-tts"
+        )
+        
+        # Response validation: "sync" validates before returning; "async" runs
+        # it on a background pool unless the validator may block the response
+        validation_config = config.get("services", {}).get("validation", {}).get("sql_validation", {})
+        self.validation_mode = validation_config.get("mode", "sync")
+        self.background_validator = None
+        if self.validation_mode == "async":
+            self.background_validator = BackgroundValidator(
+                max_workers=validation_config.get("async_workers", 2),
+                max_results=validation_config.get("max_results", 1000)
+            )
+        
+        # Number of response sentences spoken by verbal TTS
+        self.max_verbal_sentences = config.get("services", {}).get("response", {}).get("max_verbal_sentences", 2)
+        
+        self.tts_model = config.get("api", {}).get("elevenlabs", {}).get("model", DEFAULT_MODEL)
         
         # Initialize ElevenLabs for TTS at startup
         self.elevenlabs_initialized = False
-        self.initialize_elevenlabs_tts()
+        if self.tts_pipeline.backend.name == "elevenlabs":
+            self.initialize_elevenlabs_tts()
+    
+    def create_session(self, session_id: Optional[str] = None, persona: Optional[str] = None) -> SessionState:
+        """
+        Start a new conversation session served by this orchestrator.
+        
+        Args:
+            session_id: Session identifier (a new one is generated if omitted)
+            persona: Persona of the session (defaults to the configured persona)
+        
+        Returns:
+            The session state, also available later through get_session
+        """
+        session = SessionState(
+            session_id=session_id,
+            persona=persona or self.default_persona,
+            max_history_items=self.max_history_items
+        )
+        with self._sessions_lock:
+            if session.session_id not in self._sessions and len(self._sessions) >= self._sessions.maxlen:
+                self.logger.warning(
+                    f"{len(self._sessions)} sessions open; dropping least recently used session "
+                    f"{next(iter(self._sessions))}"
+                )
+            self._sessions[session.session_id] = session
+        return session
+    
+    def get_session(self, session_id: str) -> SessionState:
+        """
+        Get the state of a session, starting the session if it is new.
+        
+        The least recently used sessions are forgotten once more than
+        application.max_sessions are open.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The session state
+        """
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self.create_session(session_id)
+            else:
+                self._sessions.touch(session_id)
+            return session
+    
+    def end_session(self, session_id: str) -> None:
+        """
+        Forget a session's state.
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._sessions_lock:
+            self._sessions.pop(session_id, None)
+    
+    def _resolve_session(self, context: Dict[str, Any], session: Optional[SessionState] = None) -> SessionState:
+        """Get the session a query belongs to: explicit, by context session_id, or the default one."""
+        if session is not None:
+            self._sessions.touch(session.session_id)
+            return session
+        session_id = context.get("session_id")
+        if session_id:
+            return self.get_session(session_id)
+        return self.default_session
+    
+    # The default session's state, as attributes of the orchestrator (for
+    # callers that use one orchestrator per conversation)
+    
+    @property
+    def persona(self):
+        return self.default_session.persona
+    
+    @persona.setter
+    def persona(self, value):
+        self.default_session.persona = value
+    
+    @property
+    def query_context(self) -> Dict[str, Any]:
+        return self.default_session.query_context
+    
+    @query_context.setter
+    def query_context(self, value: Dict[str, Any]):
+        self.default_session.query_context = value
+    
+    @property
+    def conversation_history(self):
+        return self.default_session.conversation_history
+    
+    @conversation_history.setter
+    def conversation_history(self, value):
+        self.default_session.conversation_history = value
+    
+    @property
+    def sql_history(self):
+        return self.default_session.sql_history
+    
+    @sql_history.setter
+    def sql_history(self, value):
+        self.default_session.sql_history = value
+    
+    @property
+    def time_period_context(self):
+        return self.default_session.time_period_context
+    
+    @time_period_context.setter
+    def time_period_context(self, value):
+        self.default_session.time_period_context = value
+    
+    @property
+    def error_context(self) -> Dict[str, Any]:
+        return self.default_session.error_context
+    
+    @error_context.setter
+    def error_context(self, value: Dict[str, Any]):
+        self.default_session.error_context = value
+    
+    @property
+    def retry_counter(self) -> int:
+        return self.default_session.retry_counter
+    
+    @retry_counter.setter
+    def retry_counter(self, value: int):
+        self.default_session.retry_counter = value
     
     def initialize_elevenlabs_tts(self) -> bool:
         """
@@ -192,29 +363,49 @@ class OrchestratorService:
         """Check the health of all services."""
         return ServiceRegistry.check_health()
     
-    def process_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    def process_query(self, query: str, context: Dict[str, Any] = None,
+                      on_chunk: Optional[Callable[[str], None]] = None,
+                      session: Optional[SessionState] = None) -> Dict[str, Any]:
         """
         Main entry point for query processing.
         
+        Safe to call from many threads at once. Queries of different sessions
+        run in parallel; queries of the same session run one at a time, as
+        each can be a follow-up to the one before.
+        
         Args:
             query: The user query to process
             context: Additional context for query processing
+            on_chunk: Optional callback receiving the response text piece by
+                piece while it is generated
+            session: The conversation this query belongs to; defaults to the
+                session named by context["session_id"], or the default session
             
         Returns:
             Response dictionary with results
         """
         # Initialize context if not provided
         context = context or {}
+        session = self._resolve_session(context, session)
         
+        with session.lock:
+            return self._process_session_query(query, context, on_chunk, session)
+    
+    def _process_session_query(self, query: str, context: Dict[str, Any],
+                               on_chunk: Optional[Callable[[str], None]],
+                               session: SessionState) -> Dict[str, Any]:
+        """Process a query within its session. Caller holds the session lock."""
         # Log input parameters
         fast_mode = context.get("fast_mode", False)
         self.logger.info(f"PROCESS_QUERY INPUT - query: '{query}'")
         if context:
-            self.logger.info(f"PROCESS_QUERY INPUT - context: {context}")
+            self.logger.info("PROCESS_QUERY INPUT - context: %s", context)
         self.logger.info(f"PROCESS_QUERY INPUT - fast_mode: {fast_mode}")
         
         # Generate a unique ID for this query
         query_id = str(uuid.uuid4())
+        session.current_query = query
+        session.error_context = {}
         
         # Start timing
         start_time = time.time()
@@ -224,11 +415,15 @@ class OrchestratorService:
             'total_start': time.perf_counter(),
             'classification': 0.0,
             'rule_processing': 0.0,
+            'rules_prefetch': 0.0,
+            'examples_prefetch': 0.0,
             'sql_generation': 0.0,
             'sql_execution': 0.0,
             'text_response': 0.0,
             'tts_generation': 0.0,
+            'tts_wait': 0.0,
             'sql_validation': 0.0,
+            'other': 0.0,
             'total_time': 0.0
         }
         
@@ -245,9 +440,7 @@ class OrchestratorService:
             fast_mode = False
             
             # Make sure TTS is initialized if voice is requested
-            if not self.elevenlabs_initialized:
-                self.logger.warning("Verbal response requested but ElevenLabs not initialized, attempting to initialize")
-                self._initialize_elevenlabs()
+            self._tts_ready()
         
         # Get the previous query category if available (for follow-up detection)
         previous_category = None
@@ -261,7 +454,16 @@ class OrchestratorService:
                 
                 # Update context with previous category
                 if previous_category:
-                    self.query_context["previous_category"] = previous_category
+                    session.query_context["previous_category"] = previous_category
+        
+        # Stages run on the shared pool as soon as their inputs are ready
+        pipeline = StagePipeline(self._pipeline_executor, timers)
+        
+        # Load rules and SQL examples for the most likely category while the
+        # classifier runs; they are used if the prediction turns out right
+        predicted_category = previous_category or self._basic_fallback_classification(query)
+        pipeline.add("rules_prefetch", lambda: self.rules.get_rules(predicted_category, query))
+        pipeline.add("examples_prefetch", lambda: self._prefetch_sql_examples(predicted_category))
         
         # Step 1: Classify the query
         t1 = time.perf_counter()
@@ -290,6 +492,12 @@ class OrchestratorService:
                 classification = {"category": category, "confidence": 0.5, "is_followup": False}
         
         timers['classification'] = time.perf_counter() - t1
+        session.error_context["classification"] = classification
+        
+        # Report which classification tier answered and how long it took
+        classification_tier = classification.get("tier") if classification else None
+        if classification_tier:
+            timers[f"classification_{classification_tier}"] = classification.get("tier_latency", 0.0)
         
         if not classification:
             self.logger.error(f"Classification failed for query: {query}")
@@ -325,19 +533,19 @@ class OrchestratorService:
         self.logger.info(f"Is follow-up: {is_followup}")
         
         # Store current category for future reference
-        self.query_context["previous_category"] = category
+        session.query_context["previous_category"] = category
         
         # Special handling for order_history category - default to completed orders
         if category == "order_history" and not any(status in query.lower() for status in ["pending", "cancelled", "refunded", "in progress"]):
             self.logger.info("No status specified, defaulting to completed orders (status=7)")
             # Apply filter for completed orders
-            self.query_context["previous_filters"]["status"] = "completed"
+            session.query_context["previous_filters"]["status"] = "completed"
         
         # Step 2: If this is a follow-up, check for time period carry-over
         if is_followup:
             # Check if we have a time period from a previous query
-            if "time_period_clause" in self.query_context and self.query_context["time_period_clause"]:
-                self.logger.info(f"Follow-up question detected. Using cached time period: {self.query_context['time_period_clause']}")
+            if "time_period_clause" in session.query_context and session.query_context["time_period_clause"]:
+                self.logger.info(f"Follow-up question detected. Using cached time period: {session.query_context['time_period_clause']}")
             
             # Check if the follow-up relates to the previous category
             if previous_category:
@@ -350,23 +558,36 @@ class OrchestratorService:
                     category = previous_category
             
             # Get filters from previous query
-            if "previous_filters" in self.query_context and self.query_context["previous_filters"]:
-                for filter_name, filter_value in self.query_context["previous_filters"].items():
+            if "previous_filters" in session.query_context and session.query_context["previous_filters"]:
+                for filter_name, filter_value in session.query_context["previous_filters"].items():
                     self.logger.info(f"Using filters from previous query: {filter_name}: {filter_value}")
             
             # Explicitly preserve time period for follow-up queries
-            if "time_period_clause" in self.query_context and self.query_context["time_period_clause"]:
+            if "time_period_clause" in session.query_context and session.query_context["time_period_clause"]:
                 self.logger.info("Detected follow-up query, explicitly preserving time period context")
-                self.logger.info(f"Using time period from previous query: {self.query_context['time_period_clause']}")
+                self.logger.info(f"Using time period from previous query: {session.query_context['time_period_clause']}")
             
             # Check if we had a status filter from the previous query
-            if "previous_filters" in self.query_context and "status" in self.query_context["previous_filters"]:
-                status_value = self.query_context["previous_filters"]["status"]
+            if "previous_filters" in session.query_context and "status" in session.query_context["previous_filters"]:
+                status_value = session.query_context["previous_filters"]["status"]
                 self.logger.info(f"Preserving status filter from previous query: status = {7 if status_value == 'completed' else status_value}")
         
         # Step 3: Get response rules and generate SQL (skip for ambiguous requests)
+        prediction_hit = category == predicted_category
+        if not prediction_hit:
+            # Load examples for the actual category alongside the rules
+            pipeline.add("examples", lambda: self._prefetch_sql_examples(category), timer="examples_prefetch")
+        
         t1 = time.perf_counter()
-        response_rules = self.rules.get_rules(category, query)
+        response_rules = None
+        if prediction_hit:
+            try:
+                response_rules = pipeline.result("rules_prefetch")
+                self.logger.info(f"Using rules prefetched for predicted category '{category}'")
+            except Exception as e:
+                self.logger.warning(f"Rules prefetch failed, loading rules again: {str(e)}")
+        if response_rules is None:
+            response_rules = self.rules.get_rules(category, query)
         timers['rule_processing'] = time.perf_counter() - t1
         
         sql = None
@@ -376,22 +597,24 @@ class OrchestratorService:
         is_ambiguous = category == "ambiguous"
         
         if not is_ambiguous:
-            # Generate SQL
+            # Generate SQL once the examples for this category are loaded
             t1 = time.perf_counter()
+            self._wait_for_stage(pipeline, "examples_prefetch" if prediction_hit else "examples")
             generation_result = self.sql_generator.generate(
                 query, 
                 category,
                 response_rules,
-                self.query_context
+                session.query_context
             )
             sql = generation_result.get("sql")
             timers['sql_generation'] = time.perf_counter() - t1
+            session.error_context["generated_sql"] = sql
             
             # Track the generated SQL for context
-            self.query_context["previous_sql"] = sql
+            session.query_context["previous_sql"] = sql
             
             # Extract time period from SQL if not already provided by classifier
-            if not self.query_context.get("time_period_clause") and sql:
+            if not session.query_context.get("time_period_clause") and sql:
                 # Look for date patterns in the SQL that might be time constraints
                 date_patterns = [
                     r"\(o\.updated_at - INTERVAL '[^']+'\)::date\s*=\s*TO_DATE\('([^']+)'",  # (updated_at - INTERVAL '7 hours')::date = TO_DATE('2/21/2025'
@@ -409,8 +632,8 @@ class OrchestratorService:
                         # Ensure there are no double table references
                         time_period_clause = time_period_clause.replace("o.o.", "o.")
                         
-                        self.query_context["time_period_clause"] = time_period_clause
-                        self.logger.info(f"Extracted time period from SQL: {self.query_context['time_period_clause']}")
+                        session.query_context["time_period_clause"] = time_period_clause
+                        self.logger.info(f"Extracted time period from SQL: {session.query_context['time_period_clause']}")
                         break
             
             # Handle status filters, time constraints, etc.
@@ -438,6 +661,7 @@ class OrchestratorService:
             t1 = time.perf_counter()
             execution_result = self.sql_executor.execute(sql)
             timers['sql_execution'] = time.perf_counter() - t1
+            session.error_context["execution_result"] = execution_result
             
             # Retrieve query results
             if execution_result and execution_result.get("success", False):
@@ -447,56 +671,91 @@ class OrchestratorService:
                     context["context_updates"] = {}
                 context["context_updates"]["sql_query"] = sql
         
-        # Step 5: Generate response
+        # Step 5: Generate response; verbal TTS works through its sentences
+        # in parallel, starting with the first one that is complete
+        sentences = None
+        if voice_enabled:
+            sentences = SentenceChannel(max_sentences=self.max_verbal_sentences)
+            pipeline.add("tts", lambda: self._synthesize_sentences(sentences, session.persona),
+                         timer="tts_generation", executor=self._tts_executor)
+        
+        # Stream the text when someone consumes it before it is complete
+        streamed = []
+        
+        def forward_chunk(text: str):
+            streamed.append(text)
+            if sentences is not None:
+                sentences.feed(text)
+            if on_chunk is not None:
+                on_chunk(text)
+        
+        stream_kwargs = {"on_chunk": forward_chunk} if sentences is not None or on_chunk is not None else {}
+        
+        # A persona set for this session only overrides the response generator's
+        session_kwargs = {"response_persona": session.response_persona} if session.response_persona else {}
+        
         t1 = time.perf_counter()
-        if voice_enabled and not fast_mode:
-            # Use combined text+verbal generation if voice is enabled
-            response_data = self.response_generator.generate_with_verbal(
-                query, category, response_rules, query_results, {
-                    "previous_sql": sql,
-                    "sql_query": sql,
-                    **context
-                }
-            )
-        else:
-            # Use text-only response generation
+        try:
             response_data = self.response_generator.generate(
                 query, category, response_rules, query_results, {
                     "previous_sql": sql,
                     "sql_query": sql,
-                    **context
-                }
+                    **session_kwargs,
+                    **context,
+                    # Validation happens once, below
+                    "skip_validation": True
+                },
+                **stream_kwargs
             )
+            if sentences is not None and not streamed:
+                sentences.feed(response_data.get("response") or "")
+        finally:
+            if sentences is not None:
+                sentences.close()
         timers['text_response'] = time.perf_counter() - t1
         
         # Step 6: Validate response with SQL validation service if available
         validation_feedback = None
         validation_blocked = False
+        validation_pending = False
         
         if sql and query_results and ServiceRegistry.service_exists("sql_validation"):
             try:
                 t1 = time.perf_counter()
                 sql_validation_service = ServiceRegistry.get_service("sql_validation")
-                validation_result = sql_validation_service.validate_response(
-                    sql_query=sql,
-                    sql_results=query_results,
-                    response_text=response_data.get("response", "")
-                )
-                
-                # Extract validation results
-                validation_status = validation_result.get("validation_status", True)
-                validation_blocked = validation_result.get("should_block_response", False)
-                validation_feedback = validation_result.get("detailed_feedback", "No validation feedback available")
-                
-                # Log validation results
-                self.logger.info(f"SQL validation completed with status: {validation_status}")
-                if not validation_status:
-                    self.logger.warning(f"SQL validation failed: {validation_feedback}")
                 
-                # If validation blocked the response, replace with error message
-                if validation_blocked:
-                    self.logger.warning("Response was blocked by SQL validation")
-                    response_data["response"] = "I'm sorry, but I can't provide an accurate response based on the data. Please try again or rephrase your question."
+                if self.background_validator is not None and not getattr(sql_validation_service, "should_block_responses", False):
+                    # The outcome cannot change the response; validate after returning it
+                    self.background_validator.submit(
+                        query_id,
+                        sql_validation_service,
+                        sql,
+                        query_results,
+                        response_data.get("response", "")
+                    )
+                    validation_pending = True
+                    validation_feedback = "SQL validation running in background"
+                else:
+                    validation_result = sql_validation_service.validate_response(
+                        sql_query=sql,
+                        sql_results=query_results,
+                        response_text=response_data.get("response", "")
+                    )
+                    
+                    # Extract validation results
+                    validation_status = validation_result.get("validation_status", True)
+                    validation_blocked = validation_result.get("should_block_response", False)
+                    validation_feedback = validation_result.get("detailed_feedback", "No validation feedback available")
+                    
+                    # Log validation results
+                    self.logger.info(f"SQL validation completed with status: {validation_status}")
+                    if not validation_status:
+                        self.logger.warning(f"SQL validation failed: {validation_feedback}")
+                    
+                    # If validation blocked the response, replace with error message
+                    if validation_blocked:
+                        self.logger.warning("Response was blocked by SQL validation")
+                        response_data["response"] = "I'm sorry, but I can't provide an accurate response based on the data. Please try again or rephrase your question."
                 
                 timers['sql_validation'] = time.perf_counter() - t1
             except Exception as e:
@@ -507,16 +766,22 @@ class OrchestratorService:
             self.logger.warning("SQL validation skipped - SQL validation service not available or no results to validate")
             validation_feedback = "SQL validation skipped - service not available or no results to validate"
         
-        # Step 7: TTS processing (if enabled)
+        # Step 7: Collect the TTS audio (if enabled)
         verbal_audio = None
         if voice_enabled:
-            # Extract the verbal audio if already generated in combined mode
-            if "verbal_audio" in response_data:
-                verbal_audio = response_data.get("verbal_audio")
-            else:
+            t1 = time.perf_counter()
+            verbal_audio = self._wait_for_stage(pipeline, "tts")
+            timers['tts_wait'] = time.perf_counter() - t1
+            
+            if validation_blocked:
+                # The audio was made from the blocked text; speak the replacement instead
                 t1 = time.perf_counter()
-                verbal_audio = self._generate_tts(response_data.get("response"), category)
-                timers['tts_generation'] = time.perf_counter() - t1
+                replacement = SentenceChannel(max_sentences=self.max_verbal_sentences)
+                replacement.feed(response_data.get("response") or "")
+                replacement.close()
+                verbal_audio = self._synthesize_sentences(replacement, session.persona)
+                timers['tts_generation'] += time.perf_counter() - t1
+                timers['tts_wait'] += time.perf_counter() - t1
         
         # Step 8: Build final response
         response = response_data.get("response")
@@ -529,13 +794,16 @@ class OrchestratorService:
             "query_id": query_id,
             "query": query,
             "category": category,
+            "classification_tier": classification_tier,
             "response": response,
             "response_model": response_data.get("response_model"),
             "execution_time": execution_time,
             "timestamp": datetime.now().isoformat(),
             "has_verbal": verbal_audio is not None,
             "query_results": query_results,
-            "validation_feedback": validation_feedback
+            "validation_feedback": validation_feedback,
+            "validation_pending": validation_pending,
+            "timers": timers
         }
         
         # Add verbal audio if available
@@ -547,28 +815,140 @@ class OrchestratorService:
         
         # Log total execution time and performance breakdown
         timers['total_time'] = time.perf_counter() - timers['total_start']
+        # Prefetches and TTS overlap other stages; only the request thread's own spans add up
+        timers['other'] = max(0.0, timers['total_time'] - sum(timers[name] for name in CRITICAL_PATH_TIMERS))
         self.logger.info(f"Query processing completed in {timers['total_time']:.2f}s")
-        self.logger.info(f"""
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"""
             Performance Breakdown:
-            - Classification: {timers['classification']:.2f}s
-            - Rule Processing: {timers['rule_processing']:.2f}s
+            - Classification: {timers['classification']:.2f}s (tier: {classification_tier or 'n/a'})
+            - Rule Processing: {timers['rule_processing']:.2f}s (prefetch: {timers['rules_prefetch']:.2f}s, examples: {timers['examples_prefetch']:.2f}s, overlapped)
             - SQL Generation: {timers['sql_generation']:.2f}s
             - SQL Execution: {timers['sql_execution']:.2f}s
             - Text Response: {timers['text_response']:.2f}s
-            - TTS Generation: {timers['tts_generation']:.2f}s
+            - TTS Generation: {timers['tts_generation']:.2f}s (overlapped, {timers['tts_wait']:.2f}s waited for)
             - SQL Validation: {timers['sql_validation']:.2f}s
-            - Other/Unaccounted: {timers['total_time'] - timers['classification'] - timers['rule_processing'] - timers['sql_generation'] - timers['sql_execution'] - timers['text_response'] - timers['tts_generation'] - timers['sql_validation']:.2f}s
+            - Other/Unaccounted: {timers['other']:.2f}s
             - Total Time: {timers['total_time']:.2f}s
-        """)
+            """)
         
-        # Log the output, but sanitize the result
-        sanitized_result = result.copy()
-        if "verbal_audio" in sanitized_result:
-            sanitized_result["verbal_audio"] = f"[BINARY_DATA:{len(sanitized_result['verbal_audio'])} bytes]"
-        self.logger.info(f"PROCESS_QUERY OUTPUT - result: {sanitized_result}")
+        # Log the output, but sanitize the result (formatted lazily by the log handler)
+        if self.logger.isEnabledFor(logging.INFO):
+            sanitized_result = result.copy()
+            if "verbal_audio" in sanitized_result:
+                sanitized_result["verbal_audio"] = f"[BINARY_DATA:{len(sanitized_result['verbal_audio'])} bytes]"
+            self.logger.info("PROCESS_QUERY OUTPUT - result: %s", sanitized_result)
         
+        session.record_turn(query, category, sql, response)
         return result
 
+    def process_query_stream(self, query: str, context: Dict[str, Any] = None,
+                             session: Optional[SessionState] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a query, yielding the response text as it is generated.
+        
+        Args:
+            query: The user query to process
+            context: Additional context for query processing
+            session: The conversation this query belongs to (see process_query)
+            
+        Yields:
+            {"type": "chunk", "text": ...} events while the response text is
+            generated, then {"type": "result", "result": ...} with the same
+            dictionary process_query returns. The final response can differ
+            from the streamed text (e.g. when validation blocks it).
+        """
+        return stream_events(
+            lambda on_chunk: self.process_query(query, context, on_chunk=on_chunk, session=session),
+            thread_name="query-stream"
+        )
+    
+    def get_validation_result(self, query_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the outcome of a response validation that ran in the background.
+        
+        Args:
+            query_id: The query_id of a process_query result
+            timeout: Seconds to wait if the validation is still running
+            
+        Returns:
+            The validation record (see BackgroundValidator.get_result), or None
+            if async validation is off or the query is unknown
+        """
+        if self.background_validator is None:
+            return None
+        return self.background_validator.get_result(query_id, timeout=timeout)
+    
+    def _prefetch_sql_examples(self, category: str):
+        """
+        Load SQL examples for a category ahead of SQL generation.
+        
+        Args:
+            category: The (predicted) query category
+            
+        Returns:
+            The loaded examples, or None if the generator does not support prefetching
+        """
+        if category == "ambiguous" or not hasattr(self.sql_generator, "prefetch_examples"):
+            return None
+        return self.sql_generator.prefetch_examples(category)
+    
+    def _wait_for_stage(self, pipeline: StagePipeline, name: str) -> Any:
+        """
+        Wait for an optional pipeline stage, logging instead of raising on failure.
+        
+        Args:
+            pipeline: The query's stage pipeline
+            name: Stage name
+            
+        Returns:
+            The stage result, or None if the stage failed
+        """
+        try:
+            return pipeline.result(name)
+        except Exception as e:
+            self.logger.warning(f"Pipeline stage '{name}' failed: {str(e)}")
+            return None
+    
+    def _synthesize_sentences(self, sentences: SentenceChannel, persona: Optional[str] = None) -> Optional[bytes]:
+        """
+        Convert response sentences to speech as they become available.
+        
+        Sentences are synthesized concurrently by the TTS pipeline, starting
+        with the first one while later ones are still being produced.
+        
+        Args:
+            sentences: Channel the text response stage feeds its sentences into
+            persona: Persona whose voice is used (defaults to the default session's)
+            
+        Returns:
+            The concatenated audio, or None if no audio could be generated
+        """
+        if not self._tts_ready():
+            return None
+        
+        cleaned = (text for text in (clean_for_tts(sentence) for sentence in sentences) if text)
+        audio = b"".join(self.tts_pipeline.synthesize_stream(cleaned, self._tts_voice_id(persona), self.tts_model))
+        return audio or None
+    
+    def _tts_ready(self) -> bool:
+        """Check that the TTS backend can be used, initializing ElevenLabs if needed."""
+        if self.tts_pipeline.backend.name != "elevenlabs":
+            return True
+        if not self.elevenlabs_initialized:
+            self.logger.warning("ElevenLabs not initialized, initializing now")
+            self.elevenlabs_initialized = self.initialize_elevenlabs_tts()
+        return self.elevenlabs_initialized
+    
+    def _tts_voice_id(self, persona: Optional[str] = None) -> str:
+        """Get the TTS voice for a persona (by default the default session's)."""
+        persona = persona or self.persona
+        voice_id = get_voice_settings(persona).get('voice_id')
+        if not voice_id:
+            self.logger.warning(f"No voice ID configured for persona {persona}, using default voice")
+            voice_id = DEFAULT_VOICE_ID
+        return voice_id
+    
     def _preprocess_sql(self, sql_query: str) -> str:
         """
         Preprocess SQL query by replacing symbolic placeholders with default values.
@@ -580,7 +960,7 @@ class OrchestratorService:
         Returns:
             Processed SQL with placeholders replaced
         """
-        self.logger.info(f"PREPROCESS_SQL INPUT - sql_query: '{sql_query}'")
+        self.logger.info("PREPROCESS_SQL INPUT - sql_query: '%s'", sql_query)
         
         if not sql_query:
             return sql_query
@@ -629,7 +1009,7 @@ class OrchestratorService:
                 # Use the value directly for numbers and NULL
                 processed_sql = processed_sql.replace(placeholder, str(value))
                 
-        self.logger.info(f"Preprocessed SQL: {processed_sql[:100]}..." if len(processed_sql) > 100 else processed_sql)
+        self.logger.info("Preprocessed SQL: %.100s%s", processed_sql, "..." if len(processed_sql) > 100 else "")
         
         # Get the location_id from all possible sources for accurate logging
         location_id = self.config.get("DEFAULT_LOCATION_ID")
@@ -640,19 +1020,25 @@ class OrchestratorService:
             
         self.logger.info(f"Using location_id: {location_id}")
         
-        self.logger.info(f"PREPROCESS_SQL OUTPUT - processed_sql: '{processed_sql}'")
+        self.logger.info("PREPROCESS_SQL OUTPUT - processed_sql: '%s'", processed_sql)
         return processed_sql
 
-    def set_persona(self, persona_name: str) -> None:
+    def set_persona(self, persona_name: str, session: Optional[SessionState] = None) -> None:
         """
         Set the current persona for response generation.
         
         Args:
             persona_name: Name of the persona to use
+            session: Set the persona of this session only; by default it is set
+                for the default session and becomes the response generator's
+                persona for all sessions that did not set their own
         """
         self.logger.info(f"SET_PERSONA INPUT - persona_name: '{persona_name}'")
         
-        self.persona = persona_name
+        if session is None:
+            self.persona = persona_name
+        else:
+            session.persona = persona_name
         
         # Get the persona configuration from the config
         persona_config = self.config.get("persona", {})
@@ -668,21 +1054,29 @@ class OrchestratorService:
             self.logger.info(f"Set persona to: {persona_name} with text persona: {persona_dict['text_persona']} and verbal persona: {persona_dict['verbal_persona']}")
             
             # Pass the full persona configuration to the response generator
-            self.response_generator.set_persona(persona_dict)
+            response_persona = persona_dict
         else:
             self.logger.info(f"Set persona to: {persona_name}")
-            self.response_generator.set_persona(persona_name)
+            response_persona = persona_name
+        
+        # The response generator is shared; a session's persona goes with its queries
+        if session is None:
+            self.response_generator.set_persona(response_persona)
+        else:
+            session.response_persona = response_persona
         
         self.logger.info(f"SET_PERSONA COMPLETE - persona set to: '{persona_name}'")
     
-    def get_tts_response(self, text: str, model: str = "eleven_multilingual_v2", max_sentences: int = 1) -> Dict[str, Any]:
+    def get_tts_response(self, text: str, model: str = "eleven_multilingual_v2", max_sentences: int = 1,
+                         session: Optional[SessionState] = None) -> Dict[str, Any]:
         """
         Generate a TTS response for the given text.
         
         Args:
             text: Text to convert to speech
             model: ElevenLabs model to use
-            max_sentences: Maximum number of sentences to include (0 for all)
+            max_sentences: Speak only the key sentences, at most this many (0 for all)
+            session: Session whose persona voice is used (defaults to the default session)
             
         Returns:
             Dictionary with TTS results
@@ -698,40 +1092,14 @@ class OrchestratorService:
         self.logger.info(f"GET_TTS_RESPONSE INPUT - model: '{model}', max_sentences: {max_sentences}")
         
         try:
-            # Ensure we have ElevenLabs client
-            if not self.elevenlabs_initialized:
-                self.logger.warning("ElevenLabs not initialized, initializing now")
-                self.elevenlabs_initialized = self.initialize_elevenlabs_tts()
-                
-            if not self.elevenlabs_initialized:
+            if not self._tts_ready():
                 self.logger.error("Failed to initialize ElevenLabs")
                 return {"success": False, "error": "ElevenLabs not initialized", "text": text}
-                
-            # Limit the text to the specified number of sentences
-            if max_sentences > 0:
-                sentences = re.split(r'(?<=[.!?])\s+', text)
-                if len(sentences) > max_sentences:
-                    text = ' '.join(sentences[:max_sentences])
-                    self.logger.info(f"Limited text to {max_sentences} sentences: '{text[:100]}...' (original length: {len(text)})")
-            
-            # Get voice settings based on current persona
-            voice_settings = get_voice_settings(self.persona)
-            voice_id = voice_settings.get('voice_id')
             
-            if not voice_id:
-                self.logger.warning(f"No voice ID configured for persona {self.persona}, using default voice")
-                voice_id = "EXAVITQu4vr4xnSDxMaL"  # Default voice ID
-            
-            # Convert text to speech
-            self.logger.info(f"Using ElevenLabs voice ID: {voice_id}")
-            self.logger.info(f"Using ElevenLabs model: {model}")
-            
-            import elevenlabs
-            audio_data = elevenlabs.generate(
-                text=text, 
-                voice=voice_id,
-                model=model
-            )
+            # Convert text to speech, sentence by sentence through the audio cache
+            voice_id = self._tts_voice_id(session.persona if session else None)
+            self.logger.info(f"Using TTS voice ID: {voice_id}, model: {model}")
+            audio_data = self.tts_pipeline.synthesize(text, voice_id, model=model, max_sentences=max_sentences)
             
             # Log success but don't include the audio data in the logs
             if audio_data:
@@ -744,22 +1112,24 @@ class OrchestratorService:
                     "model": model
                 }
             else:
-                self.logger.error("ElevenLabs returned empty audio data")
+                self.logger.error("TTS returned empty audio data")
                 return {"success": False, "error": "Empty audio data returned", "text": text}
                 
         except Exception as e:
             self.logger.error(f"Error generating TTS response: {str(e)}")
             return {"success": False, "error": str(e), "text": text}
 
-    def _get_error_context(self):
+    def _get_error_context(self, session: Optional[SessionState] = None):
         """Collect critical debugging context for error analysis"""
+        session = session or self.default_session
         context = {
-            'current_query': getattr(self, 'current_query', None),
-            'classification_result': self.error_context.get('classification'),
-            'generated_sql': self.error_context.get('generated_sql'),
-            'execution_result': self.error_context.get('execution_result'),
-            'retry_count': self.retry_counter,
-            'timers': self.error_context.get('timers', {}),
+            'session_id': session.session_id,
+            'current_query': session.current_query,
+            'classification_result': session.error_context.get('classification'),
+            'generated_sql': session.error_context.get('generated_sql'),
+            'execution_result': session.error_context.get('execution_result'),
+            'retry_count': session.retry_counter,
+            'timers': session.error_context.get('timers', {}),
             'system': {
                 'memory_usage': psutil.Process().memory_info().rss,
                 'cpu_usage': psutil.cpu_percent(),
@@ -900,23 +1270,29 @@ class OrchestratorService:
         # Add more filter extractions as needed
         return filters
 
-    def get_time_period_context(self) -> str:
+    def get_time_period_context(self, session: Optional[SessionState] = None) -> str:
         """
         Get the cached time period context from the previous query.
         
+        Args:
+            session: The session (defaults to the default session)
+        
         Returns:
             The cached time period WHERE clause or None if not available
         """
-        return self.query_context.get("time_period_clause")
+        return (session or self.default_session).query_context.get("time_period_clause")
         
-    def get_query_context(self) -> Dict[str, Any]:
+    def get_query_context(self, session: Optional[SessionState] = None) -> Dict[str, Any]:
         """
         Get the complete query context for follow-up questions.
         
+        Args:
+            session: The session (defaults to the default session)
+        
         Returns:
             Dictionary with all context information from previous queries
         """
-        return self.query_context
+        return (session or self.default_session).query_context
 
     def _extract_constraints_from_query(self, query: str) -> Dict[str, str]:
         """Extract constraints from natural language query."""
@@ -0,0 +1,208 @@
+"""
+Stage scheduling for the query processing pipeline.
+
+The orchestrator describes a query as a small dependency graph of stages
+(classification, rules, SQL generation, execution, text response, TTS,
+validation). Each stage is submitted to a shared thread pool as soon as the
+stages it depends on have finished, so independent work overlaps instead of
+running strictly one after another. Every stage records its own duration
+under its timer name.
+"""
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Dict, Any, Callable, Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Sentence boundary: terminal punctuation followed by whitespace
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+_CLOSED = object()
+
+
+class StagePipeline:
+    """
+    Runs the stages of one query on a shared executor, following dependencies.
+
+    Stages are functions that take the results of their dependencies as
+    positional arguments, in the order the dependencies were listed.
+    """
+
+    def __init__(self, executor: Executor, timers: Dict[str, float]):
+        """
+        Initialize the pipeline for a single query.
+
+        Args:
+            executor: Thread pool the stages run on
+            timers: Timer dictionary that stage durations are added to
+        """
+        self.executor = executor
+        self.timers = timers
+        self._stages: Dict[str, Future] = {}
+        self._timers_lock = threading.Lock()
+
+    def add(self,
+            name: str,
+            fn: Callable[..., Any],
+            depends_on: Sequence[str] = (),
+            timer: Optional[str] = None,
+            executor: Optional[Executor] = None) -> Future:
+        """
+        Add a stage that starts once all of its dependencies have finished.
+
+        If a dependency fails, the stage fails with the same exception
+        without running.
+
+        Args:
+            name: Unique stage name
+            fn: Stage function, called with the dependency results
+            depends_on: Names of stages that must finish first
+            timer: Timer key the stage duration is added to (defaults to name)
+            executor: Executor to run this stage on instead of the shared one,
+                for stages that block waiting on other work
+
+        Returns:
+            Future for the stage result
+        """
+        if name in self._stages:
+            raise ValueError(f"Pipeline stage already exists: {name}")
+
+        dependencies = [self._stages[dep] for dep in depends_on]
+        executor = executor or self.executor
+        stage = Future()
+        self._stages[name] = stage
+
+        def run():
+            if not stage.set_running_or_notify_cancel():
+                return
+            try:
+                args = [dep.result() for dep in dependencies]
+            except BaseException as e:
+                stage.set_exception(e)
+                return
+            started = time.perf_counter()
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                # Record the time before waiters are released
+                self._add_time(timer or name, time.perf_counter() - started)
+                logger.error(f"Pipeline stage '{name}' failed: {str(e)}")
+                stage.set_exception(e)
+            else:
+                self._add_time(timer or name, time.perf_counter() - started)
+                stage.set_result(result)
+
+        # Submit only once every dependency is done, so no worker blocks on another
+        pending = [len(dependencies)]
+        pending_lock = threading.Lock()
+
+        def dependency_done(_):
+            with pending_lock:
+                pending[0] -= 1
+                ready = pending[0] == 0
+            if ready:
+                executor.submit(run)
+
+        if not dependencies:
+            executor.submit(run)
+        for dep in dependencies:
+            dep.add_done_callback(dependency_done)
+
+        return stage
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for a stage and return its result.
+
+        Args:
+            name: Stage name
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The stage result
+
+        Raises:
+            Whatever the stage raised
+        """
+        return self._stages[name].result(timeout=timeout)
+
+    def _add_time(self, timer: str, elapsed: float):
+        """Add a stage duration to its timer."""
+        with self._timers_lock:
+            self.timers[timer] = self.timers.get(timer, 0.0) + elapsed
+
+
+class SentenceChannel:
+    """
+    Hands complete sentences from a text producer to a consumer thread.
+
+    The producer feeds text as it becomes available (all at once or in
+    chunks); the consumer iterates over sentences and can start working on
+    the first one while the rest of the text is still being produced.
+    """
+
+    def __init__(self, max_sentences: int = 0):
+        """
+        Initialize the channel.
+
+        Args:
+            max_sentences: Stop after this many sentences (0 for no limit)
+        """
+        self.max_sentences = max_sentences
+        self._sentences: "queue.Queue[Any]" = queue.Queue()
+        self._buffer = ""
+        self._emitted = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def feed(self, text: str):
+        """
+        Add produced text; every complete sentence is passed to the consumer.
+
+        Args:
+            text: Next piece of the text
+        """
+        if not text:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer += text
+            parts = _SENTENCE_END_RE.split(self._buffer)
+            self._buffer = parts.pop()
+            for sentence in parts:
+                self._emit(sentence)
+
+    def close(self):
+        """Flush the last partial sentence and signal the end of the text."""
+        with self._lock:
+            if self._closed:
+                return
+            self._emit(self._buffer)
+            self._buffer = ""
+            self._closed = True
+            self._sentences.put(_CLOSED)
+
+    def _emit(self, sentence: str):
+        """Queue one sentence, respecting the sentence limit. Caller holds the lock."""
+        sentence = sentence.strip()
+        if not sentence:
+            return
+        if self.max_sentences and self._emitted >= self.max_sentences:
+            return
+        self._emitted += 1
+        self._sentences.put(sentence)
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield sentences until the producer closes the channel or the limit is reached."""
+        received = 0
+        while not self.max_sentences or received < self.max_sentences:
+            sentence = self._sentences.get()
+            if sentence is _CLOSED:
+                return
+            received += 1
+            yield sentence
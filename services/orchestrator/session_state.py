@@ -0,0 +1,99 @@
+"""
+Per-session conversation state for the orchestrator.
+
+OrchestratorService holds the expensive, shareable parts of the pipeline
+(service clients, caches, worker pools). Everything that belongs to one
+conversation - the follow-up context, histories, persona and error
+bookkeeping - lives in a SessionState, so one orchestrator can serve many
+sessions at once.
+"""
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from services.utils.bounded_history import BoundedHistory
+
+
+def new_query_context() -> Dict[str, Any]:
+    """Get an empty follow-up context (what earlier queries left for the next one)."""
+    return {
+        "time_period_clause": None,
+        "previous_query": None,
+        "previous_category": None,
+        "previous_sql": None,
+        "previous_filters": {},
+        "previous_constraints": []
+    }
+
+
+class SessionState:
+    """
+    Conversation state of one user session.
+
+    Queries of the same session depend on each other through the query
+    context, so they should run one at a time: hold ``lock`` while
+    processing a query. Different sessions share nothing and run in parallel.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, persona: str = "casual",
+                 max_history_items: int = 10):
+        """
+        Initialize the session state.
+
+        Args:
+            session_id: Session identifier (a new one is generated if omitted)
+            persona: Persona used for the session's responses and voice
+            max_history_items: Entries kept in the conversation and SQL histories
+        """
+        self.session_id = session_id or str(uuid.uuid4())
+        self.persona = persona
+        # Response generator persona set for this session only (None: the generator's own)
+        self.response_persona = None
+        self.max_history_items = max_history_items
+
+        # Context carried from one query to its follow-ups
+        self.query_context = new_query_context()
+        self.time_period_context = None
+
+        self.conversation_history = BoundedHistory(maxlen=max_history_items)
+        self.sql_history = BoundedHistory(maxlen=max_history_items)
+
+        # Debugging context of the latest query
+        self.current_query = None
+        self.error_context = {}
+        self.retry_counter = 0
+
+        self.lock = threading.RLock()
+
+    def record_turn(self, query: str, category: str, sql: Optional[str], response: Optional[str]) -> None:
+        """
+        Add a processed query to the session's histories.
+
+        Args:
+            query: The user query
+            category: Its category
+            sql: The SQL generated for it, if any
+            response: The response text
+        """
+        timestamp = datetime.now().isoformat()
+        self.query_context["previous_query"] = query
+        self.conversation_history.append({
+            "timestamp": timestamp,
+            "query": query,
+            "category": category,
+            "response": response or ""
+        })
+        if sql:
+            self.sql_history.append({"sql": sql, "timestamp": timestamp, "category": category})
+
+    def reset(self) -> None:
+        """Forget the conversation, keeping the session's id and persona."""
+        with self.lock:
+            self.query_context = new_query_context()
+            self.time_period_context = None
+            self.conversation_history.clear()
+            self.sql_history.clear()
+            self.current_query = None
+            self.error_context = {}
+            self.retry_counter = 0
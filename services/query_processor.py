@@ -18,6 +18,7 @@ import inspect
 from services.data import get_data_access
 from services.response_service import ResponseService
 from services.context_manager import ContextManager, ConversationContext
+from services.utils.bounded_history import BoundedMapping
 from services.feedback import get_feedback_service, FeedbackModel, FeedbackType, IssueCategory
 from services.utils.error_handler import (
     ErrorTypes, 
@@ -75,7 +76,14 @@ class QueryProcessor:
         self.response_service = ResponseService(config.get('response_service', {}))
         
         # Initialize context manager
-        self.context_manager = ContextManager(config.get('context_manager', {}))
+        context_config = config.get('context_manager', {})
+        self.context_manager = ContextManager(
+            expiry_minutes=context_config.get('expiry_minutes', 30),
+            profile_storage_path=context_config.get('profile_storage_path'),
+            history_limit=context_config.get('history_limit'),
+            spill_dir=context_config.get('spill_dir'),
+            sweep_interval_seconds=context_config.get('sweep_interval_seconds')
+        )
         
         # Initialize feedback service if configured
         feedback_config = config.get('feedback', {})
@@ -99,8 +107,13 @@ class QueryProcessor:
             "error_counts": {}
         }
         
-        # Initialize response history dictionary for backward compatibility with tests
-        self.response_history = {}
+        # Recent responses by response ID (used to attach feedback); bounded so
+        # a long-running processor doesn't grow without limit
+        history_config = config.get('response_history', {})
+        self.response_history = BoundedMapping(
+            maxlen=history_config.get('max_entries', 1000),
+            spill_path=history_config.get('spill_path')
+        )
         
         logger.info("Query Processor initialized")
     
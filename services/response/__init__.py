@@ -1,5 +1,6 @@
 """Response module for generating user-friendly responses."""
 
 from .response_generator import ResponseGenerator
+from .tts_pipeline import TTSPipeline, AudioCache, FakeTTSBackend, create_tts_pipeline
 
-__all__ = ["ResponseGenerator"] 
\ No newline at end of file
+__all__ = ["ResponseGenerator", "TTSPipeline", "AudioCache", "FakeTTSBackend", "create_tts_pipeline"] 
\ No newline at end of file
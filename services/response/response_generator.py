@@ -7,15 +7,16 @@ import json
 import time
 import os
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Union, Tuple, Callable, Iterator
 from datetime import datetime
 import uuid
 import re
+import hashlib
+import threading
 import concurrent.futures
 from collections import OrderedDict
 import secrets
 import copy
-import signal
 import importlib
 import traceback
 
@@ -25,11 +26,38 @@ from resources.ui.personas import get_prompt_instructions, get_voice_settings
 import elevenlabs
 from elevenlabs import play
 from services.utils.service_registry import ServiceRegistry
+from services.utils.streaming import stream_events
+from services.response.tts_pipeline import create_tts_pipeline, DEFAULT_MODEL, DEFAULT_VOICE_ID
+from services.response.result_encoder import CompactResultEncoder
+from services.validation.sql_validation_service import IMPORTANT_COLUMNS
 
 
 
 logger = logging.getLogger(__name__)
 
+# Query fingerprint normalization: punctuation and repeated whitespace are dropped
+_QUERY_PUNCTUATION_RE = re.compile(r"[^\w\s$%.-]|(?<!\d)\.|\.(?!\d)")
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _query_fingerprint(query: str) -> str:
+    """
+    Fingerprint a query so trivially different phrasings share a cache entry.
+    
+    Case, punctuation (other than decimal points, $ and %) and whitespace
+    are ignored.
+    """
+    normalized = _QUERY_PUNCTUATION_RE.sub(" ", query.lower())
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _results_hash(query_results: Any) -> str:
+    """Hash a query result payload; equal results give equal hashes."""
+    payload = json.dumps(query_results, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
 # Simple OrderedDict-based cache with max size
 class CacheDict(OrderedDict):
     def __init__(self, maxsize=100, *args, **kwargs):
@@ -144,9 +172,6 @@ class ResponseGenerator:
         except Exception as e:
             logger.error(f"Error preloading templates: {str(e)}")
         
-        # Initialize cache for response memoization
-        self.response_cache = CacheDict(maxsize=100)
-        
         # Initialize error context for debugging
         self.error_context = {}
         
@@ -181,13 +206,28 @@ class ResponseGenerator:
         # Enable rich media formatting like Markdown and HTML
         self.enable_rich_media = self.config.get("services", {}).get("response", {}).get("enable_rich_media", True)
         
+        # Token budget for SQL results in prompts; larger results are summarized
+        self.prompt_result_tokens = self.config.get("services", {}).get("response", {}).get("prompt_result_tokens", 2000)
+        self.result_encoder = CompactResultEncoder(self.prompt_result_tokens, key_columns=IMPORTANT_COLUMNS)
+        
         # Cache parameters
         self.cache_ttl = self.config.get("services", {}).get("response", {}).get("cache_ttl", 3600)  # 1 hour by default
         self.cache_enabled = self.config.get("services", {}).get("response", {}).get("cache_enabled", True)
         self.cache_size = self.config.get("services", {}).get("response", {}).get("cache_size", 100)  # Default cache size
         
+        # Initialize cache for response memoization (least recently used entry evicted first)
+        self.response_cache = CacheDict(maxsize=self.cache_size)
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {"hits": 0, "misses": 0, "expired": 0}
+        
         # TTS parameters
         self.max_verbal_sentences = self.config.get("services", {}).get("response", {}).get("max_verbal_sentences", 2)
+        self.tts_model = elevenlabs_config.get("model", DEFAULT_MODEL)
+        # Use the application's shared TTS pipeline when one is registered
+        if ServiceRegistry.service_exists("tts_pipeline"):
+            self.tts_pipeline = ServiceRegistry.get_service("tts_pipeline")
+        else:
+            self.tts_pipeline = create_tts_pipeline(self.config)
         
         # Initialize API call tracking
         self.api_calls = {
@@ -215,55 +255,66 @@ class ResponseGenerator:
         # Create a handler for API call logs
         self.api_logger = logging.getLogger("api_calls")
         
-    def _get_cache_key(self, query: str, category: str) -> str:
-        """Generate a cache key for the query and category."""
-        # Normalize the query by removing extra whitespace and converting to lowercase
-        normalized_query = re.sub(r'\s+', ' ', query.strip().lower())
-        return f"{category}:{normalized_query}"
+    def _get_cache_key(self, query: str, category: str, query_results: Any = None, persona: Any = None) -> str:
+        """
+        Generate a cache key for a response.
+        
+        The key combines the category, the persona (by default the current
+        one), a fingerprint of the normalized query and a hash of the query
+        results, so a cached response is only reused for the same question
+        over unchanged data.
+        """
+        persona = persona or self.current_persona
+        return f"{category}:{persona}:{_query_fingerprint(query)}:{_results_hash(query_results)}"
     
-    def _check_cache(self, query: str, category: str) -> Optional[Dict[str, Any]]:
+    def _check_cache(self, query: str, category: str, query_results: Any = None,
+                     persona: Any = None) -> Optional[Dict[str, Any]]:
         """Check if response is in cache and not expired."""
         if not self.cache_enabled:
             return None
             
-        cache_key = self._get_cache_key(query, category)
-        cached_item = self.response_cache.get(cache_key)
-        
-        if not cached_item:
-            return None
+        cache_key = self._get_cache_key(query, category, query_results, persona)
+        with self._cache_lock:
+            cached_item = self.response_cache.get(cache_key)
             
-        # Check if cache has expired
-        cached_time = cached_item.get("timestamp", 0)
-        if time.time() - cached_time > self.cache_ttl:
-            # Remove expired item
-            del self.response_cache[cache_key]
-            return None
+            if not cached_item:
+                self.cache_stats["misses"] += 1
+                return None
+                
+            # Check if cache has expired
+            cached_time = cached_item.get("timestamp", 0)
+            if time.time() - cached_time > self.cache_ttl:
+                # Remove expired item
+                del self.response_cache[cache_key]
+                self.cache_stats["expired"] += 1
+                self.cache_stats["misses"] += 1
+                return None
+            
+            # Mark as recently used
+            self.response_cache.move_to_end(cache_key)
+            self.cache_stats["hits"] += 1
             
         logger.info(f"Cache hit for query: '{query}'")
-        return cached_item.get("response")
+        return copy.deepcopy(cached_item.get("response"))
     
-    def _update_cache(self, query: str, category: str, response: Dict[str, Any]) -> None:
+    def _update_cache(self, query: str, category: str, response: Dict[str, Any], query_results: Any = None,
+                      persona: Any = None) -> None:
         """Add response to cache."""
         if not self.cache_enabled:
             return
             
-        # Limit cache size by removing oldest entries if needed
-        if len(self.response_cache) >= self.cache_size:
-            # Sort by timestamp and remove oldest
-            oldest_key = sorted(
-                self.response_cache.keys(), 
-                key=lambda k: self.response_cache[k].get("timestamp", 0)
-            )[0]
-            del self.response_cache[oldest_key]
-            
-        cache_key = self._get_cache_key(query, category)
-        self.response_cache[cache_key] = {
-            "response": response,
+        cache_key = self._get_cache_key(query, category, query_results, persona)
+        entry = {
+            "response": copy.deepcopy(response),
             "timestamp": time.time(),
             "model": self.default_model,
             "category": category
         }
-        
+        # CacheDict drops the least recently used entry once it is full
+        with self._cache_lock:
+            self.response_cache[cache_key] = entry
+            self.response_cache.move_to_end(cache_key)
+    
     def _get_default_template(self) -> str:
         """
         Get the default response template.
@@ -440,7 +491,8 @@ Format currency values with dollar signs and two decimal places.
         category: str,
         response_rules: Dict[str, Any],
         query_results: Optional[List[Dict[str, Any]]],
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        on_chunk: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Generate a response for the given query.
@@ -451,6 +503,8 @@ Format currency values with dollar signs and two decimal places.
             response_rules: Rules for response generation
             query_results: Results from SQL query execution
             context: Additional context information
+            on_chunk: Optional callback; when given, the completion is streamed
+                and the callback receives each piece of text as it arrives
             
         Returns:
             Response dictionary including text and metadata
@@ -466,10 +520,24 @@ Format currency values with dollar signs and two decimal places.
         }
         
         try:
+            context = context or {}
+            
             # Add SQL query to context for validation
             if "sql_query" not in context and "previous_sql" in context:
                 context["sql_query"] = context["previous_sql"]
             
+            # The caller's session can have its own persona; the generator is shared
+            persona = context.get("response_persona") or self.current_persona
+            
+            # Reuse the response to the same question over unchanged results
+            cached = self._check_cache(query, category, query_results, persona)
+            if cached is not None:
+                cached["cached"] = True
+                cached["execution_time"] = time.time() - start_time
+                if on_chunk and cached.get("response"):
+                    on_chunk(cached["response"])
+                return cached
+            
             # Format query results for rich display if needed
             rich_results = None
             try:
@@ -488,7 +556,7 @@ Format currency values with dollar signs and two decimal places.
                 personalization = context["personalization"]
             
             # Build prompt with template and personalization
-            system_prompt = self._build_system_message(category, self.current_persona, personalization)
+            system_prompt = self._build_system_message(category, persona, personalization)
             
             # Format rules for inclusion in the prompt
             formatted_rules = self._format_rules(response_rules)
@@ -522,13 +590,28 @@ Format currency values with dollar signs and two decimal places.
             
             logger.info(f"Sending request to OpenAI API for query: {query[:50]}...")
             
-            # Get the full text of the response using the default model
-            response_text = self._get_response_text(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                model=self.default_model,
-                temperature=0.2  # Lower temperature for more consistent responses
-            )
+            if on_chunk:
+                # Stream the response, passing text on as soon as it arrives
+                def forward_chunk(text: str):
+                    if "time_to_first_chunk" not in result:
+                        result["time_to_first_chunk"] = time.time() - start_time
+                    on_chunk(text)
+                
+                response_text = self._stream_response_text(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=self.default_model,
+                    on_chunk=forward_chunk,
+                    temperature=0.2
+                )
+            else:
+                # Get the full text of the response using the default model
+                response_text = self._get_response_text(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=self.default_model,
+                    temperature=0.2  # Lower temperature for more consistent responses
+                )
             
             # Process the response text (e.g., applying formatting)
             processed_text = self._process_response_text(response_text, category)
@@ -538,8 +621,9 @@ Format currency values with dollar signs and two decimal places.
             result["response_model"] = self.default_model
             
             # Attempt to validate that response correctly addresses the SQL results
+            # (unless the caller validates the response itself)
             try:
-                if self.client and query_results and len(query_results) > 0:
+                if self.client and query_results and len(query_results) > 0 and not context.get("skip_validation"):
                     validator = ServiceRegistry.get_service("sql_validation") if ServiceRegistry.service_exists("sql_validation") else None
                     if validator:
                         validation_result = validator.validate_response(
@@ -582,9 +666,10 @@ Format currency values with dollar signs and two decimal places.
                 response_data=self._sanitize_response({"content_length": len(processed_text)}),
             )
             
-            # Update the cache with correct parameters
+            # Update the cache; blocked responses are regenerated next time
             try:
-                self._update_cache(query, category, result)
+                if not result.get("validation_blocked"):
+                    self._update_cache(query, category, result, query_results, persona)
             except Exception as e:
                 logger.error(f"Error updating cache: {str(e)}")
             
@@ -597,6 +682,35 @@ Format currency values with dollar signs and two decimal places.
             result["execution_time"] = time.time() - start_time
             return result
 
+    def generate_stream(
+        self,
+        query: str,
+        category: str,
+        response_rules: Dict[str, Any],
+        query_results: Optional[List[Dict[str, Any]]],
+        context: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a response, yielding the text as it is produced.
+        
+        Args:
+            query: The user's query
+            category: Query category
+            response_rules: Rules for response generation
+            query_results: Results from SQL query execution
+            context: Additional context information
+            
+        Yields:
+            {"type": "chunk", "text": ...} events while the response is
+            generated, then {"type": "result", "result": ...} with the same
+            dictionary generate() returns
+        """
+        return stream_events(
+            lambda on_chunk: self.generate(
+                query, category, response_rules, query_results, context, on_chunk=on_chunk
+            )
+        )
+
     def _generate_fallback_response(self, query: str, category: str, validation_result: Dict[str, Any]) -> str:
         """
         Generate a fallback response when validation fails.
@@ -684,11 +798,31 @@ Format currency values with dollar signs and two decimal places.
             logger.error(f"Error preloading templates: {str(e)}")
             raise
 
-    def get_api_latency_stats(self):
-        return {
-            'openai': self.client.get_latency_stats(),
-            'elevenlabs': self.elevenlabs_client.get_latency_stats()
-        }
+    def get_api_latency_stats(self) -> Dict[str, Any]:
+        """
+        Get API call latency statistics and response cache effectiveness.
+        
+        Returns:
+            Dictionary with per-API call counts and average latency, and
+            response cache hits, misses, hit rate and size
+        """
+        stats = {}
+        for api_name, calls in self.api_calls.items():
+            success_calls = calls.get("success_calls", 0)
+            stats[api_name] = {
+                **calls,
+                "average_time": calls.get("total_time", 0) / success_calls if success_calls else 0
+            }
+        
+        with self._cache_lock:
+            lookups = self.cache_stats["hits"] + self.cache_stats["misses"]
+            stats["response_cache"] = {
+                **self.cache_stats,
+                "hit_rate": self.cache_stats["hits"] / lookups if lookups else 0.0,
+                "size": len(self.response_cache),
+                "max_size": self.cache_size
+            }
+        return stats
 
     def _log_intermediate_steps(self):
         logger.debug(f"Current generation queue: {self._get_queue_status()}")
@@ -697,7 +831,10 @@ Format currency values with dollar signs and two decimal places.
 
     def _elevenlabs_tts(self, text: str) -> Optional[bytes]:
         """
-        Generate audio with ElevenLabs TTS.
+        Generate audio with the TTS pipeline (ElevenLabs by default).
+        
+        The text is split into sentences that are synthesized concurrently
+        and served from the audio cache when they have been spoken before.
         
         Args:
             text: Text to convert to speech
@@ -705,125 +842,46 @@ Format currency values with dollar signs and two decimal places.
         Returns:
             Audio data as bytes, or None if generation failed
         """
+        if not text or not text.strip():
+            logger.warning("Cannot generate TTS with empty text")
+            return None
+        
+        # Check if ElevenLabs client is initialized
+        if self.tts_pipeline.backend.name == "elevenlabs" and not self.elevenlabs_client:
+            logger.error("ElevenLabs client not initialized. Cannot generate TTS.")
+            return None
+        
+        # Get voice settings based on current persona
+        voice_settings = get_voice_settings(self.current_persona)
+        voice_id = voice_settings.get('voice_id')
+        if not voice_id:
+            logger.warning(f"No voice ID configured for persona: {self.current_persona}")
+            # Default to a known good voice ID
+            voice_id = DEFAULT_VOICE_ID
+        
+        start_time = time.time()
         try:
-            # Disable logging for this function
-            original_level = logging.getLogger().level
-            logging.getLogger().setLevel(logging.ERROR)
-            
-            if not text or not text.strip():
-                logger.warning("Cannot generate TTS with empty text")
-                return None
-            
-            # Check if ElevenLabs client is initialized
-            if not self.elevenlabs_client:
-                logger.error("ElevenLabs client not initialized. Cannot generate TTS.")
-                return None
-                
-            # Log attempt without text content details
-            logger.info("Attempting to generate TTS audio")
-            
-            # Import elevenlabs with enhanced error handling
-            try:
-                import elevenlabs
-                logger.info("ElevenLabs module successfully imported")
-                
-                # Verify the module has the required functions
-                if not hasattr(elevenlabs, 'generate') or not hasattr(elevenlabs, 'set_api_key'):
-                    logger.error("ElevenLabs module missing required functions. Make sure you have the latest version installed.")
-                    return None
-                    
-            except ImportError:
-                logger.error("ElevenLabs module not installed. Cannot generate TTS.")
-                return None
-                
-            # Make sure we set the API key directly before generation
-            if self.elevenlabs_api_key:
-                try:
-                    # Set the API key for this specific generation call
-                    logger.info("Setting ElevenLabs API key")
-                    elevenlabs.set_api_key(self.elevenlabs_api_key)
-                except Exception as api_key_error:
-                    logger.error(f"Failed to set ElevenLabs API key: {str(api_key_error)}")
-                    return None
-            else:
-                logger.error("No ElevenLabs API key available. Cannot generate TTS.")
-                return None
-                
-            # Get voice settings based on current persona - use current_persona if available
-            current_persona = self.current_persona if hasattr(self, 'current_persona') else self.persona
-            voice_settings = get_voice_settings(current_persona)
-            voice_id = voice_settings.get('voice_id')
-            
-            if not voice_id:
-                logger.warning(f"No voice ID configured for persona: {current_persona}")
-                # Default to a known good voice ID
-                voice_id = "EXAVITQu4vr4xnSDxMaL"  
-                
-            logger.info(f"Using ElevenLabs voice ID: {voice_id}")
-            
-            # Prepare parameters for ElevenLabs API call
-            elevenlabs_params = {
-                "text": text,  # Don't log the actual text content
-                "voice": voice_id,
-                "model": "eleven_multilingual_v2"
-            }
-            
-            # Generate audio with ElevenLabs using a timeout to prevent hanging
-            start_time = time.time()
-            logger.info("Calling ElevenLabs API for text-to-speech conversion")
-            
-            try:
-                # Use a timeout mechanism - importing signal and setting a timeout
-                # if supported by the platform
-                has_timeout_support = False
-                try:
-                    import signal
-                    
-                    def timeout_handler(signum, frame):
-                        raise TimeoutError("ElevenLabs API call timed out after 30 seconds")
-                    
-                    # Set the timeout for 30 seconds
-                    if hasattr(signal, 'SIGALRM'):
-                        has_timeout_support = True
-                        signal.signal(signal.SIGALRM, timeout_handler)
-                        signal.alarm(30)
-                except (ImportError, AttributeError):
-                    # Signal module or SIGALRM not available (e.g., on Windows)
-                    pass
-                    
-                # Generate the audio
-                audio_data = elevenlabs.generate(**elevenlabs_params)
-                
-                # Cancel the alarm if it was set
-                if has_timeout_support and hasattr(signal, 'alarm'):
-                    signal.alarm(0)
-                
-                end_time = time.time()
-                
-                if audio_data:
-                    # Only log success without audio data details or size
-                    logger.info(f"Successfully generated audio in {end_time - start_time:.2f}s")
-                    return audio_data
-                else:
-                    logger.error("ElevenLabs returned empty audio data")
-                    return None
-                    
-            except TimeoutError as timeout_err:
-                logger.error(f"ElevenLabs API call timed out: {str(timeout_err)}")
-                return None
-            except Exception as gen_err:
-                logger.error(f"Error generating audio: {str(gen_err)}")
-                import traceback
-                logger.error(f"Audio generation error stack trace: {traceback.format_exc()}")
-                return None
-                
+            audio_data = self.tts_pipeline.synthesize(text, voice_id, model=self.tts_model)
         except Exception as e:
-            # Restore logging level
-            logging.getLogger().setLevel(original_level)
-            logger.error(f"Error calling ElevenLabs API: {str(e)}")
-            import traceback
-            logger.error(f"Stack trace: {traceback.format_exc()}")
-            return None 
+            logger.error(f"Error generating audio: {str(e)}")
+            audio_data = None
+        
+        self._log_api_call(
+            api_name="elevenlabs",
+            endpoint="generate",
+            params={"text": text, "voice": voice_id, "model": self.tts_model},
+            start_time=start_time,
+            end_time=time.time(),
+            success=audio_data is not None,
+            response_data={"audio_bytes": len(audio_data)} if audio_data else None,
+            error=None if audio_data else "No audio generated"
+        )
+        
+        if audio_data:
+            logger.info(f"Successfully generated audio in {time.time() - start_time:.2f}s")
+        else:
+            logger.error("TTS returned no audio data")
+        return audio_data
 
     def _mock_generate_text_response(self, query, category, results, verbose_mode=False):
         """
@@ -1226,20 +1284,9 @@ For trend analysis:
         if isinstance(results, dict) and 'affected_rows' in results:
             return f"Query affected {results['affected_rows']} rows."
         
-        # Handle list of dictionaries
+        # Handle list of dictionaries: compact table, summarized if over the token budget
         if isinstance(results, list):
-            # Limit the number of results to avoid token limits
-            display_results = results[:10]
-            has_more = len(results) > 10
-            
-            # Format as JSON for consistent parsing
-            formatted_results = json.dumps(display_results, indent=2, default=str)
-            
-            # Add a note if there are more results than we're showing
-            if has_more:
-                formatted_results += f"\n\n(Showing 10 of {len(results)} total results)"
-            
-            return formatted_results
+            return self.result_encoder.encode(results)
         
         # For any other type, just convert to string
         return str(results)
@@ -1247,7 +1294,8 @@ For trend analysis:
     def _format_rich_results(self, results: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]], category: str) -> str:
         """
         Format query results for rich display in the OpenAI prompt, ensuring all items are included.
-        This is a more comprehensive version that ensures every item from SQL results is properly represented.
+        This is a more comprehensive version that ensures every item from SQL results is properly represented,
+        within the prompt token budget.
         
         Args:
             results: SQL query results
@@ -1265,9 +1313,9 @@ For trend analysis:
         
         # Handle list of dictionaries
         if isinstance(results, list):
-            # Include ALL results, not just the first 10
-            # This ensures no items are missed in the response generation
-            formatted_results = json.dumps(results, indent=2, default=str)
+            # Include every row that fits the token budget; larger results are
+            # summarized with totals and every key value so none are missed
+            formatted_results = self.result_encoder.encode(results)
             
             # For order_history category, provide additional context to ensure all items are mentioned
             if category == "order_history":
@@ -1343,6 +1391,53 @@ For trend analysis:
             logger.error(f"Error calling OpenAI API: {str(e)}")
             raise
 
+    def _stream_response_text(self, system_prompt: str, user_prompt: str, model: str,
+                              on_chunk: Callable[[str], None], temperature: float = 0.2) -> str:
+        """
+        Stream response text from the OpenAI API.
+        
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+            model: Model to use
+            on_chunk: Callback receiving each piece of text as it arrives
+            temperature: Temperature parameter
+            
+        Returns:
+            The complete response text
+        """
+        if not self.client:
+            raise ValueError("OpenAI client not initialized")
+        
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=800,
+                stream=True
+            )
+            
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_chunk(text)
+            
+            if not parts:
+                logger.error("Empty response from OpenAI API")
+                return "I'm sorry, I couldn't generate a response at this time."
+            return "".join(parts)
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
+            raise
+
     def _process_response_text(self, response_text: str, category: str) -> str:
         """
         Process response text (e.g., applying formatting).
@@ -0,0 +1,291 @@
+"""
+Compact, token-budgeted encoding of SQL results for LLM prompts.
+
+Results are written as a table: the column names once, then one line per
+row with ``|`` between values. Columns that hold one value in every row are
+stated once above the table, and string values that repeat are replaced by
+short references (``@1``) into a dictionary listed before the table.
+
+When even the compact table exceeds the token budget, rows are
+pre-aggregated into grouped summaries (per group: row count, sums of numeric
+measures, values shared by the whole group), using the finest grouping that
+fits. If no grouping fits, the largest groups are kept and the number left
+out is noted. Grand totals and the distinct values of the
+key columns (the ones response validation looks for) are always included;
+the value lists get at most half of the budget, most frequent values first,
+with the rest counted.
+"""
+import logging
+import math
+from collections import Counter, OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough size of one token in characters, for English text and numbers
+CHARS_PER_TOKEN = 4
+
+# Share of the token budget the key column value lists of a summary may use
+KEY_VALUES_BUDGET_SHARE = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _cell(value: Any) -> str:
+    """Format one value for the table."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return str(value)
+        if value != int(value):
+            # Significant digits, not fixed decimals, so small ratios survive
+            return f"{value:.10g}"
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _is_identifier(column: str) -> bool:
+    """Whether a numeric column is an ID rather than a measure."""
+    column = column.lower()
+    return column == "id" or column.endswith("_id")
+
+
+def _is_number(value: Any) -> bool:
+    """Whether a value is numeric (booleans excluded)."""
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+class CompactResultEncoder:
+    """
+    Encodes result rows into a compact table that fits a token budget.
+
+    Example:
+        encoder = CompactResultEncoder(token_budget=1500, key_columns=["customer_name"])
+        prompt_results = encoder.encode(rows)
+    """
+
+    def __init__(self, token_budget: int = 2000, key_columns: Sequence[str] = ()):
+        """
+        Initialize the encoder.
+
+        Args:
+            token_budget: Maximum estimated tokens of the encoded results
+            key_columns: Columns whose distinct values must stay visible
+        """
+        self.token_budget = token_budget
+        self.key_columns = list(key_columns)
+
+    def encode(self, rows: List[Dict[str, Any]]) -> str:
+        """
+        Encode result rows.
+
+        Args:
+            rows: Result rows
+
+        Returns:
+            The encoded results
+        """
+        if not rows:
+            return "No results were found for this query."
+
+        columns = list(OrderedDict.fromkeys(column for row in rows for column in row))
+        table = self._encode_table(rows, columns, title=f"{len(rows)} rows")
+        if estimate_tokens(table) <= self.token_budget:
+            return table
+
+        summary = self._encode_grouped(rows, columns)
+        logger.info(f"Results over the {self.token_budget} token budget; sent {len(rows)} rows as a grouped summary")
+        return summary
+
+    def _encode_table(self, rows: List[Dict[str, Any]], columns: List[str], title: str) -> str:
+        """Encode rows as a table with constant columns and a value dictionary."""
+        lines = [f"RESULTS ({title}):"]
+
+        # Columns with a single value are stated once
+        constant = {}
+        if len(rows) > 1:
+            for column in columns:
+                values = {_cell(row.get(column)) for row in rows}
+                if len(values) == 1:
+                    constant[column] = values.pop()
+        if constant:
+            lines.append("Same in every row: " + ", ".join(f"{c}={v}" for c, v in constant.items()))
+        table_columns = [c for c in columns if c not in constant]
+        if not table_columns:
+            return "\n".join(lines)
+
+        # Repeated strings longer than their reference go into a dictionary
+        counts = Counter(
+            _cell(row.get(column))
+            for row in rows
+            for column in table_columns
+            if isinstance(row.get(column), str)
+        )
+        references = {}
+        for value, count in counts.most_common():
+            reference = f"@{len(references) + 1}"
+            if count > 1 and len(value) > len(reference):
+                references[value] = reference
+        if references:
+            lines.append("Values: " + "; ".join(f"{ref}={value}" for value, ref in references.items()))
+
+        lines.append("|".join(table_columns))
+        for row in rows:
+            cells = []
+            for column in table_columns:
+                value = row.get(column)
+                text = _cell(value)
+                cells.append(references.get(text, text) if isinstance(value, str) else text)
+            lines.append("|".join(cells))
+        return "\n".join(lines)
+
+    def _grouping_candidates(self, rows: List[Dict[str, Any]], columns: List[str]) -> List[Tuple[str, int]]:
+        """Get columns to group by with their group counts, finest grouping first."""
+        candidates = []
+        for column in columns:
+            values = [row.get(column) for row in rows]
+            if any(_is_number(v) for v in values) and not _is_identifier(column):
+                continue
+            distinct = len({_cell(v) for v in values})
+            if 1 < distinct < len(rows):
+                candidates.append((column, distinct))
+        # Finest first; prefer key columns among equally fine groupings
+        candidates.sort(key=lambda item: (-item[1], item[0] not in self.key_columns))
+        return candidates
+
+    def _measures(self, rows: List[Dict[str, Any]], columns: List[str]) -> List[str]:
+        """Get the numeric columns that can be summed."""
+        return [
+            column for column in columns
+            if not _is_identifier(column)
+            and any(_is_number(row.get(column)) for row in rows)
+            and all(row.get(column) is None or _is_number(row.get(column)) for row in rows)
+        ]
+
+    def _summarize(self, rows: List[Dict[str, Any]], columns: List[str], group_by: str,
+                   measures: List[str]) -> List[Dict[str, Any]]:
+        """Aggregate rows into one summary row per group, largest groups first."""
+        groups: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        for row in rows:
+            groups.setdefault(_cell(row.get(group_by)), []).append(row)
+
+        summaries = []
+        for key, group in groups.items():
+            summary = {group_by: group[0].get(group_by), "rows": len(group)}
+            for column in columns:
+                if column == group_by:
+                    continue
+                values = [row.get(column) for row in group]
+                if len({_cell(v) for v in values}) == 1:
+                    summary[column] = values[0]
+                elif column in measures:
+                    summary[f"sum_{column}"] = sum(v for v in values if v is not None)
+            summaries.append(summary)
+
+        main_measure = next((f"sum_{m}" for m in measures), None)
+        summaries.sort(key=lambda s: (s["rows"], s.get(main_measure) or 0), reverse=True)
+        return summaries
+
+    def _footer(self, rows: List[Dict[str, Any]], columns: List[str], measures: List[str]) -> List[str]:
+        """Grand totals and the distinct values of the key columns, within their share of the budget."""
+        lines = []
+        totals = [f"{m}={_cell(sum(row.get(m) or 0 for row in rows))}" for m in measures]
+        lines.append(f"TOTALS over all {len(rows)} rows: " + (", ".join(totals) if totals else "(no numeric columns)"))
+
+        key_columns = [column for column in columns if column in self.key_columns]
+        if not key_columns:
+            return lines
+        line_chars = int(self.token_budget * KEY_VALUES_BUDGET_SHARE * CHARS_PER_TOKEN) // len(key_columns)
+        for column in key_columns:
+            counts = Counter(_cell(row.get(column)) for row in rows if row.get(column) is not None)
+            lines.append(self._value_list(f"All {column} values ({len(counts)}): ",
+                                          [value for value, _ in counts.most_common()], line_chars))
+        return lines
+
+    def _value_list(self, prefix: str, values: List[str], max_chars: int) -> str:
+        """List values after prefix, ending with "... and N more" when they do not fit max_chars."""
+        line = prefix + ", ".join(values)
+        if len(line) <= max_chars:
+            return line
+
+        shown = []
+        length = len(prefix)
+        for index, value in enumerate(values):
+            more = f"... and {len(values) - index - 1} more"
+            # Room for this value, its separator and the note on the rest
+            if length + len(value) + 2 + len(more) > max_chars:
+                break
+            shown.append(value)
+            length += len(value) + 2
+        return prefix + ", ".join(shown + [f"... and {len(values) - len(shown)} more"])
+
+    def _encode_grouped(self, rows: List[Dict[str, Any]], columns: List[str]) -> str:
+        """Encode rows as the finest grouped summary that fits, truncating the largest if none does."""
+        measures = self._measures(rows, columns)
+        footer = "\n".join(self._footer(rows, columns, measures))
+        candidates = self._grouping_candidates(rows, columns)
+
+        for group_by, group_count in candidates:
+            summaries = self._summarize(rows, columns, group_by, measures)
+            table = self._encode_table(summaries, list(summaries[0].keys()),
+                                       title=f"{len(rows)} rows grouped by {group_by} into {group_count} groups")
+            text = f"{table}\n{footer}"
+            if estimate_tokens(text) <= self.token_budget:
+                return text
+
+        # Nothing fits whole: keep as many of the largest groups (or rows) as the budget allows
+        if candidates:
+            group_by = candidates[-1][0]
+            items = self._summarize(rows, columns, group_by, measures)
+            title = f"{len(rows)} rows grouped by {group_by}"
+        else:
+            items, title = rows, f"{len(rows)} rows"
+        return self._truncate(items, title, footer)
+
+    def _truncate(self, items: List[Dict[str, Any]], title: str, footer: str) -> str:
+        """Keep the leading items that fit the budget, noting how many were left out."""
+        columns = list(OrderedDict.fromkeys(c for item in items for c in item))
+        low, high = 0, len(items)
+        best = None
+        # Binary search for the most items that fit
+        while low <= high:
+            middle = (low + high) // 2
+            shown = items[:middle]
+            text = self._encode_table(shown, columns, title=f"{title}, largest {middle} of {len(items)} shown") if shown else ""
+            omitted = len(items) - middle
+            if omitted:
+                text += f"\n({omitted} more not shown)"
+            text = f"{text}\n{footer}".strip()
+            if estimate_tokens(text) <= self.token_budget:
+                best = text
+                low = middle + 1
+            else:
+                high = middle - 1
+        return best if best is not None else footer
+
+
+def encode_results(rows: Iterable[Dict[str, Any]],
+                   token_budget: int = 2000,
+                   key_columns: Sequence[str] = ()) -> str:
+    """
+    Encode result rows compactly within a token budget.
+
+    Args:
+        rows: Result rows
+        token_budget: Maximum estimated tokens of the encoded results
+        key_columns: Columns whose distinct values must stay visible
+
+    Returns:
+        The encoded results
+    """
+    return CompactResultEncoder(token_budget, key_columns).encode(list(rows))
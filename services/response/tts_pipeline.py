@@ -0,0 +1,420 @@
+"""
+Sentence-pipelined text-to-speech with a content-addressed audio cache.
+
+Verbal responses are split into sentences that are synthesized concurrently
+on a small worker pool; the audio is returned (or streamed) in sentence order,
+so playback can start with the first sentence while later ones are still
+being generated. Every synthesized sentence is stored on disk under a hash of
+(voice_id, model, text), so repeated phrases and persona greetings are only
+ever synthesized once.
+
+The synthesis backend is pluggable: ElevenLabsBackend talks to the
+ElevenLabs API, FakeTTSBackend produces deterministic local audio for tests
+and benchmarks.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from services.utils.text_processing.summarization import clean_for_tts, extract_key_sentences
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "eleven_multilingual_v2"
+DEFAULT_VOICE_ID = "EXAVITQu4vr4xnSDxMaL"
+
+# Sentence boundary: terminal punctuation followed by whitespace
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+_END = object()
+
+
+def split_sentences(text: str, max_sentences: int = 0) -> List[str]:
+    """
+    Prepare text for speech and split it into sentences.
+
+    Args:
+        text: Response text (may contain markdown)
+        max_sentences: Keep only the key sentences, at most this many (0 for all)
+
+    Returns:
+        List of cleaned sentences
+    """
+    if not text or not text.strip():
+        return []
+    if max_sentences > 0:
+        text = extract_key_sentences(text, max_sentences)
+    else:
+        text = clean_for_tts(text)
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+class ElevenLabsBackend:
+    """Synthesizes speech with the ElevenLabs API."""
+
+    name = "elevenlabs"
+
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            api_key: ElevenLabs API key (set on the module before each call)
+        """
+        self.api_key = api_key
+
+    def synthesize(self, text: str, voice_id: str, model: str) -> bytes:
+        """
+        Convert one piece of text to audio.
+
+        Args:
+            text: Text to speak
+            voice_id: ElevenLabs voice ID
+            model: ElevenLabs model name
+
+        Returns:
+            MP3 audio bytes
+        """
+        import elevenlabs
+
+        if self.api_key:
+            elevenlabs.set_api_key(self.api_key)
+        audio = elevenlabs.generate(text=text, voice=voice_id, model=model)
+        if not isinstance(audio, (bytes, bytearray)):
+            # Streaming SDK versions return an iterator of chunks
+            audio = b"".join(audio)
+        return bytes(audio)
+
+
+class FakeTTSBackend:
+    """
+    Local stand-in for a TTS service, for tests and benchmarks.
+
+    Returns deterministic bytes derived from the request after an optional
+    simulated latency, and counts the calls it receives.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize the fake backend.
+
+        Args:
+            latency: Seconds each synthesis call takes
+        """
+        self.latency = latency
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, voice_id: str, model: str) -> bytes:
+        """Return fake audio for the text."""
+        with self._lock:
+            self.calls.append(text)
+        if self.latency:
+            time.sleep(self.latency)
+        return f"<audio voice={voice_id} model={model}>{text}</audio>".encode("utf-8")
+
+
+class AudioCache:
+    """
+    On-disk audio cache keyed by a hash of (voice_id, model, text).
+
+    Entries are written atomically (temporary file + rename), so several
+    processes can share one cache directory. The directory is created on
+    the first write.
+
+    The cache is bounded by total size and entry count: once a write takes
+    it over either limit, the least recently used files are deleted. Recency
+    is tracked in memory, seeded from file modification times when the cache
+    is first used, and hits touch the file so other processes see them too.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 0, max_entries: int = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory the audio files are stored in
+            max_bytes: Largest total size of the cached audio (0 for no limit)
+            max_entries: Largest number of cached files (0 for no limit)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._stats_lock = threading.Lock()
+        # key -> file size, least recently used first (loaded on first use)
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._total_bytes = 0
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def key(voice_id: str, model: str, text: str) -> str:
+        """Get the content address of a synthesis request."""
+        return hashlib.sha256(f"{voice_id}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Get the file path for a cache key (sharded by the first two hex digits)."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def get(self, voice_id: str, model: str, text: str) -> Optional[bytes]:
+        """
+        Look up cached audio.
+
+        Returns:
+            The audio bytes, or None if not cached
+        """
+        key = self.key(voice_id, model, text)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except OSError:
+            audio = None
+        with self._stats_lock:
+            self.stats["hits" if audio else "misses"] += 1
+
+        if audio and self._is_bounded():
+            with self._index_lock:
+                self._touch(key, len(audio))
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return audio or None
+
+    def put(self, voice_id: str, model: str, text: str, audio: bytes):
+        """Store audio for a synthesis request, evicting old entries if the cache is full."""
+        key = self.key(voice_id, model, text)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            with self._stats_lock:
+                self.stats["writes"] += 1
+        except OSError as e:
+            logger.warning(f"Could not write TTS audio cache entry: {str(e)}")
+            return
+
+        if self._is_bounded():
+            with self._index_lock:
+                self._touch(key, len(audio))
+                self._evict()
+
+    def _is_bounded(self) -> bool:
+        """Check whether the cache has a size or entry limit."""
+        return self.max_bytes > 0 or self.max_entries > 0
+
+    def _load_index(self):
+        """Index the files already on disk, oldest first. Caller must hold the index lock."""
+        entries = []
+        try:
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".mp3"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        except OSError:
+            pass  # Nothing cached yet
+
+        entries.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(size for _, _, size in entries)
+
+    def _touch(self, key: str, size: int):
+        """Mark an entry as most recently used. Caller must hold the index lock."""
+        if self._entries is None:
+            self._load_index()
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is within its limits. Caller must hold the index lock."""
+        while self._entries and (
+            (self.max_bytes > 0 and self._total_bytes > self.max_bytes)
+            or (self.max_entries > 0 and len(self._entries) > self.max_entries)
+        ):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass  # Already removed, e.g. by another process
+            with self._stats_lock:
+                self.stats["evictions"] += 1
+
+
+class TTSPipeline:
+    """
+    Synthesizes text sentence by sentence on a worker pool, in order.
+
+    Sentences are submitted as soon as they are available; their audio is
+    yielded in the original order as each one completes. A sentence that
+    fails or times out ends the audio at that point.
+    """
+
+    def __init__(self,
+                 backend,
+                 cache: Optional[AudioCache] = None,
+                 max_workers: int = 4,
+                 timeout: float = 30.0):
+        """
+        Initialize the pipeline.
+
+        Args:
+            backend: Object with synthesize(text, voice_id, model) -> bytes
+            cache: Optional audio cache
+            max_workers: Sentences synthesized concurrently
+            timeout: Seconds to wait for any one sentence
+        """
+        self.backend = backend
+        self.cache = cache
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    def _synthesize_sentence(self, sentence: str, voice_id: str, model: str) -> bytes:
+        """Synthesize one sentence, going through the cache."""
+        if self.cache is not None:
+            audio = self.cache.get(voice_id, model, sentence)
+            if audio:
+                return audio
+
+        audio = self.backend.synthesize(sentence, voice_id, model)
+        if not audio:
+            raise ValueError("TTS backend returned empty audio")
+        if self.cache is not None:
+            self.cache.put(voice_id, model, sentence, audio)
+        return audio
+
+    def synthesize_stream(self,
+                          sentences: Iterable[str],
+                          voice_id: str,
+                          model: str = DEFAULT_MODEL) -> Iterator[bytes]:
+        """
+        Synthesize sentences concurrently and yield their audio in order.
+
+        The sentences can come from a lazy source (e.g. a SentenceChannel fed
+        by a streaming text response); each is submitted as soon as it arrives.
+
+        Args:
+            sentences: Sentences to speak, already cleaned for TTS
+            voice_id: Voice to use
+            model: TTS model to use
+
+        Yields:
+            Audio bytes for each sentence, in order
+        """
+        futures: "queue.Queue[Any]" = queue.Queue()
+
+        def submit_all():
+            try:
+                for sentence in sentences:
+                    futures.put(self._executor.submit(self._synthesize_sentence, sentence, voice_id, model))
+            except Exception as e:
+                logger.error(f"Error reading sentences for TTS: {str(e)}")
+            finally:
+                futures.put(_END)
+
+        threading.Thread(target=submit_all, name="tts-submit", daemon=True).start()
+
+        while True:
+            future = futures.get()
+            if future is _END:
+                return
+            try:
+                yield future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                logger.error(f"TTS timed out after {self.timeout} seconds")
+                return
+            except Exception as e:
+                logger.error(f"TTS failed for sentence: {str(e)}")
+                return
+
+    def synthesize(self,
+                   text: str,
+                   voice_id: str,
+                   model: str = DEFAULT_MODEL,
+                   max_sentences: int = 0) -> Optional[bytes]:
+        """
+        Synthesize text and return the complete audio.
+
+        Args:
+            text: Text to speak (cleaned and split into sentences here)
+            voice_id: Voice to use
+            model: TTS model to use
+            max_sentences: Speak only the key sentences, at most this many (0 for all)
+
+        Returns:
+            The concatenated audio, or None if nothing could be synthesized
+        """
+        audio = b"".join(self.synthesize_stream(split_sentences(text, max_sentences), voice_id, model))
+        return audio or None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend and cache statistics."""
+        return {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "cache": dict(self.cache.stats) if self.cache is not None else None
+        }
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=False)
+
+
+def create_tts_pipeline(config: Dict[str, Any]) -> TTSPipeline:
+    """
+    Create a TTS pipeline from the application configuration.
+
+    Reads services.tts:
+        backend: "elevenlabs" (default) or "fake"
+        cache_enabled: Whether to use the on-disk audio cache (default: True)
+        cache_dir: Audio cache directory (default: cache/tts)
+        cache_max_mb: Largest size of the audio cache in MB (default: 200, 0 for no limit)
+        cache_max_entries: Largest number of cached sentences (default: 20000, 0 for no limit)
+        max_workers: Sentences synthesized concurrently (default: 4)
+        timeout: Seconds to wait for one sentence (default: 30)
+        fake_latency: Simulated latency of the fake backend (default: 0)
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        Configured TTSPipeline
+    """
+    tts_config = config.get("services", {}).get("tts", {})
+
+    if tts_config.get("backend", "elevenlabs") == "fake":
+        backend = FakeTTSBackend(latency=tts_config.get("fake_latency", 0.0))
+    else:
+        api_key = config.get("api", {}).get("elevenlabs", {}).get("api_key") or os.environ.get("ELEVENLABS_API_KEY")
+        backend = ElevenLabsBackend(api_key)
+
+    cache = None
+    if tts_config.get("cache_enabled", True):
+        cache = AudioCache(
+            tts_config.get("cache_dir", os.path.join("cache", "tts")),
+            max_bytes=int(tts_config.get("cache_max_mb", 200) * 1024 * 1024),
+            max_entries=tts_config.get("cache_max_entries", 20000)
+        )
+
+    return TTSPipeline(
+        backend,
+        cache=cache,
+        max_workers=tts_config.get("max_workers", 4),
+        timeout=tts_config.get("timeout", 30)
+    )
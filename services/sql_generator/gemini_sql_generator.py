@@ -4,12 +4,14 @@ Includes improved prompt building, SQL validation, and optimization.
 """
 import logging
 import re
+import threading
 import time
 import google.generativeai as genai
 from typing import Dict, Any, List, Optional, Tuple, Union
 import uuid
 import os
 from datetime import datetime
+from functools import lru_cache
 
 from services.rules.rules_service import RulesService
 from services.utils.service_registry import ServiceRegistry
@@ -17,6 +19,44 @@ from services.sql_generator.sql_example_loader import SQLExampleLoader
 
 logger = logging.getLogger(__name__)
 
+# Number of distinct example sets whose prompt template is kept pre-filled
+MAX_STATIC_PROMPTS = 64
+
+
+@lru_cache(maxsize=1)
+def _critical_requirements() -> str:
+    """Build the critical requirements appended to every prompt's rules (built once)."""
+    # Import the actual location ID value from business rules
+    from services.rules.business_rules import DEFAULT_LOCATION_ID
+    
+    # Add a strongly worded reminder about order status being integers and location ID filtering
+    return f"""
+CRITICAL REQUIREMENTS:
+- Order status values must ALWAYS be used as integers, never as strings
+- Completed orders have status=7 (not 'COMPLETED')
+- Cancelled orders have status=6 (not 'CANCELLED')
+- In-progress orders have status between 3-5 (not 'IN PROGRESS')
+
+*** MANDATORY LOCATION FILTERING ***
+- Every query on the orders table MUST filter by location_id 
+- ALWAYS use the exact value: o.location_id = {DEFAULT_LOCATION_ID}
+- DO NOT use placeholders like {{location_id}}
+- This is a CRITICAL security requirement for data isolation
+- The specific location ID value is: {DEFAULT_LOCATION_ID}
+- You must ALWAYS use this exact numeric value: {DEFAULT_LOCATION_ID}
+- NEVER use curly braces or placeholders in generated SQL
+
+*** TIME-BASED DEFAULT BEHAVIOR ***
+- When a query mentions "this month" or "current month" without specific dates, use the most recent COMPLETE month
+- When a query asks about "orders in a month" without specifying which month, default to the most recent complete month
+- For example, if today is October 15, 2023, "orders this month" refers to October 2023 (month to date)
+- Use date_trunc('month', current_date - interval '1 month') to get the first day of the most recent complete month
+- Use date_trunc('month', current_date) - interval '1 day' to get the last day of the most recent complete month
+- Always use explicit date ranges in your WHERE clause for time-based queries (e.g., BETWEEN start_date AND end_date)
+- Only use the current month (in progress) when the query explicitly asks for "current in-progress month" or similar
+"""
+
+
 class GeminiSQLGenerator:
     def __init__(self, config: Dict[str, Any], db_service, skip_verification=False):
         """Initialize the enhanced Gemini SQL generator."""
@@ -62,6 +102,17 @@ class GeminiSQLGenerator:
         # Test placeholder replacement
         self._verify_placeholder_replacement()
         
+        # SQL examples loaded ahead of time while the query is being classified
+        self._prefetched_examples = {}
+        self._prefetch_lock = threading.Lock()
+        
+        # Shared example loader (backed by the process-wide file cache), the
+        # rules service once resolved, and prompt templates pre-filled per example set
+        self.example_loader = SQLExampleLoader(config)
+        self._rules_service = None
+        self._static_prompts: Dict[Tuple, str] = {}
+        self._static_prompts_lock = threading.Lock()
+        
         self.db_service = db_service
         self.max_retries = config.get("services", {}).get("sql_generator", {}).get("max_retries", 3)
         
@@ -222,6 +273,38 @@ Here is the optimized SQL:
                 
         return examples_text
     
+    def _get_static_prompt(self, examples: List[Dict[str, Any]]) -> str:
+        """
+        Get the prompt template with the examples section filled in.
+        
+        The examples for a category rarely change, so the formatted template
+        is cached per example set and only the per-request parts of the
+        prompt are substituted on each call.
+        
+        Args:
+            examples: List of example queries and SQL pairs
+            
+        Returns:
+            Prompt template with {examples} replaced
+        """
+        key = tuple(
+            (example.get("query"), example.get("sql"))
+            for example in examples or []
+            if isinstance(example, dict)
+        )
+        with self._static_prompts_lock:
+            prompt = self._static_prompts.get(key)
+        if prompt is not None:
+            return prompt
+        
+        prompt = self.prompt_template.replace("{examples}", self._format_examples(examples))
+        with self._static_prompts_lock:
+            if len(self._static_prompts) >= MAX_STATIC_PROMPTS:
+                # Drop the oldest entry; dicts keep insertion order
+                self._static_prompts.pop(next(iter(self._static_prompts)))
+            self._static_prompts[key] = prompt
+        return prompt
+    
     def _build_prompt(self, query: str, examples: List[Dict[str, Any]], context: Dict[str, Any]) -> str:
         """
         Build a comprehensive prompt for SQL generation with examples and context.
@@ -234,41 +317,16 @@ Here is the optimized SQL:
         Returns:
             Complete prompt string for model
         """
-        # Start with the template
-        prompt = self.prompt_template
+        # Accept the dict returned by _get_sql_examples as well as a plain list
+        if isinstance(examples, dict):
+            examples = examples.get("examples", [])
+        
+        # Start with the template, with this example set already filled in
+        prompt = self._get_static_prompt(examples)
         
         # Initialize prompt_parts list to collect additional context
         prompt_parts = []
-        
-        # Import the actual location ID value from business rules
-        from services.rules.business_rules import DEFAULT_LOCATION_ID
-        
-        # Add a strongly worded reminder about order status being integers and location ID filtering
-        critical_requirements = f"""
-CRITICAL REQUIREMENTS:
-- Order status values must ALWAYS be used as integers, never as strings
-- Completed orders have status=7 (not 'COMPLETED')
-- Cancelled orders have status=6 (not 'CANCELLED')
-- In-progress orders have status between 3-5 (not 'IN PROGRESS')
-
-*** MANDATORY LOCATION FILTERING ***
-- Every query on the orders table MUST filter by location_id 
-- ALWAYS use the exact value: o.location_id = {DEFAULT_LOCATION_ID}
-- DO NOT use placeholders like {{location_id}}
-- This is a CRITICAL security requirement for data isolation
-- The specific location ID value is: {DEFAULT_LOCATION_ID}
-- You must ALWAYS use this exact numeric value: {DEFAULT_LOCATION_ID}
-- NEVER use curly braces or placeholders in generated SQL
-
-*** TIME-BASED DEFAULT BEHAVIOR ***
-- When a query mentions "this month" or "current month" without specific dates, use the most recent COMPLETE month
-- When a query asks about "orders in a month" without specifying which month, default to the most recent complete month
-- For example, if today is October 15, 2023, "orders this month" refers to October 2023 (month to date)
-- Use date_trunc('month', current_date - interval '1 month') to get the first day of the most recent complete month
-- Use date_trunc('month', current_date) - interval '1 day' to get the last day of the most recent complete month
-- Always use explicit date ranges in your WHERE clause for time-based queries (e.g., BETWEEN start_date AND end_date)
-- Only use the current month (in progress) when the query explicitly asks for "current in-progress month" or similar
-"""
+        context = context or {}
         
         # Format schema information if available
         schema_str = ""
@@ -281,16 +339,13 @@ CRITICAL REQUIREMENTS:
             rules_str = self._format_rules(context["rules"])
             
         # Add the critical requirements to the rules
-        rules_str = rules_str + critical_requirements
+        rules_str = rules_str + _critical_requirements()
         
         # Format SQL patterns if available
         patterns_str = ""
         if "query_patterns" in context:
             patterns_str = self._format_patterns(context["query_patterns"])
             
-        # Format examples if available
-        examples_str = self._format_examples(examples)
-        
         # Initialize previous_sql_str regardless of whether there's previous SQL
         previous_sql_str = ""
         
@@ -371,7 +426,6 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
         prompt = prompt.replace("{schema}", schema_str)
         prompt = prompt.replace("{rules}", rules_str)
         prompt = prompt.replace("{patterns}", patterns_str)
-        prompt = prompt.replace("{examples}", examples_str)
         prompt = prompt.replace("{query}", query)
         
         # Add context to the appropriate section of the prompt
@@ -452,8 +506,11 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
     def generate_sql(self, query, classification, time_period=None, constraints=None, context=None):
         """Generate SQL based on the provided query and classification."""
         try:
-            # Get SQL examples for this classification
-            sql_examples = self._get_sql_examples(classification)
+            # Get SQL examples for this classification, reusing a prefetch if one is ready
+            with self._prefetch_lock:
+                sql_examples = self._prefetched_examples.pop(classification, None)
+            if sql_examples is None:
+                sql_examples = self._get_sql_examples(classification)
             
             # Build the prompt with the query, classification, and examples
             prompt = self._build_prompt(query, sql_examples, context)
@@ -508,6 +565,25 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
             self.logger.error(f"Error in SQL generation: {str(e)}")
             return {"sql": "", "success": False, "error": str(e)}
 
+    def prefetch_examples(self, classification):
+        """
+        Load SQL examples for a classification before generate_sql needs them.
+        
+        The orchestrator calls this for the predicted category while the query
+        is still being classified; the next generate_sql for that category
+        uses the loaded examples instead of reading them again.
+        
+        Args:
+            classification: Query classification
+            
+        Returns:
+            Dict containing SQL examples
+        """
+        examples = self._get_sql_examples(classification)
+        with self._prefetch_lock:
+            self._prefetched_examples[classification] = examples
+        return examples
+    
     def _get_sql_examples(self, classification):
         """
         Get SQL examples for a specific classification from the rules service.
@@ -519,20 +595,16 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
             Dict containing SQL examples
         """
         try:
-            # Import the actual location ID value
-            from services.rules.business_rules import DEFAULT_LOCATION_ID
-            
-            # Create an instance of SQLExampleLoader
-            example_loader = SQLExampleLoader(self.config)
+            example_loader = self.example_loader
             
             # Get rules service from registry
-            rules_service = ServiceRegistry.get_service("rules")
+            rules_service = self._get_rules_service()
             if not rules_service:
                 logger.warning("Rules service not available, proceeding without examples")
                 return {"examples": []}
             
             # Get SQL examples from the rules service
-            logger.info(f"Getting SQL examples for classification: {classification}")
+            logger.debug(f"Getting SQL examples for classification: {classification}")
             examples = rules_service.get_sql_examples(classification)
             
             # Initialize examples list
@@ -558,13 +630,15 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
                 
                 logger.info(f"Found {len(example_list)} examples from rules service for {classification}")
             
+            # Copy so that adding file examples never modifies a cached list
+            example_list = list(example_list)
+            
             # Get examples directly from SQL files - this is more maintainable than hardcoding examples
-            logger.info(f"Loading examples from SQL example loader for: {classification}")
             file_examples = example_loader.load_examples_for_query_type(classification)
             
             # Add file examples to the list
             if file_examples:
-                logger.info(f"Found {len(file_examples)} examples from SQL files for {classification}")
+                logger.debug(f"Found {len(file_examples)} examples from SQL files for {classification}")
                 example_list.extend(file_examples)
             else:
                 logger.warning(f"No examples found in SQL files for: {classification}")
@@ -581,12 +655,18 @@ CRITICAL REQUIREMENTS FOR FOLLOW-UP QUERIES:
                 logger.warning(f"No examples available for classification: {classification}")
                 
             # Return all the examples
-            logger.info(f"Returning {len(example_list)} total examples for {classification}")
+            logger.debug(f"Returning {len(example_list)} total examples for {classification}")
             return {"examples": example_list}
         except Exception as e:
             logger.error(f"Error getting SQL examples: {e}")
             return {"examples": []}
 
+    def _get_rules_service(self):
+        """Get the rules service, resolving it from the registry only once."""
+        if self._rules_service is None:
+            self._rules_service = ServiceRegistry.get_service("rules")
+        return self._rules_service
+    
     def _verify_placeholder_replacement(self):
         """
         Verify placeholder replacement functionality during initialization.
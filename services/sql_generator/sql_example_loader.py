@@ -8,12 +8,96 @@ that are used for few-shot learning in the SQL Generator.
 import os
 import logging
 import json
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
 # Get the logger that was configured in utils/logging.py
 logger = logging.getLogger("swoop_ai")
 
+# Process-wide cache of parsed examples.json files, shared by all loaders:
+# absolute path -> ((mtime_ns, size), examples). An entry is reused until the
+# file's modification time or size changes.
+_file_cache: Dict[str, Tuple[Tuple[int, int], List[Dict[str, str]]]] = {}
+_file_cache_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Get a (mtime_ns, size) signature for a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_examples_file(path: str) -> List[Dict[str, str]]:
+    """
+    Parse and validate an examples.json file.
+    
+    Args:
+        path: Path to the examples.json file
+        
+    Returns:
+        List of example dictionaries containing 'query' and 'sql' keys
+    """
+    examples = []
+    try:
+        with open(path, 'r') as f:
+            file_examples = json.load(f)
+        
+        # Validate the examples format
+        for example in file_examples:
+            if 'query' in example and 'sql' in example:
+                examples.append(example)
+            else:
+                logger.warning(f"Invalid example in {path}: missing 'query' or 'sql' field")
+        
+        logger.info(f"Loaded {len(examples)} valid examples from {path}")
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error in {path}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error loading examples from {path}: {str(e)}")
+    return examples
+
+
+def load_examples_file(path: str) -> List[Dict[str, str]]:
+    """
+    Load an examples.json file through the process-wide cache.
+    
+    The file is only read and parsed again when its modification time or
+    size has changed since the last load; otherwise the same list is returned,
+    so callers must not modify it.
+    
+    Args:
+        path: Path to the examples.json file
+        
+    Returns:
+        List of example dictionaries (empty if the file does not exist)
+    """
+    path = os.path.abspath(path)
+    signature = _file_signature(path)
+    if signature is None:
+        with _file_cache_lock:
+            _file_cache.pop(path, None)
+        return []
+    
+    with _file_cache_lock:
+        cached = _file_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    examples = _read_examples_file(path)
+    with _file_cache_lock:
+        _file_cache[path] = (signature, examples)
+    return examples
+
+
+def clear_examples_cache() -> None:
+    """Clear the process-wide examples cache."""
+    with _file_cache_lock:
+        _file_cache.clear()
+
 class SQLExampleLoader:
     """
     A class for loading SQL examples from files and providing them to the SQL Generator.
@@ -35,84 +119,35 @@ class SQLExampleLoader:
         else:
             self.examples_dir = default_examples_dir
             
-        self._examples_cache: Dict[str, List[Dict[str, str]]] = {}
-        logger.info(f"SQLExampleLoader initialized with examples directory: {self.examples_dir}")
+        logger.debug(f"SQLExampleLoader initialized with examples directory: {self.examples_dir}")
         
         # Verify the directory exists
-        if not os.path.exists(self.examples_dir):
+        if not os.path.isdir(self.examples_dir):
             logger.warning(f"Examples directory does not exist: {self.examples_dir}")
-        else:
+        elif logger.isEnabledFor(logging.DEBUG):
             # Log available directories for debugging
-            logger.info(f"Available query types: {', '.join(os.listdir(self.examples_dir))}")
+            logger.debug(f"Available query types: {', '.join(os.listdir(self.examples_dir))}")
     
     def load_examples_for_query_type(self, query_type: str) -> List[Dict[str, str]]:
         """
         Load SQL examples for a specific query type.
         
+        Examples are served from the process-wide cache, which re-reads
+        examples.json only after the file has been modified.
+        
         Args:
             query_type: Type of query (e.g., 'menu', 'order_history')
             
         Returns:
             List of example dictionaries containing 'query' and 'sql' keys
         """
-        # Check cache first
-        if query_type in self._examples_cache:
-            logger.debug(f"Returning cached examples for query type: {query_type}")
-            return self._examples_cache[query_type]
-        
-        # Build the path to the examples directory for this query type
-        query_examples_dir = os.path.join(self.examples_dir, query_type)
-        logger.info(f"Looking for examples in directory: {query_examples_dir}")
-        
-        # Check if directory exists
-        if not os.path.exists(query_examples_dir):
-            logger.warning(f"No examples directory found for query type: {query_type}")
-            return []
-        
-        examples = []
-        
-        # Log what files exist in the directory
-        all_files = os.listdir(query_examples_dir) if os.path.exists(query_examples_dir) else []
-        logger.info(f"Files in {query_examples_dir}: {all_files}")
-        
-        # Flag to check if examples.json was found
-        examples_json_found = False
-        
-        # Look for examples.json file first
-        examples_json_path = os.path.join(query_examples_dir, "examples.json")
-        if os.path.exists(examples_json_path):
-            examples_json_found = True
-            logger.info(f"Found examples.json at {examples_json_path}")
-            try:
-                with open(examples_json_path, 'r') as f:
-                    file_examples = json.load(f)
-                
-                # Validate the examples format
-                valid_examples = 0
-                for example in file_examples:
-                    if 'query' in example and 'sql' in example:
-                        examples.append(example)
-                        valid_examples += 1
-                    else:
-                        logger.warning(f"Invalid example in {examples_json_path}: missing 'query' or 'sql' field")
-                
-                logger.info(f"Loaded {valid_examples} valid examples from examples.json for {query_type}")
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing error in {examples_json_path}: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error loading examples from {examples_json_path}: {str(e)}")
-        
-        # If no examples.json or no valid examples, try individual SQL files
-        if not examples_json_found or not examples:
-            logger.warning(f"No examples.json found or no valid examples for {query_type}. " 
-                          f"Per updated requirements, only loading from examples.json is supported.")
+        examples_json_path = os.path.join(self.examples_dir, query_type, "examples.json")
+        examples = load_examples_file(examples_json_path)
+        
+        if not examples:
             # Note: We used to fall back to individual SQL files, but this has been disabled
             # to ensure consistency with the RulesManager approach.
-        
-        # Cache the examples
-        self._examples_cache[query_type] = examples
-        
-        logger.info(f"Loaded a total of {len(examples)} examples for query type: {query_type}")
+            logger.debug(f"No examples.json found or no valid examples for {query_type}")
         
         # Print first example for debugging if available
         if examples and logger.isEnabledFor(logging.DEBUG):
@@ -149,7 +184,7 @@ class SQLExampleLoader:
     
     def clear_cache(self) -> None:
         """Clear the examples cache."""
-        self._examples_cache = {}
+        clear_examples_cache()
         logger.info("Cleared SQL examples cache")
 
 # Don't create a singleton instance here as it causes initialization issues
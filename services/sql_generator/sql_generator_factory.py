@@ -62,6 +62,20 @@ class SQLGeneratorAdapter:
         """
         self.generator = generator
     
+    def prefetch_examples(self, category: str) -> Optional[Dict[str, Any]]:
+        """
+        Load SQL examples ahead of generation, if the generator supports it.
+        
+        Args:
+            category: The predicted query category
+            
+        Returns:
+            The loaded examples, or None if the generator has no prefetch support
+        """
+        if hasattr(self.generator, 'prefetch_examples') and callable(self.generator.prefetch_examples):
+            return self.generator.prefetch_examples(category)
+        return None
+    
     def generate(self, query: str, category: str, rules_and_examples: Dict[str, Any], 
                  additional_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -0,0 +1,239 @@
+"""
+Bounded in-memory stores with optional spill to disk.
+
+Conversation and response histories are append-mostly and only their most
+recent entries are read on the hot path. These stores keep a fixed number of
+recent entries in memory; older entries are dropped, or, when a spill path is
+configured, moved to disk where they remain available:
+
+- BoundedHistory: list-like ring buffer; evicted items are appended to a
+  JSON lines file
+- BoundedMapping: dict-like LRU store; evicted entries are written to a
+  shelve database and are still found by key lookups
+"""
+import json
+import logging
+import os
+import shelve
+import threading
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class BoundedHistory(MutableSequence):
+    """
+    List-like history that keeps the most recent ``maxlen`` items in memory.
+
+    Indexing, slicing, ``len`` and iteration cover the in-memory items, so
+    code written for plain lists (``history[-1]``, ``history[-5:]``,
+    ``x in history``) keeps working. Evicted items are appended to
+    ``spill_path`` as JSON lines if one is given, and can be read back with
+    ``iter_all``.
+    """
+
+    def __init__(self,
+                 maxlen: int = 100,
+                 spill_path: Optional[str] = None,
+                 items: Optional[Iterable[Any]] = None):
+        """
+        Initialize the history.
+
+        Args:
+            maxlen: Number of items kept in memory
+            spill_path: JSON lines file evicted items are appended to (optional)
+            items: Initial items (only the last ``maxlen`` stay in memory)
+        """
+        self.maxlen = max(1, int(maxlen))
+        self.spill_path = spill_path
+        self.spilled_count = 0
+        self._items = deque()
+        for item in items or ():
+            self.append(item)
+
+    def _spill(self, item: Any):
+        """Move an evicted item to disk (or drop it if spilling is off)."""
+        if not self.spill_path:
+            return
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, default=str) + "\n")
+            self.spilled_count += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not spill history item to {self.spill_path}: {str(e)}")
+
+    def append(self, item: Any):
+        """Add an item, evicting the oldest one if the history is full."""
+        if len(self._items) >= self.maxlen:
+            self._spill(self._items.popleft())
+        self._items.append(item)
+
+    def insert(self, index: int, item: Any):
+        """Insert an item, evicting the oldest one if the history is full."""
+        self._items.insert(index, item)
+        if len(self._items) > self.maxlen:
+            self._spill(self._items.popleft())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items)[index]
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            items = list(self._items)
+            items[index] = value
+            self._items = deque(items)
+        else:
+            self._items[index] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            items = list(self._items)
+            del items[index]
+            self._items = deque(items)
+        else:
+            del self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (BoundedHistory, list, tuple)):
+            return list(self._items) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"BoundedHistory({list(self._items)!r}, maxlen={self.maxlen})"
+
+    def clear(self):
+        """Remove the in-memory items (spilled items stay on disk)."""
+        self._items.clear()
+
+    def iter_all(self) -> Iterator[Any]:
+        """Iterate over spilled items, oldest first, then the in-memory items."""
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        yield from self._items
+
+    def to_list(self) -> List[Any]:
+        """Get the in-memory items as a plain list (for serialization)."""
+        return list(self._items)
+
+
+class BoundedMapping(MutableMapping):
+    """
+    Dict-like store that keeps the most recently written ``maxlen`` entries in memory.
+
+    When full, the least recently written (or touched) entry is evicted;
+    with a spill path it moves to a shelve database on disk and lookups
+    still find it. Thread-safe.
+    """
+
+    def __init__(self, maxlen: int = 1000, spill_path: Optional[str] = None):
+        """
+        Initialize the mapping.
+
+        Args:
+            maxlen: Number of entries kept in memory
+            spill_path: Shelve database file evicted entries are moved to (optional)
+        """
+        self.maxlen = max(1, int(maxlen))
+        self.spill_path = spill_path
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._shelf = None
+
+    def _spill_store(self):
+        """Open the on-disk store on first use. Caller holds the lock."""
+        if self._shelf is None and self.spill_path:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._shelf = shelve.open(self.spill_path)
+        return self._shelf
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxlen:
+                old_key, old_value = self._items.popitem(last=False)
+                try:
+                    store = self._spill_store()
+                    if store is not None:
+                        store[str(old_key)] = old_value
+                except Exception as e:
+                    logger.warning(f"Could not spill entry {old_key} to {self.spill_path}: {str(e)}")
+
+    def touch(self, key: str) -> bool:
+        """
+        Mark an in-memory entry as recently used, so it is evicted last.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            True if the entry is in memory
+        """
+        with self._lock:
+            if key not in self._items:
+                return False
+            self._items.move_to_end(key)
+            return True
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._items:
+                return self._items[key]
+            store = self._spill_store()
+            if store is not None and str(key) in store:
+                return store[str(key)]
+        raise KeyError(key)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            found = self._items.pop(key, _MISSING) is not _MISSING
+            store = self._spill_store()
+            if store is not None and str(key) in store:
+                del store[str(key)]
+                found = True
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self._items:
+                return True
+            store = self._spill_store()
+            return store is not None and str(key) in store
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the in-memory keys, oldest first."""
+        with self._lock:
+            return iter(list(self._items))
+
+    def __len__(self) -> int:
+        """Number of in-memory entries."""
+        return len(self._items)
+
+    def close(self):
+        """Close the on-disk store."""
+        with self._lock:
+            if self._shelf is not None:
+                self._shelf.close()
+                self._shelf = None
+
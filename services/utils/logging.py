@@ -3,9 +3,13 @@ import os
 import sys
 import logging
 import json
-from datetime import datetime
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
 import re
 
 # Set up logging configuration
@@ -141,12 +145,115 @@ class AudioDataFilter(logging.Filter):
                     
         return True
 
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records of chosen loggers.
+    
+    Rates are per logger name prefix (the longest matching prefix wins), e.g.
+    {"services.orchestrator": 0.1} keeps every 10th record from the
+    orchestrator. Warnings and errors are always kept.
+    """
+    
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+        self._intervals: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        
+    def _interval(self, name: str) -> int:
+        """Get the sampling interval for a logger (1 keeps every record)."""
+        interval = self._intervals.get(name)
+        if interval is None:
+            prefixes = [p for p in self.sample_rates if name == p or name.startswith(p + ".")]
+            rate = self.sample_rates[max(prefixes, key=len)] if prefixes else 1.0
+            interval = max(1, round(1 / rate)) if rate > 0 else 0
+            self._intervals[name] = interval
+        return interval
+        
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        interval = self._interval(record.name)
+        if interval == 1:
+            return True
+        if interval == 0:
+            return False
+        with self._lock:
+            count = self._counters.get(record.name, 0)
+            self._counters[record.name] = count + 1
+        return count % interval == 0
+
+# Attributes every LogRecord has; anything else came from `extra`
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any `extra` fields."""
+    
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+    
+    The standard QueueHandler formats each message before queueing it. This
+    one only snapshots mutable arguments (a shallow copy, so later changes by
+    the caller do not leak into the log line) and queues the record, so
+    %-style messages with large arguments cost almost nothing to log.
+    """
+    
+    def prepare(self, record):
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = dict(record.args)
+            else:
+                record.args = tuple(
+                    arg.copy() if isinstance(arg, (dict, list, set)) else arg
+                    for arg in record.args
+                )
+        return record
+
+# Listener of the active async logging setup
+_queue_listener: Optional[QueueListener] = None
+
+def shutdown_logging() -> None:
+    """Flush and stop the async logging listener, if one is running."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+
+atexit.register(shutdown_logging)
+
 def setup_logging(
     log_level: str = "INFO",
     log_format: Optional[str] = None,
     log_file: Optional[str] = None,
     max_log_size: int = 10 * 1024 * 1024,  # 10 MB
     backup_count: int = 5,
+    async_mode: bool = False,
+    json_format: Optional[bool] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
 ) -> None:
     """
     Set up logging for the application.
@@ -157,6 +264,11 @@ def setup_logging(
         log_file: Path to log file
         max_log_size: Maximum size of each log file in bytes (default: 10MB)
         backup_count: Number of backup logs to keep (default: 5)
+        async_mode: Queue records and write them on a background thread
+            (default: False)
+        json_format: Write the log file as JSON lines (default: same as async_mode)
+        sample_rates: Fraction of records to keep per logger name prefix,
+            e.g. {"services.orchestrator": 0.1}; warnings are always kept
     """
     # Create a session ID for this run if log_file is not provided
     if not log_file:
@@ -171,6 +283,13 @@ def setup_logging(
     if log_format is None:
         log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+    # Stop the listener of a previous async setup before replacing its handlers
+    global _queue_listener
+    shutdown_logging()
+    
+    if json_format is None:
+        json_format = async_mode
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
@@ -183,7 +302,7 @@ def setup_logging(
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(max(numeric_level, logging.INFO))  # At least INFO for console
     console_handler.setFormatter(logging.Formatter(log_format))
-    root_logger.addHandler(console_handler)
+    sink_handlers = [console_handler]
 
     # Create file handler if log file is specified
     if log_file:
@@ -192,6 +311,8 @@ def setup_logging(
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
 
+        file_formatter = JsonLinesFormatter() if json_format else logging.Formatter(log_format)
+
         # Use RotatingFileHandler instead of FileHandler to manage log size
         try:
             from logging.handlers import RotatingFileHandler
@@ -201,16 +322,37 @@ def setup_logging(
                 backupCount=backup_count
             )
             file_handler.setLevel(numeric_level)
-            file_handler.setFormatter(logging.Formatter(log_format))
-            root_logger.addHandler(file_handler)
+            file_handler.setFormatter(file_formatter)
+            sink_handlers.append(file_handler)
         except Exception as e:
             # Fall back to regular file handler if rotating handler fails
             file_handler = logging.FileHandler(log_file)
             file_handler.setLevel(numeric_level)
-            file_handler.setFormatter(logging.Formatter(log_format))
-            root_logger.addHandler(file_handler)
+            file_handler.setFormatter(file_formatter)
+            sink_handlers.append(file_handler)
             root_logger.warning(f"Failed to create rotating log handler, using standard handler: {str(e)}")
 
+    # Filter binary data once, at the handlers every record ends up in
+    for handler in sink_handlers:
+        handler.addFilter(BinaryDataFilter())
+        handler.addFilter(AudioDataFilter())
+
+    if async_mode:
+        # Request threads only queue records; the listener formats and writes them
+        log_queue = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(log_queue)
+        if sample_rates:
+            queue_handler.addFilter(SamplingFilter(sample_rates))
+        root_logger.addHandler(queue_handler)
+        _queue_listener = QueueListener(log_queue, *sink_handlers, respect_handler_level=True)
+        _queue_listener.start()
+    else:
+        for handler in sink_handlers:
+            # Sampling counts records, so every handler needs its own counters
+            if sample_rates:
+                handler.addFilter(SamplingFilter(sample_rates))
+            root_logger.addHandler(handler)
+
     # Configure application-specific logger
     app_logger = logging.getLogger("swoop_ai")
     app_logger.setLevel(numeric_level)
@@ -226,25 +368,9 @@ def setup_logging(
         except Exception as e:
             app_logger.warning(f"Failed to clean old logs: {str(e)}")
         
-    app_logger.info(f"Logging initialized at level {log_level}")
+    app_logger.info(f"Logging initialized at level {log_level}{' (async)' if async_mode else ''}")
     app_logger.info(f"Log file: {log_file}")
 
-    # Add binary data filter
-    binary_data_filter = BinaryDataFilter()
-    app_logger.addFilter(binary_data_filter)
-
-    # Add to your logging setup
-    logger = logging.getLogger()
-    logger.addFilter(BinaryDataFilter())
-
-    # Apply AudioDataFilter to the root logger
-    root_logger.addFilter(AudioDataFilter())
-
-    # Also apply to all other loggers that might be used
-    for name in logging.root.manager.loggerDict:
-        logger = logging.getLogger(name)
-        logger.addFilter(AudioDataFilter())
-
 def setup_ai_api_logging():
     """
     Set up specialized logging for AI API calls.
@@ -468,6 +594,9 @@ sys.stderr = BinaryFilter(sys.stderr)
 __all__ = [
     "logger", 
     "setup_logging", 
+    "shutdown_logging",
+    "JsonLinesFormatter",
+    "SamplingFilter",
     "get_log_file_path", 
     "clean_old_logs", 
     "setup_ai_api_logging",
@@ -0,0 +1,192 @@
+"""
+Bounded worker pool for running database queries with a timeout.
+
+Queries run on a fixed-size thread pool sized to match the SQLAlchemy
+connection pool, instead of on a new thread per query. Timeouts are enforced
+in two places:
+- On the server, through a per-transaction statement timeout (PostgreSQL)
+- On the client, by cancelling the running statement through the DBAPI
+  connection when the caller stops waiting
+
+Either way the statement stops, so the worker thread and its pooled
+connection are freed instead of being abandoned.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import AbstractContextManager
+from typing import Dict, Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _RunningQuery:
+    """Tracks the connection a submitted query is using, for cancellation."""
+
+    __slots__ = ("lock", "connection", "cancelled")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connection = None
+        self.cancelled = False
+
+
+class PooledQueryExecutor:
+    """
+    Runs query work on a bounded thread pool with server and client timeouts.
+
+    The work callable receives a checked-out connection and returns the query
+    result. Connections come from the ``connect`` callable passed to ``run``,
+    which must return a context manager that releases the connection on exit.
+    """
+
+    def __init__(self,
+                 engine: Any,
+                 max_workers: int,
+                 server_timeout_grace: float = 1.0,
+                 thread_name_prefix: str = "sql-query"):
+        """
+        Initialize the query executor.
+
+        Args:
+            engine: SQLAlchemy engine the connections come from
+            max_workers: Number of worker threads (pool_size + max_overflow)
+            server_timeout_grace: Seconds added to the server-side statement
+                timeout, so the client-side cancel normally fires first
+            thread_name_prefix: Name prefix for the worker threads
+        """
+        self.engine = engine
+        self.max_workers = max(1, int(max_workers))
+        self.server_timeout_grace = server_timeout_grace
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "timeouts": 0,
+            "cancelled_running": 0,
+            "cancelled_queued": 0
+        }
+
+    def run(self,
+            work: Callable[[Any], T],
+            timeout: Optional[float],
+            connect: Callable[[], AbstractContextManager]) -> T:
+        """
+        Run query work on the pool and wait for its result.
+
+        Args:
+            work: Function that executes the query on the given connection
+            timeout: Timeout in seconds (None or 0 waits indefinitely)
+            connect: Function returning a connection context manager
+
+        Returns:
+            Whatever work returned
+
+        Raises:
+            TimeoutError: If the query did not finish within the timeout
+            Any exception raised by work
+        """
+        running = _RunningQuery()
+        with self._stats_lock:
+            self.stats["submitted"] += 1
+
+        future = self._executor.submit(self._run_work, running, work, timeout, connect)
+
+        try:
+            return future.result(timeout=timeout or None)
+        except (TimeoutError, FutureTimeoutError):
+            # Before Python 3.11 future.result() raises its own TimeoutError class
+            if future.done() and not running.cancelled and future.exception() is not None:
+                # The work itself raised a TimeoutError
+                raise
+
+            with self._stats_lock:
+                self.stats["timeouts"] += 1
+                if future.cancel():
+                    # Never started: all workers were busy
+                    self.stats["cancelled_queued"] += 1
+                elif self._cancel(running):
+                    self.stats["cancelled_running"] += 1
+
+            raise TimeoutError(f"Query execution timed out after {timeout} seconds")
+
+    def _run_work(self,
+                  running: _RunningQuery,
+                  work: Callable[[Any], T],
+                  timeout: Optional[float],
+                  connect: Callable[[], AbstractContextManager]) -> T:
+        """Execute work on a worker thread with the connection registered for cancellation."""
+        with connect() as connection:
+            with running.lock:
+                running.connection = connection
+            try:
+                self._apply_statement_timeout(connection, timeout)
+                return work(connection)
+            finally:
+                with running.lock:
+                    running.connection = None
+
+    def _apply_statement_timeout(self, connection: Any, timeout: Optional[float]):
+        """
+        Set a server-side statement timeout for the current transaction.
+
+        SET LOCAL only lasts until the transaction ends, so the setting never
+        leaks to the next user of the pooled connection.
+        """
+        if not timeout:
+            return
+
+        dialect = getattr(getattr(self.engine, "dialect", None), "name", None)
+        if dialect == "postgresql":
+            timeout_ms = int((timeout + self.server_timeout_grace) * 1000)
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+    def _cancel(self, running: _RunningQuery) -> bool:
+        """
+        Cancel the statement running on a query's connection.
+
+        psycopg2 connections expose cancel() and sqlite3 connections expose
+        interrupt(); both are safe to call from another thread.
+
+        Returns:
+            True if a cancel request was sent
+        """
+        with running.lock:
+            running.cancelled = True
+            connection = running.connection
+            if connection is None:
+                return False
+
+            pooled = getattr(connection, "connection", None)
+            dbapi_connection = getattr(pooled, "dbapi_connection", None)
+            for method_name in ("cancel", "interrupt"):
+                method = getattr(dbapi_connection, method_name, None)
+                if callable(method):
+                    try:
+                        method()
+                        return True
+                    except Exception as e:
+                        logger.warning(f"Failed to cancel timed out query: {e}")
+                        return False
+
+        logger.warning("Timed out query could not be cancelled; waiting for the server-side timeout")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics.
+
+        Returns:
+            Dictionary with pool size, submitted queries and timeout counts
+        """
+        with self._stats_lock:
+            return {"max_workers": self.max_workers, **self.stats}
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
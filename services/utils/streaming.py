@@ -0,0 +1,59 @@
+"""
+Turn callback-based text streaming into an iterator of events.
+
+The response pipeline produces text through an ``on_chunk`` callback, since
+the same call also has to return a final result dictionary. This module runs
+such a call on a background thread and yields what it produces as it arrives:
+
+    {"type": "chunk", "text": "..."}    for every piece of text
+    {"type": "result", "result": {...}} once, when the call has returned
+
+An exception raised by the call is re-raised from the iterator.
+"""
+import logging
+import queue
+import threading
+from typing import Dict, Any, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def stream_events(run: Callable[[Callable[[str], None]], Any],
+                  thread_name: str = "response-stream") -> Iterator[Dict[str, Any]]:
+    """
+    Run a callback-streaming call in the background and iterate over its output.
+
+    Args:
+        run: Function taking an ``on_chunk(text)`` callback and returning the
+            final result
+        thread_name: Name of the background thread
+
+    Yields:
+        Chunk events as text is produced, then a single result event
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+
+    def on_chunk(text: str):
+        if text:
+            events.put({"type": "chunk", "text": text})
+
+    def worker():
+        try:
+            events.put({"type": "result", "result": run(on_chunk)})
+        except BaseException as e:
+            events.put(e)
+        finally:
+            events.put(_DONE)
+
+    threading.Thread(target=worker, name=thread_name, daemon=True).start()
+
+    while True:
+        event = events.get()
+        if event is _DONE:
+            return
+        if isinstance(event, BaseException):
+            logger.error(f"Streaming call failed: {str(event)}")
+            raise event
+        yield event
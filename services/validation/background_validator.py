@@ -0,0 +1,147 @@
+"""
+Response validation off the critical path.
+
+Validation compares a response against its SQL results. When it cannot change
+the response (blocking is off), its outcome is only needed for auditing, so
+BackgroundValidator runs it on a small worker pool after the response has
+been returned, and keeps the outcome under the query's ID for later lookup.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from services.utils.bounded_history import BoundedMapping
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundValidator:
+    """
+    Runs SQL response validation on a worker pool, keyed by query ID.
+
+    Completed results are kept for the most recent ``max_results`` queries.
+    Listeners registered with ``add_listener`` are called with
+    ``(query_id, record)`` when a validation finishes.
+    """
+
+    def __init__(self, max_workers: int = 2, max_results: int = 1000):
+        """
+        Initialize the background validator.
+
+        Args:
+            max_workers: Validations run concurrently
+            max_results: Completed results kept for lookup
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="validation")
+        self._results = BoundedMapping(maxlen=max_results)
+        self._pending: Dict[str, Future] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """
+        Register a callback for finished validations.
+
+        Args:
+            listener: Called with (query_id, record) from a worker thread
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def submit(self,
+               query_id: str,
+               validator,
+               sql_query: str,
+               sql_results: List[Dict[str, Any]],
+               response_text: str) -> Future:
+        """
+        Queue a response for validation.
+
+        Args:
+            query_id: ID the result is stored under
+            validator: Object with validate_response(sql_query, sql_results, response_text)
+            sql_query: The SQL query that was executed
+            sql_results: The data returned from the SQL query
+            response_text: The response that was returned to the user
+
+        Returns:
+            Future resolving to the validation record
+        """
+        with self._lock:
+            self.stats["submitted"] += 1
+            future = self._executor.submit(
+                self._run, query_id, validator, sql_query, sql_results, response_text
+            )
+            self._pending[query_id] = future
+        return future
+
+    def _run(self, query_id: str, validator, sql_query: str,
+             sql_results: List[Dict[str, Any]], response_text: str) -> Dict[str, Any]:
+        """Validate one response and store the record."""
+        start = time.perf_counter()
+        record = {"query_id": query_id, "status": "completed", "result": None, "error": None}
+        try:
+            record["result"] = validator.validate_response(
+                sql_query=sql_query,
+                sql_results=sql_results,
+                response_text=response_text
+            )
+        except Exception as e:
+            logger.error(f"Background SQL validation failed for query {query_id}: {str(e)}")
+            record["status"] = "error"
+            record["error"] = str(e)
+        record["validation_time"] = time.perf_counter() - start
+
+        with self._lock:
+            self._results[query_id] = record
+            self._pending.pop(query_id, None)
+            self.stats["completed" if record["status"] == "completed" else "failed"] += 1
+            listeners = list(self._listeners)
+
+        result = record["result"] or {}
+        if record["status"] == "completed" and not result.get("validation_status", True):
+            logger.warning(f"SQL validation failed for query {query_id}: {result.get('detailed_feedback', '')}")
+
+        for listener in listeners:
+            try:
+                listener(query_id, record)
+            except Exception as e:
+                logger.error(f"Validation listener failed for query {query_id}: {str(e)}")
+        return record
+
+    def get_result(self, query_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up the validation record of a query.
+
+        Args:
+            query_id: The query ID
+            timeout: Seconds to wait for a pending validation (None to not wait)
+
+        Returns:
+            The record ({"query_id", "status", "result", "error", "validation_time"}),
+            {"query_id", "status": "pending"} if still running, or None if unknown
+        """
+        with self._lock:
+            if query_id in self._results:
+                return self._results[query_id]
+            future = self._pending.get(query_id)
+        if future is None:
+            return None
+        if timeout is not None:
+            try:
+                return future.result(timeout=timeout)
+            except Exception:
+                pass
+        return {"query_id": query_id, "status": "pending"}
+
+    def pending_count(self) -> int:
+        """Get the number of validations not yet finished."""
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=wait)
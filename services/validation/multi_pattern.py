@@ -0,0 +1,96 @@
+"""
+One-pass multi-pattern substring matching (Aho-Corasick).
+
+Response validation has to check whether many candidate strings (every
+result value in several formats) occur in one response text. Checking each
+candidate with ``in`` costs a scan of the response per candidate; the
+automaton built here finds all of them in a single scan.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class MultiPatternMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of patterns.
+
+    ``find_all(text)`` returns the patterns that occur in ``text`` as
+    substrings, i.e. exactly those for which ``pattern in text`` is true.
+
+    Example:
+        matcher = MultiPatternMatcher(["$10.50", "burger", "order #12"])
+        matcher.find_all("your burger was $10.50")  # {"$10.50", "burger"}
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Patterns to search for (empty strings are ignored)
+        """
+        # Node 0 is the root; each node has goto transitions, a failure link
+        # and the patterns that end at it (including via failure links)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self.patterns: Set[str] = set()
+
+        for pattern in patterns:
+            if pattern and pattern not in self.patterns:
+                self.patterns.add(pattern)
+                self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str):
+        """Add a pattern to the trie."""
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(pattern)
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Find which patterns occur in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of the patterns found
+        """
+        found: Set[str] = set()
+        if not self.patterns:
+            return found
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
@@ -11,10 +11,10 @@ from typing import Dict, Any, List, Optional
 import os
 import traceback
 import math
-from fuzzywuzzy import fuzz
 from datetime import datetime
 
 from services.validation.sql_response_validator import SQLResponseValidator
+from services.validation.multi_pattern import MultiPatternMatcher
 from services.utils.service_registry import ServiceRegistry
 
 # Try to import get_config, but don't fail if it's not available
@@ -62,6 +62,87 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Columns whose values a response is expected to mention
+IMPORTANT_COLUMNS = ['customer_name', 'order_total', 'item_name', 'order_count', 'customer', 'total', 'price',
+                     'quantity', 'revenue', 'sales', 'item_price', 'order_id', 'first_name', 'last_name']
+
+# Typical ways a response writes money, order IDs and quantities
+_MONEY_FORMATS = [
+    lambda v: f"${v}",                                # $10.50
+    lambda v: f"${float(v):.2f}",                     # $10.50
+    lambda v: f"{float(v):.2f}",                      # 10.50
+    lambda v: f"{int(float(v))}",                     # 10
+    lambda v: f"${int(float(v))}",                    # $10
+    lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
+    lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
+    lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
+]
+_ORDER_ID_FORMATS = [
+    lambda v: f"#{v}",                                # #123
+    lambda v: f"#{int(v)}",                           # #123
+    lambda v: f"order #{v}",                          # order #123
+    lambda v: f"order #{int(v)}",                     # order #123
+    lambda v: f"order {v}",                           # order 123
+    lambda v: f"order {int(v)}",                      # order 123
+    lambda v: f"order number {v}",                    # order number 123
+    lambda v: f"order number {int(v)}",               # order number 123
+    lambda v: f"{int(v)}"                             # 123
+]
+_QUANTITY_FORMATS = [
+    lambda v: f"{v}x",                                # 5x
+    lambda v: f"{int(v)}x",                           # 5x
+    lambda v: f"{v} x",                               # 5 x
+    lambda v: f"{int(v)} x",                          # 5 x
+    lambda v: f"{v}",                                 # 5
+    lambda v: f"{int(v)}"                             # 5
+]
+
+# Mapping of columns to their typical formatting patterns
+FORMATTING_PATTERNS = {
+    'order_total': _MONEY_FORMATS,
+    'total': _MONEY_FORMATS,
+    'price': _MONEY_FORMATS,
+    'item_price': _MONEY_FORMATS,
+    'item_total_price': _MONEY_FORMATS,
+    'revenue': _MONEY_FORMATS,
+    'order_id': _ORDER_ID_FORMATS,
+    'quantity': _QUANTITY_FORMATS,
+    'item_quantity': _QUANTITY_FORMATS
+}
+
+
+def _column_formats(column: str, value: Any) -> List[str]:
+    """
+    Format a value with its column's formatting patterns, in order.
+
+    Stops at the first pattern that does not apply to the value
+    (e.g. a non-numeric value for a numeric pattern).
+    """
+    formats = []
+    try:
+        for format_func in FORMATTING_PATTERNS.get(column, ()):
+            formats.append(format_func(value))
+    except (ValueError, TypeError):
+        pass
+    return formats
+
+
+def _generic_numeric_formats(value: Any, value_str: str) -> List[str]:
+    """
+    Get the generic spellings of a numeric value: integer, dollar, thousands separators.
+
+    Returns an empty list for non-numeric values and for values that have
+    no integer form (NaN, infinity).
+    """
+    if not (isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit())):
+        return []
+    try:
+        integer = int(float(value))
+    except (ValueError, OverflowError):
+        return []
+    return [str(integer), '$' + value_str.replace('$', ''), format(integer, ",")]
+
+
 class SQLValidationService:
     """Service for validating AI responses against SQL query results."""
     
@@ -304,6 +385,11 @@ class SQLValidationService:
         """
         Perform basic validation by checking if key data points are mentioned in the response.
         
+        All candidate spellings of all values (raw, column-specific formats,
+        generic numeric formats) are collected first and found in the response
+        with a single scan, so the cost grows with the response length and the
+        number of distinct values rather than their product.
+        
         Args:
             sql_results: The results of the SQL query
             response_text: The response text to validate
@@ -317,106 +403,11 @@ class SQLValidationService:
         # Track matches and mismatches
         matched_data_points = []
         data_point_mismatches = []
+        important_columns = list(IMPORTANT_COLUMNS)
         
-        # Track important columns for completeness check
-        important_columns = ['customer_name', 'order_total', 'item_name', 'order_count', 'customer', 'total', 'price', 
-                             'quantity', 'revenue', 'sales', 'item_price', 'order_id', 'first_name', 'last_name']
-        
-        # Mapping of columns to their typical formatting patterns
-        formatting_patterns = {
-            'order_total': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'total': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'price': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'item_price': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'item_total_price': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'revenue': [
-                lambda v: f"${v}",                                # $10.50
-                lambda v: f"${float(v):.2f}",                     # $10.50
-                lambda v: f"{float(v):.2f}",                      # 10.50
-                lambda v: f"{int(float(v))}",                     # 10
-                lambda v: f"${int(float(v))}",                    # $10
-                lambda v: f"${float(v):,.2f}",                    # $10.50 or $1,000.50
-                lambda v: f"{float(v):,}",                        # 10.5 or 1,000.5
-                lambda v: f"{int(float(v)):,}"                    # 10 or 1,000
-            ],
-            'order_id': [
-                lambda v: f"#{v}",                                # #123
-                lambda v: f"#{int(v)}",                           # #123
-                lambda v: f"order #{v}",                          # order #123
-                lambda v: f"order #{int(v)}",                     # order #123
-                lambda v: f"order {v}",                           # order 123
-                lambda v: f"order {int(v)}",                      # order 123
-                lambda v: f"order number {v}",                    # order number 123
-                lambda v: f"order number {int(v)}",               # order number 123
-                lambda v: f"{int(v)}"                             # 123
-            ],
-            'quantity': [
-                lambda v: f"{v}x",                                # 5x
-                lambda v: f"{int(v)}x",                           # 5x
-                lambda v: f"{v} x",                               # 5 x
-                lambda v: f"{int(v)} x",                          # 5 x
-                lambda v: f"{v}",                                 # 5
-                lambda v: f"{int(v)}"                             # 5
-            ],
-            'item_quantity': [
-                lambda v: f"{v}x",                                # 5x
-                lambda v: f"{int(v)}x",                           # 5x
-                lambda v: f"{v} x",                               # 5 x
-                lambda v: f"{int(v)} x",                          # 5 x
-                lambda v: f"{v}",                                 # 5
-                lambda v: f"{int(v)}"                             # 5
-            ]
-        }
-        
-        # Track values mentioned in response for each column
-        mentioned_values = {}
-        
-        # Process all results in the SQL data
+        # First pass: collect the candidate spellings of every value
+        candidates = []
+        patterns = set()
         for row in sql_results:
             for column, value in row.items():
                 # Skip null values
@@ -426,112 +417,71 @@ class SQLValidationService:
                 # Convert value to string for matching
                 value_str = str(value).lower()
                 
-                # Skip empty strings
-                if not value_str.strip():
+                # Skip empty strings and very short values that might cause false positives
+                if not value_str.strip() or len(value_str) < 2:
                     continue
                 
-                # Skip very short values that might cause false positives
-                if len(value_str) < 2:
-                    continue
+                column_formats = [(f, f.lower()) for f in _column_formats(column, value)]
+                generic_formats = _generic_numeric_formats(value, value_str)
                 
-                # Check if this exact value is mentioned in the response
-                if value_str in response_lower:
-                    # Found a match
-                    matched_data_points.append({
-                        "column": column,
-                        "value": value,
-                        "match_type": "exact"
-                    })
-                    
-                    # Track in mentioned values
-                    if column not in mentioned_values:
-                        mentioned_values[column] = []
-                    mentioned_values[column].append(value)
-                else:
-                    # Check for alternate formats
-                    found_match = False
-                    matched_format = None
-                    
-                    # First, try column-specific formatting patterns if available
-                    if column in formatting_patterns:
-                        try:
-                            for format_func in formatting_patterns[column]:
-                                formatted_value = format_func(value)
-                                if formatted_value.lower() in response_lower:
-                                    found_match = True
-                                    matched_format = formatted_value
-                                    break
-                        except (ValueError, TypeError):
-                            # If formatting fails (e.g. non-numeric value for numeric pattern), 
-                            # continue with generic checks
-                            pass
-                    
-                    # Generic checks for numbers if specific formatting didn't match
-                    if not found_match and isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
-                        # Try without decimal (for integers)
-                        if str(int(float(value))) in response_lower:
-                            found_match = True
-                            matched_format = str(int(float(value)))
-                        # Try with dollar sign for money
-                        elif '$' + value_str.replace('$', '') in response_lower:
-                            found_match = True
-                            matched_format = '$' + value_str.replace('$', '')
-                        # Try with commas for thousands
-                        elif any(format(int(float(value)), ",") in response_lower for _ in [1]):
-                            found_match = True
-                            matched_format = format(int(float(value)), ",")
-                        # Try to find the value surrounded by non-alphanumeric characters
-                        elif re.search(r'[^a-zA-Z0-9]' + re.escape(value_str) + r'[^a-zA-Z0-9]', response_lower):
-                            found_match = True
-                            matched_format = value_str + " (with boundary)"
-                            
-                    # For strings, try partial matching for important columns
-                    elif not found_match and isinstance(value, str) and column in important_columns:
-                        # Check if a significant portion of the string is in the response
-                        if len(value_str) > 3 and value_str in response_lower:
-                            found_match = True
-                            matched_format = value_str
-                            
-                    if found_match:
-                        matched_data_points.append({
-                            "column": column,
-                            "value": value,
-                            "match_type": "formatted",
-                            "matched_format": matched_format
-                        })
-                        
-                        # Track in mentioned values
-                        if column not in mentioned_values:
-                            mentioned_values[column] = []
-                        mentioned_values[column].append(value)
-                    elif column in important_columns:
-                        # This is an important value that's missing
-                        # Get the relevant fragment from the response for context
-                        response_fragment = self._extract_relevant_fragment(response_lower, value_str)
-                        
-                        # Try to find potential formatting issues for better feedback
-                        attempted_formats = []
-                        if column in formatting_patterns:
-                            try:
-                                for format_func in formatting_patterns[column]:
-                                    attempted_formats.append(format_func(value))
-                            except (ValueError, TypeError):
-                                # If formatting fails, just continue
-                                pass
-                        
-                        # Limit the number of formats shown in the error
-                        if len(attempted_formats) > 3:
-                            attempted_formats = attempted_formats[:3]
-                        
-                        formatted_attempts = ", ".join([f"'{f}'" for f in attempted_formats]) if attempted_formats else "None tried"
-                        
-                        data_point_mismatches.append({
-                            "column": column,
-                            "expected": value,
-                            "found": "Not mentioned",
-                            "reason": f"Important value not found in response. Attempted formats: {formatted_attempts}",
-                            "response_fragment": response_fragment or "No relevant fragment found"
-                        })
+                patterns.add(value_str)
+                patterns.update(lowered for _, lowered in column_formats)
+                patterns.update(generic_formats)
+                candidates.append((column, value, value_str, column_formats, generic_formats))
+        
+        # One scan of the response finds every candidate it contains
+        found = MultiPatternMatcher(patterns).find_all(response_lower) if candidates else set()
+        
+        # Second pass: resolve each value against the set of found candidates
+        mentioned_columns = set()
+        for column, value, value_str, column_formats, generic_formats in candidates:
+            # Check if this exact value is mentioned in the response
+            if value_str in found:
+                matched_data_points.append({
+                    "column": column,
+                    "value": value,
+                    "match_type": "exact"
+                })
+                mentioned_columns.add(column)
+                continue
+            
+            # Check for alternate formats, column-specific ones first
+            found_match = False
+            matched_format = None
+            for formatted_value, lowered in column_formats:
+                if lowered in found:
+                    found_match = True
+                    matched_format = formatted_value
+                    break
+            
+            # Generic numeric formats; for numeric strings these take precedence
+            if not found_match or isinstance(value, str):
+                for generic_value in generic_formats:
+                    if generic_value in found:
+                        found_match = True
+                        matched_format = generic_value
+                        break
+            
+            if found_match:
+                matched_data_points.append({
+                    "column": column,
+                    "value": value,
+                    "match_type": "formatted",
+                    "matched_format": matched_format
+                })
+                mentioned_columns.add(column)
+            elif column in IMPORTANT_COLUMNS:
+                # This is an important value that's missing; show a few of the formats tried
+                attempted_formats = [formatted_value for formatted_value, _ in column_formats[:3]]
+                formatted_attempts = ", ".join([f"'{f}'" for f in attempted_formats]) if attempted_formats else "None tried"
+                
+                data_point_mismatches.append({
+                    "column": column,
+                    "expected": value,
+                    "found": "Not mentioned",
+                    "reason": f"Important value not found in response. Attempted formats: {formatted_attempts}",
+                    "response_fragment": "No relevant fragment found"
+                })
         
         # Check for each important column if at least one value is mentioned
         missing_important_columns = []
@@ -539,7 +489,7 @@ class SQLValidationService:
             # Check if this column exists in the SQL results
             column_exists = any(column in row for row in sql_results)
             
-            if column_exists and column not in mentioned_values:
+            if column_exists and column not in mentioned_columns:
                 missing_important_columns.append(column)
         
         # Add mismatches for missing important columns
@@ -548,20 +498,8 @@ class SQLValidationService:
             if values:
                 sample_value = values[0]
                 
-                # Try to suggest formats that should have been used
-                suggested_formats = []
-                if column in formatting_patterns:
-                    try:
-                        for format_func in formatting_patterns[column]:
-                            suggested_formats.append(format_func(sample_value))
-                    except (ValueError, TypeError):
-                        # If formatting fails, just continue
-                        pass
-                
-                # Limit the number of suggestions
-                if len(suggested_formats) > 3:
-                    suggested_formats = suggested_formats[:3]
-                    
+                # Suggest a few formats that should have been used
+                suggested_formats = _column_formats(column, sample_value)[:3]
                 suggestions = f" Suggested formats: {', '.join(suggested_formats)}" if suggested_formats else ""
                 
                 data_point_mismatches.append({
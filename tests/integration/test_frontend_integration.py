@@ -180,7 +180,8 @@ class TestFrontendIntegration:
         # Verify orchestrator was called with the user input and context
         mock_orchestrator.process_query.assert_called_once_with(
             "Show me menu items under $10",
-            context
+            context,
+            session=mock_orchestrator.get_session.return_value
         )
         
         # Verify update_history was called
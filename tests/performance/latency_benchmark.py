@@ -0,0 +1,286 @@
+"""
+End-to-end latency benchmark for OrchestratorService.process_query.
+
+Runs the conversations in ai_agent/test_scenarios/*.json against an
+orchestrator wired to the local stand-ins in ai_agent/benchmark_support, at one or
+more concurrency levels, and reports p50/p95/p99 of every stage timer the
+orchestrator records. Results are written as JSON so runs on different
+commits can be compared.
+
+Usage:
+    python -m tests.performance.latency_benchmark --concurrency 1 4 8 --repeats 3
+    python -m tests.performance.latency_benchmark --compare tests/performance/results/baseline.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from ai_agent.benchmark_support import BenchmarkServices, create_orchestrator, summarize
+from services.orchestrator.orchestrator import OrchestratorService
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCENARIO_DIR = os.path.join(PROJECT_ROOT, "ai_agent", "test_scenarios")
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "tests", "performance", "results")
+
+# Timer entries that are not stage durations
+_NON_STAGE_TIMERS = {"total_start"}
+
+
+def load_scenarios(pattern: str = os.path.join(SCENARIO_DIR, "*.json")) -> List[Dict[str, Any]]:
+    """
+    Load benchmark scenarios.
+
+    Args:
+        pattern: Glob of scenario files
+
+    Returns:
+        List of {"name", "steps"} with the user inputs of each conversation
+    """
+    scenarios = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "rb") as f:
+            raw = f.read()
+        # Some scenario files were saved as UTF-16
+        encoding = "utf-16" if raw[:2] in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+        scenario = json.loads(raw.decode(encoding))
+        steps = [step["input"] for step in scenario.get("test_steps", []) if step.get("input")]
+        if not steps and scenario.get("user_input"):
+            steps = [scenario["user_input"]]
+        if steps:
+            scenarios.append({"name": scenario.get("name", os.path.basename(path)), "steps": steps})
+    return scenarios
+
+
+def _run_scenario(orchestrator: OrchestratorService, scenario: Dict[str, Any],
+                  enable_verbal: bool) -> List[Dict[str, Any]]:
+    """Run the steps of one conversation in a new session and return each step's timers."""
+    session = orchestrator.create_session()
+    samples = []
+    for step in scenario["steps"]:
+        started = time.perf_counter()
+        try:
+            result = orchestrator.process_query(step, {"enable_verbal": enable_verbal}, session=session)
+            error = result.get("error")
+        except Exception as e:
+            result, error = {}, str(e)
+        timers = {
+            name: value for name, value in (result.get("timers") or {}).items()
+            if name not in _NON_STAGE_TIMERS and isinstance(value, (int, float))
+        }
+        timers["wall_time"] = time.perf_counter() - started
+        samples.append({"scenario": scenario["name"], "query": step, "timers": timers, "error": error})
+    orchestrator.end_session(session.session_id)
+    return samples
+
+
+def run_level(services: BenchmarkServices, scenarios: List[Dict[str, Any]], concurrency: int,
+              repeats: int = 1, enable_verbal: bool = True,
+              config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run every scenario `repeats` times with `concurrency` conversations at once.
+
+    All conversations share one orchestrator, each in its own session, as
+    the app's user sessions do.
+
+    Returns:
+        Report of this concurrency level with per-stage statistics
+    """
+    orchestrator = create_orchestrator(services, config)
+
+    def run(scenario):
+        return _run_scenario(orchestrator, scenario, enable_verbal)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark") as pool:
+        runs = list(pool.map(run, [s for _ in range(repeats) for s in scenarios]))
+    wall_time = time.perf_counter() - started
+
+    samples = [sample for run_samples in runs for sample in run_samples]
+    stages: Dict[str, List[float]] = {}
+    for sample in samples:
+        if sample["error"]:
+            continue
+        for name, value in sample["timers"].items():
+            stages.setdefault(name, []).append(value)
+
+    # Release the orchestrator's stage worker threads
+    orchestrator._pipeline_executor.shutdown(wait=False)
+
+    return {
+        "concurrency": concurrency,
+        "queries": len(samples),
+        "errors": sum(1 for sample in samples if sample["error"]),
+        "wall_time": wall_time,
+        "throughput_qps": len(samples) / wall_time if wall_time else 0.0,
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """Get the current commit, if this is a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(concurrency_levels: Sequence[int] = (1, 4, 8), repeats: int = 1,
+                  latencies: Optional[Dict[str, float]] = None, jitter: float = 0.2, seed: int = 0,
+                  enable_verbal: bool = True, scenarios: Optional[List[Dict[str, Any]]] = None,
+                  config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark at each concurrency level.
+
+    Args:
+        concurrency_levels: Numbers of concurrent conversations
+        repeats: Times each scenario runs per level
+        latencies: Latency overrides for the stand-ins
+        jitter: Maximum relative deviation of each latency
+        seed: Random seed for latencies and data
+        enable_verbal: Request verbal (TTS) responses
+        scenarios: Scenarios to run (default: ai_agent/test_scenarios)
+        config: Extra orchestrator configuration
+
+    Returns:
+        The benchmark report
+    """
+    scenarios = scenarios if scenarios is not None else load_scenarios()
+    services = BenchmarkServices(latencies, jitter, seed)
+    levels = [run_level(services, scenarios, level, repeats, enable_verbal, config) for level in concurrency_levels]
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "latencies": services.latency.latencies,
+            "jitter": jitter,
+            "seed": seed,
+            "repeats": repeats,
+            "enable_verbal": enable_verbal,
+            "scenarios": [scenario["name"] for scenario in scenarios],
+        },
+        "levels": levels,
+    }
+
+
+def save_report(report: Dict[str, Any], path: Optional[str] = None) -> str:
+    """
+    Write a report as JSON.
+
+    Args:
+        report: The benchmark report
+        path: Output file (default: results/benchmark_<commit>_<time>.json)
+
+    Returns:
+        The path written
+    """
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"benchmark_{report.get('commit') or 'nogit'}_{stamp}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], metric: str = "p95",
+                    threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compare a stage metric between two reports.
+
+    Args:
+        baseline: Earlier report
+        current: New report
+        metric: Statistic to compare (p50, p95, p99, mean)
+        threshold: Relative increase counted as a regression
+
+    Returns:
+        One entry per (concurrency, stage) present in both reports, with
+        the baseline and current values, the relative change and whether
+        it is a regression
+    """
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    comparison = []
+    for level in current.get("levels", []):
+        before = baseline_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        for stage, stats in level["stages"].items():
+            if stage not in before["stages"]:
+                continue
+            old, new = before["stages"][stage][metric], stats[metric]
+            change = (new - old) / old if old else 0.0
+            comparison.append({
+                "concurrency": level["concurrency"],
+                "stage": stage,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": change > threshold and new - old > 0.001,
+            })
+    return comparison
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format a report as a table of per-stage percentiles in milliseconds."""
+    lines = []
+    for level in report["levels"]:
+        lines.append(f"\nconcurrency {level['concurrency']}: {level['queries']} queries, "
+                     f"{level['errors']} errors, {level['throughput_qps']:.2f} queries/s")
+        lines.append(f"  {'stage':<28}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, stats in level["stages"].items():
+            lines.append(f"  {stage:<28}" + "".join(f"{stats[p] * 1000:>10.1f}" for p in ("p50", "p95", "p99")))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark for process_query")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Concurrency levels")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of each scenario per level")
+    parser.add_argument("--latency", action="append", default=[], metavar="NAME=SECONDS",
+                        help="Override a stand-in latency, e.g. sql_generation=1.2")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Maximum relative latency jitter")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--no-verbal", action="store_true", help="Do not request TTS")
+    parser.add_argument("--output", help="Result file (default: tests/performance/results/...)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative p95 increase that fails --compare")
+    args = parser.parse_args(argv)
+
+    latencies = {}
+    for override in args.latency:
+        name, _, seconds = override.partition("=")
+        latencies[name] = float(seconds)
+
+    logging.disable(logging.INFO)
+    report = run_benchmark(args.concurrency, args.repeats, latencies, args.jitter, args.seed, not args.no_verbal)
+    print(format_report(report))
+    print(f"\nResults written to {save_report(report, args.output)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = [c for c in compare_reports(baseline, report, threshold=args.threshold) if c["regression"]]
+        for entry in regressions:
+            print(f"REGRESSION concurrency {entry['concurrency']} {entry['stage']}: p95 "
+                  f"{entry['baseline'] * 1000:.1f}ms -> {entry['current'] * 1000:.1f}ms ({entry['change']:+.0%})")
+        if regressions:
+            return 1
+        print(f"No p95 regressions over {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Smoke tests for the latency benchmark harness, with zero simulated latency.
+"""
+import json
+
+import pytest
+
+from ai_agent.benchmark_support import DEFAULT_LATENCIES, BenchmarkServices, create_orchestrator, percentile
+from services.utils.service_registry import ServiceRegistry
+from tests.performance.latency_benchmark import compare_reports, load_scenarios, run_benchmark, save_report
+
+NO_LATENCY = {name: 0.0 for name in DEFAULT_LATENCIES}
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    """Keep the benchmark's services out of other tests' registry."""
+    yield
+    ServiceRegistry._services = {}
+    ServiceRegistry._config = None
+
+
+def test_scenarios_load():
+    """Test that every scenario file loads, including UTF-16 ones."""
+    scenarios = load_scenarios()
+
+    assert len(scenarios) >= 8
+    assert all(scenario["steps"] for scenario in scenarios)
+    assert any(scenario["name"] == "followup_order_details" for scenario in scenarios)
+
+
+def test_percentile():
+    """Test linear interpolation between ranks."""
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == pytest.approx(50.5)
+    assert percentile(values, 0.99) == pytest.approx(99.01)
+    assert percentile([], 0.5) == 0.0
+
+
+def test_orchestrator_uses_synthetic_data():
+    """Test that a query runs end to end on the stand-ins."""
+    services = BenchmarkServices(NO_LATENCY, jitter=0.0, orders_per_day=5)
+    orchestrator = create_orchestrator(services)
+
+    result = orchestrator.process_query("Who placed orders on February 21st?", {"enable_verbal": True})
+
+    assert result["category"] == "order_history"
+    assert any(row["customer_name"] == "Brandon Devers" for row in result["query_results"])
+    assert result["has_verbal"] is True
+
+
+def test_report_and_comparison(tmp_path):
+    """Test the report layout, JSON output and regression check."""
+    scenarios = load_scenarios()[:3]
+
+    report = run_benchmark([1, 2], latencies=NO_LATENCY, jitter=0.0, scenarios=scenarios)
+
+    assert [level["concurrency"] for level in report["levels"]] == [1, 2]
+    level = report["levels"][0]
+    assert level["errors"] == 0
+    assert level["queries"] == sum(len(scenario["steps"]) for scenario in scenarios)
+    assert {"classification", "sql_generation", "text_response", "total_time"} <= set(level["stages"])
+    assert set(level["stages"]["total_time"]) >= {"p50", "p95", "p99"}
+
+    path = save_report(report, str(tmp_path / "run.json"))
+    with open(path) as f:
+        assert json.load(f)["settings"]["scenarios"] == [scenario["name"] for scenario in scenarios]
+
+    slower = json.loads(json.dumps(report))
+    slower["levels"][0]["stages"]["total_time"]["p95"] += 1.0
+    regressions = [c for c in compare_reports(report, slower) if c["regression"]]
+    assert [(c["concurrency"], c["stage"]) for c in regressions] == [(1, "total_time")]
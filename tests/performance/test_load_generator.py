@@ -0,0 +1,48 @@
+"""
+Smoke tests for the concurrent session load generator.
+"""
+import pytest
+
+from ai_agent.ai_user_simulator import ScriptedUserSimulator
+from ai_agent.load_generator import LoadGenerator, create_load_orchestrator
+from services.utils.service_registry import ServiceRegistry
+from ai_agent.benchmark_support import DEFAULT_LATENCIES
+
+NO_LATENCY = {name: 0.0 for name in DEFAULT_LATENCIES}
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    """Keep the load test's services out of other tests' registry."""
+    yield
+    ServiceRegistry._services = {}
+    ServiceRegistry._config = None
+
+
+def test_scripted_simulator_is_reproducible():
+    """Test that seeded simulators produce the same conversation."""
+    first, second = ScriptedUserSimulator(seed=3), ScriptedUserSimulator(seed=3)
+
+    assert first.generate_initial_query() == second.generate_initial_query()
+    assert first.generate_followup("Answer") == second.generate_followup("Answer")
+    assert [m["role"] for m in first.conversation_history] == ["user", "assistant", "user"]
+
+
+def test_concurrent_sessions_report():
+    """Test a small load run against a shared orchestrator."""
+    orchestrator = create_load_orchestrator(latencies=NO_LATENCY)
+    generator = LoadGenerator(orchestrator, sessions=20, turns=3, think_time=(0.0, 0.0),
+                              followup_ratio=0.5, ramp_up=0.0, enable_verbal=True)
+
+    report = generator.run()
+
+    assert report["queries"] == 60
+    assert report["errors"] == 0
+    assert 0 < report["followups"] < 40
+    assert report["throughput_qps"] > 0
+    assert report["latency"]["p99"] >= report["latency"]["p50"]
+    assert "total_time" in report["stages"]
+    assert report["memory"]["peak_mb"] >= report["memory"]["start_mb"] > 0
+    tiers = report["caches"]["classification_tiers"]
+    assert tiers["rules"] + tiers["model"] + tiers["llm"] == 60
+    assert report["caches"]["tts_cache"]["hit_rate"] > 0
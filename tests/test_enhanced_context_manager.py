@@ -335,6 +335,80 @@ class TestEnhancedContextManager(unittest.TestCase):
         # Verify the context was removed
         self.assertEqual(removed, 1)
         self.assertNotIn(self.session_id, self.context_manager.contexts)
+    
+    def test_context_histories_are_bounded(self):
+        """Test that context histories keep a fixed number of recent entries."""
+        context_manager = ContextManager(history_limit=5)
+        context = context_manager.get_context(self.session_id)
+        
+        for i in range(20):
+            context_manager.update_context(
+                self.session_id,
+                f"Show orders for day {i}",
+                {"query_type": "order_history" if i % 2 else "menu_items", "confidence": 0.9}
+            )
+        
+        self.assertEqual(len(context.conversation_history), 5)
+        self.assertEqual(context.conversation_history[-1]["query"], "Show orders for day 19")
+        self.assertLessEqual(len(context.topic_history), 5)
+        self.assertEqual(len(context.to_dict()["conversation_history"]), 5)
+        
+    def test_sweeper_removes_expired_contexts(self):
+        """Test that the background sweeper removes expired contexts."""
+        context_manager = ContextManager(expiry_minutes=30, sweep_interval_seconds=0.05)
+        try:
+            context_manager.get_context(self.session_id)
+            context_manager.last_access_times[self.session_id] = time.time() - 3600
+            
+            deadline = time.time() + 2
+            while self.session_id in context_manager.contexts and time.time() < deadline:
+                time.sleep(0.02)
+            
+            self.assertNotIn(self.session_id, context_manager.contexts)
+            self.assertGreaterEqual(context_manager.get_session_stats()["sweeper"]["removed"], 1)
+        finally:
+            context_manager.stop_sweeper(timeout=1)
+
+    
+    def test_binary_serialization_round_trip(self):
+        """Test that to_bytes/from_bytes restores the full context state."""
+        context = self.context_manager.get_context(self.session_id, "user-1")
+        context.update_with_query(
+            "Show me burger sales",
+            {
+                "query_type": "data_query",
+                "confidence": 0.9,
+                "parameters": {"entities": {"menu_items": [{"name": "Burger", "id": 7}]}}
+            }
+        )
+        context.update_with_query("What about last week?", {"query_type": "order_history", "confidence": 0.9})
+        
+        data = context.to_bytes()
+        restored = ConversationContext.from_bytes(data)
+        
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(restored.to_dict(), context.to_dict())
+        self.assertEqual(restored.tracked_entities["menu_item"], {"Burger"})
+        self.assertEqual(restored.entity_ids, {"menu_item:Burger": 7})
+        self.assertEqual(restored.conversation_history.maxlen, context.conversation_history.maxlen)
+        self.assertEqual(restored.user_profile.stats["queries_by_category"]["data_query"], 1)
+        self.assertEqual(restored.user_profile.creation_date, context.user_profile.creation_date)
+        
+    def test_compact_context_representation(self):
+        """Test that contexts use slots and create rarely used state on demand."""
+        context = ConversationContext(self.session_id)
+        
+        self.assertFalse(hasattr(context, "__dict__"))
+        with self.assertRaises(AttributeError):
+            context.unknown_attribute = 1
+        self.assertNotIn("pending_actions", context._lazy)
+        self.assertEqual(context.pending_actions, [])
+        self.assertIn("pending_actions", context._lazy)
+        
+        # Topics are interned, so all sessions share one string
+        topic = "".join(["order", "_history"])
+        context.update_with_query("Show orders", {"query_type": topic, "confidence": 0.9})
+        self.assertIs(context.current_topic, "order_history")
 
 
 if __name__ == '__main__':
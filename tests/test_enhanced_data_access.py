@@ -8,6 +8,7 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 import pandas as pd
+import numpy as np
 import time
 import threading
 from datetime import datetime, timedelta
@@ -17,6 +18,8 @@ import os
 
 from services.data.db_connection_manager import DatabaseConnectionManager
 from services.data.query_cache_manager import QueryCacheManager
+from services.data.cache_backends import SQLiteCacheBackend, create_cache_backend
+from services.data.columnar_result import ColumnarResult
 from services.data.enhanced_data_access import EnhancedDataAccess, get_data_access
 
 
@@ -212,6 +215,85 @@ class TestDatabaseConnectionManager(unittest.TestCase):
             assert db_manager._is_select_query(query) == expected
 
 
+    @patch('services.data.db_connection_manager.create_engine')
+    def test_performance_metrics_latency_percentiles(self, mock_create_engine):
+        """Test latency histograms and counters merged across threads."""
+        # Arrange
+        mock_create_engine.return_value = self.mock_engine
+        db_manager = DatabaseConnectionManager(self.test_config)
+        
+        def record_queries():
+            for i in range(100):
+                db_manager._record_query_performance(
+                    "SELECT * FROM orders WHERE id = 1", 0.01 if i < 90 else 1.0, True, None, 1
+                )
+        
+        # Act
+        threads = [threading.Thread(target=record_queries) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db_manager._record_query_performance(
+            "SELECT * FROM items JOIN orders ON orders.item_id = items.id", 0.2, False, "boom", 0
+        )
+        metrics = db_manager.get_performance_metrics()
+        
+        # Assert
+        assert metrics["total_queries"] == 401
+        assert metrics["successful_queries"] == 400
+        assert metrics["failed_queries"] == 1
+        assert metrics["slowest_query"]["time"] == 1.0
+        assert metrics["fastest_query"]["time"] == 0.01
+        assert metrics["latency"]["p50"] == pytest.approx(0.01, rel=0.15)
+        assert metrics["latency"]["p99"] == pytest.approx(1.0, rel=0.15)
+        assert metrics["latency_by_table"]["orders"]["count"] == 401
+        assert metrics["latency_by_table"]["items"]["count"] == 1
+        assert metrics["recent_errors"][-1]["error"] == "boom"
+        assert len(metrics["recent_queries"]) == 5
+    
+    @patch('services.data.db_connection_manager.create_engine')
+    def test_performance_metrics_retire_dead_threads(self, mock_create_engine):
+        """Test that exited threads are folded into the totals and no longer tracked."""
+        # Arrange
+        mock_create_engine.return_value = self.mock_engine
+        db_manager = DatabaseConnectionManager(self.test_config)
+        
+        def record_query():
+            db_manager._record_query_performance("SELECT * FROM orders", 0.05, True, None, 1)
+        
+        # Act
+        for _ in range(20):
+            thread = threading.Thread(target=record_query)
+            thread.start()
+            thread.join()
+        metrics = db_manager.get_performance_metrics()
+        
+        # Assert
+        assert db_manager._query_stats._threads == []
+        assert metrics["total_queries"] == 20
+        assert metrics["latency_by_table"]["orders"]["count"] == 20
+        assert metrics["slowest_query"]["time"] == 0.05
+    
+    @patch('services.data.db_connection_manager.create_engine')
+    def test_query_history_ring_buffer_sampling(self, mock_create_engine):
+        """Test that the history ring buffer is bounded and sampled."""
+        # Arrange
+        mock_create_engine.return_value = self.mock_engine
+        config = {"database": {**self.test_config["database"],
+                               "max_history": 3, "history_sample_every": 2}}
+        db_manager = DatabaseConnectionManager(config)
+        
+        # Act
+        for i in range(10):
+            db_manager._record_query_performance(f"SELECT {i}", 0.01, True, None, 1)
+        metrics = db_manager._query_stats.get_metrics(recent=10)
+        
+        # Assert
+        assert metrics["total_queries"] == 10
+        assert [q["query"] for q in metrics["recent_queries"]] == ["SELECT 5", "SELECT 7", "SELECT 9"]
+
+
 class TestQueryCacheManager(unittest.TestCase):
     """Tests for the QueryCacheManager class."""
     
@@ -419,6 +501,374 @@ class TestQueryCacheManager(unittest.TestCase):
         assert hit1 is False
         assert hit2 is False
 
+    def test_lru_eviction_order(self):
+        """Test that the least recently used entry is evicted when full."""
+        # Arrange
+        self.cache_manager.max_size = 3
+        queries = [f"SELECT * FROM users WHERE id = {i}" for i in range(3)]
+        for query in queries:
+            self.cache_manager.set(query, None, [{"id": 1}], True, 0.1)
+
+        # Touch the oldest entry so the second one becomes LRU
+        self.cache_manager.get(queries[0], None)
+
+        # Act
+        self.cache_manager.set("SELECT * FROM users WHERE id = 3", None, [{"id": 3}], True, 0.1)
+
+        # Assert
+        assert len(self.cache_manager._cache) == 3
+        assert self.cache_manager.get(queries[0], None)[0] is True
+        assert self.cache_manager.get(queries[1], None)[0] is False
+        assert self.cache_manager.stats["evictions"] == 1
+
+    def test_expired_entries_purged_before_lru(self):
+        """Test that expired entries are purged in a batch before evicting live ones."""
+        # Arrange
+        self.cache_manager.max_size = 3
+        self.cache_manager.set("SELECT * FROM users WHERE id = 1", None, [{"id": 1}], True, 0.1, ttl=-1)
+        self.cache_manager.set("SELECT * FROM users WHERE id = 2", None, [{"id": 2}], True, 0.1, ttl=-1)
+        self.cache_manager.set("SELECT * FROM orders", None, [{"id": 3}], True, 0.1)
+
+        # Act
+        self.cache_manager.set("SELECT * FROM users", None, [{"id": 4}], True, 0.1)
+
+        # Assert - both expired entries went, the live one survived
+        assert len(self.cache_manager._cache) == 2
+        assert self.cache_manager.get("SELECT * FROM orders", None)[0] is True
+
+    def test_replace_entry_keeps_memory_accounting(self):
+        """Test that re-setting a key does not double count its memory."""
+        # Arrange
+        query = "SELECT * FROM users"
+        data = [{"id": 1, "name": "User 1"}]
+
+        # Act
+        self.cache_manager.set(query, None, data, True, 0.1)
+        usage = self.cache_manager._memory_usage
+        self.cache_manager.set(query, None, data, True, 0.1)
+
+        # Assert
+        assert len(self.cache_manager._cache) == 1
+        assert self.cache_manager._memory_usage == usage
+
+    def test_extract_tables(self):
+        """Test table extraction used for the invalidation index."""
+        # Test cases
+        test_cases = [
+            ("SELECT * FROM users WHERE id = 1", {"users"}),
+            ("SELECT * FROM public.orders o JOIN order_items oi ON oi.order_id = o.id",
+             {"public.orders", "orders", "order_items"}),
+            ("SELECT * FROM users u, orders o WHERE u.id = o.user_id", {"users", "orders"}),
+            ("SELECT * FROM users WHERE note = 'from orders'", {"users"}),
+            ('UPDATE "orders" SET status = 1', {"orders"}),
+            ("SELECT * FROM items LEFT JOIN orders ON orders.item_id = items.id",
+             {"items", "orders"}),
+            ("SELECT * FROM orders JOIN items ON items.id = orders.item_id WHERE orders.id = 1",
+             {"orders", "items"}),
+        ]
+
+        # Act & Assert
+        for query, expected in test_cases:
+            assert self.cache_manager._extract_tables(query) == expected
+
+    def test_invalidate_by_table_uses_index(self):
+        """Test that table invalidation only touches entries reading that table."""
+        # Arrange - the table reference sits past the truncated query preview
+        long_query = "SELECT " + ", ".join(f"col_{i}" for i in range(40)) + " FROM orders"
+        self.cache_manager.set(long_query, None, [{"value": 1}], True, 0.1)
+        self.cache_manager.set("SELECT * FROM users", None, [{"value": 2}], True, 0.1)
+
+        # Act
+        invalidated = self.cache_manager.invalidate(table_name="ORDERS")
+
+        # Assert
+        assert invalidated == 1
+        assert "orders" not in self.cache_manager._table_index
+        assert self.cache_manager._table_index["users"]
+        assert self.cache_manager.get("SELECT * FROM users", None)[0] is True
+
+    def test_invalidate_by_table_cleans_patterns(self):
+        """Test that table invalidation drops the related query patterns."""
+        # Arrange
+        self.cache_manager.pattern_caching = True
+        self.cache_manager.set("SELECT * FROM orders WHERE id = 1", None, [{"id": 1}], True, 0.1)
+        self.cache_manager.set("SELECT * FROM users WHERE id = 1", None, [{"id": 1}], True, 0.1)
+
+        # Act
+        self.cache_manager.invalidate(table_name="orders")
+
+        # Assert
+        patterns = list(self.cache_manager._query_patterns)
+        assert len(patterns) == 1
+        assert "users" in patterns[0]
+        assert len(self.cache_manager._key_patterns) == 1
+        assert set(self.cache_manager._pattern_tables) == {"users"}
+
+    def test_invalidate_joined_table(self):
+        """Test that invalidating a joined table drops entries that join it."""
+        # Arrange
+        query = "SELECT * FROM orders JOIN items ON items.id = orders.item_id"
+        self.cache_manager.set(query, None, [{"id": 1}], True, 0.1)
+
+        # Act
+        invalidated = self.cache_manager.invalidate(table_name="items")
+
+        # Assert
+        assert invalidated == 1
+        assert self.cache_manager.get(query, None)[0] is False
+
+    def test_evicted_pattern_leaves_table_index(self):
+        """Test that a pattern whose last entry is evicted is dropped from the table index."""
+        # Arrange
+        self.cache_manager.pattern_caching = True
+        query = "SELECT * FROM orders WHERE id = 1"
+        self.cache_manager.set(query, None, [{"id": 1}], True, 0.1)
+        cache_key = next(iter(self.cache_manager._key_patterns))
+
+        # Act
+        self.cache_manager._evict_entry(cache_key)
+
+        # Assert
+        assert self.cache_manager._query_patterns == {}
+        assert self.cache_manager._pattern_tables == {}
+
+
+class TestColumnarResult(unittest.TestCase):
+    """Tests for the ColumnarResult cache representation."""
+    
+    def setUp(self):
+        """Set up a result with repeated strings, nulls and mixed types."""
+        self.rows = [
+            {
+                "order_id": i,
+                "item_name": ["Burger", "Fries", "Salad"][i % 3],
+                "price": [9.5, 3.25, 7.0][i % 3],
+                "status": None if i % 7 == 0 else "completed",
+                "quantity": None if i % 5 == 0 else i % 4,
+                "is_active": i % 2 == 0,
+                "created_at": datetime(2025, 1, 1) + timedelta(hours=i),
+                "options": {"extra": i}
+            }
+            for i in range(500)
+        ]
+    
+    def test_rows_round_trip(self):
+        """Test that rows decode back to exactly what was encoded."""
+        # Act
+        columnar = ColumnarResult.from_rows(self.rows)
+        
+        # Assert
+        assert columnar.row_count == 500
+        assert columnar.to_rows() == self.rows
+    
+    def test_compressed_round_trip(self):
+        """Test that compression shrinks the buffers and still round-trips."""
+        # Act
+        plain = ColumnarResult.from_rows(self.rows)
+        compressed = ColumnarResult.from_rows(self.rows, compress=True, compress_min_bytes=64)
+        
+        # Assert
+        assert compressed.nbytes < plain.nbytes
+        assert compressed.to_rows() == self.rows
+    
+    def test_dataframe_matches_rows_frame(self):
+        """Test that the decoded frame has the dtypes pandas infers from the rows."""
+        # Arrange
+        expected = pd.DataFrame(self.rows)
+        
+        # Act
+        df = ColumnarResult.from_rows(self.rows).to_dataframe()
+        
+        # Assert
+        pd.testing.assert_frame_equal(df, expected)
+        assert not isinstance(df["item_name"].dtype, pd.CategoricalDtype)
+        assert df["quantity"].isna().sum() == 100
+        assert df["order_id"].dtype == "int64"
+    
+    def test_dataframe_string_columns_behave_like_objects(self):
+        """Test that dictionary-encoded strings sort by value and accept new values."""
+        # Arrange
+        rows = [{"item_name": name} for name in ["Salad", "Burger", "Fries"] * 4]
+        df = ColumnarResult.from_rows(rows).to_dataframe()
+        
+        # Act
+        ordered = df.sort_values("item_name")["item_name"].tolist()
+        df.loc[0, "item_name"] = "Wrap"
+        
+        # Assert
+        assert ordered == ["Burger"] * 4 + ["Fries"] * 4 + ["Salad"] * 4
+        assert df.loc[0, "item_name"] == "Wrap"
+    
+    def test_categorical_dataframe_round_trip(self):
+        """Test that categorical columns of a cached frame stay categorical."""
+        # Arrange
+        dtype = pd.CategoricalDtype(["small", "medium", "large"], ordered=True)
+        df = pd.DataFrame({"size": pd.Categorical(["large", "small", None, "medium"], dtype=dtype)})
+        
+        # Act
+        decoded = ColumnarResult.from_dataframe(df).to_dataframe()
+        
+        # Assert
+        pd.testing.assert_frame_equal(decoded, df)
+    
+    def test_dataframe_owns_its_data(self):
+        """Test that each decoded DataFrame gets its own writable numeric columns."""
+        # Arrange
+        df = pd.DataFrame({"order_id": range(100), "total": [float(i) for i in range(100)]})
+        columnar = ColumnarResult.from_dataframe(df)
+        
+        # Act
+        first = columnar.to_dataframe()
+        second = columnar.to_dataframe()
+        
+        # Assert
+        assert first.equals(df)
+        assert columnar.nbytes == 1600
+        assert not np.shares_memory(first["total"].to_numpy(), second["total"].to_numpy())
+        first.loc[0, "total"] = 99.0
+        assert second.loc[0, "total"] == 0.0
+    
+    def test_irregular_rows_not_encoded(self):
+        """Test that rows with differing keys are left alone."""
+        assert ColumnarResult.from_rows([{"a": 1}, {"b": 2}]) is None
+        assert ColumnarResult.encode("not tabular") is None
+    
+    def test_cache_stores_columnar(self):
+        """Test that the cache stores columnar data and returns the original shape."""
+        # Arrange
+        cache_manager = QueryCacheManager({"cache": {"min_query_time": 0.01}})
+        query = "SELECT * FROM orders"
+        
+        # Act
+        cache_manager.set(query, None, self.rows, True, 0.1)
+        hit, result = cache_manager.get(query, None)
+        
+        # Assert
+        stored = next(iter(cache_manager._cache.values()))
+        assert isinstance(stored["data"], ColumnarResult)
+        assert stored["size"] == stored["data"].nbytes
+        assert hit is True
+        assert result == self.rows
+
+
+class TestSharedCacheBackend(unittest.TestCase):
+    """Tests for QueryCacheManager with a shared SQLite backend."""
+    
+    def setUp(self):
+        """Set up two cache managers standing in for two worker processes."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.test_config = {
+            "cache": {
+                "enabled": True,
+                "default_ttl": 60,
+                "min_query_time": 0.01,
+                "backend": "sqlite",
+                "backend_path": os.path.join(self.temp_dir.name, "query_cache.sqlite3"),
+                "sync_interval": 0
+            }
+        }
+        
+        self.worker_a = QueryCacheManager(self.test_config)
+        self.worker_b = QueryCacheManager(self.test_config)
+    
+    def tearDown(self):
+        """Close the backends and remove the database."""
+        self.worker_a.close()
+        self.worker_b.close()
+        self.temp_dir.cleanup()
+    
+    def test_create_cache_backend(self):
+        """Test backend selection from configuration."""
+        assert create_cache_backend({}) is None
+        assert isinstance(self.worker_a._backend, SQLiteCacheBackend)
+        with pytest.raises(ValueError, match="Unknown cache backend"):
+            create_cache_backend({"backend": "redis"})
+    
+    def test_backend_file_owner_only(self):
+        """Test that the shared cache file is private and a file others can write to is refused."""
+        # Assert
+        path = self.test_config["cache"]["backend_path"]
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        
+        other_path = os.path.join(self.temp_dir.name, "open_cache.sqlite3")
+        with open(other_path, "wb"):
+            pass
+        os.chmod(other_path, 0o666)
+        with pytest.raises(PermissionError, match="writable by other users"):
+            SQLiteCacheBackend(other_path)
+    
+    def test_result_shared_between_workers(self):
+        """Test that a result cached by one worker is a hit for another."""
+        # Arrange
+        query = "SELECT * FROM orders WHERE location_id = :location_id"
+        params = {"location_id": 62}
+        data = [{"id": 1, "status": "completed"}]
+        
+        # Act
+        self.worker_a.set(query, params, data, True, 0.1)
+        hit, result = self.worker_b.get(query, params)
+        
+        # Assert - promoted into worker B's in-process cache
+        assert hit is True
+        assert result == data
+        assert self.worker_b.stats["backend_hits"] == 1
+        assert self.worker_b.get(query, params)[0] is True
+        assert self.worker_b.stats["backend_hits"] == 1
+    
+    def test_invalidation_stream(self):
+        """Test that invalidation by one worker evicts entries in the other."""
+        # Arrange
+        self.worker_a.set("SELECT * FROM orders", None, [{"id": 1}], True, 0.1)
+        self.worker_a.set("SELECT * FROM users", None, [{"id": 2}], True, 0.1)
+        assert self.worker_b.get("SELECT * FROM orders", None)[0] is True
+        
+        # Act
+        invalidated = self.worker_a.invalidate(table_name="orders")
+        
+        # Assert
+        assert invalidated == 1
+        assert self.worker_b.get("SELECT * FROM orders", None)[0] is False
+        assert self.worker_b.stats["remote_invalidations"] == 1
+        assert self.worker_b.get("SELECT * FROM users", None)[0] is True
+    
+    def test_expired_shared_entry_is_miss(self):
+        """Test that expired entries in the shared tier are not served."""
+        # Act
+        self.worker_a.set("SELECT * FROM orders", None, [{"id": 1}], True, 0.1, ttl=-1)
+        
+        # Assert
+        assert self.worker_b.get("SELECT * FROM orders", None)[0] is False
+
+    
+    def test_memory_hits_do_not_wait_for_backend(self):
+        """Test that an in-process hit is served while another thread waits on the shared tier."""
+        # Arrange
+        self.worker_b.set("SELECT * FROM users", None, [{"id": 2}], True, 0.1)
+        backend_get = self.worker_b._backend.get
+        in_backend, release = threading.Event(), threading.Event()
+        
+        def slow_get(key):
+            in_backend.set()
+            release.wait(5)
+            return backend_get(key)
+        
+        self.worker_a.set("SELECT * FROM orders", None, [{"id": 1}], True, 0.1)
+        
+        # Act
+        with patch.object(self.worker_b._backend, "get", side_effect=slow_get):
+            reader = threading.Thread(target=self.worker_b.get, args=("SELECT * FROM orders", None))
+            reader.start()
+            assert in_backend.wait(5)
+            memory_hit = self.worker_b.get("SELECT * FROM users", None)
+            served_during_lookup = not release.is_set() and reader.is_alive()
+            release.set()
+            reader.join(5)
+        
+        # Assert
+        assert served_during_lookup
+        assert memory_hit == (True, [{"id": 2}])
+        assert self.worker_b.stats["backend_hits"] == 1
+
 
 class TestEnhancedDataAccess(unittest.TestCase):
     """Tests for the EnhancedDataAccess class."""
@@ -561,6 +1011,73 @@ class TestEnhancedDataAccess(unittest.TestCase):
         assert result["success"] is True
         assert result["cached"] is False
     
+    @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
+    def test_execute_query_coalesces_concurrent_misses(self, mock_dcm_class):
+        """Test that identical concurrent cache misses share one DB execution."""
+        # Arrange - a slow query so that all callers overlap
+        mock_dcm_class.return_value = self.mock_db_manager
+        
+        def slow_query(**kwargs):
+            time.sleep(0.2)
+            return {
+                "success": True,
+                "data": [{"total_sales": 1250.0}],
+                "rowcount": 1,
+                "execution_time": 0.2,
+                "error": None
+            }
+        self.mock_db_manager.execute_query.side_effect = slow_query
+        data_access = EnhancedDataAccess(self.test_config)
+        
+        results = []
+        def run_query():
+            results.append(data_access.execute_query(
+                sql_query="SELECT SUM(total) AS total_sales FROM orders WHERE updated_at::date = CURRENT_DATE"
+            ))
+        
+        # Act
+        threads = [threading.Thread(target=run_query) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Assert
+        self.mock_db_manager.execute_query.assert_called_once()
+        assert all(r["success"] and r["data"] == [{"total_sales": 1250.0}] for r in results)
+        assert sum(r["coalesced"] for r in results) == 4
+        
+        # Each caller got its own rows
+        results[0]["data"][0]["total_sales"] = 0.0
+        results[1]["data"].clear()
+        assert all(r["data"] == [{"total_sales": 1250.0}] for r in results[2:])
+        assert len({id(r["data"][0]) for r in results[2:]}) == 3
+        
+        coalescing = data_access.get_performance_metrics()["coalescing"]
+        assert coalescing["executions"] == 1
+        assert coalescing["coalesced"] == 4
+        assert coalescing["in_flight"] == 0
+    
+    @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
+    @patch('services.data.enhanced_data_access.QueryCacheManager')
+    def test_execute_query_writes_not_coalesced(self, mock_qcm_class, mock_dcm_class):
+        """Test that non-SELECT statements always execute."""
+        # Arrange
+        mock_dcm_class.return_value = self.mock_db_manager
+        mock_qcm_class.return_value = self.mock_cache_manager
+        self.mock_db_manager.execute_query.return_value = {
+            "success": True, "data": None, "rowcount": 1, "execution_time": 0.1, "error": None
+        }
+        data_access = EnhancedDataAccess(self.test_config)
+        
+        # Act
+        for _ in range(2):
+            data_access.execute_query("UPDATE items SET disabled = TRUE WHERE id = 1")
+        
+        # Assert
+        assert self.mock_db_manager.execute_query.call_count == 2
+        self.mock_cache_manager.generate_cache_key.assert_not_called()
+    
     @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
     @patch('services.data.enhanced_data_access.QueryCacheManager')
     def test_query_to_dataframe(self, mock_qcm_class, mock_dcm_class):
@@ -596,6 +1113,54 @@ class TestEnhancedDataAccess(unittest.TestCase):
         assert metadata["success"] is True
         assert metadata["query_id"] == "q-12345"
     
+    @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
+    @patch('services.data.enhanced_data_access.QueryCacheManager')
+    def test_query_to_dataframe_cache_hit_skips_rows(self, mock_qcm_class, mock_dcm_class):
+        """Test that query_to_dataframe builds cache hits from the columnar data."""
+        # Arrange
+        rows = [{"id": i, "name": ["Burger", "Fries"][i % 2]} for i in range(100)]
+        cache_manager = QueryCacheManager({"cache": {"min_query_time": 0.01}})
+        cache_manager.set("SELECT * FROM test", None, rows, True, 0.1)
+        mock_dcm_class.return_value = self.mock_db_manager
+        mock_qcm_class.return_value = cache_manager
+        data_access = EnhancedDataAccess(self.test_config)
+        
+        # Act
+        with patch.object(ColumnarResult, "to_rows", side_effect=AssertionError("rows built")):
+            df, metadata = data_access.query_to_dataframe(sql_query="SELECT * FROM test")
+        
+        # Assert
+        assert metadata["cached"] is True
+        assert metadata["rowcount"] == 100
+        pd.testing.assert_frame_equal(df, pd.DataFrame(rows))
+        self.mock_db_manager.execute_query.assert_not_called()
+    
+    @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
+    @patch('services.data.enhanced_data_access.QueryCacheManager')
+    def test_query_to_dataframe_cache_hit_is_writable_copy(self, mock_qcm_class, mock_dcm_class):
+        """Test that changing a cache-hit frame does not change the next hit."""
+        # Arrange
+        frame = pd.DataFrame({
+            "price": [1.5, 2.5, 3.5],
+            "size": pd.Categorical(["S", "M", "L"], categories=["S", "M", "L"])
+        })
+        cache_manager = QueryCacheManager({"cache": {"min_query_time": 0.01}})
+        cache_manager.set("SELECT * FROM test", None, frame, True, 0.1)
+        mock_dcm_class.return_value = self.mock_db_manager
+        mock_qcm_class.return_value = cache_manager
+        data_access = EnhancedDataAccess(self.test_config)
+        
+        # Act
+        first, _ = data_access.query_to_dataframe(sql_query="SELECT * FROM test")
+        first.loc[0, "price"] = 99.0
+        first.loc[0, "size"] = "L"
+        second, metadata = data_access.query_to_dataframe(sql_query="SELECT * FROM test")
+        
+        # Assert
+        assert metadata["cached"] is True
+        assert first.loc[0, "price"] == 99.0
+        pd.testing.assert_frame_equal(second, frame)
+    
     @patch('services.data.enhanced_data_access.DatabaseConnectionManager')
     @patch('services.data.enhanced_data_access.QueryCacheManager')
     def test_transactions(self, mock_qcm_class, mock_dcm_class):
@@ -321,5 +321,141 @@ class TestFeedbackService(unittest.TestCase):
             self.assertEqual(retrieved["query_type"], "action_request")
 
 
+
+class TestSQLiteFeedbackStorage(unittest.TestCase):
+    """Tests for the indexed SQLite feedback storage."""
+    
+    def setUp(self):
+        """Set up the test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.feedback_service = FeedbackService({
+            "feedback_storage_type": "sqlite",
+            "feedback_storage_dir": self.temp_dir
+        })
+    
+    def tearDown(self):
+        """Clean up the test environment."""
+        self.feedback_service.feedback_store.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_default_storage_is_sqlite(self):
+        """Test that the indexed store is used when no storage type is configured."""
+        service = FeedbackService({"feedback_storage_dir": self.temp_dir})
+        self.assertEqual(service.storage_type, "sqlite")
+        self.assertEqual(service.feedback_store.path, os.path.join(self.temp_dir, "feedback.db"))
+    
+    def test_get_feedback_by_index(self):
+        """Test lookups by feedback ID, session, query and date range."""
+        now = datetime.utcnow()
+        ids = []
+        for i in range(6):
+            ids.append(self.feedback_service.submit_feedback(FeedbackModel(
+                session_id=f"session-{i % 2}",
+                query_id=f"query-{i}",
+                query_text=f"Query {i}",
+                feedback_type=FeedbackType.HELPFUL,
+                created_at=now - timedelta(days=i)
+            )))
+        
+        self.assertEqual(self.feedback_service.get_feedback(feedback_id=ids[3])[0].query_text, "Query 3")
+        self.assertEqual(
+            [f.query_text for f in self.feedback_service.get_feedback(session_id="session-0")],
+            ["Query 0", "Query 2", "Query 4"]
+        )
+        self.assertEqual(len(self.feedback_service.get_feedback(query_id="query-5")), 1)
+        self.assertEqual(
+            len(self.feedback_service.get_feedback(start_date=now - timedelta(days=2, hours=1))), 3
+        )
+        self.assertEqual(
+            [f.query_text for f in self.feedback_service.get_feedback(limit=2, offset=1)],
+            ["Query 1", "Query 2"]
+        )
+    
+    def test_incremental_statistics(self):
+        """Test that statistics match the stored feedback, including partial days."""
+        now = datetime.utcnow()
+        for i in range(4):
+            self.feedback_service.submit_feedback(FeedbackModel(
+                session_id="session-1",
+                query_text=f"Query {i}",
+                feedback_type=FeedbackType.HELPFUL,
+                rating=5,
+                original_intent="menu_query",
+                created_at=now
+            ))
+        self.feedback_service.submit_feedback(FeedbackModel(
+            session_id="session-2",
+            query_text="Old query",
+            feedback_type=FeedbackType.NOT_HELPFUL,
+            rating=1,
+            issue_category=IssueCategory.INCORRECT_DATA,
+            original_intent="order_history",
+            created_at=now - timedelta(days=3)
+        ))
+        
+        stats = self.feedback_service.get_statistics()
+        self.assertEqual(stats.total_count, 5)
+        self.assertEqual(stats.helpful_count, 4)
+        self.assertEqual(stats.not_helpful_count, 1)
+        self.assertAlmostEqual(stats.average_rating, 4.2)
+        self.assertEqual(stats.issue_distribution, {IssueCategory.INCORRECT_DATA: 1})
+        self.assertEqual(stats.top_query_intents[0], {"intent": "menu_query", "count": 4})
+        
+        # The old item falls outside the last day
+        day_stats = self.feedback_service.get_statistics(force_refresh=True, time_period="day")
+        self.assertEqual(day_stats.total_count, 4)
+        self.assertEqual(day_stats.not_helpful_count, 0)
+        self.assertAlmostEqual(day_stats.average_rating, 5.0)
+        
+        week_stats = self.feedback_service.get_statistics(force_refresh=True, time_period="week")
+        self.assertEqual(week_stats.total_count, 5)
+    
+    def test_store_and_get_response(self):
+        """Test storing and retrieving responses in the SQLite store."""
+        self.feedback_service.store_query_response(
+            session_id="session-1",
+            response_id="response-1",
+            query_text="Show me the menu",
+            query_type="menu",
+            response={"type": "data_response", "message": "Here is the menu"}
+        )
+        
+        retrieved = self.feedback_service.get_response("response-1")
+        self.assertEqual(retrieved["query_text"], "Show me the menu")
+        self.assertEqual(retrieved["response"]["message"], "Here is the menu")
+        self.assertIsNone(self.feedback_service.get_response("missing"))
+
+    
+    def test_file_storage_imported_on_first_open(self):
+        """Test that feedback saved by the file storage moves into a new SQLite store once."""
+        legacy_dir = os.path.join(self.temp_dir, "legacy")
+        file_service = FeedbackService({"feedback_storage_type": "file", "feedback_storage_dir": legacy_dir})
+        for i in range(3):
+            file_service.submit_feedback(FeedbackModel(
+                session_id="session-1",
+                query_text=f"Query {i}",
+                feedback_type=FeedbackType.HELPFUL,
+                rating=4
+            ))
+        file_service.store_query_response(
+            session_id="session-1",
+            response_id="response-1",
+            query_text="Show me the menu",
+            query_type="menu",
+            response={"type": "data_response", "message": "Here is the menu"}
+        )
+        with open(os.path.join(legacy_dir, "broken.json"), "w") as f:
+            f.write("{not json")
+        
+        for _ in range(2):
+            service = FeedbackService({"feedback_storage_type": "sqlite", "feedback_storage_dir": legacy_dir})
+            stats = service.get_statistics(force_refresh=True)
+            self.assertEqual(stats.total_count, 3)
+            self.assertAlmostEqual(stats.average_rating, 4.0)
+            self.assertEqual(len(service.get_feedback(session_id="session-1")), 3)
+            self.assertEqual(service.get_response("response-1")["query_text"], "Show me the menu")
+            service.feedback_store.close()
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
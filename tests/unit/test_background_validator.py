@@ -0,0 +1,55 @@
+"""
+Unit tests for background response validation.
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.validation.background_validator import BackgroundValidator
+
+
+@pytest.fixture
+def background_validator():
+    """Fixture for a background validator with one worker."""
+    runner = BackgroundValidator(max_workers=1, max_results=2)
+    yield runner
+    runner.shutdown(wait=True)
+
+
+class TestBackgroundValidator:
+    """Tests for BackgroundValidator."""
+
+    def test_result_attached_by_query_id(self, background_validator):
+        """Test that results are pending until done, then found by query ID and sent to listeners."""
+        release = threading.Event()
+        validator = MagicMock()
+        validator.validate_response.side_effect = lambda **kwargs: release.wait(1) and {"validation_status": True}
+        received = []
+        background_validator.add_listener(lambda query_id, record: received.append(query_id))
+
+        background_validator.submit("q1", validator, "SELECT 1", [{"total": 1}], "Total is 1")
+        assert background_validator.get_result("q1")["status"] == "pending"
+
+        release.set()
+        record = background_validator.get_result("q1", timeout=2)
+        assert record["status"] == "completed"
+        assert record["result"] == {"validation_status": True}
+        assert received == ["q1"]
+        assert background_validator.pending_count() == 0
+        validator.validate_response.assert_called_once_with(
+            sql_query="SELECT 1", sql_results=[{"total": 1}], response_text="Total is 1"
+        )
+
+    def test_errors_recorded_and_results_bounded(self, background_validator):
+        """Test that a failing validation is recorded and old results are dropped."""
+        validator = MagicMock()
+        validator.validate_response.side_effect = RuntimeError("database gone")
+
+        futures = [background_validator.submit(f"q{i}", validator, "SELECT 1", [{}], "") for i in range(3)]
+        for future in futures:
+            future.result(timeout=2)
+
+        assert background_validator.get_result("q2")["error"] == "database gone"
+        assert background_validator.get_result("q0") is None
+        assert background_validator.stats == {"submitted": 3, "completed": 0, "failed": 3}
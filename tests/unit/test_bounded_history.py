@@ -0,0 +1,85 @@
+"""
+Unit tests for the bounded history stores.
+"""
+import pytest
+
+from services.utils.bounded_history import BoundedHistory, BoundedMapping
+
+
+class TestBoundedHistory:
+    """Tests for the list-like ring buffer."""
+
+    def test_keeps_most_recent_items(self):
+        """Test that only the last maxlen items stay in memory."""
+        history = BoundedHistory(maxlen=3)
+        for i in range(10):
+            history.append(i)
+
+        assert len(history) == 3
+        assert history == [7, 8, 9]
+        assert history[-1] == 9
+        assert history[-2:] == [8, 9]
+        assert 8 in history and 2 not in history
+
+    def test_list_operations(self):
+        """Test the list operations used by the conversation context."""
+        history = BoundedHistory(maxlen=5, items=["a", "b", "c"])
+        assert history.pop() == "c"
+        history.extend(["d", "e"])
+        assert [i for i, _ in enumerate(history)] == [0, 1, 2, 3]
+        del history[1:3]
+        assert history.to_list() == ["a", "e"]
+        assert history != ["a"]
+
+    def test_spills_evicted_items(self, tmp_path):
+        """Test that evicted items are written to disk and can be read back."""
+        spill_path = str(tmp_path / "spill" / "history.jsonl")
+        history = BoundedHistory(maxlen=2, spill_path=spill_path)
+        for i in range(5):
+            history.append({"turn": i})
+
+        assert history.spilled_count == 3
+        assert history.to_list() == [{"turn": 3}, {"turn": 4}]
+        assert [item["turn"] for item in history.iter_all()] == [0, 1, 2, 3, 4]
+
+
+class TestBoundedMapping:
+    """Tests for the dict-like LRU store."""
+
+    def test_evicts_oldest_entries(self):
+        """Test that the mapping never holds more than maxlen entries."""
+        mapping = BoundedMapping(maxlen=2)
+        mapping["a"] = 1
+        mapping["b"] = 2
+        mapping["c"] = 3
+
+        assert len(mapping) == 2
+        assert "a" not in mapping
+        assert mapping.get("a") is None
+        assert mapping["c"] == 3
+
+    def test_touched_entries_evicted_last(self):
+        """Test that touching an entry makes it the most recently used."""
+        mapping = BoundedMapping(maxlen=2)
+        mapping["a"] = 1
+        mapping["b"] = 2
+
+        assert mapping.touch("a") is True
+        assert mapping.touch("missing") is False
+        mapping["c"] = 3
+
+        assert list(mapping) == ["a", "c"]
+
+    def test_spilled_entries_still_found(self, tmp_path):
+        """Test that entries evicted to disk are still returned by lookups."""
+        mapping = BoundedMapping(maxlen=2, spill_path=str(tmp_path / "responses"))
+        for i in range(5):
+            mapping[f"r{i}"] = {"query": f"query {i}"}
+
+        assert len(mapping) == 2
+        assert "r0" in mapping
+        assert mapping["r0"] == {"query": "query 0"}
+        del mapping["r0"]
+        with pytest.raises(KeyError):
+            mapping["r0"]
+        mapping.close()
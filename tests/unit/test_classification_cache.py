@@ -0,0 +1,139 @@
+"""
+Unit tests for the persistent classification cache.
+"""
+import time
+from unittest.mock import MagicMock
+
+from services.classification.classification_cache import ClassificationCache, normalize_query
+from services.classification.classifier import ClassificationService
+
+
+def _result(query_type="order_history", confidence=0.9, time_period=None):
+    """Create a classification result."""
+    result = {"query_type": query_type, "confidence": confidence, "parameters": {}}
+    if time_period:
+        result["parameters"]["time_period"] = time_period
+        result["time_period_clause"] = f"WHERE updated_at::date = '{time_period}'"
+    return result
+
+
+class TestNormalizeQuery:
+    """Tests for query normalization."""
+
+    def test_stopwords_and_dates(self):
+        """Test that phrasing differences and date expressions normalize away."""
+        assert normalize_query("Show me yesterday's orders")[0] == normalize_query("show yesterday's orders")[0]
+        assert normalize_query("Orders on 2/21/2025?")[0] == normalize_query("orders on Feb 3, 2025")[0]
+        assert normalize_query("orders last week") == ("orders _date_", ("last week",))
+
+    def test_words_that_look_like_months(self):
+        """Test that 'may' is only a date when followed by a number."""
+        assert normalize_query("May I see the menu")[1] == ()
+        assert normalize_query("sales on may 3")[1] == ("may 3",)
+
+
+class TestClassificationCache:
+    """Tests for ClassificationCache."""
+
+    def test_normalized_hit_keeps_same_dates(self):
+        """Test that an equivalent query reuses the whole classification."""
+        cache = ClassificationCache()
+        cache.put("Show me yesterday's orders", _result(time_period="2025-02-21"))
+
+        result = cache.get("show yesterday's orders")
+
+        assert result["query_type"] == "order_history"
+        assert result["parameters"]["time_period"] == "2025-02-21"
+        assert result["query"] == "show yesterday's orders"
+        assert result["from_cache"] is True
+        assert result["cache_match"] == "normalized"
+
+    def test_other_dates_drop_time_period(self):
+        """Test that a query naming other dates reuses only the date-independent fields."""
+        cache = ClassificationCache()
+        cache.put("orders on 2/21/2025", _result(time_period="2025-02-21"))
+
+        result = cache.get("orders on 3/1/2025")
+
+        assert result["query_type"] == "order_history"
+        assert "time_period" not in result["parameters"]
+        assert "time_period_clause" not in result
+
+    def test_similar_query_above_threshold(self):
+        """Test nearest-neighbour lookup and its confidence and similarity limits."""
+        cache = ClassificationCache(similarity_threshold=0.8)
+        cache.put("top selling menu items this month", _result("popular_items"))
+        cache.put("customer feedback ratings", _result("feedback", confidence=0.5))
+
+        assert cache.get("top selling menu items")["cache_match"] == "similar"
+        assert cache.get("customer feedback ratings summary") is None  # low confidence
+        assert cache.get("update burger price") is None
+        assert cache.stats == {"hits": 0, "similar_hits": 1, "misses": 2}
+
+    def test_similar_query_reuses_only_query_type(self):
+        """Test that a similar query gets the type but not the parameters of its neighbour."""
+        cache = ClassificationCache(similarity_threshold=0.5)
+        cached = _result("popular_items")
+        cached["parameters"] = {"item_name": "Burger", "limit": 5}
+        cache.put("top 5 selling burger items", cached)
+        cache.put("update burger price to 10", {
+            "query_type": "action",
+            "confidence": 0.95,
+            "parameters": {"action": "update_price", "entities": ["Burger"], "values": [10]}
+        })
+
+        similar = cache.get("top selling burger items")
+        assert similar["cache_match"] == "similar"
+        assert similar["query_type"] == "popular_items"
+        assert similar["parameters"] == {}
+
+        # Actions only come from an equivalent query, never a similar one
+        assert cache.get("update burger price to 12") is None
+        assert cache.get("Update the burger price to 10")["parameters"]["action"] == "update_price"
+
+    def test_ttl_and_bound(self):
+        """Test that entries expire and the least recently used are evicted."""
+        cache = ClassificationCache(max_entries=2, ttl_seconds=0.05, similarity_threshold=1.0)
+        cache.put("orders", _result())
+        time.sleep(0.1)
+        assert cache.get("orders") is None
+
+        cache = ClassificationCache(max_entries=2, similarity_threshold=1.0)
+        cache.put("orders", _result())
+        cache.put("menu items", _result("menu_inquiry"))
+        cache.get("orders")
+        cache.put("revenue", _result("sales"))
+
+        assert len(cache) == 2
+        assert "menu items" not in cache
+        assert "orders" in cache
+
+    def test_persisted_across_instances(self, tmp_path):
+        """Test that entries survive a restart and clear() removes them from disk."""
+        path = str(tmp_path / "classification.db")
+        cache = ClassificationCache(path=path)
+        cache.put("show me all orders", _result())
+        cache.close()
+
+        reopened = ClassificationCache(path=path)
+        assert reopened.get("all orders")["query_type"] == "order_history"
+
+        reopened.clear()
+        reopened.close()
+        assert len(ClassificationCache(path=path)) == 0
+
+    def test_service_skips_api_for_equivalent_query(self):
+        """Test that the classification service calls the API once for equivalent queries."""
+        client = MagicMock()
+        client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content='{"query_type": "order_history", "confidence": 0.9, "parameters": {}}'))
+        ]
+        service = ClassificationService(config={}, ai_client=client)
+        service.model = "test-model"
+
+        first = service.classify_query("Show me yesterday's orders")
+        second = service.classify_query("show yesterday's orders please")
+
+        assert first["query_type"] == second["query_type"] == "order_history"
+        assert second["from_cache"] is True
+        assert client.chat.completions.create.call_count == 1
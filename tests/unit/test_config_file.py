@@ -0,0 +1,36 @@
+"""
+Unit tests for the settings in config/config.yaml.
+"""
+import os
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "config", "config.yaml")
+
+
+class _UniqueKeyLoader(yaml.SafeLoader):
+    """SafeLoader that rejects duplicate keys instead of keeping the last one."""
+
+    def construct_mapping(self, node, deep=False):
+        keys = [self.construct_object(key, deep=deep) for key, _ in node.value]
+        duplicates = {key for key in keys if keys.count(key) > 1}
+        assert not duplicates, f"Duplicate keys at line {node.start_mark.line + 1}: {duplicates}"
+        return super().construct_mapping(node, deep=deep)
+
+
+def _load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.load(f, Loader=_UniqueKeyLoader)
+
+
+def test_sql_validation_settings_take_effect():
+    """Test that the SQL validation mode and workers are in the services block that is loaded."""
+    sql_validation = _load_config()["services"]["validation"]["sql_validation"]
+
+    assert sql_validation["mode"] == "sync"
+    assert sql_validation["async_workers"] == 2
+
+
+def test_prompt_result_tokens_take_effect():
+    """Test that the prompt result token budget is in the services block that is loaded."""
+    assert _load_config()["services"]["response"]["prompt_result_tokens"] == 2000
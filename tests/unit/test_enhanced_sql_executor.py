@@ -170,21 +170,68 @@ class TestEnhancedSQLExecutor:
     
     def test_execute_with_timeout_exception(self, sql_executor):
         """Test _execute_with_timeout with an exception in the worker thread."""
-        # Mock queue.Queue.get to simulate getting an exception from the worker thread
-        with patch("queue.Queue.get") as mock_get:
-            mock_get.return_value = ValueError("Test error")
-            
+        # Exceptions raised on the pooled worker propagate to the caller
+        with patch("pandas.read_sql", side_effect=ValueError("Test error")):
             with pytest.raises(ValueError, match="Test error"):
                 sql_executor._execute_with_timeout("SELECT * FROM test", None, 10)
     
     def test_execute_with_timeout_timeout(self, sql_executor):
         """Test _execute_with_timeout with a timeout."""
-        # Mock queue.Queue.get to raise Empty exception (timeout)
-        with patch("queue.Queue.get") as mock_get:
-            mock_get.side_effect = sql_executor._execute_with_timeout.__globals__["queue"].Empty
-            
+        # Simulate a query that runs longer than the timeout
+        with patch("pandas.read_sql", side_effect=lambda *args, **kwargs: time.sleep(0.5)):
             with pytest.raises(TimeoutError):
-                sql_executor._execute_with_timeout("SELECT * FROM test", None, 10)
+                sql_executor._execute_with_timeout("SELECT * FROM test", None, 0.1)
+        
+        stats = sql_executor._query_executor.get_stats()
+        assert stats["timeouts"] == 1
+    
+    def test_execute_with_timeout_futures_timeout(self, sql_executor):
+        """Test that the futures TimeoutError of Python < 3.11 is treated as a timeout."""
+        class LegacyFutureTimeout(Exception):
+            """Stands in for concurrent.futures.TimeoutError before it aliased the builtin."""
+        
+        future = MagicMock()
+        future.result.side_effect = LegacyFutureTimeout()
+        future.done.return_value = False
+        future.cancel.return_value = True
+        query_executor = sql_executor._query_executor
+        
+        with patch("services.utils.query_executor.FutureTimeoutError", LegacyFutureTimeout), \
+                patch.object(query_executor._executor, "submit", return_value=future):
+            with pytest.raises(TimeoutError):
+                sql_executor._execute_with_timeout("SELECT * FROM test", None, 0.1)
+        
+        stats = query_executor.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["cancelled_queued"] == 1
+    
+    def test_execute_with_timeout_cancels_running_query(self, tmp_path):
+        """Test that a timed out query is cancelled and its connection returned to the pool."""
+        config = {
+            "database": {
+                "connection_string": f"sqlite:///{tmp_path / 'timeout.db'}",
+                "pool_size": 1,
+                "max_overflow": 0
+            }
+        }
+        executor = SQLExecutor(config)
+        endless_query = (
+            "SELECT count(*) FROM (WITH RECURSIVE c(x) AS "
+            "(SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c)"
+        )
+        
+        start = time.time()
+        with pytest.raises(TimeoutError):
+            executor._execute_with_timeout(endless_query, None, 0.2)
+        assert time.time() - start < 2
+        
+        # The single pooled connection and worker are free for the next query
+        result = executor._execute_with_timeout("SELECT 1 AS value", None, 5)
+        assert result["value"].tolist() == [1]
+        
+        stats = executor._query_executor.get_stats()
+        assert stats["max_workers"] == 1
+        assert stats["cancelled_running"] == 1
     
     def test_record_query_performance(self, sql_executor):
         """Test recording query performance metrics."""
@@ -130,6 +130,49 @@ class TestEnhancedSQLGenerator:
         # We can't test if mock_rules_service was called since it might be using a different approach
         # Instead, just verify that prompt building works and produces something with expected content
 
+    def test_build_prompt_reuses_static_part(self, sql_generator):
+        """Test that the examples section is formatted once per example set."""
+        examples = {"examples": [{"query": "Show me all desserts", "sql": "SELECT * FROM menu_items"}]}
+
+        with patch.object(sql_generator, '_format_examples', wraps=sql_generator._format_examples) as format_examples:
+            first = sql_generator._build_prompt("Show me all appetizers", examples, {})
+            second = sql_generator._build_prompt("Show me all drinks", examples, {})
+
+        format_examples.assert_called_once()
+        assert "Show me all desserts" in first and "Show me all desserts" in second
+        assert "Show me all drinks" in second and "Show me all appetizers" not in second
+
+    def test_examples_cached_until_file_changes(self, sql_generator, mock_rules_service, tmp_path):
+        """Test that example files are read once and reloaded after modification."""
+        from services.sql_generator import sql_example_loader
+        import json
+        import os
+
+        examples_file = tmp_path / "menu_inquiry" / "examples.json"
+        examples_file.parent.mkdir()
+        examples_file.write_text(json.dumps([{"query": "What is on the menu?", "sql": "SELECT 1"}]))
+        sql_generator.example_loader = sql_example_loader.SQLExampleLoader(
+            {"services": {"sql_generator": {"examples_dir": str(tmp_path)}}}
+        )
+        mock_rules_service.get_sql_examples.return_value = []
+
+        with patch.object(ServiceRegistry, "get_service", return_value=mock_rules_service) as get_service, \
+             patch.object(sql_example_loader, "_read_examples_file",
+                          wraps=sql_example_loader._read_examples_file) as read_file:
+            first = sql_generator._get_sql_examples("menu_inquiry")
+            second = sql_generator._get_sql_examples("menu_inquiry")
+            assert read_file.call_count == 1
+            assert get_service.call_count == 1
+
+            examples_file.write_text(json.dumps([{"query": "What drinks are there?", "sql": "SELECT 2"}]))
+            stat = examples_file.stat()
+            os.utime(examples_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            third = sql_generator._get_sql_examples("menu_inquiry")
+
+        assert first == second == {"examples": [{"query": "What is on the menu?", "sql": "SELECT 1"}]}
+        assert third == {"examples": [{"query": "What drinks are there?", "sql": "SELECT 2"}]}
+        assert read_file.call_count == 2
+
     def test_generate_sql_success(self, sql_generator, mock_genai):
         """Test successful SQL generation."""
         # Set up mock for generate_content
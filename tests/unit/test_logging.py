@@ -0,0 +1,89 @@
+"""
+Unit tests for the async logging setup.
+"""
+import json
+import logging
+import threading
+
+import pytest
+
+from services.utils.logging import SamplingFilter, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    """Restore the root logger's handlers and level after the test."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_async_json_lines(tmp_path, restore_root_logger):
+    """Test that records are written as JSON lines by the listener thread."""
+    log_file = str(tmp_path / "app.log")
+    setup_logging(log_level="DEBUG", log_file=log_file, async_mode=True)
+
+    logger = logging.getLogger("services.test")
+    context = {"query": "orders"}
+    logger.info("context: %s", context, extra={"query_id": "q-1"})
+    context["query"] = "changed"
+    logger.debug(b"\x00\x01 audio bytes")
+    shutdown_logging()
+
+    records = [r for r in _read_lines(log_file) if r["logger"] == "services.test"]
+    assert len(records) == 1
+    assert records[0]["message"] == "context: {'query': 'orders'}"
+    assert records[0]["query_id"] == "q-1"
+    assert records[0]["level"] == "INFO"
+    assert records[0]["thread"] == threading.current_thread().name
+
+
+def test_sampling_keeps_warnings(tmp_path, restore_root_logger):
+    """Test per-logger sampling by name prefix."""
+    log_file = str(tmp_path / "app.log")
+    setup_logging(log_file=log_file, async_mode=True, sample_rates={"services.noisy": 0.25, "services.quiet": 0})
+
+    for i in range(8):
+        logging.getLogger("services.noisy.child").info(f"noisy {i}")
+        logging.getLogger("services.quiet").info(f"quiet {i}")
+    logging.getLogger("services.quiet").warning("quiet warning")
+    logging.getLogger("services.other").info("other")
+    shutdown_logging()
+
+    messages = [r["message"] for r in _read_lines(log_file)]
+    assert [m for m in messages if m.startswith("noisy")] == ["noisy 0", "noisy 4"]
+    assert [m for m in messages if m.startswith("quiet")] == ["quiet warning"]
+    assert "other" in messages
+
+
+def test_sampling_in_sync_mode(tmp_path, restore_root_logger, capsys):
+    """Test that the console and the file each keep every Nth record when logging synchronously."""
+    log_file = str(tmp_path / "app.log")
+    setup_logging(log_file=log_file, sample_rates={"services.noisy": 0.5})
+
+    for i in range(6):
+        logging.getLogger("services.noisy").info(f"noisy {i}")
+
+    with open(log_file) as f:
+        file_messages = [line.rsplit(" - ", 1)[-1].strip() for line in f if "services.noisy" in line]
+    console_messages = [line.rsplit(" - ", 1)[-1] for line in capsys.readouterr().out.splitlines()
+                        if "services.noisy" in line]
+    assert file_messages == ["noisy 0", "noisy 2", "noisy 4"]
+    assert console_messages == ["noisy 0", "noisy 2", "noisy 4"]
+
+
+def test_sampling_filter_interval():
+    """Test that the longest matching prefix decides the rate."""
+    sampling = SamplingFilter({"a": 0.5, "a.b": 1.0})
+
+    assert sampling._interval("a.c") == 2
+    assert sampling._interval("a.b.c") == 1
+    assert sampling._interval("ab") == 1
@@ -0,0 +1,34 @@
+"""
+Unit tests for the one-pass multi-pattern matcher.
+"""
+import random
+
+from services.validation.multi_pattern import MultiPatternMatcher
+
+
+class TestMultiPatternMatcher:
+    """Tests for the Aho-Corasick matcher."""
+
+    def test_finds_overlapping_and_nested_patterns(self):
+        """Test that patterns sharing prefixes and suffixes are all found."""
+        matcher = MultiPatternMatcher(["he", "she", "his", "hers", "$1,000", "1,000.50"])
+
+        assert matcher.find_all("ushers paid $1,000.50") == {"he", "she", "hers", "$1,000", "1,000.50"}
+        assert matcher.find_all("nothing here") == {"he"}
+        assert matcher.find_all("") == set()
+
+    def test_empty_patterns_are_ignored(self):
+        """Test that an empty pattern set or empty strings match nothing."""
+        assert MultiPatternMatcher([]).find_all("anything") == set()
+        assert MultiPatternMatcher(["", "ab"]).find_all("xaby") == {"ab"}
+
+    def test_matches_substring_semantics(self):
+        """Test that results agree with `pattern in text` for random inputs."""
+        rng = random.Random(7)
+        alphabet = "ab$1,."
+        for _ in range(200):
+            patterns = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(10)}
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+            expected = {p for p in patterns if p in text}
+            assert MultiPatternMatcher(patterns).find_all(text) == expected
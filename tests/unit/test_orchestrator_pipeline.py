@@ -0,0 +1,467 @@
+"""
+Unit tests for the staged query pipeline in OrchestratorService.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from services.classification.tiered_classifier import TieredClassifier
+from services.orchestrator.orchestrator import OrchestratorService
+from services.orchestrator.pipeline import StagePipeline, SentenceChannel
+from services.response.tts_pipeline import FakeTTSBackend
+from services.utils.service_registry import ServiceRegistry
+
+
+@pytest.fixture
+def executor():
+    """Fixture for a small stage executor."""
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+class TestStagePipeline:
+    """Tests for dependency-driven stage scheduling."""
+
+    def test_dependencies_and_timers(self, executor):
+        """Test that stages get their dependency results and record timings."""
+        timers = {}
+        pipeline = StagePipeline(executor, timers)
+
+        pipeline.add("a", lambda: 2)
+        pipeline.add("b", lambda: 3)
+        pipeline.add("sum", lambda a, b: a + b, depends_on=["a", "b"], timer="math")
+
+        assert pipeline.result("sum", timeout=1) == 5
+        assert set(timers) == {"a", "b", "math"}
+
+    def test_independent_stages_overlap(self, executor):
+        """Test that stages without dependencies on each other run concurrently."""
+        pipeline = StagePipeline(executor, {})
+        barrier = threading.Barrier(2, timeout=1)
+
+        # Each stage only completes if the other one is running at the same time
+        pipeline.add("left", lambda: barrier.wait())
+        pipeline.add("right", lambda: barrier.wait())
+
+        pipeline.result("left", timeout=2)
+        pipeline.result("right", timeout=2)
+
+    def test_failed_dependency_propagates(self, executor):
+        """Test that a stage fails without running when a dependency fails."""
+        pipeline = StagePipeline(executor, {})
+        downstream = MagicMock()
+
+        def fail():
+            raise ValueError("boom")
+
+        pipeline.add("upstream", fail)
+        pipeline.add("downstream", downstream, depends_on=["upstream"])
+
+        with pytest.raises(ValueError, match="boom"):
+            pipeline.result("downstream", timeout=1)
+        downstream.assert_not_called()
+
+
+class TestSentenceChannel:
+    """Tests for handing sentences from the text producer to TTS."""
+
+    def test_sentences_from_chunks(self):
+        """Test splitting streamed text into complete sentences."""
+        channel = SentenceChannel()
+        channel.feed("You sold 12 burgers for $4.50 each. Fri")
+        channel.feed("es were second! What else")
+        channel.close()
+
+        assert list(channel) == [
+            "You sold 12 burgers for $4.50 each.",
+            "Fries were second!",
+            "What else"
+        ]
+
+    def test_first_sentence_available_before_close(self):
+        """Test that the consumer gets the first sentence while text is still produced."""
+        channel = SentenceChannel(max_sentences=2)
+        received = []
+
+        consumer = threading.Thread(target=lambda: received.extend(channel))
+        consumer.start()
+
+        channel.feed("First sentence. ")
+        deadline = time.time() + 1
+        while not received and time.time() < deadline:
+            time.sleep(0.01)
+        assert received == ["First sentence."]
+
+        channel.feed("Second sentence. Third sentence.")
+        consumer.join(timeout=1)
+        assert received == ["First sentence.", "Second sentence."]
+
+
+class TestOrchestratorPipeline:
+    """Tests for the staged process_query flow."""
+
+    def setup_method(self):
+        """Setup method that runs before each test."""
+        ServiceRegistry._services = {}
+        ServiceRegistry._config = None
+        self._patchers = []
+
+    def teardown_method(self):
+        """Teardown method that runs after each test."""
+        for patcher in self._patchers:
+            patcher.stop()
+        ServiceRegistry._services = {}
+
+    def _create_service(self, classifier, rules, sql_generator, executor, response,
+                        validator=None, validation_mode="sync"):
+        """Create an OrchestratorService wired to mock services."""
+        services = {
+            "classification": classifier,
+            "rules": rules,
+            "sql_generator": sql_generator,
+            "execution": executor,
+            "response": response,
+            "sql_validation": validator
+        }
+        # The registry stays mocked for the validation lookups in process_query
+        patcher = patch('services.orchestrator.orchestrator.ServiceRegistry')
+        self._patchers.append(patcher)
+        mock_registry = patcher.start()
+        mock_registry.get_service.side_effect = lambda name: services.get(name)
+        mock_registry.service_exists.side_effect = lambda name: services.get(name) is not None
+        with patch.object(OrchestratorService, 'health_check', return_value=None), \
+             patch.object(OrchestratorService, 'initialize_elevenlabs_tts', return_value=False):
+            service = OrchestratorService({"services": {
+                "response": {"max_verbal_sentences": 2},
+                "tts": {"backend": "fake", "cache_enabled": False},
+                "validation": {"sql_validation": {"mode": validation_mode}}
+            }})
+        return service
+
+    def _mock_services(self, category="menu_inquiry"):
+        """Create mock services for a simple data query."""
+        classifier = MagicMock()
+        classifier.classify.return_value = {"category": category, "is_followup": False}
+        rules = MagicMock()
+        rules.get_rules.return_value = {"response_rules": {}}
+        sql_generator = MagicMock()
+        sql_generator.generate.return_value = {"sql": "SELECT name FROM items"}
+        executor = MagicMock()
+        executor.execute.return_value = {"success": True, "results": [{"name": "Burger"}]}
+        response = MagicMock()
+        response.generate.return_value = {
+            "response": "Burgers are on the menu. So are fries. And shakes.",
+            "response_model": "test-model"
+        }
+        return classifier, rules, sql_generator, executor, response
+
+    def test_rules_prefetched_during_classification(self):
+        """Test that rules for the predicted category load while classification runs."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        rules_loaded = threading.Event()
+        rules.get_rules.side_effect = lambda category, query: rules_loaded.set() or {"response_rules": {}}
+
+        def classify(query):
+            # Rules are requested before classification has returned
+            assert rules_loaded.wait(timeout=1)
+            return {"category": "menu_inquiry", "is_followup": False}
+
+        classifier.classify.side_effect = classify
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+
+        result = service.process_query("What is on the menu?", {})
+
+        assert result["category"] == "menu_inquiry"
+        rules.get_rules.assert_called_once_with("menu_inquiry", "What is on the menu?")
+        sql_generator.prefetch_examples.assert_called_once_with("menu_inquiry")
+        assert result["timers"]["rule_processing"] >= 0
+        assert result["timers"]["rules_prefetch"] > 0
+
+    def test_misprediction_loads_actual_category(self):
+        """Test that a wrong category prediction falls back to the classified category."""
+        classifier, rules, sql_generator, executor, response = self._mock_services(category="popular_items")
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+
+        service.process_query("What is on the menu?", {})
+
+        rules.get_rules.assert_any_call("popular_items", "What is on the menu?")
+        sql_generator.prefetch_examples.assert_any_call("popular_items")
+
+    def test_tts_speaks_response_sentences(self):
+        """Test that verbal TTS synthesizes the first response sentences."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        service.tts_pipeline.backend = backend = FakeTTSBackend()
+
+        result = service.process_query("What is on the menu?", {"enable_verbal": True})
+
+        assert backend.calls == ["Burgers are on the menu.", "So are fries."]
+        assert b"Burgers are on the menu." in result["verbal_audio"]
+        assert result["verbal_audio"].index(b"Burgers") < result["verbal_audio"].index(b"So are fries.")
+        assert result["has_verbal"] is True
+
+    def test_process_query_stream(self):
+        """Test that response chunks are yielded before the final result."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+
+        def generate(query, category, rules, results, context, on_chunk=None):
+            for text in ["Burgers are ", "on the menu."]:
+                on_chunk(text)
+            return {"response": "Burgers are on the menu.", "response_model": "test-model"}
+
+        response.generate.side_effect = generate
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+
+        events = list(service.process_query_stream("What is on the menu?", {}))
+
+        assert [e["text"] for e in events if e["type"] == "chunk"] == ["Burgers are ", "on the menu."]
+        assert events[-1]["type"] == "result"
+        assert events[-1]["result"]["response"] == "Burgers are on the menu."
+
+    def test_tts_starts_while_response_streams(self):
+        """Test that the first sentence is spoken before the text response finishes."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        first_spoken = threading.Event()
+
+        def generate(query, category, rules, results, context, on_chunk=None):
+            on_chunk("Burgers are on the menu. ")
+            # TTS picks up the first sentence while generation is still running
+            assert first_spoken.wait(timeout=1)
+            on_chunk("So are fries.")
+            return {"response": "Burgers are on the menu. So are fries.", "response_model": "test-model"}
+
+        class SignallingBackend(FakeTTSBackend):
+            def synthesize(self, text, voice_id, model):
+                first_spoken.set()
+                return super().synthesize(text, voice_id, model)
+
+        response.generate.side_effect = generate
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        service.tts_pipeline.backend = backend = SignallingBackend()
+
+        result = service.process_query("What is on the menu?", {"enable_verbal": True})
+
+        assert backend.calls == ["Burgers are on the menu.", "So are fries."]
+        assert result["has_verbal"] is True
+
+    def test_tts_pipeline_shared_with_response_generator(self):
+        """Test that the response generator reuses the orchestrator's TTS pipeline."""
+        from services.orchestrator import orchestrator as orchestrator_module
+        from services.response.response_generator import ResponseGenerator
+
+        service = self._create_service(*self._mock_services())
+        factories = {call.args[0]: call.args[1] for call in orchestrator_module.ServiceRegistry.register.call_args_list}
+
+        # The registry is mocked for the orchestrator; register the factory for real
+        ServiceRegistry.register("tts_pipeline", factories["tts_pipeline"])
+        with patch("services.response.response_generator.OpenAI"):
+            generator = ResponseGenerator({"services": {"tts": {"backend": "fake", "cache_enabled": False}}})
+
+        assert generator.tts_pipeline is service.tts_pipeline
+
+    def test_tts_runs_on_its_own_workers(self):
+        """Test that the TTS consumer does not hold a shared pipeline worker."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        original = service._synthesize_sentences
+        threads = []
+
+        def synthesize(sentences, persona=None):
+            threads.append(threading.current_thread().name)
+            return original(sentences, persona)
+
+        service._synthesize_sentences = synthesize
+        result = service.process_query("What is on the menu?", {"enable_verbal": True})
+
+        assert result["has_verbal"] is True
+        assert len(threads) == 1 and threads[0].startswith("query-tts")
+
+    def test_unaccounted_time_excludes_overlapped_stages(self):
+        """Test that slow TTS overlapping the response does not make the unaccounted time negative."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        original = service._synthesize_sentences
+
+        def synthesize(sentences, persona=None):
+            time.sleep(0.2)
+            return original(sentences, persona)
+
+        service._synthesize_sentences = synthesize
+        result = service.process_query("What is on the menu?", {"enable_verbal": True})
+
+        timers = result["timers"]
+        assert timers["tts_generation"] >= 0.2
+        assert timers["other"] >= 0.0
+        assert timers["other"] < timers["total_time"]
+
+    def _validator(self, should_block=False, delay=0.0):
+        """Create a fake SQL validation service."""
+        validator = MagicMock()
+        validator.should_block_responses = should_block
+
+        def validate_response(sql_query, sql_results, response_text):
+            time.sleep(delay)
+            return {
+                "validation_status": False,
+                "should_block_response": should_block,
+                "detailed_feedback": "Burger price missing"
+            }
+
+        validator.validate_response.side_effect = validate_response
+        return validator
+
+    def test_response_validated_once(self):
+        """Test that the response generator leaves validation to the orchestrator."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        validator = self._validator()
+        service = self._create_service(classifier, rules, sql_generator, executor, response, validator)
+
+        result = service.process_query("What is on the menu?", {})
+
+        assert response.generate.call_args[0][4]["skip_validation"] is True
+        validator.validate_response.assert_called_once()
+        assert result["validation_feedback"] == "Burger price missing"
+        assert result["validation_pending"] is False
+
+    def test_async_validation_off_critical_path(self):
+        """Test that async mode returns before validation finishes and attaches it by query_id."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        validator = self._validator(delay=0.3)
+        service = self._create_service(classifier, rules, sql_generator, executor, response,
+                                       validator, validation_mode="async")
+
+        result = service.process_query("What is on the menu?", {})
+
+        assert result["validation_pending"] is True
+        assert result["timers"]["sql_validation"] < 0.3
+        assert result["response"] == "Burgers are on the menu. So are fries. And shakes."
+
+        record = service.get_validation_result(result["query_id"], timeout=2)
+        assert record["status"] == "completed"
+        assert record["result"]["detailed_feedback"] == "Burger price missing"
+        assert service.get_validation_result("unknown-query") is None
+
+    def test_async_validation_blocks_when_configured(self):
+        """Test that async mode still validates inline when failed responses are blocked."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        validator = self._validator(should_block=True)
+        service = self._create_service(classifier, rules, sql_generator, executor, response,
+                                       validator, validation_mode="async")
+
+        result = service.process_query("What is on the menu?", {})
+
+        assert result["validation_pending"] is False
+        assert result["response"].startswith("I'm sorry")
+        assert service.get_validation_result(result["query_id"]) is None
+
+    def test_classification_tier_in_timers(self):
+        """Test that the classification tier and its latency are reported."""
+        classifier, rules, sql_generator, executor, response = self._mock_services(category="menu")
+        classifier.categories = ["menu", "order_history"]
+        classifier.prompt_builder.examples = []
+        classifier._classification_cache.labelled_queries.return_value = []
+        classifier.classify.return_value = {"category": "menu", "confidence": 0.95, "is_followup": False}
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        service.classifier = TieredClassifier(classifier)
+
+        first = service.process_query("What is on the menu?", {})
+        second = service.process_query("What is on the menu?", {})
+
+        assert first["classification_tier"] == "llm"
+        assert first["timers"]["classification_llm"] >= 0
+        assert second["classification_tier"] == "model"
+        assert "classification_model" in second["timers"]
+        classifier.classify.assert_called_once()
+
+    def test_concurrent_sessions_keep_separate_state(self):
+        """Test that queries of two sessions overlap without sharing follow-up context."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        both_generating = threading.Barrier(2, timeout=2)
+
+        def generate(query, category, rules, query_context):
+            # Both sessions are inside SQL generation at the same time
+            both_generating.wait()
+            return {"sql": f"SELECT * FROM items WHERE name = '{query}'"}
+
+        sql_generator.generate.side_effect = generate
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        burgers, fries = service.create_session(), service.create_session()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for future in [pool.submit(service.process_query, "burger", {}, session=burgers),
+                           pool.submit(service.process_query, "fries", {}, session=fries)]:
+                future.result(timeout=5)
+
+        assert burgers.query_context["previous_sql"].endswith("'burger'")
+        assert fries.query_context["previous_sql"].endswith("'fries'")
+        assert [turn["query"] for turn in burgers.conversation_history] == ["burger"]
+        assert [entry["sql"] for entry in fries.sql_history] == [fries.query_context["previous_sql"]]
+        # The default session saw none of it
+        assert service.query_context["previous_sql"] is None
+        assert len(service.conversation_history) == 0
+
+    def test_session_from_context_and_default_session(self):
+        """Test that context session_ids select a session and other queries use the default one."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+
+        service.process_query("What is on the menu?", {"session_id": "manager-1"})
+        service.process_query("What is on the menu?", {"session_id": "manager-1"})
+        service.process_query("What is on the menu?", {})
+
+        assert len(service.get_session("manager-1").conversation_history) == 2
+        assert len(service.conversation_history) == 1
+        assert service.get_query_context()["previous_query"] == "What is on the menu?"
+
+        service.end_session("manager-1")
+        assert len(service.get_session("manager-1").conversation_history) == 0
+
+    def test_sessions_started_concurrently(self):
+        """Test that sessions started from many threads are all kept, once per session id."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            created = list(pool.map(lambda _: service.create_session(), range(50)))
+            fetched = list(pool.map(lambda number: service.get_session(f"manager-{number % 5}"), range(50)))
+
+        assert all(service.get_session(session.session_id) is session for session in created)
+        assert len({id(session) for session in fetched}) == 5
+
+    def test_least_recently_used_session_dropped(self, caplog):
+        """Test that a full orchestrator drops the idlest session, not the oldest active one."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        service.end_session(service.default_session.session_id)
+        service._sessions.maxlen = 2
+        service.process_query("What is on the menu?", {"session_id": "manager-1"})
+        service.get_session("manager-2")
+
+        # manager-1 keeps asking follow-ups while manager-2 stays idle
+        service.process_query("What is on the menu?", {"session_id": "manager-1"})
+        with caplog.at_level(logging.WARNING, logger="services.orchestrator.orchestrator"):
+            service.get_session("manager-3")
+
+        assert list(service._sessions) == ["manager-1", "manager-3"]
+        assert len(service.get_session("manager-1").conversation_history) == 2
+        assert "dropping least recently used session manager-2" in caplog.text
+
+    def test_session_persona(self):
+        """Test that a session's persona reaches its responses without changing the shared generator."""
+        classifier, rules, sql_generator, executor, response = self._mock_services()
+        service = self._create_service(classifier, rules, sql_generator, executor, response)
+        session = service.create_session()
+
+        service.set_persona("professional", session=session)
+        service.process_query("What is on the menu?", {}, session=session)
+        service.process_query("What is on the menu?", {})
+
+        response.set_persona.assert_not_called()
+        assert session.persona == "professional"
+        assert response.generate.call_args_list[0][0][4]["response_persona"] == "professional"
+        assert "response_persona" not in response.generate.call_args_list[1][0][4]
@@ -172,4 +172,64 @@ class TestResponseService:
                 {"text_to_process": markdown_text}
             )
             
-            assert result == "This is clean text for TTS." 
\ No newline at end of file
+            assert result == "This is clean text for TTS."
+
+    def test_generate_reads_through_response_cache(self, mock_openai_client, test_config):
+        """Test that repeated questions over unchanged results skip the API call."""
+        with patch("services.response.response_generator.OpenAI", return_value=mock_openai_client):
+            response_generator = ResponseGenerator(config=test_config)
+
+        results = [{"name": "Burger", "quantity": 12}]
+        with patch.object(response_generator, "_get_response_text", return_value="Burgers sold 12.") as get_text, \
+             patch("services.response.response_generator.ServiceRegistry.service_exists", return_value=False):
+            first = response_generator.generate("What sold best?", "popular_items", {}, results, {})
+            second = response_generator.generate("  what sold BEST ", "popular_items", {}, list(results), {})
+            assert get_text.call_count == 1
+
+            # Changed data or a different category is a miss
+            response_generator.generate("What sold best?", "popular_items", {}, [{"name": "Fries", "quantity": 3}], {})
+            response_generator.generate("What sold best?", "order_history", {}, results, {})
+            assert get_text.call_count == 3
+
+        assert second["response"] == first["response"]
+        assert second["cached"] is True
+        cache_stats = response_generator.get_api_latency_stats()["response_cache"]
+        assert cache_stats["hits"] == 1
+        assert cache_stats["misses"] == 3
+
+    def test_response_cache_evicts_least_recently_used(self, mock_openai_client, test_config):
+        """Test that the response cache stays at its configured size."""
+        config = {**test_config, "services": {**test_config["services"], "response": {"cache_size": 2}}}
+        with patch("services.response.response_generator.OpenAI", return_value=mock_openai_client):
+            response_generator = ResponseGenerator(config=config)
+
+        response_generator._update_cache("first", "menu", {"response": "1"}, [])
+        response_generator._update_cache("second", "menu", {"response": "2"}, [])
+        assert response_generator._check_cache("first", "menu", []) == {"response": "1"}
+        response_generator._update_cache("third", "menu", {"response": "3"}, [])
+
+        assert len(response_generator.response_cache) == 2
+        assert response_generator._check_cache("second", "menu", []) is None
+        assert response_generator._check_cache("first", "menu", []) == {"response": "1"}
+
+    def test_generate_stream_yields_chunks(self, mock_openai_client, test_config):
+        """Test that streamed completions are passed on chunk by chunk."""
+        def chunk(text):
+            return MagicMock(choices=[MagicMock(delta=MagicMock(content=text))])
+
+        mock_openai_client.chat.completions.create.return_value = iter(
+            [chunk("Burgers "), chunk("sold "), chunk(None), chunk("12.")]
+        )
+        with patch("services.response.response_generator.OpenAI", return_value=mock_openai_client):
+            response_generator = ResponseGenerator(config=test_config)
+
+        with patch("services.response.response_generator.ServiceRegistry.service_exists", return_value=False):
+            events = list(response_generator.generate_stream(
+                "What sold best?", "popular_items", {}, [{"name": "Burger"}], {}
+            ))
+
+        assert [e["text"] for e in events if e["type"] == "chunk"] == ["Burgers ", "sold ", "12."]
+        assert events[-1]["type"] == "result"
+        assert events[-1]["result"]["response"] == "Burgers sold 12."
+        assert events[-1]["result"]["time_to_first_chunk"] >= 0
+        assert mock_openai_client.chat.completions.create.call_args.kwargs["stream"] is True
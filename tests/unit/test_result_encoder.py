@@ -0,0 +1,102 @@
+"""
+Unit tests for the compact result encoder.
+"""
+import json
+
+from services.response.result_encoder import CompactResultEncoder, estimate_tokens
+
+
+def _order_rows(count):
+    """Create order item rows for a handful of customers."""
+    customers = ["Alice Johnson", "Bob Smith", "Carol White", "Dan Brown"]
+    return [
+        {
+            "order_id": 1000 + i // 3,
+            "customer_name": customers[(i // 3) % len(customers)],
+            "item_name": f"Item {i % 7}",
+            "quantity": 1 + i % 3,
+            "total": 10.5 + i,
+            "location_id": 62,
+        }
+        for i in range(count)
+    ]
+
+
+def _sum_text(rows):
+    """Format the sum of the total column as the encoder does."""
+    total = sum(row["total"] for row in rows)
+    return str(int(total)) if total == int(total) else f"{total:.10g}"
+
+
+class TestCompactResultEncoder:
+    """Tests for CompactResultEncoder."""
+
+    def test_small_results_as_compact_table(self):
+        """Test the header, constant columns and value dictionary."""
+        rows = _order_rows(6)
+        text = CompactResultEncoder(token_budget=2000).encode(rows)
+
+        assert text.startswith("RESULTS (6 rows):")
+        assert "Same in every row: location_id=62" in text
+        assert "order_id|customer_name|item_name|quantity|total" in text
+        assert "@1=Alice Johnson" in text
+        assert "1000|@1|" in text
+        assert estimate_tokens(text) < estimate_tokens(json.dumps(rows, indent=2))
+
+    def test_large_results_grouped_within_budget(self):
+        """Test that results over the budget keep totals and every key value."""
+        rows = _order_rows(600)
+        encoder = CompactResultEncoder(token_budget=300, key_columns=["customer_name"])
+
+        text = encoder.encode(rows)
+
+        assert estimate_tokens(text) <= 300
+        assert "grouped by" in text
+        assert f"quantity={sum(r['quantity'] for r in rows)}" in text
+        for name in ("Alice Johnson", "Bob Smith", "Carol White", "Dan Brown"):
+            assert name in text
+
+    def test_truncates_largest_groups_when_nothing_fits(self):
+        """Test that the largest groups are kept when no grouping fits."""
+        rows = [{"item_name": f"Item {i}", "quantity": i} for i in range(500)]
+
+        text = CompactResultEncoder(token_budget=100).encode(rows)
+
+        assert estimate_tokens(text) <= 100
+        assert "more not shown" in text
+        assert f"quantity={sum(range(500))}" in text
+
+    def test_high_cardinality_key_values_within_budget(self):
+        """Test that key columns with thousands of values are summarized to fit the budget."""
+        for count in (500, 5000):
+            rows = [
+                {"customer_name": f"Customer {i}", "item_name": f"Item {i % 40}", "total": 10.0 + i % 7}
+                for i in range(count)
+            ]
+            encoder = CompactResultEncoder(token_budget=500, key_columns=["customer_name", "item_name"])
+
+            text = encoder.encode(rows)
+
+            assert estimate_tokens(text) <= 500
+            assert f"All customer_name values ({count}): " in text
+            assert "more" in text
+            assert "grouped by" in text or "largest" in text
+            assert f"total={_sum_text(rows)}" in text
+
+    def test_small_and_fractional_values_kept(self):
+        """Test that floats keep their significant digits instead of being rounded to cents."""
+        rows = [{"metric": "refund_rate", "value": 0.004},
+                {"metric": "avg_rating", "value": 0.125},
+                {"metric": "price", "value": 10.5},
+                {"metric": "sum", "value": 0.1 + 0.2}]
+
+        text = CompactResultEncoder(token_budget=2000).encode(rows)
+
+        assert "refund_rate|0.004" in text
+        assert "avg_rating|0.125" in text
+        assert "price|10.5" in text
+        assert "sum|0.3" in text
+
+    def test_empty_results(self):
+        """Test the message for empty results."""
+        assert CompactResultEncoder().encode([]) == "No results were found for this query."
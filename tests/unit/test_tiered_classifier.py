@@ -0,0 +1,130 @@
+"""
+Unit tests for the tiered classifier.
+"""
+from unittest.mock import MagicMock
+
+from services.classification.tiered_classifier import LocalQueryModel, TieredClassifier
+
+
+def _llm_classifier(category="order_history", confidence=0.95):
+    """Create a mock LLM classification service with prompt examples."""
+    llm = MagicMock()
+    llm.categories = ["order_history", "menu", "action", "general", "follow_up"]
+    llm.prompt_builder.examples = [
+        {"query": "How many orders did we have last month?", "classification": {"query_type": "order_history"}},
+        {"query": "Show me the burger menu", "classification": {"query_type": "menu"}}
+    ]
+    llm._classification_cache.labelled_queries.return_value = [
+        ("average ticket size _date_", "order_history", 0.9),
+        ("vegan options", "menu", 0.4)  # Too unsure to learn from
+    ]
+    llm.classify.return_value = {
+        "category": category,
+        "confidence": confidence,
+        "skip_database": False,
+        "time_period_clause": None,
+        "is_followup": False
+    }
+    return llm
+
+
+class TestLocalQueryModel:
+    """Tests for the naive Bayes model."""
+
+    def test_predicts_known_phrasing(self):
+        """Test that queries phrased like training examples are predicted confidently."""
+        model = LocalQueryModel()
+        model.train([("How many orders did we have last month?", "order_history"),
+                     ("Show me the burger menu", "menu")])
+
+        category, confidence = model.predict("how many orders did we have yesterday")
+        assert category == "order_history"
+        assert confidence > 0.9
+
+    def test_unknown_words_give_no_prediction(self):
+        """Test that a query of mostly unseen words is not predicted."""
+        model = LocalQueryModel()
+        assert model.predict("anything") == (None, 0.0)
+
+        model.learn("Show me the burger menu", "menu")
+        assert model.predict("refund the customer for a cold pizza") == (None, 0.0)
+        assert not model.learn("show the burger menu", "menu")  # Same normalized example
+
+
+class TestTieredClassifier:
+    """Tests for tier selection."""
+
+    def test_trained_on_examples_and_confident_history(self):
+        """Test that the model learns from prompt examples and confident cached classifications."""
+        tiered = TieredClassifier(_llm_classifier())
+
+        assert tiered.model.size == 3
+
+    def test_model_tier_answers_without_llm(self):
+        """Test that a confident local prediction skips the LLM."""
+        llm = _llm_classifier()
+        tiered = TieredClassifier(llm)
+
+        result = tiered.classify("How many orders did we have last week?")
+
+        assert result["category"] == "order_history"
+        assert result["tier"] == "model"
+        assert result["tier_latency"] >= 0
+        llm.classify.assert_not_called()
+
+    def test_rules_tier(self):
+        """Test that a high-confidence rule answers first."""
+        llm = _llm_classifier()
+        tiered = TieredClassifier(llm, {"rules_threshold": 0.7})
+
+        result = tiered.classify("Disable the fries and enable the salad")
+
+        assert result["category"] == "action"
+        assert result["tier"] == "rules"
+        llm.classify.assert_not_called()
+
+    def test_escalates_and_learns(self):
+        """Test that unsure queries go to the LLM and its confident answers are learned."""
+        llm = _llm_classifier(category="general")
+        tiered = TieredClassifier(llm)
+
+        first = tiered.classify("What are your opening hours?")
+        second = tiered.classify("what are your opening hours")
+
+        assert first["tier"] == "llm"
+        assert first["category"] == "general"
+        assert second["tier"] == "model"
+        assert second["category"] == "general"
+        assert llm.classify.call_count == 1
+        assert tiered.stats == {"rules": 0, "model": 1, "llm": 1}
+
+    def test_follow_up_goes_to_llm_with_context(self):
+        """Test that a query with a previous category skips the local tiers and keeps its context."""
+        llm = _llm_classifier()
+        llm.get_classification_with_context.return_value = {
+            "category": "order_history",
+            "confidence": 0.9,
+            "is_followup": True
+        }
+        llm.detect_follow_up.return_value = (False, None)
+        tiered = TieredClassifier(llm)
+        context = {"previous_category": "order_history"}
+
+        result = tiered.get_classification_with_context("How many orders did we have last week?", context)
+
+        assert result["tier"] == "llm"
+        assert result["is_followup"] is True
+        llm.get_classification_with_context.assert_called_once_with("How many orders did we have last week?", context)
+        llm.classify.assert_not_called()
+        assert tiered.detect_follow_up("and the week before?", "order_history") == (False, None)
+
+    def test_no_context_uses_local_tiers(self):
+        """Test that without a previous category the local tiers still answer."""
+        llm = _llm_classifier()
+        tiered = TieredClassifier(llm)
+
+        result = tiered.get_classification_with_context("How many orders did we have last week?", {"previous_category": None})
+
+        assert result["tier"] == "model"
+        assert result["is_followup"] is False
+        llm.get_classification_with_context.assert_not_called()
@@ -0,0 +1,133 @@
+"""
+Unit tests for the sentence-pipelined TTS and its audio cache.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from services.response.tts_pipeline import (
+    TTSPipeline, AudioCache, FakeTTSBackend, split_sentences, create_tts_pipeline
+)
+
+
+@pytest.fixture
+def backend():
+    """Fixture for a fake TTS backend."""
+    return FakeTTSBackend()
+
+
+class TestSplitSentences:
+    """Tests for preparing text for speech."""
+
+    def test_cleans_markdown_and_splits(self):
+        """Test that markdown is removed before splitting into sentences."""
+        assert split_sentences("**Burgers** sold best. Fries were *second*!") == [
+            "Burgers sold best.", "Fries were second!"
+        ]
+
+    def test_key_sentences(self):
+        """Test that max_sentences keeps the key (first and last) sentences."""
+        text = "First point. Middle detail. Another detail. Final summary."
+        assert split_sentences(text, max_sentences=2) == ["First point.", "Final summary."]
+
+
+class TestTTSPipeline:
+    """Tests for concurrent, ordered synthesis."""
+
+    def test_sentences_synthesized_concurrently_in_order(self):
+        """Test that sentences overlap but the audio keeps the sentence order."""
+        backend = FakeTTSBackend(latency=0.2)
+        pipeline = TTSPipeline(backend, max_workers=4)
+
+        started = time.perf_counter()
+        chunks = list(pipeline.synthesize_stream(["One.", "Two.", "Three.", "Four."], "voice", "model"))
+        elapsed = time.perf_counter() - started
+
+        for chunk, sentence in zip(chunks, [b"One.", b"Two.", b"Three.", b"Four."]):
+            assert sentence in chunk
+        assert elapsed < 0.6
+
+    def test_first_chunk_before_source_is_exhausted(self, backend):
+        """Test that audio is yielded while later sentences are still being produced."""
+        pipeline = TTSPipeline(backend)
+        release = threading.Event()
+
+        def sentences():
+            yield "First."
+            release.wait(timeout=1)
+            yield "Second."
+
+        stream = pipeline.synthesize_stream(sentences(), "voice", "model")
+        assert b"First." in next(stream)
+        release.set()
+        assert b"Second." in next(stream)
+
+    def test_failed_sentence_ends_audio(self, backend):
+        """Test that audio stops at the first sentence that cannot be synthesized."""
+        original = backend.synthesize
+
+        def flaky(text, voice_id, model):
+            if text == "Two.":
+                raise RuntimeError("service unavailable")
+            return original(text, voice_id, model)
+
+        backend.synthesize = flaky
+        pipeline = TTSPipeline(backend)
+
+        chunks = list(pipeline.synthesize_stream(["One.", "Two.", "Three."], "voice", "model"))
+        assert len(chunks) == 1 and b"One." in chunks[0]
+
+    def test_audio_cache_reused(self, backend, tmp_path):
+        """Test that repeated sentences are served from the disk cache."""
+        pipeline = TTSPipeline(backend, cache=AudioCache(str(tmp_path)))
+
+        first = pipeline.synthesize("Welcome back. Sales are up.", "voice", "model")
+        second = pipeline.synthesize("Welcome back. Sales are down.", "voice", "model")
+
+        assert first is not None and second is not None
+        # Sentences of one response are synthesized concurrently, in any order
+        assert sorted(backend.calls) == ["Sales are down.", "Sales are up.", "Welcome back."]
+        assert pipeline.get_stats()["cache"]["hits"] == 1
+
+        # A new pipeline sharing the directory starts warm
+        fresh_backend = FakeTTSBackend()
+        TTSPipeline(fresh_backend, cache=AudioCache(str(tmp_path))).synthesize("Welcome back.", "voice", "model")
+        assert fresh_backend.calls == []
+
+    def test_cache_key_includes_voice_and_model(self, tmp_path):
+        """Test that the same text in another voice or model is a different entry."""
+        cache = AudioCache(str(tmp_path))
+        cache.put("voice-a", "model", "Hello.", b"a")
+
+        assert cache.get("voice-a", "model", "Hello.") == b"a"
+        assert cache.get("voice-b", "model", "Hello.") is None
+        assert cache.get("voice-a", "other-model", "Hello.") is None
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        """Test that the cache stays within its entry and byte limits, keeping recent entries."""
+        cache = AudioCache(str(tmp_path), max_entries=2)
+        cache.put("voice", "model", "One.", b"1" * 10)
+        cache.put("voice", "model", "Two.", b"2" * 10)
+        assert cache.get("voice", "model", "One.") is not None
+        cache.put("voice", "model", "Three.", b"3" * 10)
+
+        assert cache.get("voice", "model", "Two.") is None
+        assert cache.get("voice", "model", "One.") == b"1" * 10
+        assert cache.get("voice", "model", "Three.") == b"3" * 10
+        assert cache.stats["evictions"] == 1
+
+        # A byte limit applies across processes sharing the directory
+        bounded = AudioCache(str(tmp_path), max_bytes=25)
+        bounded.put("voice", "model", "Four.", b"4" * 10)
+        assert bounded.get("voice", "model", "Four.") is not None
+        assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2
+        assert bounded.stats["evictions"] == 1
+
+    def test_create_fake_pipeline(self, tmp_path):
+        """Test building a fake-backed pipeline from configuration."""
+        pipeline = create_tts_pipeline({"services": {"tts": {"backend": "fake", "cache_dir": str(tmp_path)}}})
+
+        assert isinstance(pipeline.backend, FakeTTSBackend)
+        assert pipeline.synthesize("Hello there.", "voice") is not None
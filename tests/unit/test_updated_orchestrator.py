@@ -33,7 +33,7 @@ class TestUpdatedOrchestratorService:
             
             # Verify ServiceRegistry was initialized and services registered
             mock_registry.initialize.assert_called_once_with(config)
-            assert mock_registry.register.call_count == 5  # 5 services should be registered
+            assert mock_registry.register.call_count == 6  # 5 services plus the shared TTS pipeline
             mock_health_check.assert_called_once()
     
     def test_health_check(self):